@@ -1,11 +1,882 @@
 import sqlite3
 import os
+import logging
+import re
 import hashlib
+import threading
+import time
+from urllib.parse import quote
+from contextlib import contextmanager
+
+from utils.formatters import normalize_text, only_digits
+from utils.perfil_sql import PERFIL_ATIVO, CursorPerfilado
 
 DB_NAME = "crm_compressores.db"
 DATA_DIR = "data"
+# Banco com o histórico arquivado, anexado como "arquivo" quando existir
+ARQUIVO_DB = "crm_arquivo.db"
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Ajustes aplicados a cada conexão aberta pelo gerenciador.
+# WAL não funciona em compartilhamentos de rede sem memória compartilhada;
+# nesses casos defina CRM_JOURNAL_MODE=DELETE no ambiente.
+JOURNAL_MODE = os.environ.get("CRM_JOURNAL_MODE", "WAL")
+BUSY_TIMEOUT_MS = 5000
+CACHE_SIZE_KB = 32768
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Cópia somente leitura para consultas analíticas longas (estatísticas de
+# clientes, ranking de produtos, exportações), atualizada periodicamente por
+# utils.backup. Ativada com CRM_SNAPSHOT_LEITURA=1; o intervalo de atualização
+# é CRM_SNAPSHOT_INTERVALO_MIN minutos.
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "leitura")
+USAR_SNAPSHOT_LEITURA = os.environ.get("CRM_SNAPSHOT_LEITURA", "0") == "1"
+SNAPSHOT_INTERVALO_MIN = int(os.environ.get("CRM_SNAPSHOT_INTERVALO_MIN", "15"))
+
+_local = threading.local()
+logger = logging.getLogger(__name__)
+
+class ConexaoCompartilhada(sqlite3.Connection):
+	"""Conexão reutilizada pela thread; close() apenas devolve ao pool.
+
+	Cada obter_conexao() é um empréstimo. Um empréstimo feito com uma transação
+	já em andamento ganha um SAVEPOINT próprio: seu commit() e rollback() agem
+	apenas sobre as alterações feitas desde o empréstimo, sem confirmar nem
+	descartar as pendências de quem pediu a conexão antes. Também é gerenciador
+	de contexto: "with obter_conexao() as conn:" devolve a conexão na saída,
+	inclusive em exceções. A saída do bloco NÃO confirma nada; o commit()
+	continua explícito.
+	"""
+
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.emprestimos = 0
+		# Blocos transacao() abertos nesta conexão
+		self.transacoes = 0
+		# Empréstimo (nível) -> savepoint criado para ele
+		self._savepoints = {}
+
+	def emprestar(self):
+		"""Registrar mais um empréstimo da conexão"""
+		self.emprestimos += 1
+		if self.emprestimos > 1 and self.in_transaction:
+			nome = f"emprestimo_{self.emprestimos}"
+			super().execute(f"SAVEPOINT {nome}")
+			self._savepoints[self.emprestimos] = nome
+		return self
+
+	def _savepoint_atual(self):
+		"""Savepoint do empréstimo mais recente, se ainda estiver ativo"""
+		nome = self._savepoints.get(self.emprestimos)
+		if nome and not self.in_transaction:
+			# A transação externa terminou; o savepoint não existe mais
+			del self._savepoints[self.emprestimos]
+			return None
+		return nome
+
+	def commit(self):
+		"""Confirmar; num empréstimo aninhado, só fecha o savepoint dele"""
+		nome = self._savepoint_atual()
+		if nome is None:
+			super().commit()
+			return
+		super().execute(f"RELEASE {nome}")
+		super().execute(f"SAVEPOINT {nome}")
+
+	def rollback(self):
+		"""Descartar; num empréstimo aninhado, só o que foi feito depois dele"""
+		nome = self._savepoint_atual()
+		if nome is None:
+			super().rollback()
+			return
+		super().execute(f"ROLLBACK TO {nome}")
+
+	def close(self):
+		"""Devolver a conexão; a última devolução descarta transação pendente"""
+		nome = self._savepoint_atual()
+		if nome is not None:
+			# Alterações não confirmadas do empréstimo seguem na transação externa
+			super().execute(f"RELEASE {nome}")
+		self._savepoints.pop(self.emprestimos, None)
+		self.emprestimos = max(0, self.emprestimos - 1)
+		if self.emprestimos == 0:
+			if self.in_transaction and not self.transacoes:
+				super().rollback()
+			self.row_factory = None
+
+	def fechar(self):
+		"""Fechar de fato a conexão"""
+		super().close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, tipo, valor, tb):
+		self.close()
+		return False
+
+class ConexaoPerfilada(ConexaoCompartilhada):
+	"""Conexão compartilhada que mede cada comando (CRM_PERFIL_SQL=1, ver utils.perfil_sql)"""
+
+	def cursor(self, factory=CursorPerfilado):
+		return super().cursor(factory)
+
+	def execute(self, sql, parametros=()):
+		return self.cursor().execute(sql, parametros)
+
+	def executemany(self, sql, sequencia):
+		return self.cursor().executemany(sql, sequencia)
+
+# Classe das conexões abertas pelo gerenciador
+_CLASSE_CONEXAO = ConexaoPerfilada if PERFIL_ATIVO else ConexaoCompartilhada
+
+def _configurar_conexao(conn):
+	"""Aplicar PRAGMAs de desempenho à conexão"""
+	conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+	try:
+		conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+	except sqlite3.OperationalError as e:
+		logger.warning("Não foi possível ativar journal_mode=%s: %s", JOURNAL_MODE, e)
+	conn.execute("PRAGMA synchronous = NORMAL")
+	conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+	conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+	conn.execute("PRAGMA temp_store = MEMORY")
+
+def _configurar_conexao_leitura(conn):
+	"""PRAGMAs da conexão somente leitura (sem journal_mode/synchronous, que exigem escrita)"""
+	conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+	conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+	conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+	conn.execute("PRAGMA temp_store = MEMORY")
+
+def _conexao_da_thread(db_name=None, somente_leitura=False):
+	"""Conexão da thread atual para o banco informado, criada sob demanda"""
+	caminho = os.path.abspath(db_name or DB_NAME)
+	conexoes = getattr(_local, "conexoes", None)
+	if conexoes is None:
+		conexoes = _local.conexoes = {}
+	chave = (caminho, somente_leitura)
+	conn = conexoes.get(chave)
+	if conn is None:
+		if somente_leitura:
+			conn = sqlite3.connect(f"file:{quote(caminho)}?mode=ro", uri=True, factory=_CLASSE_CONEXAO,
+								   timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=256)
+			_configurar_conexao_leitura(conn)
+		else:
+			conn = sqlite3.connect(caminho, factory=_CLASSE_CONEXAO,
+								   timeout=BUSY_TIMEOUT_MS / 1000, cached_statements=256)
+			_configurar_conexao(conn)
+		conexoes[chave] = conn
+		anexar_arquivo(conn, caminho, somente_leitura=somente_leitura)
+	return conn
+
+def obter_conexao(db_name=None):
+	"""Obter a conexão da thread atual para o banco informado (padrão DB_NAME).
+
+	A conexão é criada na primeira chamada e reutilizada nas seguintes,
+	preservando o cache de statements do SQLite. Use "with obter_conexao() as
+	conn:" para que a devolução aconteça mesmo em exceções; só a última
+	devolução descarta alterações não confirmadas.
+	"""
+	return _conexao_da_thread(db_name).emprestar()
+
+def caminho_snapshot(db_name=None):
+	"""Caminho da cópia somente leitura do banco (data/leitura/<nome do banco>)"""
+	return os.path.join(SNAPSHOT_DIR, os.path.basename(db_name or DB_NAME))
+
+def snapshot_disponivel(db_name=None):
+	"""Se a cópia de leitura existe e foi atualizada há menos de dois intervalos"""
+	caminho = caminho_snapshot(db_name)
+	if not os.path.exists(caminho):
+		return False
+	return time.time() - os.path.getmtime(caminho) < 2 * SNAPSHOT_INTERVALO_MIN * 60
+
+def obter_conexao_leitura(db_name=None):
+	"""Conexão para consultas analíticas longas.
+
+	Com CRM_SNAPSHOT_LEITURA=1 e uma cópia recente em data/leitura, abre a
+	cópia em modo somente leitura: a consulta não segura o lock compartilhado
+	do banco em uso pela equipe. Os dados podem estar até um intervalo de
+	atualização atrasados. O arquivo histórico anexado é a cópia feita junto
+	com a do banco ou, se ela ainda não existir, o arquivo do banco principal,
+	então o histórico arquivado continua visível. Sem a opção (ou sem cópia
+	recente), usa o banco principal como obter_conexao().
+	Também deve ser usada com with.
+	"""
+	if USAR_SNAPSHOT_LEITURA and snapshot_disponivel(db_name):
+		try:
+			conn = _conexao_da_thread(caminho_snapshot(db_name), somente_leitura=True)
+		except sqlite3.Error as e:
+			logger.warning("Cópia de leitura indisponível, usando o banco principal: %s", e)
+		else:
+			if not arquivo_anexado(conn) and os.path.exists(caminho_arquivo(db_name)):
+				# Arquivo criado depois da última cópia: anexar o do banco principal
+				anexar_arquivo(conn, db_name, somente_leitura=True)
+			return conn.emprestar()
+	return obter_conexao(db_name)
+
+@contextmanager
+def transacao(db_name=None, imediata=True):
+	"""Executar um bloco em uma transação, com commit ao final ou rollback em erro.
+
+	Com imediata=True o lock de escrita é obtido já no início (BEGIN IMMEDIATE),
+	evitando deadlocks entre estações que leem e depois escrevem. Dentro de uma
+	transação já aberta, o bloco vira um savepoint da transação externa.
+	"""
+	conn = _conexao_da_thread(db_name)
+	aninhada = conn.in_transaction
+	conn.emprestar()
+	conn.transacoes += 1
+	try:
+		if not aninhada:
+			conn.execute("BEGIN IMMEDIATE" if imediata else "BEGIN")
+		yield conn
+	except BaseException:
+		conn.rollback()
+		raise
+	else:
+		conn.commit()
+	finally:
+		conn.transacoes -= 1
+		conn.close()
+
+def fechar_conexoes():
+	"""Fechar todas as conexões abertas pela thread atual"""
+	conexoes = getattr(_local, "conexoes", None) or {}
+	for conn in conexoes.values():
+		try:
+			conn.fechar()
+		except sqlite3.Error:
+			pass
+	conexoes.clear()
+
+def _colunas(conn, tabela):
+	"""Nomes das colunas existentes na tabela"""
+	return {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+
+def _adicionar_coluna(conn, tabela, coluna, definicao):
+	"""ALTER TABLE ADD COLUMN apenas se a coluna ainda não existir"""
+	if coluna not in _colunas(conn, tabela):
+		conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+
+def _migracao_colunas_legadas(conn):
+	"""Colunas já usadas pelos módulos mas ausentes do schema original"""
+	_adicionar_coluna(conn, "cotacoes", "contato_nome", "TEXT")
+
+def _migracao_indices_listagem(conn):
+	"""Índices de chaves estrangeiras e das listagens/dashboard/PDF"""
+	for sql in (
+		# Chaves estrangeiras percorridas a cada abertura de cotação, cliente, kit e relatório
+		"CREATE INDEX IF NOT EXISTS idx_itens_cotacao_cotacao ON itens_cotacao(cotacao_id, id)",
+		"CREATE INDEX IF NOT EXISTS idx_contatos_cliente ON contatos(cliente_id, nome)",
+		"CREATE INDEX IF NOT EXISTS idx_eventos_campo_relatorio ON eventos_campo(relatorio_id)",
+		"CREATE INDEX IF NOT EXISTS idx_kit_items_kit ON kit_items(kit_id, produto_id, quantidade)",
+		"CREATE INDEX IF NOT EXISTS idx_kit_items_produto ON kit_items(produto_id)",
+		# Cotações: painel do cliente, dashboard por responsável e listas por tipo
+		"CREATE INDEX IF NOT EXISTS idx_cotacoes_cliente ON cotacoes(cliente_id, status, valor_total)",
+		"CREATE INDEX IF NOT EXISTS idx_cotacoes_cliente_data ON cotacoes(cliente_id, data_criacao)",
+		"CREATE INDEX IF NOT EXISTS idx_cotacoes_responsavel ON cotacoes(responsavel_id, created_at)",
+		"CREATE INDEX IF NOT EXISTS idx_cotacoes_status ON cotacoes(status)",
+		"CREATE INDEX IF NOT EXISTS idx_cotacoes_tipo_created ON cotacoes(tipo_cotacao, created_at)",
+		"CREATE INDEX IF NOT EXISTS idx_cotacoes_created ON cotacoes(created_at)",
+		"CREATE INDEX IF NOT EXISTS idx_cotacoes_aprovadas ON cotacoes(responsavel_id, valor_total) WHERE status = 'Aprovada'",
+		# Relatórios técnicos
+		"CREATE INDEX IF NOT EXISTS idx_relatorios_cliente ON relatorios_tecnicos(cliente_id)",
+		"CREATE INDEX IF NOT EXISTS idx_relatorios_responsavel ON relatorios_tecnicos(responsavel_id, created_at)",
+		"CREATE INDEX IF NOT EXISTS idx_relatorios_created ON relatorios_tecnicos(created_at)",
+		# Cadastros ordenados por nome
+		"CREATE INDEX IF NOT EXISTS idx_clientes_nome ON clientes(nome)",
+		"CREATE INDEX IF NOT EXISTS idx_produtos_ativos ON produtos(tipo, nome) WHERE ativo = 1",
+		"CREATE INDEX IF NOT EXISTS idx_produtos_nome ON produtos(nome)",
+	):
+		conn.execute(sql)
+
+# Numeração de documentos: (prefixo, tabela, coluna) usados para semear os contadores
+SEQUENCIAS_DOCUMENTOS = (
+	("PROP", "cotacoes", "numero_proposta"),
+	("LOC", "cotacoes", "numero_proposta"),
+	("REL", "relatorios_tecnicos", "numero_relatorio"),
+)
+
+def _migracao_sequencias(conn):
+	"""Tabela de contadores de numeração, semeada com o maior número já emitido"""
+	conn.execute('''CREATE TABLE IF NOT EXISTS sequences (
+		prefixo TEXT NOT NULL,
+		filial_id INTEGER NOT NULL DEFAULT 0,
+		ultimo_valor INTEGER NOT NULL DEFAULT 0,
+		PRIMARY KEY (prefixo, filial_id)
+	) WITHOUT ROWID''')
+	for prefixo, tabela, coluna in SEQUENCIAS_DOCUMENTOS:
+		conn.execute(f'''INSERT OR IGNORE INTO sequences (prefixo, filial_id, ultimo_valor)
+			SELECT ?, 0, COALESCE(MAX(CAST(SUBSTR({coluna}, ?) AS INTEGER)), 0)
+			FROM {tabela} WHERE {coluna} LIKE ?''',
+			(prefixo, len(prefixo) + 2, f"{prefixo}-%"))
+
+# Campos técnicos agrupados na coluna "detalhes" do índice de texto dos relatórios
+_CAMPOS_DETALHES_RELATORIO = (
+	"formulario_servico", "tipo_servico", "placa_identificacao", "acoplamento",
+	"aspectos_rotores", "valvulas_acopladas", "parafusos_pinos", "superficie_vedacao",
+	"engrenagens", "bico_injetor", "rolamentos", "aspecto_oleo", "interf_desmontagem",
+	"aspecto_rotores_aba3", "aspecto_carcaca", "interf_mancais", "galeria_hidraulica",
+)
+
+def fts5_disponivel(conn):
+	"""Indica se o SQLite em uso foi compilado com FTS5"""
+	try:
+		return bool(conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+	except sqlite3.Error:
+		return False
+
+def tokenizador_fts5_disponivel(conn, tokenize):
+	"""Indica se o FTS5 aceita o tokenizador (trigram exige SQLite 3.34+, remove_diacritics 2 exige 3.27+)
+
+	A sonda cria uma tabela temporária dentro de um SAVEPOINT desfeito em seguida.
+	"""
+	if not fts5_disponivel(conn):
+		return False
+	conn.execute("SAVEPOINT sonda_tokenizador")
+	try:
+		conn.execute(f"CREATE VIRTUAL TABLE temp._sonda_tokenizador USING fts5(texto, tokenize = \"{tokenize}\")")
+		return True
+	except sqlite3.Error:
+		return False
+	finally:
+		conn.execute("ROLLBACK TO sonda_tokenizador")
+		conn.execute("RELEASE sonda_tokenizador")
+
+def valores_fts_relatorio(ref, eventos="eventos_campo"):
+	"""Expressões SQL com os valores indexados de um relatório (ref = new/old/r)"""
+	detalhes = " || ' ' || ".join(f"COALESCE({ref}.{campo}, '')" for campo in _CAMPOS_DETALHES_RELATORIO)
+	return f'''{ref}.id, {ref}.numero_relatorio,
+		(SELECT nome FROM clientes WHERE id = {ref}.cliente_id),
+		{ref}.descricao_servico, {ref}.condicao_encontrada, {ref}.servicos_propostos,
+		{ref}.pecas_recomendadas, {detalhes},
+		(SELECT group_concat(evento, ' ') FROM {eventos} WHERE relatorio_id = {ref}.id)'''
+
+def _migracao_fts_relatorios(conn):
+	"""Índice FTS5 dos relatórios técnicos e eventos de campo, mantido por triggers"""
+	if not fts5_disponivel(conn):
+		logger.warning("SQLite sem FTS5: busca textual de relatórios usará LIKE")
+		return
+	colunas_fts = ("rowid, numero_relatorio, cliente, descricao_servico, condicao_encontrada, "
+				   "servicos_propostos, pecas_recomendadas, detalhes, eventos")
+	# remove_diacritics 2 (também letras com vários acentos) só existe a partir do SQLite 3.27
+	tokenize = "unicode61 remove_diacritics 2"
+	if not tokenizador_fts5_disponivel(conn, tokenize):
+		tokenize = "unicode61 remove_diacritics 1"
+	conn.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS relatorios_fts USING fts5(
+		numero_relatorio, cliente, descricao_servico, condicao_encontrada,
+		servicos_propostos, pecas_recomendadas, detalhes, eventos,
+		tokenize = "{tokenize}", prefix = '2 3'
+	)''')
+	conn.execute(f'''CREATE TRIGGER IF NOT EXISTS relatorios_fts_ai AFTER INSERT ON relatorios_tecnicos BEGIN
+		INSERT INTO relatorios_fts ({colunas_fts}) SELECT {valores_fts_relatorio("new")};
+	END''')
+	conn.execute(f'''CREATE TRIGGER IF NOT EXISTS relatorios_fts_au AFTER UPDATE ON relatorios_tecnicos BEGIN
+		DELETE FROM relatorios_fts WHERE rowid = old.id;
+		INSERT INTO relatorios_fts ({colunas_fts}) SELECT {valores_fts_relatorio("new")};
+	END''')
+	conn.execute('''CREATE TRIGGER IF NOT EXISTS relatorios_fts_ad AFTER DELETE ON relatorios_tecnicos BEGIN
+		DELETE FROM relatorios_fts WHERE rowid = old.id;
+	END''')
+	# Eventos de campo: recalcular apenas a coluna "eventos" do relatório afetado
+	eventos_sql = "(SELECT group_concat(evento, ' ') FROM eventos_campo WHERE relatorio_id = {ref}.relatorio_id)"
+	for nome, momento, ref in (("ai", "INSERT", "new"), ("au", "UPDATE", "new"), ("ad", "DELETE", "old")):
+		conn.execute(f'''CREATE TRIGGER IF NOT EXISTS eventos_campo_fts_{nome} AFTER {momento} ON eventos_campo BEGIN
+			UPDATE relatorios_fts SET eventos = {eventos_sql.format(ref=ref)} WHERE rowid = {ref}.relatorio_id;
+		END''')
+	conn.execute('''CREATE TRIGGER IF NOT EXISTS eventos_campo_fts_au_old AFTER UPDATE OF relatorio_id ON eventos_campo
+		WHEN old.relatorio_id IS NOT new.relatorio_id BEGIN
+		UPDATE relatorios_fts SET eventos = (SELECT group_concat(evento, ' ') FROM eventos_campo WHERE relatorio_id = old.relatorio_id)
+		WHERE rowid = old.relatorio_id;
+	END''')
+	# Nome do cliente também é pesquisável
+	conn.execute('''CREATE TRIGGER IF NOT EXISTS clientes_relatorios_fts_au AFTER UPDATE OF nome ON clientes BEGIN
+		UPDATE relatorios_fts SET cliente = new.nome
+		WHERE rowid IN (SELECT id FROM relatorios_tecnicos WHERE cliente_id = new.id);
+	END''')
+	# Carga inicial com os relatórios existentes
+	conn.execute("DELETE FROM relatorios_fts")
+	conn.execute(f"INSERT INTO relatorios_fts ({colunas_fts}) SELECT {valores_fts_relatorio('r')} FROM relatorios_tecnicos r")
+
+def _migracao_colunas_cadastros(conn):
+	"""Colunas gravadas pelos formulários de clientes e produtos mas ausentes do schema"""
+	_adicionar_coluna(conn, "clientes", "observacoes", "TEXT")
+	_adicionar_coluna(conn, "produtos", "updated_at", "TIMESTAMP")
+
+def campos_busca_cliente(nome, nome_fantasia, cidade, cnpj):
+	"""Valores das colunas de busca de clientes: (nome_busca, cidade_busca, cnpj_digitos)"""
+	return (normalize_text(f"{nome or ''} {nome_fantasia or ''}"), normalize_text(cidade), only_digits(cnpj))
+
+def campos_busca_produto(nome, tipo, descricao):
+	"""Valores das colunas de busca de produtos: (nome_busca, detalhes_busca)"""
+	return (normalize_text(nome), normalize_text(f"{tipo or ''} {descricao or ''}"))
+
+def _criar_indice_trigram(conn, indice, tabela, colunas):
+	"""Tabela FTS5 trigram de conteúdo externo sobre as colunas de busca, com triggers"""
+	lista = ", ".join(colunas)
+	novos = ", ".join(f"new.{col}" for col in colunas)
+	antigos = ", ".join(f"old.{col}" for col in colunas)
+	conn.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS {indice} USING fts5(
+		{lista}, content='{tabela}', content_rowid='id', tokenize='trigram')""")
+	conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {indice}_ai AFTER INSERT ON {tabela} BEGIN
+		INSERT INTO {indice} (rowid, {lista}) VALUES (new.id, {novos});
+	END""")
+	conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {indice}_ad AFTER DELETE ON {tabela} BEGIN
+		INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', old.id, {antigos});
+	END""")
+	conn.execute(f"""CREATE TRIGGER IF NOT EXISTS {indice}_au AFTER UPDATE OF {lista} ON {tabela} BEGIN
+		INSERT INTO {indice} ({indice}, rowid, {lista}) VALUES ('delete', old.id, {antigos});
+		INSERT INTO {indice} (rowid, {lista}) VALUES (new.id, {novos});
+	END""")
+	conn.execute(f"INSERT INTO {indice} ({indice}) VALUES ('rebuild')")
+
+def _migracao_busca_cadastros(conn):
+	"""Colunas normalizadas de busca de clientes/produtos e índices trigram sobre elas"""
+	for coluna in ("nome_busca", "cidade_busca", "cnpj_digitos"):
+		_adicionar_coluna(conn, "clientes", coluna, "TEXT")
+	for coluna in ("nome_busca", "detalhes_busca"):
+		_adicionar_coluna(conn, "produtos", coluna, "TEXT")
+	clientes = conn.execute("SELECT id, nome, nome_fantasia, cidade, cnpj FROM clientes").fetchall()
+	conn.executemany("UPDATE clientes SET nome_busca = ?, cidade_busca = ?, cnpj_digitos = ? WHERE id = ?",
+					 [campos_busca_cliente(*row[1:]) + (row[0],) for row in clientes])
+	produtos = conn.execute("SELECT id, nome, tipo, descricao FROM produtos").fetchall()
+	conn.executemany("UPDATE produtos SET nome_busca = ?, detalhes_busca = ? WHERE id = ?",
+					 [campos_busca_produto(*row[1:]) + (row[0],) for row in produtos])
+	conn.execute("CREATE INDEX IF NOT EXISTS idx_clientes_cnpj_digitos ON clientes(cnpj_digitos)")
+	if not tokenizador_fts5_disponivel(conn, "trigram"):
+		logger.warning("SQLite sem FTS5 trigram (3.34+): busca de clientes e produtos usará LIKE nas colunas normalizadas")
+		return
+	_criar_indice_trigram(conn, "clientes_busca", "clientes", ("nome_busca", "cidade_busca", "cnpj_digitos"))
+	_criar_indice_trigram(conn, "produtos_busca", "produtos", ("nome_busca", "detalhes_busca"))
+
+def _migracao_anexos_relatorios(conn):
+	"""Tabela relatorio_anexos e importação dos anexos gravados em JSON nas colunas anexos_aba1..4"""
+	import json
+	from utils.anexos import ingerir_arquivo, salvar_anexos
+	conn.execute('''CREATE TABLE IF NOT EXISTS relatorio_anexos (
+		id INTEGER PRIMARY KEY AUTOINCREMENT,
+		relatorio_id INTEGER NOT NULL,
+		aba INTEGER NOT NULL,
+		ordem INTEGER NOT NULL,
+		sha256 TEXT NOT NULL,
+		nome TEXT,
+		descricao TEXT,
+		mime TEXT,
+		size INTEGER,
+		width INTEGER,
+		height INTEGER,
+		created_at TIMESTAMP DEFAULT (datetime('now')),
+		FOREIGN KEY (relatorio_id) REFERENCES relatorios_tecnicos(id)
+	)''')
+	conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_relatorio_anexos_relatorio ON relatorio_anexos(relatorio_id, aba, ordem)")
+	conn.execute("CREATE INDEX IF NOT EXISTS idx_relatorio_anexos_sha256 ON relatorio_anexos(sha256)")
+	conn.execute('''CREATE TRIGGER IF NOT EXISTS relatorio_anexos_ad AFTER DELETE ON relatorios_tecnicos BEGIN
+		DELETE FROM relatorio_anexos WHERE relatorio_id = old.id;
+	END''')
+	colunas = [f"anexos_aba{aba}" for aba in range(1, 5)]
+	if not set(colunas) <= _colunas(conn, "relatorios_tecnicos"):
+		return
+	preenchidas = " OR ".join(f"COALESCE({col}, '') NOT IN ('', '[]')" for col in colunas)
+	rows = conn.execute(f"SELECT id, {', '.join(colunas)} FROM relatorios_tecnicos WHERE {preenchidas}").fetchall()
+	for relatorio_id, *jsons in rows:
+		anexos_por_aba = {}
+		for aba, texto in enumerate(jsons, 1):
+			try:
+				itens = json.loads(texto) if texto else []
+			except (ValueError, TypeError):
+				itens = [parte for parte in texto.split(';') if parte]
+			anexos_por_aba[aba] = []
+			for item in itens:
+				caminho = item.get('caminho') if isinstance(item, dict) else str(item)
+				if not caminho or not os.path.isfile(caminho):
+					logger.warning("Anexo não encontrado no relatório %s: %s", relatorio_id, caminho)
+					continue
+				descricao = item.get('descricao', '') if isinstance(item, dict) else ''
+				anexo = ingerir_arquivo(caminho, descricao)
+				if isinstance(item, dict) and item.get('nome'):
+					anexo['nome'] = item['nome']
+				anexos_por_aba[aba].append(anexo)
+		salvar_anexos(conn, relatorio_id, anexos_por_aba)
+		conn.execute(f"UPDATE relatorios_tecnicos SET {', '.join(f'{col} = NULL' for col in colunas)} WHERE id = ?",
+					 (relatorio_id,))
+
+# Contadores de cliente_stats: (coluna, expressão somada por cotação; {ref} = new/old)
+_DELTAS_CLIENTE_STATS = (
+	("total_cotacoes", "1"),
+	("aprovadas", "({ref}.status IS 'Aprovada')"),
+	("rejeitadas", "({ref}.status IS 'Rejeitada')"),
+	("em_aberto", "({ref}.status IS 'Em Aberto')"),
+	("valor_aprovado", "(CASE WHEN {ref}.status IS 'Aprovada' THEN COALESCE({ref}.valor_total, 0) ELSE 0 END)"),
+	("valor_em_aberto", "(CASE WHEN {ref}.status IS 'Em Aberto' THEN COALESCE({ref}.valor_total, 0) ELSE 0 END)"),
+	("valor_rejeitado", "(CASE WHEN {ref}.status IS 'Rejeitada' THEN COALESCE({ref}.valor_total, 0) ELSE 0 END)"),
+	("soma_valores", "(CASE WHEN {ref}.valor_total > 0 THEN {ref}.valor_total ELSE 0 END)"),
+	("qtd_valores", "(COALESCE({ref}.valor_total, 0) > 0)"),
+)
+
+def _sql_mais_recente(atual, nova):
+	"""Expressão SQL com a data mais recente entre atual e nova (NULL conta como ausente)"""
+	return f"(CASE WHEN {atual} IS NULL OR {nova} > {atual} THEN {nova} ELSE {atual} END)"
+
+def _atualizar_cliente_stats_sql(ref, sinal):
+	"""Comandos de trigger que somam (sinal '+') ou retiram ('-') a cotação {ref} das estatísticas.
+
+	Os ajustes são incrementais: os triggers não enxergam o arquivo histórico,
+	então nada é recalculado a partir de cotacoes. ultima_cotacao só avança;
+	excluir ou arquivar uma cotação não a recua.
+	"""
+	deltas = ",\n\t\t\t".join(f"{col} = {col} {sinal} {expr.format(ref=ref)}" for col, expr in _DELTAS_CLIENTE_STATS)
+	if sinal == "+":
+		deltas += f",\n\t\t\tultima_cotacao = {_sql_mais_recente('ultima_cotacao', f'{ref}.data_criacao')}"
+	return f'''INSERT OR IGNORE INTO cliente_stats (cliente_id) VALUES ({ref}.cliente_id);
+		UPDATE cliente_stats SET
+			{deltas}
+		WHERE cliente_id = {ref}.cliente_id;'''
+
+def recalcular_cliente_stats(conn):
+	"""Recalcular do zero a tabela cliente_stats (carga inicial ou correção)"""
+	somas = ", ".join(f"SUM({expr.format(ref='c')})" for _col, expr in _DELTAS_CLIENTE_STATS)
+	colunas = ", ".join(col for col, _expr in _DELTAS_CLIENTE_STATS)
+	conn.execute("DELETE FROM cliente_stats")
+	conn.execute(f'''INSERT INTO cliente_stats (cliente_id, {colunas}, ultima_cotacao)
+		SELECT c.cliente_id, {somas}, MAX(c.data_criacao) FROM {fonte_historico(conn, 'cotacoes')} c
+		GROUP BY c.cliente_id''')
+	conn.execute('''INSERT OR IGNORE INTO cliente_stats (cliente_id)
+		SELECT DISTINCT cliente_id FROM contatos''')
+	conn.execute('''UPDATE cliente_stats SET total_contatos =
+		(SELECT COUNT(*) FROM contatos WHERE cliente_id = cliente_stats.cliente_id)''')
+
+def _criar_triggers_cliente_stats_cotacoes(conn):
+	"""Triggers de cotações que mantêm cliente_stats"""
+	conn.execute(f'''CREATE TRIGGER IF NOT EXISTS cliente_stats_cotacoes_ai AFTER INSERT ON cotacoes BEGIN
+		{_atualizar_cliente_stats_sql("new", "+")}
+	END''')
+	conn.execute(f'''CREATE TRIGGER IF NOT EXISTS cliente_stats_cotacoes_ad AFTER DELETE ON cotacoes BEGIN
+		{_atualizar_cliente_stats_sql("old", "-")}
+	END''')
+	conn.execute(f'''CREATE TRIGGER IF NOT EXISTS cliente_stats_cotacoes_au
+		AFTER UPDATE OF cliente_id, status, valor_total, data_criacao ON cotacoes BEGIN
+		{_atualizar_cliente_stats_sql("old", "-")}
+		{_atualizar_cliente_stats_sql("new", "+")}
+	END''')
+
+def _migracao_cliente_stats(conn):
+	"""Estatísticas por cliente (painel do cliente) mantidas por triggers em cotações e contatos"""
+	colunas = ",\n\t\t".join(f"{col} {'REAL' if col.startswith(('valor', 'soma')) else 'INTEGER'} NOT NULL DEFAULT 0"
+							  for col, _expr in _DELTAS_CLIENTE_STATS)
+	conn.execute(f'''CREATE TABLE IF NOT EXISTS cliente_stats (
+		cliente_id INTEGER PRIMARY KEY,
+		{colunas},
+		total_contatos INTEGER NOT NULL DEFAULT 0,
+		ultima_cotacao DATE
+	)''')
+	_criar_triggers_cliente_stats_cotacoes(conn)
+	for nome, momento, ref, sinal in (("ai", "INSERT", "new", "+"), ("ad", "DELETE", "old", "-")):
+		conn.execute(f'''CREATE TRIGGER IF NOT EXISTS cliente_stats_contatos_{nome} AFTER {momento} ON contatos BEGIN
+			INSERT OR IGNORE INTO cliente_stats (cliente_id) VALUES ({ref}.cliente_id);
+			UPDATE cliente_stats SET total_contatos = total_contatos {sinal} 1 WHERE cliente_id = {ref}.cliente_id;
+		END''')
+	conn.execute('''CREATE TRIGGER IF NOT EXISTS cliente_stats_contatos_au AFTER UPDATE OF cliente_id ON contatos
+		WHEN old.cliente_id IS NOT new.cliente_id BEGIN
+		UPDATE cliente_stats SET total_contatos = total_contatos - 1 WHERE cliente_id = old.cliente_id;
+		INSERT OR IGNORE INTO cliente_stats (cliente_id) VALUES (new.cliente_id);
+		UPDATE cliente_stats SET total_contatos = total_contatos + 1 WHERE cliente_id = new.cliente_id;
+	END''')
+	conn.execute('''CREATE TRIGGER IF NOT EXISTS cliente_stats_clientes_ad AFTER DELETE ON clientes BEGIN
+		DELETE FROM cliente_stats WHERE cliente_id = old.id;
+	END''')
+	recalcular_cliente_stats(conn)
+
+def _sql_ajustar_contadores(tabela, chaves, deltas, ref, sinal):
+	"""Comandos de trigger que somam (sinal '+') ou retiram ('-') a linha {ref} dos contadores de {tabela}.
+
+	chaves e deltas são pares (coluna, expressão), com {ref} nas expressões.
+	"""
+	colunas_chave = ", ".join(col for col, _expr in chaves)
+	valores_chave = ", ".join(expr.format(ref=ref) for _col, expr in chaves)
+	condicao = " AND ".join(f"{col} = {expr.format(ref=ref)}" for col, expr in chaves)
+	ajustes = ", ".join(f"{col} = {col} {sinal} {expr.format(ref=ref)}" for col, expr in deltas)
+	return f'''INSERT OR IGNORE INTO {tabela} ({colunas_chave}) VALUES ({valores_chave});
+		UPDATE {tabela} SET {ajustes} WHERE {condicao};'''
+
+# Resumo do dashboard por (responsavel_id, filial_id): chaves e contadores por cotação/relatório
+_CHAVES_DASHBOARD = (("responsavel_id", "{ref}.responsavel_id"), ("filial_id", "COALESCE({ref}.filial_id, 0)"))
+_DELTAS_DASHBOARD_COTACOES = (
+	("total_cotacoes", "1"),
+	("cotacoes_aprovadas", "({ref}.status IS 'Aprovada')"),
+	("faturamento_aprovado", "(CASE WHEN {ref}.status IS 'Aprovada' THEN COALESCE({ref}.valor_total, 0) ELSE 0 END)"),
+)
+_DELTAS_DASHBOARD_RELATORIOS = (("total_relatorios", "1"),)
+# Totais gerais exibidos ao admin: (chave, tabela, condição)
+_TOTAIS_DASHBOARD = (
+	("clientes", "clientes", "1"),
+	("produtos_ativos", "produtos", "COALESCE({ref}.ativo, 0) = 1"),
+)
+
+def recalcular_dashboard_resumo(conn):
+	"""Recalcular do zero dashboard_resumo e dashboard_totais (use se os números divergirem)"""
+	chaves = ", ".join(expr.format(ref="t") for _col, expr in _CHAVES_DASHBOARD)
+	conn.execute("DELETE FROM dashboard_resumo")
+	for tabela, deltas in (("cotacoes", _DELTAS_DASHBOARD_COTACOES), ("relatorios_tecnicos", _DELTAS_DASHBOARD_RELATORIOS)):
+		colunas = ", ".join(col for col, _expr in deltas)
+		somas = ", ".join(f"SUM({expr.format(ref='t')})" for _col, expr in deltas)
+		atualizar = ", ".join(f"{col} = excluded.{col}" for col, _expr in deltas)
+		# "WHERE true" desfaz a ambiguidade do ON CONFLICT após SELECT
+		conn.execute(f'''INSERT INTO dashboard_resumo (responsavel_id, filial_id, {colunas})
+			SELECT {chaves}, {somas} FROM {fonte_historico(conn, tabela)} t WHERE true GROUP BY {chaves}
+			ON CONFLICT (responsavel_id, filial_id) DO UPDATE SET {atualizar}''')
+	conn.execute("DELETE FROM dashboard_totais")
+	for chave, tabela, condicao in _TOTAIS_DASHBOARD:
+		conn.execute(f"INSERT INTO dashboard_totais (chave, valor) SELECT ?, COUNT(*) FROM {tabela} t WHERE {condicao.format(ref='t')}",
+					 (chave,))
+
+def devolver_contadores_arquivados(conn, ids_cotacoes, ids_relatorios):
+	"""Somar de volta a cliente_stats e dashboard_resumo as linhas recém-movidas para o arquivo.
+
+	A exclusão no banco principal dispara os triggers que retiram as linhas dos
+	contadores, mas o histórico arquivado continua contando. ids_cotacoes e
+	ids_relatorios são tabelas (coluna id) com as linhas movidas, já presentes
+	em arquivo.cotacoes e arquivo.relatorios_tecnicos.
+	"""
+	colunas = ", ".join(col for col, _expr in _DELTAS_CLIENTE_STATS)
+	somas = ", ".join(f"SUM({expr.format(ref='c')})" for _col, expr in _DELTAS_CLIENTE_STATS)
+	atualizar = ", ".join(f"{col} = {col} + excluded.{col}" for col, _expr in _DELTAS_CLIENTE_STATS)
+	conn.execute(f'''INSERT INTO cliente_stats (cliente_id, {colunas}, ultima_cotacao)
+		SELECT c.cliente_id, {somas}, MAX(c.data_criacao) FROM arquivo.cotacoes c
+		WHERE c.id IN (SELECT id FROM {ids_cotacoes}) GROUP BY c.cliente_id
+		ON CONFLICT (cliente_id) DO UPDATE SET {atualizar},
+			ultima_cotacao = {_sql_mais_recente('ultima_cotacao', 'excluded.ultima_cotacao')}''')
+	chaves = ", ".join(expr.format(ref="t") for _col, expr in _CHAVES_DASHBOARD)
+	for tabela, deltas, ids in (("cotacoes", _DELTAS_DASHBOARD_COTACOES, ids_cotacoes),
+								("relatorios_tecnicos", _DELTAS_DASHBOARD_RELATORIOS, ids_relatorios)):
+		colunas = ", ".join(col for col, _expr in deltas)
+		somas = ", ".join(f"SUM({expr.format(ref='t')})" for _col, expr in deltas)
+		atualizar = ", ".join(f"{col} = {col} + excluded.{col}" for col, _expr in deltas)
+		conn.execute(f'''INSERT INTO dashboard_resumo (responsavel_id, filial_id, {colunas})
+			SELECT {chaves}, {somas} FROM arquivo.{tabela} t
+			WHERE t.id IN (SELECT id FROM {ids}) GROUP BY {chaves}
+			ON CONFLICT (responsavel_id, filial_id) DO UPDATE SET {atualizar}''')
+
+def _migracao_dashboard_resumo(conn):
+	"""Contadores do dashboard por responsável e filial, mantidos por triggers"""
+	conn.execute('''CREATE TABLE IF NOT EXISTS dashboard_resumo (
+		responsavel_id INTEGER NOT NULL,
+		filial_id INTEGER NOT NULL DEFAULT 0,
+		total_cotacoes INTEGER NOT NULL DEFAULT 0,
+		cotacoes_aprovadas INTEGER NOT NULL DEFAULT 0,
+		faturamento_aprovado REAL NOT NULL DEFAULT 0,
+		total_relatorios INTEGER NOT NULL DEFAULT 0,
+		PRIMARY KEY (responsavel_id, filial_id)
+	) WITHOUT ROWID''')
+	conn.execute('''CREATE TABLE IF NOT EXISTS dashboard_totais (
+		chave TEXT PRIMARY KEY,
+		valor INTEGER NOT NULL DEFAULT 0
+	) WITHOUT ROWID''')
+	for tabela, prefixo, deltas, colunas in (
+		("cotacoes", "dashboard_cotacoes", _DELTAS_DASHBOARD_COTACOES, "responsavel_id, filial_id, status, valor_total"),
+		("relatorios_tecnicos", "dashboard_relatorios", _DELTAS_DASHBOARD_RELATORIOS, "responsavel_id, filial_id"),
+	):
+		def ajuste(ref, sinal):
+			return _sql_ajustar_contadores("dashboard_resumo", _CHAVES_DASHBOARD, deltas, ref, sinal)
+		conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {prefixo}_ai AFTER INSERT ON {tabela} BEGIN
+		{ajuste("new", "+")}
+	END''')
+		conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {prefixo}_ad AFTER DELETE ON {tabela} BEGIN
+		{ajuste("old", "-")}
+	END''')
+		conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {prefixo}_au AFTER UPDATE OF {colunas} ON {tabela} BEGIN
+		{ajuste("old", "-")}
+		{ajuste("new", "+")}
+	END''')
+	for chave, tabela, condicao in _TOTAIS_DASHBOARD:
+		for nome, momento, ref, sinal in (("ai", "INSERT", "new", "+"), ("ad", "DELETE", "old", "-")):
+			conn.execute(f'''CREATE TRIGGER IF NOT EXISTS dashboard_{chave}_{nome} AFTER {momento} ON {tabela}
+		WHEN {condicao.format(ref=ref)} BEGIN
+		UPDATE dashboard_totais SET valor = valor {sinal} 1 WHERE chave = '{chave}';
+	END''')
+		if condicao != "1":
+			conn.execute(f'''CREATE TRIGGER IF NOT EXISTS dashboard_{chave}_au AFTER UPDATE ON {tabela}
+		WHEN ({condicao.format(ref="old")}) IS NOT ({condicao.format(ref="new")}) BEGIN
+		UPDATE dashboard_totais SET valor = valor + (CASE WHEN {condicao.format(ref="new")} THEN 1 ELSE -1 END)
+		WHERE chave = '{chave}';
+	END''')
+	recalcular_dashboard_resumo(conn)
+
+def _migracao_indice_produtos_busca(conn):
+	"""Índice do nome normalizado de produtos, usado na deduplicação da importação em lote"""
+	conn.execute("CREATE INDEX IF NOT EXISTS idx_produtos_nome_busca ON produtos(nome_busca, tipo)")
+
+def _migracao_indice_validade(conn):
+	"""Índice parcial das cotações em aberto por validade, lido pela rotina de expiração"""
+	conn.execute("CREATE INDEX IF NOT EXISTS idx_cotacoes_validade_em_aberto "
+				 "ON cotacoes(data_validade) WHERE status = 'Em Aberto'")
+
+def _migracao_cliente_stats_incremental(conn):
+	"""Triggers de cliente_stats sem recálculo a partir de cotacoes, que perdia o histórico arquivado"""
+	for nome in ("ai", "ad", "au"):
+		conn.execute(f"DROP TRIGGER IF EXISTS cliente_stats_cotacoes_{nome}")
+	_criar_triggers_cliente_stats_cotacoes(conn)
+	recalcular_cliente_stats(conn)
+
+# Migrações em ordem: (versão, descrição, função). A versão aplicada fica em
+# PRAGMA user_version; novas migrações devem sempre entrar no fim da lista.
+MIGRACOES = [
+	(1, "colunas legadas de cotações", _migracao_colunas_legadas),
+	(2, "índices de chaves estrangeiras e listagens", _migracao_indices_listagem),
+	(3, "contadores de numeração de documentos", _migracao_sequencias),
+	(4, "busca textual dos relatórios técnicos", _migracao_fts_relatorios),
+	(5, "colunas faltantes de clientes e produtos", _migracao_colunas_cadastros),
+	(6, "busca normalizada de clientes e produtos", _migracao_busca_cadastros),
+	(7, "armazenamento de anexos dos relatórios", _migracao_anexos_relatorios),
+	(8, "estatísticas por cliente", _migracao_cliente_stats),
+	(9, "resumo do dashboard por responsável e filial", _migracao_dashboard_resumo),
+	(10, "índice de nomes normalizados de produtos", _migracao_indice_produtos_busca),
+	(11, "índice de validade das cotações em aberto", _migracao_indice_validade),
+	(12, "estatísticas de clientes incrementais", _migracao_cliente_stats_incremental),
+]
+
+def versao_schema(conn):
+	"""Versão atual do schema (PRAGMA user_version)"""
+	return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def aplicar_migracoes(db_name=None):
+	"""Aplicar, em ordem, as migrações ainda não registradas no banco.
+
+	Cada migração roda em sua própria transação junto com a atualização de
+	user_version, então uma falha no meio não deixa o schema pela metade.
+	"""
+	atual = versao_schema(_conexao_da_thread(db_name))
+	pendentes = [m for m in MIGRACOES if m[0] > atual]
+	for versao, descricao, funcao in pendentes:
+		with transacao(db_name) as conn:
+			# Outra estação pode ter aplicado a migração enquanto aguardávamos o lock
+			if versao_schema(conn) >= versao:
+				continue
+			funcao(conn)
+			conn.execute(f"PRAGMA user_version = {int(versao)}")
+		print(f"🔄 Migração {versao} aplicada: {descricao}")
+	if pendentes:
+		# Views de histórico listam as colunas: recriar após mudanças de schema
+		anexar_arquivo(_conexao_da_thread(db_name), db_name)
+	return versao_schema(_conexao_da_thread(db_name))
+
+# Tabelas históricas movidas para o arquivo: (tabela, view temporária com ativos + arquivados)
+TABELAS_HISTORICO = (
+	("cotacoes", "cotacoes_todas"),
+	("itens_cotacao", "itens_cotacao_todos"),
+	("relatorios_tecnicos", "relatorios_todos"),
+	("eventos_campo", "eventos_campo_todos"),
+	("relatorio_anexos", "relatorio_anexos_todos"),
+)
+
+def caminho_arquivo(db_name=None):
+	"""Caminho do banco de arquivo, na mesma pasta do banco principal"""
+	return os.path.join(os.path.dirname(os.path.abspath(db_name or DB_NAME)), ARQUIVO_DB)
+
+def arquivo_anexado(conn):
+	"""Se o banco de arquivo está anexado (ATTACH ... AS arquivo) a esta conexão"""
+	return any(row[1] == "arquivo" for row in conn.execute("PRAGMA database_list"))
+
+def _sincronizar_schema_arquivo(conn):
+	"""Criar no arquivo as tabelas históricas e índices do banco principal, e as colunas novas"""
+	for tabela, _view in TABELAS_HISTORICO:
+		row = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (tabela,)).fetchone()
+		if not row:
+			continue
+		existentes = {r[1] for r in conn.execute(f"PRAGMA arquivo.table_info({tabela})")}
+		if not existentes:
+			conn.execute(re.sub(r'^CREATE TABLE\s+"?\w+"?', f"CREATE TABLE arquivo.{tabela}", row[0]))
+			existentes = {r[1] for r in conn.execute(f"PRAGMA arquivo.table_info({tabela})")}
+		for _cid, coluna, tipo, _notnull, padrao, _pk in conn.execute(f"PRAGMA main.table_info({tabela})").fetchall():
+			if coluna not in existentes:
+				default = f" DEFAULT {padrao}" if padrao is not None else ""
+				conn.execute(f"ALTER TABLE arquivo.{tabela} ADD COLUMN {coluna} {tipo}{default}")
+		for (sql,) in conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'index' AND tbl_name = ? "
+								   "AND sql IS NOT NULL", (tabela,)).fetchall():
+			conn.execute(re.sub(r'^CREATE (UNIQUE )?INDEX\s+', r'CREATE \1INDEX IF NOT EXISTS arquivo.', sql))
+
+def criar_views_historico(conn):
+	"""Views temporárias (cotacoes_todas, relatorios_todos, ...) com os registros ativos e os arquivados.
+
+	Sem arquivo anexado, as views mostram apenas o banco principal, então as
+	consultas de histórico podem usá-las sempre. Uma linha presente nos dois
+	bancos (arquivamento interrompido) aparece só uma vez.
+	"""
+	anexado = arquivo_anexado(conn)
+	for tabela, view in TABELAS_HISTORICO:
+		colunas = [row[1] for row in conn.execute(f"PRAGMA main.table_info({tabela})")]
+		if not colunas:
+			continue
+		lista = ", ".join(colunas)
+		sql = f"SELECT {lista} FROM main.{tabela}"
+		if anexado and conn.execute(f"PRAGMA arquivo.table_info({tabela})").fetchone():
+			sql += f'''
+			UNION ALL
+			SELECT {lista} FROM arquivo.{tabela} a
+			WHERE NOT EXISTS (SELECT 1 FROM main.{tabela} m WHERE m.id = a.id)'''
+		conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+		conn.execute(f"CREATE TEMP VIEW {view} AS {sql}")
+
+def anexar_arquivo(conn, db_name=None, criar=False, somente_leitura=False):
+	"""Anexar o banco de arquivo à conexão (se existir, ou sempre com criar=True) e recriar as views"""
+	caminho = caminho_arquivo(db_name)
+	try:
+		if not arquivo_anexado(conn) and (criar or os.path.exists(caminho)):
+			if somente_leitura:
+				conn.execute("ATTACH DATABASE ? AS arquivo", (f"file:{quote(caminho)}?mode=ro",))
+			else:
+				conn.execute("ATTACH DATABASE ? AS arquivo", (caminho,))
+				try:
+					conn.execute(f"PRAGMA arquivo.journal_mode = {JOURNAL_MODE}")
+				except sqlite3.OperationalError:
+					pass
+		if arquivo_anexado(conn) and not somente_leitura:
+			_sincronizar_schema_arquivo(conn)
+			if conn.in_transaction:
+				conn.commit()
+		criar_views_historico(conn)
+	except sqlite3.Error as e:
+		logger.warning("Não foi possível anexar o arquivo histórico %s: %s", caminho, e)
+
+def esquemas_historico(conn):
+	"""Bancos com dados históricos: ["main"] ou ["main", "arquivo"] se o arquivo estiver anexado"""
+	return ["main", "arquivo"] if arquivo_anexado(conn) else ["main"]
+
+def fonte_historico(conn, tabela):
+	"""Nome da view com ativos + arquivados para a tabela (ou a própria tabela, se não houver view)"""
+	view = dict(TABELAS_HISTORICO).get(tabela)
+	if view and conn.execute("SELECT 1 FROM sqlite_temp_master WHERE type = 'view' AND name = ?", (view,)).fetchone():
+		return view
+	return tabela
+
+def formatar_numero(prefixo, valor, filial_id=0, largura=6):
+	"""Montar o número do documento: PROP-000123 ou, por filial, PROP-2-000123"""
+	if filial_id:
+		return f"{prefixo}-{filial_id}-{valor:0{largura}d}"
+	return f"{prefixo}-{valor:0{largura}d}"
+
+def espiar_numero(prefixo, filial_id=0, db_name=None):
+	"""Próximo número da sequência, sem reservá-lo (para exibir em formulários)"""
+	with obter_conexao(db_name) as conn:
+		row = conn.execute("SELECT ultimo_valor FROM sequences WHERE prefixo = ? AND filial_id = ?",
+						   (prefixo, filial_id)).fetchone()
+	return formatar_numero(prefixo, (row[0] if row else 0) + 1, filial_id)
+
+def alocar_numero(prefixo, filial_id=0, db_name=None):
+	"""Reservar atomicamente o próximo número da sequência.
+
+	Incrementa o contador em uma transação curta (BEGIN IMMEDIATE), então duas
+	estações nunca recebem o mesmo número, independentemente do tamanho das tabelas.
+	"""
+	with transacao(db_name) as conn:
+		conn.execute("INSERT OR IGNORE INTO sequences (prefixo, filial_id) VALUES (?, ?)",
+					 (prefixo, filial_id))
+		conn.execute("UPDATE sequences SET ultimo_valor = ultimo_valor + 1 WHERE prefixo = ? AND filial_id = ?",
+					 (prefixo, filial_id))
+		valor = conn.execute("SELECT ultimo_valor FROM sequences WHERE prefixo = ? AND filial_id = ?",
+							 (prefixo, filial_id)).fetchone()[0]
+	return formatar_numero(prefixo, valor, filial_id)
+
 def verificar_banco():
 	"""Verificar se o banco existe e tem tamanho válido"""
 	if not os.path.exists(DB_NAME) or os.path.getsize(DB_NAME) == 0:
@@ -14,293 +885,295 @@ def verificar_banco():
 		return True
 	return False
 
-def criar_banco():
+def criar_banco(db_name=None):
 	"""Criar banco de dados com todas as tabelas necessárias"""
-	print(f"🔧 Criando banco de dados: {DB_NAME}")
+	db_name = db_name or DB_NAME
+	print(f"🔧 Criando banco de dados: {db_name}")
 	
 	# Remover banco existente se estiver vazio
-	if os.path.exists(DB_NAME) and os.path.getsize(DB_NAME) == 0:
-		os.remove(DB_NAME)
+	if os.path.exists(db_name) and os.path.getsize(db_name) == 0:
+		os.remove(db_name)
 		print("🗑️ Banco vazio removido")
 	
-	conn = sqlite3.connect(DB_NAME)
-	c = conn.cursor()
+	with obter_conexao(db_name) as conn:
+		c = conn.cursor()
 	
-	print("📋 Criando tabelas...")
+		print("📋 Criando tabelas...")
 	
-	# Tabela Usuários
-	c.execute('''CREATE TABLE IF NOT EXISTS usuarios (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		username TEXT UNIQUE NOT NULL,
-		password TEXT NOT NULL,
-		role TEXT DEFAULT 'operador',
-		nome_completo TEXT,
-		email TEXT,
-		telefone TEXT,
-		template_personalizado BOOLEAN DEFAULT 0,
-		template_image_path TEXT,
-		created_at TIMESTAMP DEFAULT (datetime('now'))
-	)''')
+		# Tabela Usuários
+		c.execute('''CREATE TABLE IF NOT EXISTS usuarios (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			username TEXT UNIQUE NOT NULL,
+			password TEXT NOT NULL,
+			role TEXT DEFAULT 'operador',
+			nome_completo TEXT,
+			email TEXT,
+			telefone TEXT,
+			template_personalizado BOOLEAN DEFAULT 0,
+			template_image_path TEXT,
+			created_at TIMESTAMP DEFAULT (datetime('now'))
+		)''')
 	
-	# Tabela Clientes
-	c.execute('''CREATE TABLE IF NOT EXISTS clientes (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		nome TEXT NOT NULL,
-		nome_fantasia TEXT,
-		cnpj TEXT UNIQUE,
-		inscricao_estadual TEXT,
-		inscricao_municipal TEXT,
-		endereco TEXT,
-		numero TEXT,
-		complemento TEXT,
-		bairro TEXT,
-		cidade TEXT,
-		estado TEXT,
-		cep TEXT,
-		telefone TEXT,
-		email TEXT,
-		site TEXT,
-		ativo BOOLEAN DEFAULT 1,
-		prazo_pagamento TEXT,
-		created_at TIMESTAMP DEFAULT (datetime('now'))
-	)''')
+		# Tabela Clientes
+		c.execute('''CREATE TABLE IF NOT EXISTS clientes (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			nome TEXT NOT NULL,
+			nome_fantasia TEXT,
+			cnpj TEXT UNIQUE,
+			inscricao_estadual TEXT,
+			inscricao_municipal TEXT,
+			endereco TEXT,
+			numero TEXT,
+			complemento TEXT,
+			bairro TEXT,
+			cidade TEXT,
+			estado TEXT,
+			cep TEXT,
+			telefone TEXT,
+			email TEXT,
+			site TEXT,
+			ativo BOOLEAN DEFAULT 1,
+			prazo_pagamento TEXT,
+			created_at TIMESTAMP DEFAULT (datetime('now'))
+		)''')
 	
-	# Tabela Contatos
-	c.execute('''CREATE TABLE IF NOT EXISTS contatos (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		cliente_id INTEGER NOT NULL,
-		nome TEXT NOT NULL,
-		cargo TEXT,
-		email TEXT,
-		telefone TEXT,
-		celular TEXT,
-		observacoes TEXT,
-		ativo BOOLEAN DEFAULT 1,
-		created_at TIMESTAMP DEFAULT (datetime('now')),
-		FOREIGN KEY (cliente_id) REFERENCES clientes(id)
-	)''')
+		# Tabela Contatos
+		c.execute('''CREATE TABLE IF NOT EXISTS contatos (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			cliente_id INTEGER NOT NULL,
+			nome TEXT NOT NULL,
+			cargo TEXT,
+			email TEXT,
+			telefone TEXT,
+			celular TEXT,
+			observacoes TEXT,
+			ativo BOOLEAN DEFAULT 1,
+			created_at TIMESTAMP DEFAULT (datetime('now')),
+			FOREIGN KEY (cliente_id) REFERENCES clientes(id)
+		)''')
 	
-	# Tabela Produtos
-	c.execute('''CREATE TABLE IF NOT EXISTS produtos (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		nome TEXT NOT NULL,
-		tipo TEXT NOT NULL,
-		ncm TEXT,
-		valor_unitario REAL DEFAULT 0,
-		descricao TEXT,
-		ativo BOOLEAN DEFAULT 1,
-		created_at TIMESTAMP DEFAULT (datetime('now'))
-	)''')
+		# Tabela Produtos
+		c.execute('''CREATE TABLE IF NOT EXISTS produtos (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			nome TEXT NOT NULL,
+			tipo TEXT NOT NULL,
+			ncm TEXT,
+			valor_unitario REAL DEFAULT 0,
+			descricao TEXT,
+			ativo BOOLEAN DEFAULT 1,
+			created_at TIMESTAMP DEFAULT (datetime('now'))
+		)''')
 	
-	# Tabela Itens de Kit
-	c.execute('''CREATE TABLE IF NOT EXISTS kit_items (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		kit_id INTEGER NOT NULL,
-		produto_id INTEGER NOT NULL,
-		quantidade REAL NOT NULL DEFAULT 1,
-		created_at TIMESTAMP DEFAULT (datetime('now')),
-		FOREIGN KEY (kit_id) REFERENCES produtos(id),
-		FOREIGN KEY (produto_id) REFERENCES produtos(id)
-	)''')
+		# Tabela Itens de Kit
+		c.execute('''CREATE TABLE IF NOT EXISTS kit_items (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			kit_id INTEGER NOT NULL,
+			produto_id INTEGER NOT NULL,
+			quantidade REAL NOT NULL DEFAULT 1,
+			created_at TIMESTAMP DEFAULT (datetime('now')),
+			FOREIGN KEY (kit_id) REFERENCES produtos(id),
+			FOREIGN KEY (produto_id) REFERENCES produtos(id)
+		)''')
 	
-	# Tabela Cotações
-	c.execute('''CREATE TABLE IF NOT EXISTS cotacoes (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		numero_proposta TEXT NOT NULL UNIQUE,
-		cliente_id INTEGER NOT NULL,
-		responsavel_id INTEGER NOT NULL,
-		filial_id INTEGER DEFAULT 1,
-		data_criacao DATE NOT NULL,
-		data_validade DATE,
-		modelo_compressor TEXT,
-		numero_serie_compressor TEXT,
-		descricao_atividade TEXT,
-		observacoes TEXT,
-		valor_total REAL DEFAULT 0,
-		tipo_frete TEXT,
-		condicao_pagamento TEXT,
-		prazo_entrega TEXT,
-		moeda TEXT DEFAULT 'BRL',
-		status TEXT DEFAULT 'Em Aberto',
-		caminho_arquivo_pdf TEXT,
-		relacao_pecas TEXT,
-		esboco_servico TEXT,
-		relacao_pecas_substituir TEXT,
-		tipo_cotacao TEXT DEFAULT 'Compra',
-		locacao_valor_mensal REAL,
-		locacao_data_inicio DATE,
-		locacao_data_fim DATE,
-		locacao_qtd_meses INTEGER,
-		locacao_nome_equipamento TEXT,
-		locacao_imagem_path TEXT,
-		created_at TIMESTAMP DEFAULT (datetime('now')),
-		FOREIGN KEY (cliente_id) REFERENCES clientes(id),
-		FOREIGN KEY (responsavel_id) REFERENCES usuarios(id)
-	)''')
+		# Tabela Cotações
+		c.execute('''CREATE TABLE IF NOT EXISTS cotacoes (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			numero_proposta TEXT NOT NULL UNIQUE,
+			cliente_id INTEGER NOT NULL,
+			responsavel_id INTEGER NOT NULL,
+			filial_id INTEGER DEFAULT 1,
+			data_criacao DATE NOT NULL,
+			data_validade DATE,
+			modelo_compressor TEXT,
+			numero_serie_compressor TEXT,
+			descricao_atividade TEXT,
+			observacoes TEXT,
+			valor_total REAL DEFAULT 0,
+			tipo_frete TEXT,
+			condicao_pagamento TEXT,
+			prazo_entrega TEXT,
+			moeda TEXT DEFAULT 'BRL',
+			status TEXT DEFAULT 'Em Aberto',
+			caminho_arquivo_pdf TEXT,
+			relacao_pecas TEXT,
+			esboco_servico TEXT,
+			relacao_pecas_substituir TEXT,
+			tipo_cotacao TEXT DEFAULT 'Compra',
+			locacao_valor_mensal REAL,
+			locacao_data_inicio DATE,
+			locacao_data_fim DATE,
+			locacao_qtd_meses INTEGER,
+			locacao_nome_equipamento TEXT,
+			locacao_imagem_path TEXT,
+			created_at TIMESTAMP DEFAULT (datetime('now')),
+			FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+			FOREIGN KEY (responsavel_id) REFERENCES usuarios(id)
+		)''')
 	
-	# Tabela Itens da Cotação
-	c.execute('''CREATE TABLE IF NOT EXISTS itens_cotacao (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		cotacao_id INTEGER NOT NULL,
-		produto_id INTEGER,
-		tipo TEXT NOT NULL,
-		item_nome TEXT NOT NULL,
-		quantidade REAL NOT NULL,
-		descricao TEXT,
-		valor_unitario REAL NOT NULL,
-		valor_total_item REAL NOT NULL,
-		eh_kit BOOLEAN DEFAULT 0,
-		kit_id INTEGER,
-		mao_obra REAL DEFAULT 0,
-		deslocamento REAL DEFAULT 0,
-		estadia REAL DEFAULT 0,
-		tipo_operacao TEXT DEFAULT 'Compra',
-		locacao_data_inicio DATE,
-		locacao_data_fim DATE,
-		locacao_qtd_meses INTEGER,
-		locacao_imagem_path TEXT,
-		created_at TIMESTAMP DEFAULT (datetime('now')),
-		FOREIGN KEY (cotacao_id) REFERENCES cotacoes(id),
-		FOREIGN KEY (produto_id) REFERENCES produtos(id),
-		FOREIGN KEY (kit_id) REFERENCES itens_cotacao(id)
-	)''')
+		# Tabela Itens da Cotação
+		c.execute('''CREATE TABLE IF NOT EXISTS itens_cotacao (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			cotacao_id INTEGER NOT NULL,
+			produto_id INTEGER,
+			tipo TEXT NOT NULL,
+			item_nome TEXT NOT NULL,
+			quantidade REAL NOT NULL,
+			descricao TEXT,
+			valor_unitario REAL NOT NULL,
+			valor_total_item REAL NOT NULL,
+			eh_kit BOOLEAN DEFAULT 0,
+			kit_id INTEGER,
+			mao_obra REAL DEFAULT 0,
+			deslocamento REAL DEFAULT 0,
+			estadia REAL DEFAULT 0,
+			tipo_operacao TEXT DEFAULT 'Compra',
+			locacao_data_inicio DATE,
+			locacao_data_fim DATE,
+			locacao_qtd_meses INTEGER,
+			locacao_imagem_path TEXT,
+			created_at TIMESTAMP DEFAULT (datetime('now')),
+			FOREIGN KEY (cotacao_id) REFERENCES cotacoes(id),
+			FOREIGN KEY (produto_id) REFERENCES produtos(id),
+			FOREIGN KEY (kit_id) REFERENCES itens_cotacao(id)
+		)''')
 	
-	# Tabela Relatórios Técnicos
-	c.execute('''CREATE TABLE IF NOT EXISTS relatorios_tecnicos (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		numero_relatorio TEXT NOT NULL UNIQUE,
-		cliente_id INTEGER NOT NULL,
-		responsavel_id INTEGER NOT NULL,
-		data_criacao DATE NOT NULL,
-		formulario_servico TEXT,
-		tipo_servico TEXT,
-		descricao_servico TEXT,
-		data_recebimento DATE,
-		condicao_encontrada TEXT,
-		placa_identificacao TEXT,
-		acoplamento TEXT,
-		aspectos_rotores TEXT,
-		valvulas_acopladas TEXT,
-		data_recebimento_equip TEXT,
-		parafusos_pinos TEXT,
-		superficie_vedacao TEXT,
-		engrenagens TEXT,
-		bico_injetor TEXT,
-		rolamentos TEXT,
-		aspecto_oleo TEXT,
-		data_peritagem TEXT,
-		interf_desmontagem TEXT,
-		aspecto_rotores_aba3 TEXT,
-		aspecto_carcaca TEXT,
-		interf_mancais TEXT,
-		galeria_hidraulica TEXT,
-		data_desmembracao TEXT,
-		servicos_propostos TEXT,
-		pecas_recomendadas TEXT,
-		data_pecas TEXT,
-		cotacao_id INTEGER,
-		tempo_trabalho_total TEXT,
-		tempo_deslocamento_total TEXT,
-		fotos TEXT,
-		assinaturas TEXT,
-		anexos_aba1 TEXT,
-		anexos_aba2 TEXT,
-		anexos_aba3 TEXT,
-		anexos_aba4 TEXT,
-		filial_id INTEGER DEFAULT 2,
-		created_at TIMESTAMP DEFAULT (datetime('now')),
-		FOREIGN KEY (cliente_id) REFERENCES clientes(id),
-		FOREIGN KEY (responsavel_id) REFERENCES usuarios(id)
-	)''')
+		# Tabela Relatórios Técnicos
+		c.execute('''CREATE TABLE IF NOT EXISTS relatorios_tecnicos (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			numero_relatorio TEXT NOT NULL UNIQUE,
+			cliente_id INTEGER NOT NULL,
+			responsavel_id INTEGER NOT NULL,
+			data_criacao DATE NOT NULL,
+			formulario_servico TEXT,
+			tipo_servico TEXT,
+			descricao_servico TEXT,
+			data_recebimento DATE,
+			condicao_encontrada TEXT,
+			placa_identificacao TEXT,
+			acoplamento TEXT,
+			aspectos_rotores TEXT,
+			valvulas_acopladas TEXT,
+			data_recebimento_equip TEXT,
+			parafusos_pinos TEXT,
+			superficie_vedacao TEXT,
+			engrenagens TEXT,
+			bico_injetor TEXT,
+			rolamentos TEXT,
+			aspecto_oleo TEXT,
+			data_peritagem TEXT,
+			interf_desmontagem TEXT,
+			aspecto_rotores_aba3 TEXT,
+			aspecto_carcaca TEXT,
+			interf_mancais TEXT,
+			galeria_hidraulica TEXT,
+			data_desmembracao TEXT,
+			servicos_propostos TEXT,
+			pecas_recomendadas TEXT,
+			data_pecas TEXT,
+			cotacao_id INTEGER,
+			tempo_trabalho_total TEXT,
+			tempo_deslocamento_total TEXT,
+			fotos TEXT,
+			assinaturas TEXT,
+			anexos_aba1 TEXT,
+			anexos_aba2 TEXT,
+			anexos_aba3 TEXT,
+			anexos_aba4 TEXT,
+			filial_id INTEGER DEFAULT 2,
+			created_at TIMESTAMP DEFAULT (datetime('now')),
+			FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+			FOREIGN KEY (responsavel_id) REFERENCES usuarios(id)
+		)''')
 	
-	# Tabela de Permissões de Usuários
-	c.execute('''CREATE TABLE IF NOT EXISTS permissoes_usuarios (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		usuario_id INTEGER NOT NULL,
-		modulo TEXT NOT NULL,
-		nivel_acesso TEXT NOT NULL DEFAULT 'sem_acesso',
-		created_at TIMESTAMP DEFAULT (datetime('now')),
-		FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
-		UNIQUE(usuario_id, modulo)
-	)''')
+		# Tabela de Permissões de Usuários
+		c.execute('''CREATE TABLE IF NOT EXISTS permissoes_usuarios (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			usuario_id INTEGER NOT NULL,
+			modulo TEXT NOT NULL,
+			nivel_acesso TEXT NOT NULL DEFAULT 'sem_acesso',
+			created_at TIMESTAMP DEFAULT (datetime('now')),
+			FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
+			UNIQUE(usuario_id, modulo)
+		)''')
 	
-	# Tabela de Eventos de Campo
-	c.execute('''CREATE TABLE IF NOT EXISTS eventos_campo (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		relatorio_id INTEGER NOT NULL,
-		tecnico_id INTEGER NOT NULL,
-		data_hora TEXT NOT NULL,
-		evento TEXT NOT NULL,
-		tipo TEXT NOT NULL,
-		created_at TIMESTAMP DEFAULT (datetime('now')),
-		FOREIGN KEY (relatorio_id) REFERENCES relatorios_tecnicos(id),
-		FOREIGN KEY (tecnico_id) REFERENCES usuarios(id)
-	)''')
+		# Tabela de Eventos de Campo
+		c.execute('''CREATE TABLE IF NOT EXISTS eventos_campo (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			relatorio_id INTEGER NOT NULL,
+			tecnico_id INTEGER NOT NULL,
+			data_hora TEXT NOT NULL,
+			evento TEXT NOT NULL,
+			tipo TEXT NOT NULL,
+			created_at TIMESTAMP DEFAULT (datetime('now')),
+			FOREIGN KEY (relatorio_id) REFERENCES relatorios_tecnicos(id),
+			FOREIGN KEY (tecnico_id) REFERENCES usuarios(id)
+		)''')
 	
-	# Tabela Filiais
-	c.execute('''CREATE TABLE IF NOT EXISTS filiais (
-		id INTEGER PRIMARY KEY AUTOINCREMENT,
-		nome TEXT NOT NULL,
-		cnpj TEXT,
-		endereco TEXT,
-		cidade TEXT,
-		estado TEXT,
-		cep TEXT,
-		telefones TEXT,
-		email TEXT,
-		ativo BOOLEAN DEFAULT 1,
-		created_at TIMESTAMP DEFAULT (datetime('now'))
-	)''')
+		# Tabela Filiais
+		c.execute('''CREATE TABLE IF NOT EXISTS filiais (
+			id INTEGER PRIMARY KEY AUTOINCREMENT,
+			nome TEXT NOT NULL,
+			cnpj TEXT,
+			endereco TEXT,
+			cidade TEXT,
+			estado TEXT,
+			cep TEXT,
+			telefones TEXT,
+			email TEXT,
+			ativo BOOLEAN DEFAULT 1,
+			created_at TIMESTAMP DEFAULT (datetime('now'))
+		)''')
 	
-	# Inserir dados iniciais
-	print("📝 Inserindo dados iniciais...")
+		# Inserir dados iniciais
+		print("📝 Inserindo dados iniciais...")
 	
-	# Usuário admin padrão
-	try:
-		password_hash = hashlib.sha256("admin123".encode()).hexdigest()
-		c.execute('''INSERT INTO usuarios (username, password, role, nome_completo, email, template_personalizado)
-					 VALUES (?, ?, ?, ?, ?, ?)''', 
-				  ('admin', password_hash, 'admin', 'Administrador', 'admin@worldcomp.com.br', 0))
-		print("✅ Usuário admin criado")
-	except sqlite3.IntegrityError:
-		print("ℹ️ Usuário admin já existe")
+		# Usuário admin padrão
+		try:
+			password_hash = hashlib.sha256("admin123".encode()).hexdigest()
+			c.execute('''INSERT INTO usuarios (username, password, role, nome_completo, email, template_personalizado)
+						 VALUES (?, ?, ?, ?, ?, ?)''', 
+					  ('admin', password_hash, 'admin', 'Administrador', 'admin@worldcomp.com.br', 0))
+			print("✅ Usuário admin criado")
+		except sqlite3.IntegrityError:
+			print("ℹ️ Usuário admin já existe")
 	
-	# Filial padrão
-	try:
-		c.execute('''INSERT INTO filiais (id, nome, cnpj, endereco, cidade, estado, cep, telefones, email)
-					 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-				  (1, 'World Comp Brasil', '12.345.678/0001-90', 'Rua das Flores, 123', 'São Paulo', 'SP', '01234-567', '(11) 99999-9999', 'contato@worldcomp.com.br'))
-		print("✅ Filial padrão criada")
-	except sqlite3.IntegrityError:
-		print("ℹ️ Filial padrão já existe")
+		# Filial padrão
+		try:
+			c.execute('''INSERT INTO filiais (id, nome, cnpj, endereco, cidade, estado, cep, telefones, email)
+						 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+					  (1, 'World Comp Brasil', '12.345.678/0001-90', 'Rua das Flores, 123', 'São Paulo', 'SP', '01234-567', '(11) 99999-9999', 'contato@worldcomp.com.br'))
+			print("✅ Filial padrão criada")
+		except sqlite3.IntegrityError:
+			print("ℹ️ Filial padrão já existe")
 	
-	# Cliente de teste
-	try:
-		c.execute('''INSERT INTO clientes (nome, cnpj, email, telefone, endereco, cidade, estado, cep, prazo_pagamento)
-					 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-				  ('Cliente Teste', '98.765.432/0001-10', 'teste@cliente.com', '(11) 88888-8888', 'Rua Teste, 456', 'São Paulo', 'SP', '04567-890', '30 dias'))
-		print("✅ Cliente de teste criado")
-	except sqlite3.IntegrityError:
-		print("ℹ️ Cliente de teste já existe")
+		# Cliente de teste
+		try:
+			c.execute('''INSERT INTO clientes (nome, cnpj, email, telefone, endereco, cidade, estado, cep, prazo_pagamento)
+						 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+					  ('Cliente Teste', '98.765.432/0001-10', 'teste@cliente.com', '(11) 88888-8888', 'Rua Teste, 456', 'São Paulo', 'SP', '04567-890', '30 dias'))
+			print("✅ Cliente de teste criado")
+		except sqlite3.IntegrityError:
+			print("ℹ️ Cliente de teste já existe")
 	
-	# Produto de teste
-	try:
-		c.execute('''INSERT INTO produtos (nome, tipo, valor_unitario, descricao)
-					 VALUES (?, ?, ?, ?)''',
-				  ('Compressor Teste', 'Produto', 1000.00, 'Compressor para testes'))
-		print("✅ Produto de teste criado")
-	except sqlite3.IntegrityError:
-		print("ℹ️ Produto de teste já existe")
+		# Produto de teste
+		try:
+			c.execute('''INSERT INTO produtos (nome, tipo, valor_unitario, descricao)
+						 VALUES (?, ?, ?, ?)''',
+					  ('Compressor Teste', 'Produto', 1000.00, 'Compressor para testes'))
+			print("✅ Produto de teste criado")
+		except sqlite3.IntegrityError:
+			print("ℹ️ Produto de teste já existe")
 	
-	conn.commit()
-	conn.close()
+		conn.commit()
 	
-	print(f"🎉 Banco de dados {DB_NAME} criado com sucesso!")
-	print(f"📁 Localização: {os.path.abspath(DB_NAME)}")
+	aplicar_migracoes(db_name)
+	
+	print(f"🎉 Banco de dados {db_name} criado com sucesso!")
+	print(f"📁 Localização: {os.path.abspath(db_name)}")
 	
 	# Verificar tamanho do arquivo
-	if os.path.exists(DB_NAME):
-		size = os.path.getsize(DB_NAME)
+	if os.path.exists(db_name):
+		size = os.path.getsize(db_name)
 		print(f"📊 Tamanho do arquivo: {size} bytes")
 		if size > 0:
 			print("✅ Banco de dados válido e funcional!")
@@ -308,5 +1181,14 @@ def criar_banco():
 			print("❌ Banco de dados está vazio!")
 
 if __name__ == "__main__":
-	criar_banco()
-	print("Banco de dados criado com sucesso!")
+	import sys
+	if "--recalcular-resumos" in sys.argv:
+		# Reconstrói as tabelas de estatísticas mantidas por triggers
+		aplicar_migracoes()
+		with transacao() as conn:
+			recalcular_cliente_stats(conn)
+			recalcular_dashboard_resumo(conn)
+		print("✅ Resumos do dashboard e estatísticas de clientes recalculados!")
+	else:
+		criar_banco()
+		print("Banco de dados criado com sucesso!")
@@ -0,0 +1,199 @@
+import os
+import sqlite3
+
+from database import obter_conexao
+
+# Linhas lidas do banco por página (a primeira ao abrir, as demais ao rolar)
+TAMANHO_PAGINA = int(os.environ.get('CRM_LISTA_PAGINA', '200'))
+# Posição da rolagem (0 a 1) a partir da qual a próxima página é lida
+LIMIAR_ROLAGEM = 0.9
+
+
+def _como_int(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return valor
+
+
+class Registro:
+    """Linha carregada na lista: id, valor da ordenação, colunas como vieram do banco e item da Treeview"""
+    __slots__ = ('id', 'chave', 'dados', 'iid')
+
+    def __init__(self, registro_id, chave, dados):
+        self.id = registro_id
+        self.chave = chave
+        self.dados = dados
+        self.iid = None
+
+
+class ListaPaginada:
+    """Treeview preenchida aos poucos, com paginação por chave (keyset).
+
+    A lista é ordenada por (coluna, id) e cada página continua a partir da
+    última chave exibida: `WHERE (coluna, id) < (?, ?) ORDER BY ... LIMIT n`.
+    Assim o índice da ordenação é percorrido só até onde o usuário rolou,
+    e abrir a lista custa uma página, qualquer que seja o tamanho da tabela.
+
+    `colunas` é a lista do SELECT, com o id primeiro; `formatar(dados)`
+    devolve os valores exibidos de uma linha. As linhas recebem tags=(id,),
+    como nas demais listas.
+    """
+
+    def __init__(self, tree, scrollbar, colunas, origem, ordem, formatar,
+                 condicao=None, descendente=False, tamanho_pagina=TAMANHO_PAGINA, ao_erro=print):
+        self.tree = tree
+        self.colunas = colunas
+        self.origem = origem
+        self.coluna_ordem, self.coluna_id = ordem
+        self.formatar = formatar
+        self.condicao = condicao
+        self.descendente = descendente
+        self.tamanho_pagina = tamanho_pagina
+        self.ao_erro = ao_erro
+        self.registros = {}
+        self._paginada = False
+        self._filtro = None
+        self._parametros = ()
+        self._ultima_chave = None
+        self._ha_mais = False
+        self._agendado = False
+        self._scrollbar = scrollbar
+        tree.configure(yscrollcommand=self._ao_rolar)
+
+    def carregar(self, filtro=None, parametros=()):
+        """Recomeçar a lista do início, opcionalmente com uma condição SQL extra (busca)"""
+        self._limpar()
+        self._filtro = filtro
+        self._parametros = tuple(parametros)
+        self._paginada = True
+        self._ha_mais = True
+        self.carregar_mais()
+
+    def exibir(self, linhas):
+        """Mostrar linhas já obtidas (resultado de busca), sem paginar"""
+        self._limpar()
+        self._paginada = False
+        self._inserir(Registro(linha[0], None, tuple(linha)) for linha in linhas)
+
+    def carregar_mais(self):
+        """Ler e inserir a próxima página, se houver"""
+        self._agendado = False
+        if not self._ha_mais:
+            return
+        condicoes = [self._filtro] if self._filtro else []
+        parametros = list(self._parametros)
+        if self._ultima_chave is not None:
+            condicao, valores = self._depois_de(*self._ultima_chave)
+            condicoes.append(condicao)
+            parametros.extend(valores)
+        direcao = "DESC" if self.descendente else "ASC"
+        linhas = self._consultar(
+            condicoes, parametros,
+            f" ORDER BY {self.coluna_ordem} {direcao}, {self.coluna_id} {direcao} LIMIT {int(self.tamanho_pagina)}")
+        if linhas is None:
+            self._ha_mais = False
+            return
+
+        self._ha_mais = len(linhas) == self.tamanho_pagina
+        if linhas:
+            ultima = linhas[-1]
+            self._ultima_chave = (ultima[0], ultima[1])
+        self._inserir(Registro(linha[1], linha[0], linha[1:]) for linha in linhas)
+
+    def atualizar(self, ids):
+        """
+        Reler só as linhas dos ids informados, sem recarregar a lista: as
+        exibidas são trocadas ou removidas (excluídas ou fora do filtro) e as
+        novas entram na posição da ordem, se ela já estiver carregada.
+        """
+        ids = [registro_id for registro_id in ids if registro_id is not None]
+        if not ids:
+            return
+        marcadores = ", ".join("?" * len(ids))
+        condicoes = [self._filtro] if self._paginada and self._filtro else []
+        condicoes.append(f"{self.coluna_id} IN ({marcadores})")
+        linhas = self._consultar(condicoes, list(self._parametros if self._paginada else ()) + ids)
+        if linhas is None:
+            return
+        encontrados = {}
+        for linha in linhas:
+            encontrados[linha[1]] = Registro(linha[1], linha[0], linha[1:])
+        for registro_id in ids:
+            # Os ids vindos de tags da Treeview podem chegar como texto
+            atual = self.registros.get(registro_id) or self.registros.get(_como_int(registro_id))
+            novo = encontrados.get(registro_id) or encontrados.get(_como_int(registro_id))
+            if atual is not None and novo is None:
+                self.tree.delete(atual.iid)
+                del self.registros[atual.id]
+            elif atual is not None:
+                atual.chave, atual.dados = novo.chave, novo.dados
+                self.tree.item(atual.iid, values=self.formatar(novo.dados))
+            elif novo is not None and self._paginada:
+                self._inserir_na_ordem(novo)
+
+    def registro(self, registro_id):
+        return self.registros.get(registro_id)
+
+    def _consultar(self, condicoes, parametros, sufixo=""):
+        """Linhas (chave, colunas...) da origem; None em caso de erro (já informado)"""
+        condicoes = [c for c in [self.condicao] + condicoes if c]
+        sql = f"SELECT {self.coluna_ordem}, {self.colunas} FROM {self.origem}"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(f"({c})" for c in condicoes)
+        with obter_conexao() as conn:
+            try:
+                return conn.execute(sql + sufixo, parametros).fetchall()
+            except sqlite3.Error as e:
+                self.ao_erro(f"Erro ao carregar a lista: {e}")
+                return None
+
+    def _posicao_ordem(self, registro):
+        # NULL antes de qualquer valor, como no ORDER BY do SQLite
+        return (registro.chave is not None, registro.chave if registro.chave is not None else '', registro.id)
+
+    def _inserir_na_ordem(self, novo):
+        """Inserir uma linha nova antes da primeira carregada que venha depois dela"""
+        chave = self._posicao_ordem(novo)
+        por_iid = {registro.iid: registro for registro in self.registros.values()}
+        for posicao, iid in enumerate(self.tree.get_children()):
+            outra = self._posicao_ordem(por_iid[iid])
+            if (chave > outra) if self.descendente else (chave < outra):
+                self._inserir([novo], posicao)
+                return
+        # Depois da última carregada: se há mais páginas, ela virá com a rolagem
+        if not self._ha_mais:
+            self._inserir([novo])
+
+    def _depois_de(self, chave, registro_id):
+        """Condição das linhas posteriores a (chave, id) na ordem da lista.
+
+        NULL vem antes de qualquer valor no SQLite: no fim da ordem
+        decrescente e no começo da crescente.
+        """
+        coluna, coluna_id = self.coluna_ordem, self.coluna_id
+        if self.descendente:
+            if chave is None:
+                return f"{coluna} IS NULL AND {coluna_id} < ?", (registro_id,)
+            return f"({coluna}, {coluna_id}) < (?, ?) OR {coluna} IS NULL", (chave, registro_id)
+        if chave is None:
+            return f"{coluna} IS NOT NULL OR {coluna_id} > ?", (registro_id,)
+        return f"({coluna}, {coluna_id}) > (?, ?)", (chave, registro_id)
+
+    def _limpar(self):
+        self.tree.delete(*self.tree.get_children())
+        self.registros = {}
+        self._ultima_chave = None
+        self._ha_mais = False
+
+    def _inserir(self, registros, posicao="end"):
+        for registro in registros:
+            self.registros[registro.id] = registro
+            registro.iid = self.tree.insert("", posicao, values=self.formatar(registro.dados), tags=(registro.id,))
+
+    def _ao_rolar(self, primeiro, ultimo):
+        self._scrollbar.set(primeiro, ultimo)
+        # Perto do fim (ou lista menor que a área visível): ler a próxima página fora do callback da rolagem
+        if self._ha_mais and not self._agendado and float(ultimo) >= LIMIAR_ROLAGEM:
+            self._agendado = True
+            self.tree.after_idle(self.carregar_mais)
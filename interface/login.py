@@ -2,21 +2,28 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 import hashlib
+import sys
 
-from database import DB_NAME, criar_banco
+from database import DB_NAME, criar_banco, obter_conexao
 from interface.main_window import MainWindow
+from interface.sessao import Sessao
 
 
 class LoginWindow:
     def __init__(self, root):
         self.root = root
 
-        # Garantir banco criado e usuário admin padrão
+        # Garantir banco criado e usuário admin padrão; com o schema pela metade
+        # (migração interrompida) as telas falhariam depois, então o sistema não abre
         try:
             criar_banco()
             self._ensure_default_admin()
         except Exception as e:
-            print(f"Erro ao preparar banco de dados: {e}")
+            print(f"❌ Erro ao preparar banco de dados: {e}")
+            messagebox.showerror("Erro no banco de dados",
+                                 f"Não foi possível preparar o banco de dados:\n\n{e}\n\nO sistema será encerrado.")
+            self.root.destroy()
+            sys.exit(1)
 
         # Janela de login como Toplevel
         self.window = tk.Toplevel(self.root)
@@ -132,9 +139,8 @@ class LoginWindow:
             pass
 
     def _ensure_default_admin(self):
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        try:
+        with obter_conexao() as conn:
+            c = conn.cursor()
             c.execute("SELECT COUNT(*) FROM usuarios")
             count = c.fetchone()[0] or 0
             if count == 0:
@@ -148,8 +154,6 @@ class LoginWindow:
                 )
                 conn.commit()
                 print("Usuário admin padrão criado: admin / admin123")
-        finally:
-            conn.close()
 
     def _attempt_login(self):
         username = (self.username_var.get() or "").strip()
@@ -161,22 +165,20 @@ class LoginWindow:
 
         password_hash = hashlib.sha256(password.encode()).hexdigest()
 
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        try:
+        with obter_conexao() as conn:
+            c = conn.cursor()
             c.execute(
-                "SELECT id, role, COALESCE(nome_completo, username) FROM usuarios WHERE username = ? AND password = ?",
+                "SELECT id FROM usuarios WHERE username = ? AND password = ?",
                 (username, password_hash),
             )
             row = c.fetchone()
-        finally:
-            conn.close()
 
         if not row:
             messagebox.showerror("Login", "Usuário ou senha inválidos.")
             return
 
-        user_id, role, nome_completo = row
+        # Sessão com cadastro, perfis e permissões, compartilhada por todos os módulos
+        sessao = Sessao(row[0])
 
         # Fechar janela de login e abrir a principal
         try:
@@ -184,7 +186,7 @@ class LoginWindow:
         except Exception:
             pass
 
-        MainWindow(self.root, user_id, role, nome_completo)
+        MainWindow(self.root, sessao)
 
     def _quick_login_admin(self):
         self.username_var.set("admin")
@@ -1,22 +1,74 @@
+import queue
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
+from utils.perfil_sql import PERFIL_ATIVO, resultados_perfil, formatar_relatorio, salvar_perfil, limpar_perfil
+from utils.cotacao_validator import STATUS_EXPIRADA, iniciar_expiracao_automatica
+from utils.sugestoes import tratar_evento as atualizar_sugestoes
+from interface.tarefas import ExecutorTarefas
+
+# Intervalo (ms) em que eventos gerados por threads de segundo plano são entregues na interface
+INTERVALO_EVENTOS_THREADS_MS = 500
+# Tipo de alteração informado em data['acao'], pelo sufixo do nome do evento (demais: 'alterado')
+ACOES_EVENTO = {'created': 'criado', 'updated': 'alterado', 'deleted': 'excluido'}
+
+def mesclar_evento(pendente, event_type, data=None):
+    """
+    Juntar um evento aos já pendentes do mesmo tipo.
+
+    data['ids'] acumula os ids afetados; ids None significa "não se sabe
+    quais" (ex.: importação de planilha) e pede recarga completa. As demais
+    chaves ficam com o valor mais recente.
+    """
+    data = dict(data or {})
+    ids = data.pop('ids', None)
+    if 'id' in data:
+        ids = [data.pop('id')]
+    ids = set(ids) if ids is not None else None
+    if pendente is None:
+        pendente = {'ids': ids, 'acao': ACOES_EVENTO.get(event_type.rsplit('_', 1)[-1], 'alterado')}
+    elif pendente['ids'] is None or ids is None:
+        pendente['ids'] = None
+    else:
+        pendente['ids'] |= ids
+    pendente.update(data)
+    return pendente
 
 class MainWindow:
-    def __init__(self, root, user_id, role, nome_completo):
+    def __init__(self, root, sessao):
         self.root = root
-        self.user_id = user_id
-        self.role = role
-        self.nome_completo = nome_completo
+        # Sessão do usuário logado, compartilhada com todos os módulos
+        self.sessao = sessao
+        self.user_id = sessao.user_id
         
         # Sistema de eventos para comunicação entre módulos
         self.event_listeners = []
+        # Eventos emitidos e ainda não entregues (um por tipo, entregues no próximo ciclo ocioso do Tk)
+        self._eventos_pendentes = {}
+        self._despacho_agendado = None
+        # Eventos vindos de threads de segundo plano, entregues na thread da interface
+        self._eventos_threads = queue.Queue()
+        # Índices de sugestões dos combobox atualizados antes dos módulos
+        self.register_listener(atualizar_sugestoes)
+        # Trabalho pesado dos módulos (PDFs, planilhas, agregados) fora da thread da interface
+        self.tarefas = ExecutorTarefas(self.root, ao_ocupacao=self.mostrar_tarefas)
         
         self.setup_main_window()
         self.create_main_ui()
+        self.iniciar_rotinas()
         
         # Mostrar janela principal
         self.root.deiconify()
         
+    @property
+    def role(self):
+        """Perfis do usuário logado, sempre os da sessão (relida ao salvar o cadastro)"""
+        return self.sessao.role
+
+    @property
+    def nome_completo(self):
+        return self.sessao.nome_completo
+
     def setup_main_window(self):
         """Configurar janela principal"""
         self.root.title(f"Sistema CRM Compressores - {self.nome_completo} ({self.role})")
@@ -37,23 +89,62 @@ class MainWindow:
         
     def has_role(self, role_name: str) -> bool:
         """Verifica se o usuário possui o perfil informado (suporta múltiplos perfis separados por vírgula)."""
-        try:
-            roles = [r.strip().lower() for r in (self.role or '').split(',') if r.strip()]
-            return role_name.lower() in roles
-        except Exception:
-            return self.role == role_name
+        return self.sessao.has_role(role_name)
         
     def register_listener(self, listener_func):
         """Registrar um listener para eventos do sistema"""
         self.event_listeners.append(listener_func)
         
     def emit_event(self, event_type, data=None):
-        """Emitir um evento para todos os listeners"""
-        for listener in self.event_listeners:
+        """
+        Emitir um evento para todos os listeners.
+
+        A entrega acontece quando o Tk fica ocioso: eventos do mesmo tipo
+        emitidos até lá (ex.: uma ação em lote) chegam uma única vez, com
+        data = {'ids': ids afetados ou None, 'acao': 'criado'/'alterado'/'excluido', ...}.
+        """
+        self._eventos_pendentes[event_type] = mesclar_evento(
+            self._eventos_pendentes.get(event_type), event_type, data)
+        if self._despacho_agendado is None:
+            self._despacho_agendado = self.root.after_idle(self._despachar_eventos)
+        
+    def _despachar_eventos(self):
+        self._despacho_agendado = None
+        # Eventos emitidos pelos próprios listeners ficam para o ciclo seguinte
+        pendentes, self._eventos_pendentes = self._eventos_pendentes, {}
+        for event_type, data in pendentes.items():
+            for listener in list(self.event_listeners):
+                try:
+                    listener(event_type, data)
+                except Exception as e:
+                    print(f"Erro ao processar evento {event_type}: {e}")
+        
+    def emit_event_threadsafe(self, event_type, data=None):
+        """Emitir um evento a partir de outra thread (entregue pelo laço da interface)"""
+        self._eventos_threads.put((event_type, data))
+        
+    def _entregar_eventos_threads(self):
+        while True:
             try:
-                listener(event_type, data)
-            except Exception as e:
-                print(f"Erro ao processar evento {event_type}: {e}")
+                event_type, data = self._eventos_threads.get_nowait()
+            except queue.Empty:
+                break
+            self.emit_event(event_type, data)
+        self._entrega_agendada = self.root.after(INTERVALO_EVENTOS_THREADS_MS, self._entregar_eventos_threads)
+        
+    def iniciar_rotinas(self):
+        """Rotinas de segundo plano da sessão: expiração das cotações vencidas"""
+        self._entregar_eventos_threads()
+        self._parar_expiracao = iniciar_expiracao_automatica(
+            lambda ids: self.emit_event_threadsafe('cotacoes_expiradas', {'ids': ids, 'status': STATUS_EXPIRADA}))
+        
+    def encerrar_rotinas(self):
+        self._parar_expiracao.set()
+        self.tarefas.encerrar()
+        if self._despacho_agendado is not None:
+            self.root.after_cancel(self._despacho_agendado)
+            self._despacho_agendado = None
+        self.root.after_cancel(self._entrega_agendada)
         
     def create_main_ui(self):
         # Frame superior com menu
@@ -104,41 +195,131 @@ class MainWindow:
                               command=self.logout)
         logout_btn.pack(anchor="e", pady=(5, 0))
         
+        # Indicador das tarefas em segundo plano (oculto enquanto não há nenhuma)
+        self.tarefas_frame = tk.Frame(left_frame, bg='#1e293b')
+        self.tarefas_label = tk.Label(self.tarefas_frame, font=('Arial', 9), bg='#1e293b', fg='#fbbf24')
+        self.tarefas_label.pack(side="left")
+        tk.Button(self.tarefas_frame, text="Cancelar", font=('Arial', 8), bg='#64748b', fg='white',
+                  relief='flat', cursor='hand2',
+                  command=self.tarefas.cancelar_todas).pack(side="left", padx=(10, 0))
+        
+        # Relatório do perfil de consultas (apenas com CRM_PERFIL_SQL=1)
+        if PERFIL_ATIVO:
+            perfil_btn = tk.Button(right_frame,
+                                   text="Perfil SQL",
+                                   font=('Arial', 9),
+                                   bg='#64748b',
+                                   fg='white',
+                                   relief='flat',
+                                   cursor='hand2',
+                                   command=self.mostrar_perfil_sql)
+            perfil_btn.pack(anchor="e", pady=(5, 0))
+        
+    def mostrar_tarefas(self, descricoes, progresso=None):
+        """Mostrar no cabeçalho as tarefas em andamento (e o progresso mais recente)"""
+        if not hasattr(self, 'tarefas_frame'):
+            return
+        if not descricoes:
+            self.tarefas_frame.pack_forget()
+            return
+        texto = "⏳ " + ", ".join(descricoes)
+        if progresso:
+            texto += f" — {progresso}"
+        self.tarefas_label.config(text=texto)
+        self.tarefas_frame.pack(anchor="w")
+        
+    def mostrar_perfil_sql(self):
+        """Janela com as consultas mais custosas da sessão, seus planos e varreduras completas"""
+        janela = tk.Toplevel(self.root)
+        janela.title("Perfil das consultas SQL")
+        janela.geometry("1000x600")
+        
+        texto = tk.Text(janela, font=('Courier', 9), wrap=tk.NONE)
+        scroll = ttk.Scrollbar(janela, orient="vertical", command=texto.yview)
+        texto.configure(yscrollcommand=scroll.set)
+        
+        def atualizar():
+            texto.delete('1.0', tk.END)
+            texto.insert('1.0', formatar_relatorio(resultados_perfil()))
+        
+        def salvar():
+            messagebox.showinfo("Perfil SQL", f"Perfil salvo em:\n{salvar_perfil()}", parent=janela)
+        
+        def limpar():
+            limpar_perfil()
+            atualizar()
+        
+        botoes = tk.Frame(janela)
+        botoes.pack(side="bottom", fill="x", padx=10, pady=5)
+        tk.Button(botoes, text="Atualizar", command=atualizar).pack(side="left")
+        tk.Button(botoes, text="Salvar JSON", command=salvar).pack(side="left", padx=5)
+        tk.Button(botoes, text="Limpar", command=limpar).pack(side="left")
+        scroll.pack(side="right", fill="y")
+        texto.pack(fill="both", expand=True)
+        atualizar()
+        
     def create_modules(self):
-        """Criar todos os módulos do sistema com importação isolada e tolerante a falhas"""
-        def add_module(tab_text, module_path, class_name):
+        """
+        Registrar as abas do sistema. Cada módulo é importado e construído só
+        quando a aba é aberta pela primeira vez (o Dashboard, aba inicial, já
+        no login). Ao ser construído ele lê os dados atuais, então os eventos
+        emitidos antes disso não lhe são entregues.
+        """
+        # Abas registradas, pelo nome do frame no notebook
+        self.abas = {}
+
+        def add_module(tab_text, module_path, class_name, attribute):
             frame = tk.Frame(self.notebook)
             self.notebook.add(frame, text=tab_text)
-            try:
-                mod = __import__(module_path, fromlist=[class_name])
-                cls = getattr(mod, class_name)
-                instance = cls(frame, self.user_id, self.role, self)
-                return instance
-            except Exception as e:
-                messagebox.showerror("Erro ao carregar módulo", f"Falha ao carregar {tab_text}:\n\n{e}")
-                return None
+            self.abas[str(frame)] = {'titulo': tab_text, 'modulo': module_path, 'classe': class_name,
+                                     'atributo': attribute, 'frame': frame, 'construida': False}
+            setattr(self, attribute, None)
 
         # Dashboard
-        self.dashboard_module = add_module("📊 Dashboard", "interface.modules.dashboard", "DashboardModule")
+        add_module("📊 Dashboard", "interface.modules.dashboard", "DashboardModule", 'dashboard_module')
         # Clientes
-        self.clientes_module = add_module("👥 Clientes", "interface.modules.clientes", "ClientesModule")
+        add_module("👥 Clientes", "interface.modules.clientes", "ClientesModule", 'clientes_module')
         # Produtos
-        self.produtos_module = add_module("📦 Produtos", "interface.modules.produtos", "ProdutosModule")
+        add_module("📦 Produtos", "interface.modules.produtos", "ProdutosModule", 'produtos_module')
         # Compras (Cotações de compra)
-        self.cotacoes_module = add_module("💰 Compras", "interface.modules.cotacoes", "CotacoesModule")
+        add_module("💰 Compras", "interface.modules.cotacoes", "CotacoesModule", 'cotacoes_module')
         # Locações (aba separada - módulo independente)
-        self.locacoes_module = add_module("📄 Locações", "interface.modules.locacoes_full", "LocacoesModule")
+        add_module("📄 Locações", "interface.modules.locacoes_full", "LocacoesModule", 'locacoes_module')
         # Relatórios
-        self.relatorios_module = add_module("📋 Relatórios", "interface.modules.relatorios", "RelatoriosModule")
+        add_module("📋 Relatórios", "interface.modules.relatorios", "RelatoriosModule", 'relatorios_module')
         # Consultas
         # Usuários e Permissões (apenas admin)
         if self.has_role('admin'):
-            self.usuarios_module = add_module("👤 Usuários", "interface.modules.usuarios", "UsuariosModule")
-            self.permissoes_module = add_module("🔐 Permissões", "interface.modules.permissoes", "PermissoesModule")
+            add_module("👤 Usuários", "interface.modules.usuarios", "UsuariosModule", 'usuarios_module')
+            add_module("🔐 Permissões", "interface.modules.permissoes", "PermissoesModule", 'permissoes_module')
+
+        self.notebook.bind('<<NotebookTabChanged>>', lambda event: self.construir_aba(self.notebook.select()))
+        self.construir_aba(self.notebook.select())
+
+    def construir_aba(self, aba_id):
+        """Importar e construir o módulo da aba, se ainda não foi; devolve a instância (ou None)"""
+        aba = self.abas.get(str(aba_id))
+        if aba is None:
+            return None
+        if not aba['construida']:
+            # Marcada antes: uma falha não é repetida a cada troca de aba
+            aba['construida'] = True
+            inicio = time.perf_counter()
+            try:
+                mod = __import__(aba['modulo'], fromlist=[aba['classe']])
+                cls = getattr(mod, aba['classe'])
+                instance = cls(aba['frame'], self.user_id, self.role, self)
+            except Exception as e:
+                messagebox.showerror("Erro ao carregar módulo", f"Falha ao carregar {aba['titulo']}:\n\n{e}")
+                instance = None
+            print(f"📑 Aba {aba['titulo']} construída em {(time.perf_counter() - inicio) * 1000:.0f} ms")
+            setattr(self, aba['atributo'], instance)
+        return getattr(self, aba['atributo'])
         
     def logout(self):
         """Fazer logout e voltar para tela de login"""
         if messagebox.askyesno("Logout", "Tem certeza que deseja sair?"):
+            self.encerrar_rotinas()
             self.root.withdraw()
             
             # Criar nova janela de login
@@ -1,6 +1,11 @@
+import time
 import tkinter as tk
 from tkinter import ttk
 
+from interface.lista_paginada import ListaPaginada
+from interface.tarefas import ExecutorTarefas
+from utils.sugestoes import LIMITE_SUGESTOES
+
 class BaseModule:
     """Classe base para todos os módulos do sistema"""
     
@@ -9,6 +14,8 @@ class BaseModule:
         self.user_id = user_id
         self.role = role
         self.main_window = main_window
+        # Sessão compartilhada (dados, perfis e permissões do usuário logado)
+        self.sessao = main_window.sessao
         
         # Registrar para receber eventos
         if hasattr(main_window, 'register_listener'):
@@ -18,6 +25,14 @@ class BaseModule:
         self.frame = tk.Frame(parent, bg='#f8fafc')
         self.frame.pack(fill="both", expand=True)
         
+        # Executor de tarefas em segundo plano (compartilhado pela MainWindow)
+        self.tarefas = getattr(main_window, 'tarefas', None) or ExecutorTarefas(self.frame)
+        self._tarefas_ativas = 0
+        
+        # Seções com construção adiada (nome -> (frame, construir)) e tempo de montagem (ms) das já construídas
+        self._secoes_adiadas = {}
+        self.tempos_secoes = {}
+        
         # Configurar UI específica do módulo
         self.setup_ui()
         
@@ -34,13 +49,135 @@ class BaseModule:
         if hasattr(self.main_window, 'emit_event'):
             self.main_window.emit_event(event_type, data)
     
+    def executar_em_segundo_plano(self, funcao, *args, descricao="", ao_concluir=None, ao_erro=None,
+                                  ao_progresso=None, **kwargs):
+        """Rodar funcao(tarefa, *args, **kwargs) fora da thread da interface.
+
+        funcao não pode tocar em widgets: leia os campos antes e atualize a
+        tela em ao_concluir(resultado), que roda na thread da interface. O
+        cursor do módulo fica em espera até o fim; sem ao_progresso, o
+        progresso (tarefa.progresso(...)) aparece no cabeçalho da janela.
+        Retorna a Tarefa, que pode ser cancelada.
+        """
+        if ao_erro is None:
+            ao_erro = lambda erro: self.show_error(f"Erro em {descricao or 'tarefa'}: {erro}")
+        if ao_progresso is None and hasattr(self.main_window, 'mostrar_tarefas'):
+            ao_progresso = lambda *valores: self.main_window.mostrar_tarefas(
+                [tarefa.descricao for tarefa in self.tarefas.em_andamento()], " ".join(map(str, valores)))
+        self._tarefas_ativas += 1
+        self.frame.config(cursor='watch')
+        return self.tarefas.executar(funcao, *args, descricao=descricao, ao_concluir=ao_concluir, ao_erro=ao_erro,
+                                     ao_progresso=ao_progresso, ao_fim=self._fim_tarefa, **kwargs)
+    
+    def _fim_tarefa(self):
+        self._tarefas_ativas -= 1
+        if not self._tarefas_ativas:
+            self.frame.config(cursor='')
+    
+    def gerar_pdf_em_segundo_plano(self, gerador, *args, **kwargs):
+        """Rodar um gerador de PDF (que devolve (sucesso, caminho ou erro)) e avisar quando terminar"""
+        def concluir(resultado):
+            sucesso, resultado = resultado
+            if sucesso:
+                self.show_success(f"PDF gerado com sucesso!\nLocal: {resultado}")
+            else:
+                self.show_error(f"Erro ao gerar PDF: {resultado}")
+        return self.executar_em_segundo_plano(
+            lambda tarefa: gerador(*args, ao_progresso=lambda pagina: tarefa.progresso(f"página {pagina}"), **kwargs),
+            descricao="Gerando PDF", ao_concluir=concluir)
+    
+    def atualizar_status_na_lista(self, tree, ids, status):
+        """Trocar a coluna status das linhas afetadas (tag = id), sem recarregar a lista"""
+        ids = {str(i) for i in ids}
+        for item in tree.get_children():
+            tags = tree.item(item, 'tags')
+            if tags and str(tags[0]) in ids:
+                tree.set(item, "status", status)
+    
+    def criar_lista_paginada(self, tree, scrollbar, colunas, origem, ordem, formatar, **opcoes):
+        """Ligar a Treeview a uma ListaPaginada (páginas lidas conforme a rolagem)"""
+        return ListaPaginada(tree, scrollbar, colunas, origem, ordem, formatar, ao_erro=self.show_error, **opcoes)
+    
+    def configurar_sugestoes(self, combo, obter_indice, limite=LIMITE_SUGESTOES):
+        """Filtrar as opções do combobox pelo texto digitado, mostrando até `limite` sugestões.
+
+        obter_indice() devolve o IndiceSugestoes atual (ou None), consultado a
+        cada tecla e ao abrir a lista.
+        """
+        def filtrar(event=None):
+            if event is not None and event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab'):
+                return
+            indice = obter_indice()
+            combo['values'] = indice.buscar(combo.get(), limite) if indice is not None else []
+        combo.bind('<KeyRelease>', filtrar, add='+')
+        combo.configure(postcommand=filtrar)
+        return filtrar
+    
+    def adiar_construcao(self, frame, nome, construir):
+        """Preencher `frame` com construir(frame) só quando ele aparecer pela primeira vez.
+
+        Para abas de notebooks internos e seções pouco usadas: o frame entra
+        vazio no layout e é construído no primeiro <Map> (aba selecionada,
+        seção mostrada). Quem precisar dos widgets antes disso chama
+        construir_secao(nome). Os dados da seção devem ficar fora dos widgets
+        (variáveis Tk, listas), para que a construção os exiba ao montar.
+        """
+        self._secoes_adiadas[nome] = (frame, construir)
+        frame.bind('<Map>', lambda event: self.construir_secao(nome, frame), add='+')
+        return frame
+    
+    def construir_secao(self, nome, frame=None):
+        """Construir agora a seção adiada `nome`, se ainda não foi, e registrar quanto tempo levou"""
+        pendente = self._secoes_adiadas.get(nome)
+        # O frame confere que o <Map> é da seção atual (um nome pode ser registrado de novo)
+        if pendente is None or (frame is not None and pendente[0] is not frame):
+            return
+        del self._secoes_adiadas[nome]
+        frame, construir = pendente
+        inicio = time.perf_counter()
+        construir(frame)
+        self.tempos_secoes[nome] = (time.perf_counter() - inicio) * 1000
+        print(f"🧩 {type(self).__name__}: seção {nome} construída em {self.tempos_secoes[nome]:.0f} ms")
+    
+    def secao_pendente(self, nome):
+        """Se a seção foi adiada e ainda não foi construída (seus widgets ainda não existem)"""
+        return nome in self._secoes_adiadas
+    
+    def descartar_secao(self, nome):
+        """Esquecer uma seção adiada que saiu do layout sem ter sido construída"""
+        self._secoes_adiadas.pop(nome, None)
+    
+    def criar_secao_recolhivel(self, parent, titulo, nome, construir, bg='white'):
+        """Seção com cabeçalho clicável, inicialmente recolhida; o conteúdo é construído ao expandir.
+
+        Devolve (frame da seção, StringVar do título), para o módulo poder
+        atualizar o título (ex.: quantidade de itens) sem construir a seção.
+        """
+        secao = tk.Frame(parent, bg=bg)
+        titulo_var = tk.StringVar(value=titulo)
+        cabecalho = tk.Frame(secao, bg=bg, cursor='hand2')
+        cabecalho.pack(fill="x", padx=12, pady=(8, 0))
+        seta = tk.Label(cabecalho, text="▸", font=("Arial", 12, "bold"), bg=bg)
+        seta.pack(side="left")
+        rotulo = tk.Label(cabecalho, textvariable=titulo_var, font=("Arial", 12, "bold"), bg=bg, anchor="w")
+        rotulo.pack(side="left", padx=(5, 0))
+        conteudo = tk.Frame(secao, bg=bg)
+        self.adiar_construcao(conteudo, nome, construir)
+        
+        def alternar(event=None):
+            if conteudo.winfo_manager():
+                conteudo.pack_forget()
+                seta.config(text="▸")
+            else:
+                conteudo.pack(fill="both", expand=True)
+                seta.config(text="▾")
+        for widget in (cabecalho, seta, rotulo):
+            widget.bind('<Button-1>', alternar)
+        return secao, titulo_var
+    
     def has_role(self, role_name: str) -> bool:
         """Verifica se o usuário possui o perfil informado (suporta múltiplos perfis separados por vírgula)."""
-        try:
-            roles = [r.strip().lower() for r in (self.role or '').split(',') if r.strip()]
-            return role_name.lower() in roles
-        except Exception:
-            return self.role == role_name
+        return self.sessao.has_role(role_name)
     
     def create_section_frame(self, parent, title, padx=10, pady=10):
         """Criar frame de seção com título"""
@@ -86,6 +223,52 @@ class BaseModule:
         
         return search_frame, search_var
     
+    def importar_planilha(self, tipo, ao_concluir=None):
+        """Escolher um .csv/.xlsx e importar em lote (tipo: clientes, contatos ou produtos).
+        A importação roda em segundo plano; ao_concluir(resultado) é chamado depois do resumo."""
+        from tkinter import filedialog
+        from utils.importacao import IMPORTADORES, resumo_importacao
+        
+        caminho = filedialog.askopenfilename(
+            title=f"Importar {tipo}",
+            filetypes=[("Planilhas", "*.csv *.xlsx"), ("CSV", "*.csv"), ("Excel", "*.xlsx")])
+        if not caminho:
+            return None
+        
+        def concluir(resultado):
+            self.show_info("Importação concluída", resumo_importacao(resultado))
+            if ao_concluir:
+                ao_concluir(resultado)
+        
+        return self.executar_em_segundo_plano(
+            lambda tarefa: IMPORTADORES[tipo](caminho), descricao=f"Importando {tipo}", ao_concluir=concluir,
+            ao_erro=lambda erro: self.show_error(f"Erro ao importar {tipo}: {erro}"))
+    
+    def exportar_planilha(self, tipo):
+        """Escolher o destino e exportar para .xlsx (tipo: cotacoes, locacoes ou relatorios), em segundo plano"""
+        from datetime import datetime
+        from tkinter import filedialog
+        
+        caminho = filedialog.asksaveasfilename(
+            title=f"Exportar {tipo}",
+            defaultextension=".xlsx",
+            initialfile=f"{tipo}_{datetime.now().strftime('%Y%m%d')}.xlsx",
+            filetypes=[("Excel", "*.xlsx")])
+        if not caminho:
+            return
+        
+        try:
+            from utils.exportacao import EXPORTADORES, resumo_exportacao
+        except ImportError as e:
+            self.show_error(f"Erro ao exportar {tipo}: {e}")
+            return
+        
+        return self.executar_em_segundo_plano(
+            lambda tarefa: EXPORTADORES[tipo](caminho, ao_progresso=tarefa.progresso),
+            descricao=f"Exportando {tipo}",
+            ao_concluir=lambda totais: self.show_info("Exportação concluída", resumo_exportacao(totais, caminho)),
+            ao_erro=lambda erro: self.show_error(f"Erro ao exportar {tipo}: {erro}"))
+    
     def show_success(self, message):
         """Mostrar mensagem de sucesso"""
         from tkinter import messagebox
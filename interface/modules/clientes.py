@@ -3,7 +3,8 @@ from tkinter import ttk, messagebox
 import sqlite3
 from datetime import datetime
 from .base_module import BaseModule
-from database import DB_NAME
+from database import DB_NAME, obter_conexao, obter_conexao_leitura, campos_busca_cliente, esquemas_historico
+from utils.busca import buscar_clientes_texto
 from utils.formatters import format_cnpj, format_phone, validate_cnpj, validate_email
 import tkinter.scrolledtext as scrolledtext
 
@@ -12,6 +13,11 @@ class ClientesModule(BaseModule):
         # Inicializar variáveis primeiro
         self.current_cliente_id = None
         self.contatos_data = []
+        self.contato_nome_var = tk.StringVar()
+        self.contato_cargo_var = tk.StringVar()
+        self.contato_telefone_var = tk.StringVar()
+        self.contato_email_var = tk.StringVar()
+        self.contato_observacoes_var = tk.StringVar()
         
         # Container principal - usando toda a tela
         container = tk.Frame(self.frame, bg='#f8fafc')
@@ -105,10 +111,10 @@ class ClientesModule(BaseModule):
         tk.Label(card4_5, text="📝 Observações", font=("Arial", 12, "bold"), bg='white', anchor="w").pack(anchor="w", padx=12, pady=(8, 0))
         self.create_observacoes_section(card4_5)
 
-        card5 = tk.Frame(form_inner, bg='white', bd=0, relief='ridge', highlightthickness=0)
+        # Contatos: seção recolhida, montada na primeira vez que é expandida
+        card5, self.contatos_titulo_var = self.criar_secao_recolhivel(
+            form_inner, "📇 Contatos do Cliente", 'contatos', self.create_contatos_integrados_section)
         card5.pack(fill="both", expand=True)
-        tk.Label(card5, text="📇 Contatos do Cliente", font=("Arial", 12, "bold"), bg='white', anchor="w").pack(anchor="w", padx=12, pady=(8, 0))
-        self.create_contatos_integrados_section(card5)
 
         # Botões já reservados no rodapé
 
@@ -150,6 +156,10 @@ class ClientesModule(BaseModule):
 
         lista_scrollbar = ttk.Scrollbar(lista_inner, orient="vertical", command=self.clientes_tree.yview)
         self.clientes_tree.configure(yscrollcommand=lista_scrollbar.set)
+        self.lista_clientes = self.criar_lista_paginada(
+            self.clientes_tree, lista_scrollbar,
+            "id, nome, cnpj, cidade, telefone, email", "clientes", ("nome", "id"),
+            self._valores_cliente)
 
         self.clientes_tree.pack(side="left", fill="both", expand=True)
         lista_scrollbar.pack(side="right", fill="y")
@@ -164,6 +174,16 @@ class ClientesModule(BaseModule):
         excluir_btn = self.create_button(lista_buttons, "Excluir", self.excluir_cliente, bg='#dc2626')
         excluir_btn.pack(side="left")
 
+        importar_contatos_btn = self.create_button(lista_buttons, "Importar Contatos",
+                                                   lambda: self.importar_cadastros('contatos'),
+                                                   bg='#e2e8f0', fg='#475569')
+        importar_contatos_btn.pack(side="right")
+
+        importar_btn = self.create_button(lista_buttons, "Importar Clientes",
+                                          lambda: self.importar_cadastros('clientes'),
+                                          bg='#e2e8f0', fg='#475569')
+        importar_btn.pack(side="right", padx=(0, 10))
+
         # Carregar dados
         self.carregar_clientes()
         
@@ -621,104 +641,53 @@ class ClientesModule(BaseModule):
         self.produtos_text.delete('1.0', tk.END)
         
         if self.current_cliente_id:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            # Consultas analíticas: cópia de leitura, quando ativada (CRM_SNAPSHOT_LEITURA=1)
+            with obter_conexao_leitura() as conn:
+                c = conn.cursor()
             
-            try:
-                # Estatísticas detalhadas
-                c.execute("SELECT COUNT(*) FROM cotacoes WHERE cliente_id = ?", (self.current_cliente_id,))
-                total_cotacoes = c.fetchone()[0]
-                
-                c.execute("SELECT COUNT(*) FROM cotacoes WHERE cliente_id = ? AND status = 'Aprovada'", (self.current_cliente_id,))
-                cotacoes_aprovadas = c.fetchone()[0]
-                
-                c.execute("SELECT COUNT(*) FROM cotacoes WHERE cliente_id = ? AND status = 'Rejeitada'", (self.current_cliente_id,))
-                cotacoes_rejeitadas = c.fetchone()[0]
-                
-                c.execute("SELECT COUNT(*) FROM cotacoes WHERE cliente_id = ? AND status = 'Em Aberto'", (self.current_cliente_id,))
-                cotacoes_aberto = c.fetchone()[0]
-                
-                c.execute("SELECT SUM(valor_total) FROM cotacoes WHERE cliente_id = ? AND status = 'Aprovada'", (self.current_cliente_id,))
-                faturamento = c.fetchone()[0] or 0
-                
-                c.execute("SELECT AVG(valor_total) FROM cotacoes WHERE cliente_id = ? AND valor_total > 0", (self.current_cliente_id,))
-                media_valor = c.fetchone()[0] or 0
+                try:
+                    # Estatísticas detalhadas (linha mantida por triggers em cliente_stats)
+                    stats = self._carregar_stats_cliente(c)
+                    total_cotacoes = stats['total_cotacoes']
+                    cotacoes_aprovadas = stats['aprovadas']
                 
-                # Tratar valores None
-                faturamento = faturamento or 0
-                media_valor = media_valor or 0
+                    # Taxa de conversão
+                    taxa_conversao = (cotacoes_aprovadas / total_cotacoes * 100) if total_cotacoes > 0 else 0
+                    media_valor = (stats['soma_valores'] / stats['qtd_valores']) if stats['qtd_valores'] > 0 else 0
                 
-                c.execute("SELECT COUNT(*) FROM contatos WHERE cliente_id = ?", (self.current_cliente_id,))
-                total_contatos = c.fetchone()[0]
-                
-                # Taxa de conversão
-                taxa_conversao = (cotacoes_aprovadas / total_cotacoes * 100) if total_cotacoes > 0 else 0
-                
-                stats_info = f"""Total de Cotações: {total_cotacoes}
+                    stats_info = f"""Total de Cotações: {total_cotacoes}
 Aprovadas: {cotacoes_aprovadas} ({taxa_conversao:.1f}%)
-Rejeitadas: {cotacoes_rejeitadas}
-Em Aberto: {cotacoes_aberto}
-Faturamento Total: R$ {faturamento:,.2f}
+Rejeitadas: {stats['rejeitadas']}
+Em Aberto: {stats['em_aberto']}
+Faturamento Total: R$ {stats['valor_aprovado']:,.2f}
 Média por Cotação: R$ {media_valor:,.2f}
-Contatos Cadastrados: {total_contatos}"""
-                
-                self.stats_detalhadas_text.insert('1.0', stats_info)
+Contatos Cadastrados: {stats['total_contatos']}"""
                 
-                # Histórico completo
-                c.execute("""
-                    SELECT numero_proposta, data_criacao, status, valor_total, 
-                           responsavel_id, data_validade
-                    FROM cotacoes 
-                    WHERE cliente_id = ? 
-                    ORDER BY data_criacao DESC 
-                    LIMIT 10
-                """, (self.current_cliente_id,))
+                    self.stats_detalhadas_text.insert('1.0', stats_info)
                 
-                historico = c.fetchall()
-                if historico:
-                    history_info = ""
-                    for cotacao in historico:
-                        numero, data, status, valor, resp_id, validade = cotacao
-                        
-                        # Buscar nome do responsável
-                        c.execute("SELECT nome_completo FROM usuarios WHERE id = ?", (resp_id,))
-                        resp_nome = c.fetchone()
-                        resp_nome = resp_nome[0] if resp_nome else "N/A"
+                    # Histórico completo
+                    historico = self._carregar_historico_cliente(c, 10)
+                    if historico:
+                        history_info = ""
+                        for cotacao in historico:
+                            numero, data, status, valor, resp_nome, validade = cotacao
                         
-                        valor = valor or 0  # Tratar valor None
-                        history_info += f"📋 {numero}\n"
-                        history_info += f"   Data: {data}\n"
-                        history_info += f"   Status: {status}\n"
-                        history_info += f"   Valor: R$ {valor:,.2f}\n"
-                        history_info += f"   Responsável: {resp_nome}\n"
-                        history_info += f"   Validade: {validade}\n\n"
-                else:
-                    history_info = "Nenhuma cotação encontrada."
+                            valor = valor or 0  # Tratar valor None
+                            history_info += f"📋 {numero}\n"
+                            history_info += f"   Data: {data}\n"
+                            history_info += f"   Status: {status}\n"
+                            history_info += f"   Valor: R$ {valor:,.2f}\n"
+                            history_info += f"   Responsável: {resp_nome or 'N/A'}\n"
+                            history_info += f"   Validade: {validade}\n\n"
+                    else:
+                        history_info = "Nenhuma cotação encontrada."
                 
-                self.history_completo_text.insert('1.0', history_info)
+                    self.history_completo_text.insert('1.0', history_info)
                 
-                # Análise financeira
-                c.execute("""
-                    SELECT 
-                        SUM(CASE WHEN status = 'Aprovada' THEN valor_total ELSE 0 END) as aprovado,
-                        SUM(CASE WHEN status = 'Em Aberto' THEN valor_total ELSE 0 END) as em_aberto,
-                        SUM(CASE WHEN status = 'Rejeitada' THEN valor_total ELSE 0 END) as rejeitado
-                    FROM cotacoes 
-                    WHERE cliente_id = ?
-                """, (self.current_cliente_id,))
-                
-                finance_data = c.fetchone()
-                if finance_data:
-                    aprovado, em_aberto, rejeitado = finance_data
-                    aprovado = aprovado or 0
-                    em_aberto = em_aberto or 0
-                    rejeitado = rejeitado or 0
-                    
-                    # Garantir que são números
-                    aprovado = float(aprovado) if aprovado is not None else 0
-                    em_aberto = float(em_aberto) if em_aberto is not None else 0
-                    rejeitado = float(rejeitado) if rejeitado is not None else 0
-                    
+                    # Análise financeira
+                    aprovado = stats['valor_aprovado']
+                    em_aberto = stats['valor_em_aberto']
+                    rejeitado = stats['valor_rejeitado']
                     finance_info = f"""Valor Aprovado: R$ {aprovado:,.2f}
 Valor em Aberto: R$ {em_aberto:,.2f}
 Valor Rejeitado: R$ {rejeitado:,.2f}
@@ -726,43 +695,74 @@ Total Movimentado: R$ {aprovado + em_aberto + rejeitado:,.2f}
 
 Potencial de Faturamento:
 - Em Aberto: R$ {em_aberto:,.2f}"""
-                    
+                
                     self.finance_text.insert('1.0', finance_info)
                 
-                # Produtos mais vendidos
-                c.execute("""
-                    SELECT ic.item_nome, COUNT(*) as quantidade, SUM(ic.valor_total_item) as valor_total
-                    FROM itens_cotacao ic
-                    JOIN cotacoes c ON ic.cotacao_id = c.id
-                    WHERE c.cliente_id = ? AND c.status = 'Aprovada'
-                    GROUP BY ic.item_nome
-                    ORDER BY quantidade DESC, valor_total DESC
-                    LIMIT 5
-                """, (self.current_cliente_id,))
+                    # Produtos mais vendidos
+                    # Um SELECT por banco (principal e arquivo) para cada um usar seus índices
+                    esquemas = esquemas_historico(conn)
+                    vendidos = " UNION ALL ".join(f"""
+                        SELECT ic.item_nome, ic.valor_total_item
+                        FROM {esquema}.cotacoes c
+                        JOIN {esquema}.itens_cotacao ic ON ic.cotacao_id = c.id
+                        WHERE c.cliente_id = ? AND c.status = 'Aprovada'""" for esquema in esquemas)
+                    c.execute(f"""
+                        SELECT item_nome, COUNT(*) as quantidade, SUM(valor_total_item) as valor_total
+                        FROM ({vendidos})
+                        GROUP BY item_nome
+                        ORDER BY quantidade DESC, valor_total DESC
+                        LIMIT 5
+                    """, (self.current_cliente_id,) * len(esquemas))
                 
-                produtos = c.fetchall()
-                if produtos:
-                    produtos_info = ""
-                    for produto in produtos:
-                        nome, qtd, valor = produto
-                        produtos_info += f"📦 {nome}\n"
-                        produtos_info += f"   Qtd: {qtd}\n"
-                        produtos_info += f"   Valor: R$ {valor:,.2f}\n\n"
-                else:
-                    produtos_info = "Nenhum produto vendido ainda."
+                    produtos = c.fetchall()
+                    if produtos:
+                        produtos_info = ""
+                        for produto in produtos:
+                            nome, qtd, valor = produto
+                            produtos_info += f"📦 {nome}\n"
+                            produtos_info += f"   Qtd: {qtd}\n"
+                            produtos_info += f"   Valor: R$ {valor:,.2f}\n\n"
+                    else:
+                        produtos_info = "Nenhum produto vendido ainda."
                 
-                self.produtos_text.insert('1.0', produtos_info)
+                    self.produtos_text.insert('1.0', produtos_info)
                 
-            except sqlite3.Error as e:
-                self.stats_detalhadas_text.insert('1.0', f"Erro ao carregar dados: {e}")
-            finally:
-                conn.close()
+                except sqlite3.Error as e:
+                    self.stats_detalhadas_text.insert('1.0', f"Erro ao carregar dados: {e}")
         else:
             self.stats_detalhadas_text.insert('1.0', "Selecione um cliente para ver as estatísticas.")
             self.history_completo_text.insert('1.0', "Selecione um cliente para ver o histórico.")
             self.finance_text.insert('1.0', "Selecione um cliente para ver a análise financeira.")
             self.produtos_text.insert('1.0', "Selecione um cliente para ver os produtos.")
         
+    def _carregar_stats_cliente(self, c):
+        """Estatísticas do cliente atual a partir da tabela cliente_stats (zeros se não houver linha)"""
+        c.execute("""
+            SELECT total_cotacoes, aprovadas, rejeitadas, em_aberto,
+                   valor_aprovado, valor_em_aberto, valor_rejeitado,
+                   soma_valores, qtd_valores, total_contatos, ultima_cotacao
+            FROM cliente_stats
+            WHERE cliente_id = ?
+        """, (self.current_cliente_id,))
+        row = c.fetchone()
+        colunas = [d[0] for d in c.description]
+        if row is None:
+            return {**dict.fromkeys(colunas, 0), 'ultima_cotacao': None}
+        return dict(zip(colunas, row))
+        
+    def _carregar_historico_cliente(self, c, limite):
+        """Últimas cotações do cliente atual (inclusive arquivadas) com o nome do responsável"""
+        c.execute("""
+            SELECT ct.numero_proposta, ct.data_criacao, ct.status, ct.valor_total,
+                   u.nome_completo, ct.data_validade
+            FROM cotacoes_todas ct
+            LEFT JOIN usuarios u ON u.id = ct.responsavel_id
+            WHERE ct.cliente_id = ?
+            ORDER BY ct.data_criacao DESC
+            LIMIT ?
+        """, (self.current_cliente_id, limite))
+        return c.fetchall()
+        
     def update_cliente_dashboard(self):
         """Atualizar dados do dashboard"""
         if not hasattr(self, 'stats_text') or not hasattr(self, 'history_text'):
@@ -774,59 +774,40 @@ Potencial de Faturamento:
         
         if self.current_cliente_id:
             # Buscar estatísticas do cliente
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            with obter_conexao() as conn:
+                c = conn.cursor()
             
-            try:
-                # Estatísticas
-                c.execute("SELECT COUNT(*) FROM cotacoes WHERE cliente_id = ?", (self.current_cliente_id,))
-                total_cotacoes = c.fetchone()[0]
-                
-                c.execute("SELECT COUNT(*) FROM cotacoes WHERE cliente_id = ? AND status = 'Aprovada'", (self.current_cliente_id,))
-                cotacoes_aprovadas = c.fetchone()[0]
+                try:
+                    # Estatísticas
+                    stats = self._carregar_stats_cliente(c)
                 
-                c.execute("SELECT SUM(valor_total) FROM cotacoes WHERE cliente_id = ? AND status = 'Aprovada'", (self.current_cliente_id,))
-                faturamento = c.fetchone()[0] or 0
+                    # Atualizar estatísticas
+                    stats_info = f"""Total de Cotações: {stats['total_cotacoes']}
+Cotações Aprovadas: {stats['aprovadas']}
+Faturamento Total: R$ {stats['valor_aprovado']:,.2f}
+Contatos Cadastrados: {stats['total_contatos']}"""
                 
-                c.execute("SELECT COUNT(*) FROM contatos WHERE cliente_id = ?", (self.current_cliente_id,))
-                total_contatos = c.fetchone()[0]
+                    self.stats_text.insert('1.0', stats_info)
                 
-                # Atualizar estatísticas
-                stats_info = f"""Total de Cotações: {total_cotacoes}
-Cotações Aprovadas: {cotacoes_aprovadas}
-Faturamento Total: R$ {faturamento:,.2f}
-Contatos Cadastrados: {total_contatos}"""
+                    # Histórico recente
+                    historico = self._carregar_historico_cliente(c, 5)
+                    if historico:
+                        history_info = ""
+                        for cotacao in historico:
+                            numero, data, status, valor = cotacao[:4]
+                            valor = valor or 0
+                            history_info += f"📋 {numero}\n"
+                            history_info += f"   Data: {data}\n"
+                            history_info += f"   Status: {status}\n"
+                            history_info += f"   Valor: R$ {valor:,.2f}\n\n"
+                    else:
+                        history_info = "Nenhuma cotação encontrada."
                 
-                self.stats_text.insert('1.0', stats_info)
+                    self.history_text.insert('1.0', history_info)
                 
-                # Histórico recente
-                c.execute("""
-                    SELECT numero_proposta, data_criacao, status, valor_total 
-                    FROM cotacoes 
-                    WHERE cliente_id = ? 
-                    ORDER BY data_criacao DESC 
-                    LIMIT 5
-                """, (self.current_cliente_id,))
-                
-                historico = c.fetchall()
-                if historico:
-                    history_info = ""
-                    for cotacao in historico:
-                        numero, data, status, valor = cotacao
-                        history_info += f"📋 {numero}\n"
-                        history_info += f"   Data: {data}\n"
-                        history_info += f"   Status: {status}\n"
-                        history_info += f"   Valor: R$ {valor:,.2f}\n\n"
-                else:
-                    history_info = "Nenhuma cotação encontrada."
-                
-                self.history_text.insert('1.0', history_info)
-                
-            except sqlite3.Error as e:
-                self.stats_text.insert('1.0', f"Erro ao carregar dados: {e}")
-                self.history_text.insert('1.0', "Erro ao carregar histórico.")
-            finally:
-                conn.close()
+                except sqlite3.Error as e:
+                    self.stats_text.insert('1.0', f"Erro ao carregar dados: {e}")
+                    self.history_text.insert('1.0', "Erro ao carregar histórico.")
         else:
             self.stats_text.insert('1.0', "Selecione um cliente para ver as estatísticas.")
             self.history_text.insert('1.0', "Selecione um cliente para ver o histórico.")
@@ -844,14 +825,6 @@ Contatos Cadastrados: {total_contatos}"""
         add_contato_frame = tk.Frame(contatos_container, bg='white')
         add_contato_frame.pack(fill="x", pady=(0, 10))
 
-        # Variáveis do contato (se não existirem ainda)
-        if not hasattr(self, 'contato_nome_var'):
-            self.contato_nome_var = tk.StringVar()
-            self.contato_cargo_var = tk.StringVar()
-            self.contato_telefone_var = tk.StringVar()
-            self.contato_email_var = tk.StringVar()
-            self.contato_observacoes_var = tk.StringVar()
-
         # Campos para novo contato
         fields_frame = tk.Frame(add_contato_frame, bg='white')
         fields_frame.pack(fill="x")
@@ -937,6 +910,22 @@ Contatos Cadastrados: {total_contatos}"""
         excluir_contato_btn = self.create_button(lista_buttons, "Excluir Contato", self.excluir_contato_selecionado, bg='#dc2626')
         excluir_contato_btn.pack(side="left")
 
+        # Contatos do cliente já carregado antes da seção ser aberta
+        self._exibir_contatos()
+
+    def _exibir_contatos(self):
+        """Mostrar self.contatos_data na lista de contatos (se já construída) e a quantidade no título da seção"""
+        total = len(self.contatos_data)
+        self.contatos_titulo_var.set(f"📇 Contatos do Cliente ({total})" if total else "📇 Contatos do Cliente")
+        if self.secao_pendente('contatos'):
+            return
+        self.contatos_tree.delete(*self.contatos_tree.get_children())
+        for contato in self.contatos_data:
+            self.contatos_tree.insert("", "end", values=(
+                contato['nome'], contato['cargo'], format_phone(contato['telefone']) if contato['telefone'] else "",
+                contato['email'] or "", contato['observacoes'] or ""
+            ), tags=(contato['id'],))
+
     def create_cliente_buttons(self, parent):
         buttons_frame = tk.Frame(parent, bg='white')
         # Fixar os botões ao rodapé do painel de formulário
@@ -993,7 +982,7 @@ Contatos Cadastrados: {total_contatos}"""
         self.site_var.set("")
         self.prazo_pagamento_var.set("")
         self.contatos_data = [] # Limpar contatos
-        self.contatos_tree.delete(*self.contatos_tree.get_children()) # Limpar treeview de contatos
+        self._exibir_contatos()
         
     def salvar_cliente(self):
         """Salvar cliente (novo ou existente) - VERSÃO SIMPLIFICADA"""
@@ -1007,81 +996,82 @@ Contatos Cadastrados: {total_contatos}"""
             print(f"DEBUG: Salvando cliente: {nome}")
             
             # Conectar ao banco
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            with obter_conexao() as conn:
+                c = conn.cursor()
             
-            try:
-                # Dados básicos apenas - como funcionava antes
-                nome_fantasia = self.nome_fantasia_var.get().strip() or nome
-                cnpj = self.cnpj_var.get().strip() or None
-                endereco = self.endereco_var.get().strip() or None
-                cidade = self.cidade_var.get().strip() or None
-                estado = self.estado_var.get().strip() or None
-                cep = self.cep_var.get().strip() or None
-                telefone = self.telefone_var.get().strip() or None
-                email = self.email_var.get().strip() or None
-                observacoes = self.observacoes_text.get("1.0", tk.END).strip() or None
-                prazo_pagamento = self.prazo_pagamento_var.get().strip() or None
+                try:
+                    # Dados básicos apenas - como funcionava antes
+                    nome_fantasia = self.nome_fantasia_var.get().strip() or nome
+                    cnpj = self.cnpj_var.get().strip() or None
+                    endereco = self.endereco_var.get().strip() or None
+                    cidade = self.cidade_var.get().strip() or None
+                    estado = self.estado_var.get().strip() or None
+                    cep = self.cep_var.get().strip() or None
+                    telefone = self.telefone_var.get().strip() or None
+                    email = self.email_var.get().strip() or None
+                    observacoes = self.observacoes_text.get("1.0", tk.END).strip() or None
+                    prazo_pagamento = self.prazo_pagamento_var.get().strip() or None
+                    busca = campos_busca_cliente(nome, nome_fantasia, cidade, cnpj)
                 
-                print(f"DEBUG: Dados coletados - Nome: {nome}, Fantasia: {nome_fantasia}, CNPJ: {cnpj}")
+                    print(f"DEBUG: Dados coletados - Nome: {nome}, Fantasia: {nome_fantasia}, CNPJ: {cnpj}")
                 
-                if self.current_cliente_id:
-                    # ATUALIZAR cliente existente - QUERY SIMPLES
-                    print(f"DEBUG: Atualizando cliente ID {self.current_cliente_id}")
+                    evento = 'cliente_updated' if self.current_cliente_id else 'cliente_created'
+                    if self.current_cliente_id:
+                        # ATUALIZAR cliente existente - QUERY SIMPLES
+                        print(f"DEBUG: Atualizando cliente ID {self.current_cliente_id}")
                     
-                    c.execute("""
-                        UPDATE clientes SET
-                            nome = ?, nome_fantasia = ?, cnpj = ?, endereco = ?, cidade = ?,
-                            estado = ?, cep = ?, telefone = ?, email = ?, observacoes = ?,
-                            prazo_pagamento = ?
-                        WHERE id = ?
-                    """, (nome, nome_fantasia, cnpj, endereco, cidade, estado, cep, telefone, email, observacoes, prazo_pagamento, self.current_cliente_id))
+                        c.execute("""
+                            UPDATE clientes SET
+                                nome = ?, nome_fantasia = ?, cnpj = ?, endereco = ?, cidade = ?,
+                                estado = ?, cep = ?, telefone = ?, email = ?, observacoes = ?,
+                                prazo_pagamento = ?, nome_busca = ?, cidade_busca = ?, cnpj_digitos = ?
+                            WHERE id = ?
+                        """, (nome, nome_fantasia, cnpj, endereco, cidade, estado, cep, telefone, email, observacoes, prazo_pagamento)
+                            + busca + (self.current_cliente_id,))
                     
-                    print(f"DEBUG: Cliente {self.current_cliente_id} atualizado com sucesso")
+                        print(f"DEBUG: Cliente {self.current_cliente_id} atualizado com sucesso")
                     
-                else:
-                    # INSERIR novo cliente - QUERY SIMPLES
-                    print("DEBUG: Inserindo novo cliente")
+                    else:
+                        # INSERIR novo cliente - QUERY SIMPLES
+                        print("DEBUG: Inserindo novo cliente")
                     
-                    c.execute("""
-                        INSERT INTO clientes (
-                            nome, nome_fantasia, cnpj, endereco, cidade, estado, cep,
-                            telefone, email, observacoes, prazo_pagamento, ativo, created_at
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, datetime('now'))
-                    """, (nome, nome_fantasia, cnpj, endereco, cidade, estado, cep, telefone, email, observacoes, prazo_pagamento))
+                        c.execute("""
+                            INSERT INTO clientes (
+                                nome, nome_fantasia, cnpj, endereco, cidade, estado, cep,
+                                telefone, email, observacoes, prazo_pagamento,
+                                nome_busca, cidade_busca, cnpj_digitos, ativo, created_at
+                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, datetime('now'))
+                        """, (nome, nome_fantasia, cnpj, endereco, cidade, estado, cep, telefone, email, observacoes, prazo_pagamento)
+                            + busca)
                     
-                    self.current_cliente_id = c.lastrowid
-                    print(f"DEBUG: Novo cliente criado com ID {self.current_cliente_id}")
+                        self.current_cliente_id = c.lastrowid
+                        print(f"DEBUG: Novo cliente criado com ID {self.current_cliente_id}")
                 
-                # Confirmar alterações
-                conn.commit()
-                print("DEBUG: Commit realizado com sucesso")
+                    # Confirmar alterações
+                    conn.commit()
+                    print("DEBUG: Commit realizado com sucesso")
                 
-                # Mostrar sucesso
-                self.show_success("Cliente salvo com sucesso!")
+                    # Mostrar sucesso
+                    self.show_success("Cliente salvo com sucesso!")
                 
-                # Emitir evento para atualizar outros módulos
-                self.emit_event('cliente_created')
+                    # Emitir evento para atualizar outros módulos (e a linha na própria lista)
+                    self.emit_event(evento, {'ids': [self.current_cliente_id]})
                 
-                # Recarregar lista
-                self.carregar_clientes()
-                
-                # Limpar formulário se for novo cliente
-                if not self.current_cliente_id:
-                    self.limpar_formulario()
+                    # Limpar formulário se for novo cliente
+                    if not self.current_cliente_id:
+                        self.limpar_formulario()
                     
-            except sqlite3.IntegrityError as e:
-                print(f"DEBUG: Erro de integridade: {e}")
-                if "cnpj" in str(e).lower():
-                    self.show_error("CNPJ já cadastrado no sistema.")
-                else:
-                    self.show_error(f"Erro de integridade: {e}")
-            except sqlite3.Error as e:
-                print(f"DEBUG: Erro SQLite: {e}")
-                self.show_error(f"Erro ao salvar cliente: {e}")
-            finally:
-                conn.close()
-                print("DEBUG: Conexão fechada")
+                except sqlite3.IntegrityError as e:
+                    print(f"DEBUG: Erro de integridade: {e}")
+                    if "cnpj" in str(e).lower():
+                        self.show_error("CNPJ já cadastrado no sistema.")
+                    else:
+                        self.show_error(f"Erro de integridade: {e}")
+                except sqlite3.Error as e:
+                    print(f"DEBUG: Erro SQLite: {e}")
+                    self.show_error(f"Erro ao salvar cliente: {e}")
+                finally:
+                    print("DEBUG: Conexão fechada")
                 
         except Exception as e:
             print(f"DEBUG: Erro inesperado: {e}")
@@ -1090,76 +1080,46 @@ Contatos Cadastrados: {total_contatos}"""
             self.show_error(f"Erro inesperado: {e}")
 
     def carregar_clientes(self):
-        """Carregar lista de clientes"""
-        # Limpar lista atual
-        for item in self.clientes_tree.get_children():
-            self.clientes_tree.delete(item)
+        """Carregar lista de clientes (primeira página; as demais ao rolar)"""
+        self.lista_clientes.carregar()
+        
+    def _valores_cliente(self, dados):
+        cliente_id, nome, cnpj, cidade, telefone, email = dados
+        return (
+            nome,
+            format_cnpj(cnpj) if cnpj else "",
+            cidade or "",
+            format_phone(telefone) if telefone else "",
+            email or ""
+        )
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            c.execute("""
-                SELECT id, nome, cnpj, cidade, telefone, email
-                FROM clientes
-                ORDER BY nome
-            """)
+    def importar_cadastros(self, tipo):
+        """Importar clientes ou contatos de planilha e atualizar a lista"""
+        self.importar_planilha(tipo, ao_concluir=self._cadastros_importados)
+        
+    def _cadastros_importados(self, resultado):
+        if resultado['importadas']:
+            if self.current_cliente_id:
+                self.carregar_cliente_para_edicao(self.current_cliente_id)
+            # ids None: a lista e os demais módulos recarregam por completo
+            self.emit_event('cliente_created', {'ids': None})
             
-            for row in c.fetchall():
-                cliente_id, nome, cnpj, cidade, telefone, email = row
-                self.clientes_tree.insert("", "end", values=(
-                    nome,
-                    format_cnpj(cnpj) if cnpj else "",
-                    cidade or "",
-                    format_phone(telefone) if telefone else "",
-                    email or ""
-                ), tags=(cliente_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar clientes: {e}")
-        finally:
-            conn.close()
+    def handle_event(self, event_type, data=None):
+        """Manter a lista em dia: só as linhas dos clientes afetados são relidas"""
+        if event_type in ('cliente_created', 'cliente_updated', 'cliente_deleted'):
+            if data['ids'] is None:
+                self.carregar_clientes()
+            else:
+                self.lista_clientes.atualizar(data['ids'])
             
     def buscar_clientes(self):
-        """Buscar clientes com filtro"""
+        """Buscar clientes por nome, cidade ou CNPJ (sem diferenciar acentos)"""
         termo = self.search_var.get().strip()
+        if not termo:
+            self.carregar_clientes()
+            return
         
-        # Limpar lista atual
-        for item in self.clientes_tree.get_children():
-            self.clientes_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            if termo:
-                c.execute("""
-                    SELECT id, nome, cnpj, cidade, telefone, email
-                    FROM clientes
-                    WHERE nome LIKE ? OR cnpj LIKE ? OR cidade LIKE ?
-                    ORDER BY nome
-                """, (f"%{termo}%", f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT id, nome, cnpj, cidade, telefone, email
-                    FROM clientes
-                    ORDER BY nome
-                """)
-            
-            for row in c.fetchall():
-                cliente_id, nome, cnpj, cidade, telefone, email = row
-                self.clientes_tree.insert("", "end", values=(
-                    nome,
-                    format_cnpj(cnpj) if cnpj else "",
-                    cidade or "",
-                    format_phone(telefone) if telefone else "",
-                    email or ""
-                ), tags=(cliente_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao buscar clientes: {e}")
-        finally:
-            conn.close()
+        self.lista_clientes.exibir(buscar_clientes_texto(termo))
             
     def editar_cliente(self):
         """Editar cliente selecionado"""
@@ -1181,65 +1141,59 @@ Contatos Cadastrados: {total_contatos}"""
     
     def carregar_cliente_para_edicao(self, cliente_id):
         """Carregar dados do cliente para edição"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            # Buscar dados do cliente
-            c.execute("SELECT * FROM clientes WHERE id = ?", (cliente_id,))
-            cliente = c.fetchone()
+            try:
+                # Buscar dados do cliente
+                c.execute("SELECT * FROM clientes WHERE id = ?", (cliente_id,))
+                cliente = c.fetchone()
             
-            if not cliente:
-                self.show_error("Cliente não encontrado.")
-                return
+                if not cliente:
+                    self.show_error("Cliente não encontrado.")
+                    return
                 
-            # Preencher campos
-            self.current_cliente_id = cliente_id
-            self.nome_var.set(cliente[1] or "")  # nome
-            self.nome_fantasia_var.set(cliente[2] or "")  # nome_fantasia
-            self.cnpj_var.set(format_cnpj(cliente[3]) if cliente[3] else "")  # cnpj
-            self.inscricao_estadual_var.set(cliente[4] or "")  # inscricao_estadual
-            self.inscricao_municipal_var.set(cliente[5] or "")  # inscricao_municipal
-            self.endereco_var.set(cliente[6] or "")  # endereco
-            self.numero_var.set(cliente[7] or "")  # numero
-            self.complemento_var.set(cliente[8] or "")  # complemento
-            self.bairro_var.set(cliente[9] or "")  # bairro
-            self.cidade_var.set(cliente[10] or "")  # cidade
-            self.estado_var.set(cliente[11] or "")  # estado
-            self.cep_var.set(cliente[12] or "")  # cep
-            self.telefone_var.set(format_phone(cliente[13]) if cliente[13] else "")  # telefone
-            self.email_var.set(cliente[14] or "")  # email
-            self.site_var.set(cliente[15] or "")  # site
-            self.prazo_pagamento_var.set(cliente[16] or "")  # prazo_pagamento
+                # Preencher campos
+                self.current_cliente_id = cliente_id
+                self.nome_var.set(cliente[1] or "")  # nome
+                self.nome_fantasia_var.set(cliente[2] or "")  # nome_fantasia
+                self.cnpj_var.set(format_cnpj(cliente[3]) if cliente[3] else "")  # cnpj
+                self.inscricao_estadual_var.set(cliente[4] or "")  # inscricao_estadual
+                self.inscricao_municipal_var.set(cliente[5] or "")  # inscricao_municipal
+                self.endereco_var.set(cliente[6] or "")  # endereco
+                self.numero_var.set(cliente[7] or "")  # numero
+                self.complemento_var.set(cliente[8] or "")  # complemento
+                self.bairro_var.set(cliente[9] or "")  # bairro
+                self.cidade_var.set(cliente[10] or "")  # cidade
+                self.estado_var.set(cliente[11] or "")  # estado
+                self.cep_var.set(cliente[12] or "")  # cep
+                self.telefone_var.set(format_phone(cliente[13]) if cliente[13] else "")  # telefone
+                self.email_var.set(cliente[14] or "")  # email
+                self.site_var.set(cliente[15] or "")  # site
+                self.prazo_pagamento_var.set(cliente[16] or "")  # prazo_pagamento
             
-            # Carregar contatos
-            self.contatos_data = []
-            self.contatos_tree.delete(*self.contatos_tree.get_children())
-            c.execute("SELECT * FROM contatos WHERE cliente_id = ? ORDER BY nome", (cliente_id,))
-            for contato in c.fetchall():
-                self.contatos_data.append({
-                    'id': contato[0],
-                    'nome': contato[2],
-                    'cargo': contato[3],
-                    'telefone': contato[4],
-                    'email': contato[5],
-                    'observacoes': contato[6]
-                })
-                self.contatos_tree.insert("", "end", values=(
-                    contato[2], contato[3], format_phone(contato[4]) if contato[4] else "",
-                    contato[5] or "", contato[6] or ""
-                ), tags=(contato[0],))
+                # Carregar contatos
+                self.contatos_data = []
+                c.execute("SELECT * FROM contatos WHERE cliente_id = ? ORDER BY nome", (cliente_id,))
+                for contato in c.fetchall():
+                    self.contatos_data.append({
+                        'id': contato[0],
+                        'nome': contato[2],
+                        'cargo': contato[3],
+                        'telefone': contato[4],
+                        'email': contato[5],
+                        'observacoes': contato[6]
+                    })
+                self._exibir_contatos()
             
-            # Layout único: permanecer na mesma tela
+                # Layout único: permanecer na mesma tela
             
-            # Atualizar dados derivados (se aplicável)
-            self.update_cliente_dashboard()
-            self.update_cliente_dashboard_expandido()
+                # Atualizar dados derivados (se aplicável)
+                self.update_cliente_dashboard()
+                self.update_cliente_dashboard_expandido()
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar cliente: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao carregar cliente: {e}")
             
     def excluir_cliente(self):
         """Excluir cliente selecionado"""
@@ -1261,29 +1215,24 @@ Contatos Cadastrados: {total_contatos}"""
             
         cliente_id = tags[0]
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            # Excluir contatos primeiro
-            c.execute("DELETE FROM contatos WHERE cliente_id = ?", (cliente_id,))
+            try:
+                # Excluir contatos primeiro
+                c.execute("DELETE FROM contatos WHERE cliente_id = ?", (cliente_id,))
             
-            # Excluir cliente
-            c.execute("DELETE FROM clientes WHERE id = ?", (cliente_id,))
-            conn.commit()
+                # Excluir cliente
+                c.execute("DELETE FROM clientes WHERE id = ?", (cliente_id,))
+                conn.commit()
             
-            self.show_success("Cliente excluído com sucesso!")
+                self.show_success("Cliente excluído com sucesso!")
             
-            # Emitir evento para atualizar outros módulos
-            self.emit_event('cliente_deleted')
+                # Emitir evento para atualizar outros módulos (e remover a linha da própria lista)
+                self.emit_event('cliente_deleted', {'ids': [cliente_id]})
             
-            # Recarregar lista
-            self.carregar_clientes()
-            
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao excluir cliente: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao excluir cliente: {e}")
 
     def adicionar_contato(self):
         """Adicionar novo contato ao cliente (sem salvar o cliente automaticamente)"""
@@ -1304,33 +1253,31 @@ Contatos Cadastrados: {total_contatos}"""
             self.show_warning("O contato deve ter pelo menos um telefone ou email.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            dados_contato = (
-                self.current_cliente_id,
-                nome,
-                self.contato_cargo_var.get().strip(),
-                telefone,
-                email,
-                self.contato_observacoes_var.get().strip()
-            )
+            try:
+                dados_contato = (
+                    self.current_cliente_id,
+                    nome,
+                    self.contato_cargo_var.get().strip(),
+                    telefone,
+                    email,
+                    self.contato_observacoes_var.get().strip()
+                )
             
-            c.execute("""
-                INSERT INTO contatos (cliente_id, nome, cargo, telefone, email, observacoes)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, dados_contato)
-            conn.commit()
+                c.execute("""
+                    INSERT INTO contatos (cliente_id, nome, cargo, telefone, email, observacoes)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, dados_contato)
+                conn.commit()
             
-            self.show_success("Contato salvo com sucesso!")
-            self.limpar_contato() # Limpar campos do novo contato
-            self.carregar_cliente_para_edicao(self.current_cliente_id) # Recarregar cliente com novo contato
+                self.show_success("Contato salvo com sucesso!")
+                self.limpar_contato() # Limpar campos do novo contato
+                self.carregar_cliente_para_edicao(self.current_cliente_id) # Recarregar cliente com novo contato
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao salvar contato: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao salvar contato: {e}")
             
     def limpar_contato(self):
         """Limpar campos do novo contato"""
@@ -1387,20 +1334,18 @@ Contatos Cadastrados: {total_contatos}"""
             
         contato_id = tags[0]
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            c.execute("DELETE FROM contatos WHERE id = ?", (contato_id,))
-            conn.commit()
+            try:
+                c.execute("DELETE FROM contatos WHERE id = ?", (contato_id,))
+                conn.commit()
             
-            self.show_success("Contato excluído com sucesso!")
-            self.carregar_cliente_para_edicao(self.current_cliente_id) # Recarregar cliente sem o contato excluído
+                self.show_success("Contato excluído com sucesso!")
+                self.carregar_cliente_para_edicao(self.current_cliente_id) # Recarregar cliente sem o contato excluído
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao excluir contato: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao excluir contato: {e}")
 
     def format_contato_telefone(self, event=None):
         """Formatar telefone do contato automaticamente"""
@@ -1469,7 +1414,7 @@ Contatos Cadastrados: {total_contatos}"""
         self.observacoes_text.delete("1.0", tk.END)
         
         # Limpar contatos
-        for item in self.contatos_tree.get_children():
-            self.contatos_tree.delete(item)
+        self.contatos_data = []
+        self._exibir_contatos()
         
         print("DEBUG: Formulário limpo com sucesso")
\ No newline at end of file
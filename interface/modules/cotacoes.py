@@ -52,5 +52,5 @@ class CotacoesModule(BaseModule):
 			self._collect_tipo_widgets(child, out_combo_list, out_label_list)
 
 	def handle_event(self, event_type, data=None):
-		if hasattr(self, '_compras') and hasattr(self._compras, 'handle_event'):
-			self._compras.handle_event(event_type, data)
\ No newline at end of file
+		# O módulo interno se registra na MainWindow e já recebe cada evento uma vez
+		pass
\ No newline at end of file
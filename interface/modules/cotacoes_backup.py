@@ -3,9 +3,10 @@ from tkinter import ttk, messagebox, scrolledtext
 import sqlite3
 from datetime import datetime, date
 from .base_module import BaseModule
-from database import DB_NAME
+from database import DB_NAME, obter_conexao, espiar_numero, alocar_numero
 from utils.formatters import format_currency, format_date, clean_number
-from utils.cotacao_validator import verificar_e_atualizar_status_cotacoes, obter_cotacoes_por_status
+from utils.cotacao_validator import obter_cotacoes_por_status
+from utils.sugestoes import indice_clientes, indice_produtos
 from pdf_generators.cotacao_nova import gerar_pdf_cotacao_nova
 
 class CotacoesModule(BaseModule):
@@ -120,6 +121,11 @@ class CotacoesModule(BaseModule):
 		
 		lista_scrollbar = ttk.Scrollbar(lista_inner, orient="vertical", command=self.cotacoes_tree.yview)
 		self.cotacoes_tree.configure(yscrollcommand=lista_scrollbar.set)
+		self.lista_cotacoes = self.criar_lista_paginada(
+			self.cotacoes_tree, lista_scrollbar,
+			"c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status",
+			"cotacoes c JOIN clientes cl ON c.cliente_id = cl.id", ("c.created_at", "c.id"),
+			self._valores_cotacao, condicao="c.tipo_cotacao = 'Compra'", descendente=True)
 		
 		self.cotacoes_tree.pack(side="left", fill="both", expand=True)
 		lista_scrollbar.pack(side="right", fill="y")
@@ -134,6 +140,10 @@ class CotacoesModule(BaseModule):
 		gerar_pdf_lista_btn = self.create_button(lista_buttons, "Gerar PDF", self.gerar_pdf_selecionado, bg='#10b981')
 		gerar_pdf_lista_btn.pack(side="right")
 		
+		exportar_btn = self.create_button(lista_buttons, "Exportar Excel", lambda: self.exportar_planilha('cotacoes'),
+										  bg='#e2e8f0', fg='#475569')
+		exportar_btn.pack(side="right", padx=(0, 10))
+		
 		# Dados iniciais
 		self.refresh_all_data()
 		
@@ -240,8 +250,9 @@ class CotacoesModule(BaseModule):
 		self.cliente_combo.bind("<<ComboboxSelected>>", self.on_cliente_selected)
 		
 		# Botão para buscar/atualizar clientes
-		refresh_clientes_btn = self.create_button(cliente_frame, "🔄", self.refresh_clientes, bg='#10b981')
+		refresh_clientes_btn = self.create_button(cliente_frame, "🔄", lambda: self.refresh_clientes(recarregar=True), bg='#10b981')
 		refresh_clientes_btn.pack(side="right", padx=(5, 0))
+		self.configurar_sugestoes(self.cliente_combo, indice_clientes)
 		
 		row += 1
 		# Contato do Cliente
@@ -307,8 +318,26 @@ class CotacoesModule(BaseModule):
 		
 		# Seção de Locação (inicialmente oculta)
 		self.locacao_frame = tk.Frame(section_frame, bg='white')
-		self.locacao_frame.pack(fill="x", pady=(0, 10))
-		loc_grid = tk.Frame(self.locacao_frame, bg='white')
+		self.adiar_construcao(self.locacao_frame, 'dados_locacao', self.create_locacao_dados_fields)
+		# Recalcular ao alterar campos
+		self.locacao_valor_mensal_var.trace_add('write', lambda *args: self.recalcular_locacao())
+		self.locacao_data_inicio_var.trace_add('write', lambda *args: self.recalcular_locacao())
+		self.locacao_data_fim_var.trace_add('write', lambda *args: self.recalcular_locacao())
+		
+		# Observações (mais compacto)
+		tk.Label(fields_frame, text="Observações:", 
+				 font=('Arial', 10, 'bold'), bg='white').grid(row=row, column=0, sticky="nw", pady=2)
+		self.observacoes_text = scrolledtext.ScrolledText(fields_frame, height=2, width=30)
+		self.observacoes_text.grid(row=row, column=1, sticky="ew", padx=(10, 0), pady=2)
+		
+		fields_frame.grid_columnconfigure(1, weight=1)
+		
+		# Seções específicas de compra (serão ocultadas para locação)
+		self.create_esboco_servico_section(parent)
+		self.create_relacao_pecas_section(parent)
+		
+	def create_locacao_dados_fields(self, locacao_frame):
+		loc_grid = tk.Frame(locacao_frame, bg='white')
 		loc_grid.pack(fill="x", padx=10, pady=5)
 		lrow = 0
 		tk.Label(loc_grid, text="Nome do Equipamento *:", font=('Arial', 10, 'bold'), bg='white').grid(row=lrow, column=0, sticky="w", pady=5)
@@ -330,24 +359,6 @@ class CotacoesModule(BaseModule):
 		tk.Label(loc_grid, text="Total Locação:", font=('Arial', 10, 'bold'), bg='white').grid(row=lrow, column=0, sticky="w", pady=5)
 		self.locacao_total_entry = tk.Entry(loc_grid, textvariable=self.locacao_total_var, font=('Arial', 10), width=20, state="readonly")
 		self.locacao_total_entry.grid(row=lrow, column=1, sticky="w", padx=(10, 0), pady=5)
-		# Ocultar inicialmente
-		self.locacao_frame.pack_forget()
-		# Recalcular ao alterar campos
-		self.locacao_valor_mensal_var.trace_add('write', lambda *args: self.recalcular_locacao())
-		self.locacao_data_inicio_var.trace_add('write', lambda *args: self.recalcular_locacao())
-		self.locacao_data_fim_var.trace_add('write', lambda *args: self.recalcular_locacao())
-		
-		# Observações (mais compacto)
-		tk.Label(fields_frame, text="Observações:", 
-				 font=('Arial', 10, 'bold'), bg='white').grid(row=row, column=0, sticky="nw", pady=2)
-		self.observacoes_text = scrolledtext.ScrolledText(fields_frame, height=2, width=30)
-		self.observacoes_text.grid(row=row, column=1, sticky="ew", padx=(10, 0), pady=2)
-		
-		fields_frame.grid_columnconfigure(1, weight=1)
-		
-		# Seções específicas de compra (serão ocultadas para locação)
-		self.create_esboco_servico_section(parent)
-		self.create_relacao_pecas_section(parent)
 		
 	# Dashboards removidos deste módulo
 	
@@ -409,16 +420,30 @@ class CotacoesModule(BaseModule):
 		self.item_loc_meses_var = tk.StringVar(value="0")
 		self.item_loc_total_var = tk.StringVar(value="R$ 0,00")
 		self.item_modelo_compressor_var = tk.StringVar()
+		self.locacao_imagem_var = tk.StringVar()
 		
 		# Container principal para os dois layouts
 		fields_container = tk.Frame(parent, bg="white")
 		fields_container.pack(padx=10, pady=(0, 10), fill="x")
 		
-		# ===== LAYOUT PARA COMPRA (ORIGINAL) =====
+		# Cada layout é montado só quando aparece pela primeira vez (o da Locação, nunca nas Compras)
 		self.compra_fields_frame = tk.Frame(fields_container, bg="white")
+		self.adiar_construcao(self.compra_fields_frame, 'itens_compra', self.create_item_fields_compra)
+		self.locacao_fields_frame = tk.Frame(fields_container, bg="white")
+		self.adiar_construcao(self.locacao_fields_frame, 'itens_locacao', self.create_item_fields_locacao)
+		
+		# Bindings para calcular meses e total automaticamente
+		self.item_loc_inicio_var.trace_add('write', lambda *args: self.recalcular_locacao_item())
+		self.item_loc_fim_var.trace_add('write', lambda *args: self.recalcular_locacao_item())
+		self.item_valor_var.trace_add('write', lambda *args: self.recalcular_locacao_item())
+		
+		# Inicialmente mostrar layout de compra
+		self.compra_fields_frame.pack(fill="x")
 		
+	def create_item_fields_compra(self, compra_fields_frame):
+		# ===== LAYOUT PARA COMPRA (ORIGINAL) =====
 		# Grid de campos para compra (layout original)
-		compra_grid = tk.Frame(self.compra_fields_frame, bg="white")
+		compra_grid = tk.Frame(compra_fields_frame, bg="white")
 		compra_grid.pack(fill="x")
 		
 		# Primeira linha - layout original para compra
@@ -447,6 +472,8 @@ class CotacoesModule(BaseModule):
 		self.item_nome_combo_compra = ttk.Combobox(nome_frame_compra, textvariable=self.item_nome_var, width=30)
 		self.item_nome_combo_compra.pack(side="left", fill="x", expand=True)
 		self.item_nome_combo_compra.bind("<<ComboboxSelected>>", self.on_item_selected)
+		self.configurar_sugestoes(self.item_nome_combo_compra,
+			lambda: indice_produtos(self.item_tipo_var.get()) if self.item_tipo_var.get() else None)
 		
 		refresh_produtos_btn_compra = self.create_button(nome_frame_compra, "🔄", self.refresh_produtos, bg='#10b981')
 		refresh_produtos_btn_compra.pack(side="right", padx=(2, 0))
@@ -477,11 +504,10 @@ class CotacoesModule(BaseModule):
 		compra_grid.grid_columnconfigure(2, weight=1)
 		compra_grid.grid_columnconfigure(3, weight=1)
 		
+	def create_item_fields_locacao(self, locacao_fields_frame):
 		# ===== LAYOUT PARA LOCAÇÃO (NOVO) =====
-		self.locacao_fields_frame = tk.Frame(fields_container, bg="white")
-		
 		# Grid de campos para locação (layout novo)
-		locacao_grid = tk.Frame(self.locacao_fields_frame, bg="white")
+		locacao_grid = tk.Frame(locacao_fields_frame, bg="white")
 		locacao_grid.pack(fill="x")
 		
 		# Primeira linha - Nome do Equipamento para locação
@@ -532,7 +558,6 @@ class CotacoesModule(BaseModule):
 		# Sétima linha - Imagem do Equipamento para locação
 		tk.Label(locacao_grid, text="Imagem do Equipamento:", font=("Arial", 10, "bold"), bg="white").grid(row=6, column=0, padx=5, sticky="w")
 		
-		self.locacao_imagem_var = tk.StringVar()
 		img_frame = tk.Frame(locacao_grid, bg='white')
 		img_frame.grid(row=6, column=1, columnspan=3, sticky="ew", padx=5, pady=5)
 		
@@ -558,15 +583,6 @@ class CotacoesModule(BaseModule):
 		adicionar_button_locacao = self.create_button(locacao_grid, "Adicionar Item", self.adicionar_item)
 		adicionar_button_locacao.grid(row=7, column=0, columnspan=4, pady=15)
 		
-		# Bindings para calcular meses e total automaticamente
-		self.item_loc_inicio_var.trace_add('write', lambda *args: self.recalcular_locacao_item())
-		self.item_loc_fim_var.trace_add('write', lambda *args: self.recalcular_locacao_item())
-		self.item_valor_var.trace_add('write', lambda *args: self.recalcular_locacao_item())
-		
-		# Inicialmente mostrar layout de compra
-		self.compra_fields_frame.pack(fill="x")
-		self.locacao_fields_frame.pack_forget()
-		
 	def on_tipo_changed(self, event=None):
 		"""Callback quando o tipo do item muda"""
 		tipo = self.item_tipo_var.get()
@@ -603,7 +619,8 @@ class CotacoesModule(BaseModule):
 			if hasattr(self, 'locacao_frame'):
 				self.locacao_frame.pack_forget()
 			
-			# Mostrar layout de locação, ocultar layout de compra
+			# Mostrar layout de locação, ocultar layout de compra (montado agora: os ajustes abaixo usam seus campos)
+			self.construir_secao('itens_locacao')
 			self.compra_fields_frame.pack_forget()
 			self.locacao_fields_frame.pack(fill="x")
 			
@@ -615,6 +632,7 @@ class CotacoesModule(BaseModule):
 				self.relacao_pecas_section.pack(fill="x", pady=(5, 5))
 			
 			# Mostrar layout de compra, ocultar layout de locação
+			self.construir_secao('itens_compra')
 			self.locacao_fields_frame.pack_forget()
 			self.compra_fields_frame.pack(fill="x")
 		
@@ -771,20 +789,16 @@ class CotacoesModule(BaseModule):
 				self.item_nome_combo_compra['values'] = []
 			return
 		
-		conn = sqlite3.connect(DB_NAME)
-		c = conn.cursor()
 		try:
-			c.execute("SELECT nome FROM produtos WHERE tipo = ? AND ativo = 1 ORDER BY nome", (tipo,))
-			produtos = [row[0] for row in c.fetchall()]
+			# Índice compartilhado: lido do banco só na primeira vez de cada tipo
+			indice = indice_produtos(tipo)
 			
 			# Atualizar combo de compra
 			if hasattr(self, 'item_nome_combo_compra'):
-				self.item_nome_combo_compra['values'] = produtos
+				self.item_nome_combo_compra['values'] = indice.buscar("")
 				self.item_nome_var.set("")  # Limpar seleção
 		except sqlite3.Error as e:
 			self.show_error(f"Erro ao carregar produtos: {e}")
-		finally:
-			conn.close()
 			
 	def on_item_selected(self, event=None):
 		"""Callback quando um produto é selecionado"""
@@ -800,21 +814,19 @@ class CotacoesModule(BaseModule):
 		if not nome or not tipo:
 			return
 			
-		conn = sqlite3.connect(DB_NAME)
-		c = conn.cursor()
+		with obter_conexao() as conn:
+			c = conn.cursor()
 		
-		try:
-			c.execute("SELECT valor_unitario, descricao FROM produtos WHERE nome = ? AND tipo = ?", (nome, tipo))
-			result = c.fetchone()
-			if result:
-				valor, descricao = result
-				self.item_valor_var.set(f"{valor:.2f}")
-				if descricao:
-					self.item_desc_var.set(descricao)
-		except sqlite3.Error as e:
-			self.show_error(f"Erro ao buscar dados do produto: {e}")
-		finally:
-			conn.close()
+			try:
+				c.execute("SELECT valor_unitario, descricao FROM produtos WHERE nome = ? AND tipo = ?", (nome, tipo))
+				result = c.fetchone()
+				if result:
+					valor, descricao = result
+					self.item_valor_var.set(f"{valor:.2f}")
+					if descricao:
+						self.item_desc_var.set(descricao)
+			except sqlite3.Error as e:
+				self.show_error(f"Erro ao buscar dados do produto: {e}")
 			
 	def create_itens_list(self, parent):
 		# Frame para lista com scrollbars
@@ -896,26 +908,17 @@ class CotacoesModule(BaseModule):
 		self.refresh_produtos()
 		self.carregar_cotacoes()
 		
-	def refresh_clientes(self):
-		"""Atualizar lista de clientes"""
-		conn = sqlite3.connect(DB_NAME)
-		c = conn.cursor()
-		
+	def refresh_clientes(self, recarregar=False):
+		"""Atualizar lista de clientes (o combo mostra só as sugestões do texto digitado)"""
 		try:
-			c.execute("SELECT id, nome FROM clientes ORDER BY nome")
-			clientes = c.fetchall()
+			indice = indice_clientes(recarregar)
+			self.clientes_dict = indice.ids_por_rotulo
+			self.cliente_combo['values'] = indice.buscar(self.cliente_var.get())
 			
-			self.clientes_dict = {f"{nome} (ID: {id})": id for id, nome in clientes}
-			cliente_values = list(self.clientes_dict.keys())
-			
-			self.cliente_combo['values'] = cliente_values
-			
-			print(f"Clientes carregados: {len(cliente_values)}")  # Debug
+			print(f"Clientes carregados: {len(indice)}")  # Debug
 			
 		except sqlite3.Error as e:
 			self.show_error(f"Erro ao carregar clientes: {e}")
-		finally:
-			conn.close()
 			
 	def refresh_produtos(self):
 		"""Atualizar lista de produtos"""
@@ -935,54 +938,38 @@ class CotacoesModule(BaseModule):
 			return
 			
 		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-			
-			# Buscar prazo de pagamento do cliente
-			c.execute("SELECT prazo_pagamento FROM clientes WHERE id = ?", (cliente_id,))
-			result = c.fetchone()
-			
-			if result and result[0]:
-				# Preencher automaticamente a condição de pagamento
-				self.condicao_pagamento_var.set(result[0])
-			
-			# Carregar contatos do cliente
-			c.execute("SELECT nome FROM contatos WHERE cliente_id = ? ORDER BY nome", (cliente_id,))
-			contatos = [row[0] for row in c.fetchall()]
-			self.contato_cliente_combo['values'] = contatos
-			if contatos:
-				self.contato_cliente_var.set(contatos[0])
-			else:
-				self.contato_cliente_var.set("")
+			with obter_conexao() as conn:
+				c = conn.cursor()
+			
+				# Buscar prazo de pagamento do cliente
+				c.execute("SELECT prazo_pagamento FROM clientes WHERE id = ?", (cliente_id,))
+				result = c.fetchone()
+			
+				if result and result[0]:
+					# Preencher automaticamente a condição de pagamento
+					self.condicao_pagamento_var.set(result[0])
+			
+				# Carregar contatos do cliente
+				c.execute("SELECT nome FROM contatos WHERE cliente_id = ? ORDER BY nome", (cliente_id,))
+				contatos = [row[0] for row in c.fetchall()]
+				self.contato_cliente_combo['values'] = contatos
+				if contatos:
+					self.contato_cliente_var.set(contatos[0])
+				else:
+					self.contato_cliente_var.set("")
 				
 		except sqlite3.Error as e:
 			print(f"Erro ao buscar prazo de pagamento do cliente: {e}")
-		finally:
-			conn.close()
 			
 	def gerar_numero_sequencial(self):
-		"""Gerar número sequencial para cotação"""
+		"""Sugerir o próximo número de cotação (reservado de fato ao salvar)"""
 		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-			
-			# Buscar o maior número sequencial existente
-			c.execute("SELECT MAX(CAST(SUBSTR(numero_proposta, 6) AS INTEGER)) FROM cotacoes WHERE numero_proposta LIKE 'PROP-%'")
-			result = c.fetchone()
-			
-			if result and result[0]:
-				proximo_numero = result[0] + 1
-			else:
-				proximo_numero = 1
-				
-			return f"PROP-{proximo_numero:06d}"
-			
+			self._numero_sugerido = espiar_numero('PROP')
 		except sqlite3.Error as e:
 			print(f"Erro ao gerar número sequencial: {e}")
 			# Fallback para timestamp
-			return f"PROP-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-		finally:
-			conn.close()
+			self._numero_sugerido = f"PROP-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+		return self._numero_sugerido
 		
 	def adicionar_item(self):
 		modo = self.tipo_cotacao_var.get()
@@ -1258,118 +1245,122 @@ class CotacoesModule(BaseModule):
 		if not self.itens_tree.get_children():
 			self.show_warning("Adicione pelo menos um item à cotação.")
 			return
-		conn = sqlite3.connect(DB_NAME)
-		c = conn.cursor()
-		try:
-			# Calcular valor total somando itens
-			valor_total = 0
-			for item in self.itens_tree.get_children():
-				values = self.itens_tree.item(item)['values']
-				if len(values) >= 11:
-					valor_total_str = values[10].replace('R$ ', '').replace('.', '').replace(',', '.')
+		with obter_conexao() as conn:
+			c = conn.cursor()
+			try:
+				# Calcular valor total somando itens
+				valor_total = 0
+				for item in self.itens_tree.get_children():
+					values = self.itens_tree.item(item)['values']
+					if len(values) >= 11:
+						valor_total_str = values[10].replace('R$ ', '').replace('.', '').replace(',', '.')
+						try:
+							valor_total += float(valor_total_str)
+						except ValueError:
+							pass
+				# Data validade
+				data_validade_input = self.data_validade_var.get().strip()
+				data_validade = None
+				if data_validade_input:
 					try:
-						valor_total += float(valor_total_str)
+						data_validade = datetime.strptime(data_validade_input, '%d/%m/%Y').strftime('%Y-%m-%d')
 					except ValueError:
-						pass
-			# Data validade
-			data_validade_input = self.data_validade_var.get().strip()
-			data_validade = None
-			if data_validade_input:
-				try:
-					data_validade = datetime.strptime(data_validade_input, '%d/%m/%Y').strftime('%Y-%m-%d')
-				except ValueError:
-					data_validade = data_validade_input
-			# Filial
-			filial_str = self.filial_var.get()
-			filial_id = int(filial_str.split(' - ')[0]) if ' - ' in filial_str else int(filial_str)
-			# Inserir/atualizar cotação (sem usar campos globais de locação)
-			if self.current_cotacao_id:
-				# Preparar valores baseado no tipo de cotação
-				modelo_valor = self.modelo_var.get() if modo != "Locação" else ""
-				serie_valor = self.serie_var.get() if modo != "Locação" else ""
-				status_valor = self.status_var.get() if modo != "Locação" else "Em Aberto"
-				data_validade_valor = data_validade if modo != "Locação" else None
-				condicao_pagamento_valor = self.condicao_pagamento_var.get() if modo != "Locação" else ""
-				prazo_entrega_valor = self.prazo_entrega_var.get() if modo != "Locação" else ""
+						data_validade = data_validade_input
+				# Filial
+				filial_str = self.filial_var.get()
+				filial_id = int(filial_str.split(' - ')[0]) if ' - ' in filial_str else int(filial_str)
+				# Inserir/atualizar cotação (sem usar campos globais de locação)
+				evento = 'cotacao_updated' if self.current_cotacao_id else 'cotacao_created'
+				if self.current_cotacao_id:
+					# Preparar valores baseado no tipo de cotação
+					modelo_valor = self.modelo_var.get() if modo != "Locação" else ""
+					serie_valor = self.serie_var.get() if modo != "Locação" else ""
+					status_valor = self.status_var.get() if modo != "Locação" else "Em Aberto"
+					data_validade_valor = data_validade if modo != "Locação" else None
+					condicao_pagamento_valor = self.condicao_pagamento_var.get() if modo != "Locação" else ""
+					prazo_entrega_valor = self.prazo_entrega_var.get() if modo != "Locação" else ""
 				
-				c.execute("""
-					UPDATE cotacoes SET
-						numero_proposta = ?, modelo_compressor = ?, numero_serie_compressor = ?,
-						observacoes = ?, valor_total = ?, status = ?, data_validade = ?,
-						condicao_pagamento = ?, prazo_entrega = ?, filial_id = ?,
-						esboco_servico = ?, relacao_pecas_substituir = ?,
-						tipo_cotacao = ?, locacao_nome_equipamento = ?
-					WHERE id = ?
-				""", (numero, modelo_valor, serie_valor,
-					 self.observacoes_text.get("1.0", tk.END).strip(), valor_total,
-					 status_valor, data_validade_valor,
-					 condicao_pagamento_valor, prazo_entrega_valor,
-					 filial_id,
-					 self.esboco_servico_text.get("1.0", tk.END).strip(),
-					 self.relacao_pecas_text.get("1.0", tk.END).strip(),
-					 modo, self.locacao_equipamento_var.get(),
-					 self.current_cotacao_id))
-				c.execute("DELETE FROM itens_cotacao WHERE cotacao_id = ?", (self.current_cotacao_id,))
-				cotacao_id = self.current_cotacao_id
-			else:
-				# Preparar valores baseado no tipo de cotação para INSERT
-				modelo_valor = self.modelo_var.get() if modo != "Locação" else ""
-				serie_valor = self.serie_var.get() if modo != "Locação" else ""
-				status_valor = self.status_var.get() if modo != "Locação" else "Em Aberto"
-				data_validade_valor = data_validade if modo != "Locação" else None
-				condicao_pagamento_valor = self.condicao_pagamento_var.get() if modo != "Locação" else ""
-				prazo_entrega_valor = self.prazo_entrega_var.get() if modo != "Locação" else ""
+					c.execute("""
+						UPDATE cotacoes SET
+							numero_proposta = ?, modelo_compressor = ?, numero_serie_compressor = ?,
+							observacoes = ?, valor_total = ?, status = ?, data_validade = ?,
+							condicao_pagamento = ?, prazo_entrega = ?, filial_id = ?,
+							esboco_servico = ?, relacao_pecas_substituir = ?,
+							tipo_cotacao = ?, locacao_nome_equipamento = ?
+						WHERE id = ?
+					""", (numero, modelo_valor, serie_valor,
+						 self.observacoes_text.get("1.0", tk.END).strip(), valor_total,
+						 status_valor, data_validade_valor,
+						 condicao_pagamento_valor, prazo_entrega_valor,
+						 filial_id,
+						 self.esboco_servico_text.get("1.0", tk.END).strip(),
+						 self.relacao_pecas_text.get("1.0", tk.END).strip(),
+						 modo, self.locacao_equipamento_var.get(),
+						 self.current_cotacao_id))
+					c.execute("DELETE FROM itens_cotacao WHERE cotacao_id = ?", (self.current_cotacao_id,))
+					cotacao_id = self.current_cotacao_id
+				else:
+					# Preparar valores baseado no tipo de cotação para INSERT
+					modelo_valor = self.modelo_var.get() if modo != "Locação" else ""
+					serie_valor = self.serie_var.get() if modo != "Locação" else ""
+					status_valor = self.status_var.get() if modo != "Locação" else "Em Aberto"
+					data_validade_valor = data_validade if modo != "Locação" else None
+					condicao_pagamento_valor = self.condicao_pagamento_var.get() if modo != "Locação" else ""
+					prazo_entrega_valor = self.prazo_entrega_var.get() if modo != "Locação" else ""
 				
-				c.execute("""
-					INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao,
-									  modelo_compressor, numero_serie_compressor, observacoes,
-									  valor_total, status, data_validade, condicao_pagamento,
-									  prazo_entrega, filial_id, esboco_servico, relacao_pecas_substituir,
-									  tipo_cotacao, locacao_nome_equipamento)
-					VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-				""", (numero, cliente_id, self.user_id, datetime.now().strftime('%Y-%m-%d'),
-					 modelo_valor, serie_valor, self.observacoes_text.get("1.0", tk.END).strip(), valor_total,
-					 status_valor, data_validade_valor, condicao_pagamento_valor, prazo_entrega_valor,
-					 filial_id, self.esboco_servico_text.get("1.0", tk.END).strip(), self.relacao_pecas_text.get("1.0", tk.END).strip(), modo, self.locacao_equipamento_var.get()))
-				cotacao_id = c.lastrowid
-				self.current_cotacao_id = cotacao_id
-			# Inserir itens
-			for item in self.itens_tree.get_children():
-				values = self.itens_tree.item(item)['values']
-				# Esperado 13 colunas
-				if len(values) != 13:
-					continue
-				tipo, nome, qtd, valor_unit, mao_obra, desloc, estadia, meses, inicio, fim, total, desc, tipo_operacao = values
-				quantidade = float(qtd)
-				valor_unitario = clean_number(valor_unit)
-				valor_mao_obra = clean_number(mao_obra)
-				valor_desloc = clean_number(desloc)
-				valor_estadia = clean_number(estadia)
-				valor_total_item = clean_number(total)
-				# Datas locação
-				inicio_iso = self.parse_date_input(inicio)
-				fim_iso = self.parse_date_input(fim)
-				meses_int = int(meses) if str(meses).isdigit() else None
-				# Forçar tipo_operacao conforme modo
-				if modo == 'Locação':
-					tipo_operacao = 'Locação'
-				c.execute("""
-					INSERT INTO itens_cotacao (cotacao_id, tipo, item_nome, quantidade,
-										 valor_unitario, valor_total_item, descricao,
-										 mao_obra, deslocamento, estadia, tipo_operacao,
-										 locacao_data_inicio, locacao_data_fim, locacao_qtd_meses)
-					VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-				""", (cotacao_id, tipo, nome, quantidade, valor_unitario, valor_total_item, desc,
-					 valor_mao_obra, valor_desloc, valor_estadia, tipo_operacao,
-					 inicio_iso, fim_iso, meses_int))
-			conn.commit()
-			self.show_success("Cotação salva com sucesso!")
-			self.emit_event('cotacao_created')
-			self.carregar_cotacoes()
-		except sqlite3.Error as e:
-			self.show_error(f"Erro ao salvar cotação: {e}")
-		finally:
-			conn.close()
+					# Número sugerido pelo formulário: reservar atomicamente o definitivo
+					if numero == getattr(self, '_numero_sugerido', None):
+						numero = alocar_numero('PROP')
+						self.numero_var.set(numero)
+				
+					c.execute("""
+						INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao,
+										  modelo_compressor, numero_serie_compressor, observacoes,
+										  valor_total, status, data_validade, condicao_pagamento,
+										  prazo_entrega, filial_id, esboco_servico, relacao_pecas_substituir,
+										  tipo_cotacao, locacao_nome_equipamento)
+						VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+					""", (numero, cliente_id, self.user_id, datetime.now().strftime('%Y-%m-%d'),
+						 modelo_valor, serie_valor, self.observacoes_text.get("1.0", tk.END).strip(), valor_total,
+						 status_valor, data_validade_valor, condicao_pagamento_valor, prazo_entrega_valor,
+						 filial_id, self.esboco_servico_text.get("1.0", tk.END).strip(), self.relacao_pecas_text.get("1.0", tk.END).strip(), modo, self.locacao_equipamento_var.get()))
+					cotacao_id = c.lastrowid
+					self.current_cotacao_id = cotacao_id
+				# Inserir itens
+				for item in self.itens_tree.get_children():
+					values = self.itens_tree.item(item)['values']
+					# Esperado 13 colunas
+					if len(values) != 13:
+						continue
+					tipo, nome, qtd, valor_unit, mao_obra, desloc, estadia, meses, inicio, fim, total, desc, tipo_operacao = values
+					quantidade = float(qtd)
+					valor_unitario = clean_number(valor_unit)
+					valor_mao_obra = clean_number(mao_obra)
+					valor_desloc = clean_number(desloc)
+					valor_estadia = clean_number(estadia)
+					valor_total_item = clean_number(total)
+					# Datas locação
+					inicio_iso = self.parse_date_input(inicio)
+					fim_iso = self.parse_date_input(fim)
+					meses_int = int(meses) if str(meses).isdigit() else None
+					# Forçar tipo_operacao conforme modo
+					if modo == 'Locação':
+						tipo_operacao = 'Locação'
+					c.execute("""
+						INSERT INTO itens_cotacao (cotacao_id, tipo, item_nome, quantidade,
+											 valor_unitario, valor_total_item, descricao,
+											 mao_obra, deslocamento, estadia, tipo_operacao,
+											 locacao_data_inicio, locacao_data_fim, locacao_qtd_meses)
+						VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+					""", (cotacao_id, tipo, nome, quantidade, valor_unitario, valor_total_item, desc,
+						 valor_mao_obra, valor_desloc, valor_estadia, tipo_operacao,
+						 inicio_iso, fim_iso, meses_int))
+				conn.commit()
+				self.show_success("Cotação salva com sucesso!")
+				# A própria lista também é atualizada pelo evento (só a linha da cotação)
+				self.emit_event(evento, {'ids': [cotacao_id]})
+			except sqlite3.Error as e:
+				self.show_error(f"Erro ao salvar cotação: {e}")
 			
 	def gerar_pdf(self):
 		"""Gerar PDF da cotação atual"""
@@ -1377,116 +1368,42 @@ class CotacoesModule(BaseModule):
 			self.show_warning("Salve a cotação antes de gerar o PDF.")
 			return
 			
-		try:
-			# Obter username do usuário atual para template personalizado
-			current_username = self._get_current_username()
-			# Passar contato selecionado para o gerador
-			sucesso, resultado = gerar_pdf_cotacao_nova(
-				self.current_cotacao_id,
-				DB_NAME,
-				current_username,
-				contato_nome=self.contato_cliente_var.get()
-			)
-			if sucesso:
-				self.show_success(f"PDF gerado com sucesso!\nLocal: {resultado}")
-			else:
-				self.show_error(f"Erro ao gerar PDF: {resultado}")
-		except Exception as e:
-			self.show_error(f"Erro ao gerar PDF: {e}")
+		# Obter username do usuário atual para template personalizado
+		current_username = self._get_current_username()
+		# Passar contato selecionado para o gerador (lido aqui, fora da thread do PDF)
+		self.gerar_pdf_em_segundo_plano(
+			gerar_pdf_cotacao_nova,
+			self.current_cotacao_id,
+			DB_NAME,
+			current_username,
+			contato_nome=self.contato_cliente_var.get()
+		)
 			
 	def _get_current_username(self):
 		"""Obter o username do usuário atual"""
-		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-			c.execute("SELECT username FROM usuarios WHERE id = ?", (self.user_id,))
-			result = c.fetchone()
-			return result[0] if result else None
-		except:
-			return None
-		finally:
-			if 'conn' in locals():
-				conn.close()
+		return self.sessao.username
 			
 	def carregar_cotacoes(self):
-		"""Carregar lista de cotações"""
-		# Verificar e atualizar cotações expiradas automaticamente
-		cotações_expiradas = verificar_e_atualizar_status_cotacoes()
-		
-		# Limpar lista atual
-		for item in self.cotacoes_tree.get_children():
-			self.cotacoes_tree.delete(item)
-			
-		conn = sqlite3.connect(DB_NAME)
-		c = conn.cursor()
-		
-		try:
-			c.execute("""
-				SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
-				FROM cotacoes c
-				JOIN clientes cl ON c.cliente_id = cl.id
-				WHERE c.tipo_cotacao = 'Compra'
-				ORDER BY c.created_at DESC
-			""")
-			
-			for row in c.fetchall():
-				cotacao_id, numero, cliente, data, valor, status = row
-				self.cotacoes_tree.insert("", "end", values=(
-					numero,
-					cliente,
-					format_date(data),
-					format_currency(valor) if valor else "R$ 0,00",
-					status
-				), tags=(cotacao_id,))
-				
-		except sqlite3.Error as e:
-			self.show_error(f"Erro ao carregar cotações: {e}")
-		finally:
-			conn.close()
+		"""Carregar lista de cotações (primeira página; as demais ao rolar)"""
+		self.lista_cotacoes.carregar()
+		
+	def _valores_cotacao(self, dados):
+		cotacao_id, numero, cliente, data, valor, status = dados
+		return (
+			numero,
+			cliente,
+			format_date(data),
+			format_currency(valor) if valor else "R$ 0,00",
+			status
+		)
 			
 	def buscar_cotacoes(self):
 		"""Buscar cotações com filtro"""
 		termo = self.search_var.get().strip()
-		
-		# Limpar lista atual
-		for item in self.cotacoes_tree.get_children():
-			self.cotacoes_tree.delete(item)
-			
-		conn = sqlite3.connect(DB_NAME)
-		c = conn.cursor()
-		
-		try:
-			if termo:
-				c.execute("""
-					SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
-					FROM cotacoes c
-					JOIN clientes cl ON c.cliente_id = cl.id
-					WHERE c.tipo_cotacao = 'Compra' AND (c.numero_proposta LIKE ? OR cl.nome LIKE ?)
-					ORDER BY c.created_at DESC
-				""", (f"%{termo}%", f"%{termo}%"))
-			else:
-				c.execute("""
-					SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
-					FROM cotacoes c
-					JOIN clientes cl ON c.cliente_id = cl.id
-					WHERE c.tipo_cotacao = 'Compra'
-					ORDER BY c.created_at DESC
-				""")
-			
-			for row in c.fetchall():
-				cotacao_id, numero, cliente, data, valor, status = row
-				self.cotacoes_tree.insert("", "end", values=(
-					numero,
-					cliente,
-					format_date(data),
-					format_currency(valor) if valor else "R$ 0,00",
-					status
-				), tags=(cotacao_id,))
-				
-		except sqlite3.Error as e:
-			self.show_error(f"Erro ao buscar cotações: {e}")
-		finally:
-			conn.close()
+		if termo:
+			self.lista_cotacoes.carregar("c.numero_proposta LIKE ? OR cl.nome LIKE ?", (f"%{termo}%", f"%{termo}%"))
+		else:
+			self.lista_cotacoes.carregar()
 			
 	def editar_cotacao(self):
 		"""Editar cotação selecionada"""
@@ -1507,87 +1424,85 @@ class CotacoesModule(BaseModule):
 		
 	def carregar_cotacao_para_edicao(self, cotacao_id):
 		"""Carregar dados da cotação para edição"""
-		conn = sqlite3.connect(DB_NAME)
-		c = conn.cursor()
+		with obter_conexao() as conn:
+			c = conn.cursor()
 		
-		try:
-			# Carregar dados da cotação
-			c.execute("""
-				SELECT 
-					c.id, c.numero_proposta, c.cliente_id, c.responsavel_id, c.filial_id,
-					c.data_validade, c.modelo_compressor, c.numero_serie_compressor,
-					c.descricao_atividade, c.observacoes, c.valor_total, c.tipo_frete,
-					c.condicao_pagamento, c.prazo_entrega, c.moeda, c.status,
-					c.caminho_arquivo_pdf, c.relacao_pecas, cl.nome AS cliente_nome,
-					c.esboco_servico, c.relacao_pecas_substituir,
-					c.tipo_cotacao, c.locacao_valor_mensal, c.locacao_data_inicio,
-					c.locacao_data_fim, c.locacao_qtd_meses, c.locacao_nome_equipamento
-				FROM cotacoes c
-				JOIN clientes cl ON c.cliente_id = cl.id
-				WHERE c.id = ?
-			""", (cotacao_id,))
+			try:
+				# Carregar dados da cotação
+				c.execute("""
+					SELECT 
+						c.id, c.numero_proposta, c.cliente_id, c.responsavel_id, c.filial_id,
+						c.data_validade, c.modelo_compressor, c.numero_serie_compressor,
+						c.descricao_atividade, c.observacoes, c.valor_total, c.tipo_frete,
+						c.condicao_pagamento, c.prazo_entrega, c.moeda, c.status,
+						c.caminho_arquivo_pdf, c.relacao_pecas, cl.nome AS cliente_nome,
+						c.esboco_servico, c.relacao_pecas_substituir,
+						c.tipo_cotacao, c.locacao_valor_mensal, c.locacao_data_inicio,
+						c.locacao_data_fim, c.locacao_qtd_meses, c.locacao_nome_equipamento
+					FROM cotacoes c
+					JOIN clientes cl ON c.cliente_id = cl.id
+					WHERE c.id = ?
+				""", (cotacao_id,))
 			
-			cotacao = c.fetchone()
-			if not cotacao:
-				self.show_error("Cotação não encontrada.")
-				return
+				cotacao = c.fetchone()
+				if not cotacao:
+					self.show_error("Cotação não encontrada.")
+					return
 				
-			# Preencher campos
-			self.current_cotacao_id = cotacao_id
-			self.numero_var.set(cotacao[1])  # numero_proposta
-			
-			# Encontrar cliente no combo
-			cliente_nome = cotacao[18]  # nome do cliente
-			for key, value in self.clientes_dict.items():
-				if value == cotacao[2]:  # cliente_id
-					self.cliente_var.set(key)
-					break
+				# Preencher campos
+				self.current_cotacao_id = cotacao_id
+				self.numero_var.set(cotacao[1])  # numero_proposta
+			
+				# Encontrar cliente no combo
+				cliente_nome = cotacao[18]  # nome do cliente
+				for key, value in self.clientes_dict.items():
+					if value == cotacao[2]:  # cliente_id
+						self.cliente_var.set(key)
+						break
 					
-			# Campos específicos de compra (podem estar vazios para locação)
-			self.modelo_var.set(cotacao[6] or "")
-			self.serie_var.set(cotacao[7] or "")
-			self.status_var.set(cotacao[15] or "Em Aberto")
-			self.data_validade_var.set(cotacao[5] or "")
-			self.condicao_pagamento_var.set(cotacao[12] or "")
-			self.prazo_entrega_var.set(cotacao[13] or "")
-			
-			# Observações
-			self.observacoes_text.delete("1.0", tk.END)
-			if cotacao[9]:  # observacoes
-				self.observacoes_text.insert("1.0", cotacao[9])
-			
-			# Esboço do serviço e relação de peças
-			self.esboco_servico_text.delete("1.0", tk.END)
-			if cotacao[19]:
-				self.esboco_servico_text.insert("1.0", cotacao[19])
-			self.relacao_pecas_text.delete("1.0", tk.END)
-			if cotacao[20]:
-				self.relacao_pecas_text.insert("1.0", cotacao[20])
-			
-			# Campos de Locação
-			self.tipo_cotacao_var.set(cotacao[21] or "Compra")
-			self.locacao_valor_mensal_var.set(f"{cotacao[22]:.2f}" if cotacao[22] is not None else "0.00")
-			self.locacao_data_inicio_var.set(format_date(cotacao[23]) if cotacao[23] else "")
-			self.locacao_data_fim_var.set(format_date(cotacao[24]) if cotacao[24] else "")
-			self.locacao_qtd_meses_var.set(str(cotacao[25] or 0))
-			self.locacao_equipamento_var.set(cotacao[26] or "")
-			
-			# Recarregar caminho da imagem se existir
-			try:
-				self.locacao_imagem_var.set(cotacao[27] or "")
-			except Exception:
-				pass
+				# Campos específicos de compra (podem estar vazios para locação)
+				self.modelo_var.set(cotacao[6] or "")
+				self.serie_var.set(cotacao[7] or "")
+				self.status_var.set(cotacao[15] or "Em Aberto")
+				self.data_validade_var.set(cotacao[5] or "")
+				self.condicao_pagamento_var.set(cotacao[12] or "")
+				self.prazo_entrega_var.set(cotacao[13] or "")
+			
+				# Observações
+				self.observacoes_text.delete("1.0", tk.END)
+				if cotacao[9]:  # observacoes
+					self.observacoes_text.insert("1.0", cotacao[9])
+			
+				# Esboço do serviço e relação de peças
+				self.esboco_servico_text.delete("1.0", tk.END)
+				if cotacao[19]:
+					self.esboco_servico_text.insert("1.0", cotacao[19])
+				self.relacao_pecas_text.delete("1.0", tk.END)
+				if cotacao[20]:
+					self.relacao_pecas_text.insert("1.0", cotacao[20])
+			
+				# Campos de Locação
+				self.tipo_cotacao_var.set(cotacao[21] or "Compra")
+				self.locacao_valor_mensal_var.set(f"{cotacao[22]:.2f}" if cotacao[22] is not None else "0.00")
+				self.locacao_data_inicio_var.set(format_date(cotacao[23]) if cotacao[23] else "")
+				self.locacao_data_fim_var.set(format_date(cotacao[24]) if cotacao[24] else "")
+				self.locacao_qtd_meses_var.set(str(cotacao[25] or 0))
+				self.locacao_equipamento_var.set(cotacao[26] or "")
+			
+				# Recarregar caminho da imagem se existir
+				try:
+					self.locacao_imagem_var.set(cotacao[27] or "")
+				except Exception:
+					pass
 				
-			# Alternar UI conforme tipo de cotação
-			self.on_tipo_cotacao_changed()
+				# Alternar UI conforme tipo de cotação
+				self.on_tipo_cotacao_changed()
 			
-			# Carregar itens (para Compra)
-			self.carregar_itens_cotacao(cotacao_id)
+				# Carregar itens (para Compra)
+				self.carregar_itens_cotacao(cotacao_id)
 			
-		except sqlite3.Error as e:
-			self.show_error(f"Erro ao carregar cotação: {e}")
-		finally:
-			conn.close()
+			except sqlite3.Error as e:
+				self.show_error(f"Erro ao carregar cotação: {e}")
 			
 	def carregar_itens_cotacao(self, cotacao_id):
 		"""Carregar itens da cotação"""
@@ -1599,93 +1514,91 @@ class CotacoesModule(BaseModule):
 			self.itens_tree.delete(item)
 		print(f"DEBUG: Tree limpa, agora tem {len(self.itens_tree.get_children())} itens")
 			
-		conn = sqlite3.connect(DB_NAME)
-		c = conn.cursor()
-		try:
-			# Query melhorada para garantir que todos os campos sejam retornados
-			query = """
-				SELECT 
-					COALESCE(tipo, 'Produto') as tipo,
-					COALESCE(item_nome, '') as item_nome,
-					COALESCE(quantidade, 1) as quantidade,
-					COALESCE(valor_unitario, 0) as valor_unitario,
-					COALESCE(valor_total_item, 0) as valor_total_item,
-					COALESCE(descricao, '') as descricao,
-					COALESCE(mao_obra, 0) as mao_obra,
-					COALESCE(deslocamento, 0) as deslocamento,
-					COALESCE(estadia, 0) as estadia,
-					COALESCE(locacao_qtd_meses, 0) as locacao_qtd_meses,
-					locacao_data_inicio,
-					locacao_data_fim,
-					COALESCE(tipo_operacao, 'Compra') as tipo_operacao
-				FROM itens_cotacao
-				WHERE cotacao_id = ?
-				ORDER BY id
-			"""
-			print(f"DEBUG: Executando query: {query}")
-			print(f"DEBUG: Parâmetros: cotacao_id = {cotacao_id}")
-			
-			c.execute(query, (cotacao_id,))
-			
-			itens = c.fetchall()
-			print(f"DEBUG: Encontrados {len(itens)} itens na cotação {cotacao_id}")
-			
-			if not itens:
-				print(f"DEBUG: Nenhum item encontrado para cotação {cotacao_id}")
-				print(f"DEBUG: Verificando se a cotação existe...")
-				c.execute("SELECT COUNT(*) FROM cotacoes WHERE id = ?", (cotacao_id,))
-				cotacao_count = c.fetchone()[0]
-				print(f"DEBUG: Cotação {cotacao_id} existe: {cotacao_count > 0}")
-				return
-			
-			for i, row in enumerate(itens):
-				(tipo, nome, qtd, valor_unit, total, desc, mao_obra, desloc, estadia, meses, inicio, fim, tipo_oper) = row
-				print(f"DEBUG Item {i+1}: Tipo={tipo}, Nome={nome}, Qtd={qtd}, Valor={valor_unit}, Total={total}")
+		with obter_conexao() as conn:
+			c = conn.cursor()
+			try:
+				# Query melhorada para garantir que todos os campos sejam retornados
+				query = """
+					SELECT 
+						COALESCE(tipo, 'Produto') as tipo,
+						COALESCE(item_nome, '') as item_nome,
+						COALESCE(quantidade, 1) as quantidade,
+						COALESCE(valor_unitario, 0) as valor_unitario,
+						COALESCE(valor_total_item, 0) as valor_total_item,
+						COALESCE(descricao, '') as descricao,
+						COALESCE(mao_obra, 0) as mao_obra,
+						COALESCE(deslocamento, 0) as deslocamento,
+						COALESCE(estadia, 0) as estadia,
+						COALESCE(locacao_qtd_meses, 0) as locacao_qtd_meses,
+						locacao_data_inicio,
+						locacao_data_fim,
+						COALESCE(tipo_operacao, 'Compra') as tipo_operacao
+					FROM itens_cotacao
+					WHERE cotacao_id = ?
+					ORDER BY id
+				"""
+				print(f"DEBUG: Executando query: {query}")
+				print(f"DEBUG: Parâmetros: cotacao_id = {cotacao_id}")
+			
+				c.execute(query, (cotacao_id,))
+			
+				itens = c.fetchall()
+				print(f"DEBUG: Encontrados {len(itens)} itens na cotação {cotacao_id}")
+			
+				if not itens:
+					print(f"DEBUG: Nenhum item encontrado para cotação {cotacao_id}")
+					print(f"DEBUG: Verificando se a cotação existe...")
+					c.execute("SELECT COUNT(*) FROM cotacoes WHERE id = ?", (cotacao_id,))
+					cotacao_count = c.fetchone()[0]
+					print(f"DEBUG: Cotação {cotacao_id} existe: {cotacao_count > 0}")
+					return
+			
+				for i, row in enumerate(itens):
+					(tipo, nome, qtd, valor_unit, total, desc, mao_obra, desloc, estadia, meses, inicio, fim, tipo_oper) = row
+					print(f"DEBUG Item {i+1}: Tipo={tipo}, Nome={nome}, Qtd={qtd}, Valor={valor_unit}, Total={total}")
 				
-				# Garantir que valores não sejam None
-				tipo = tipo or "Produto"
-				nome = nome or "Item sem nome"
-				qtd = qtd or 1
-				valor_unit = valor_unit or 0
-				total = total or 0
-				desc = desc or ""
-				mao_obra = mao_obra or 0
-				desloc = desloc or 0
-				estadia = estadia or 0
-				meses = meses or 0
-				tipo_oper = tipo_oper or "Compra"
+					# Garantir que valores não sejam None
+					tipo = tipo or "Produto"
+					nome = nome or "Item sem nome"
+					qtd = qtd or 1
+					valor_unit = valor_unit or 0
+					total = total or 0
+					desc = desc or ""
+					mao_obra = mao_obra or 0
+					desloc = desloc or 0
+					estadia = estadia or 0
+					meses = meses or 0
+					tipo_oper = tipo_oper or "Compra"
 				
-				print(f"DEBUG: Inserindo item na tree: {tipo}, {nome}, {qtd}")
-				self.itens_tree.insert("", "end", values=(
-					tipo,
-					nome,
-					f"{qtd:.2f}",
-					format_currency(valor_unit),
-					format_currency(mao_obra),
-					format_currency(desloc),
-					format_currency(estadia),
-					str(meses),
-					(format_date(inicio) if inicio else ""),
-					(format_date(fim) if fim else ""),
-					format_currency(total),
-					desc,
-					tipo_oper
-				))
+					print(f"DEBUG: Inserindo item na tree: {tipo}, {nome}, {qtd}")
+					self.itens_tree.insert("", "end", values=(
+						tipo,
+						nome,
+						f"{qtd:.2f}",
+						format_currency(valor_unit),
+						format_currency(mao_obra),
+						format_currency(desloc),
+						format_currency(estadia),
+						str(meses),
+						(format_date(inicio) if inicio else ""),
+						(format_date(fim) if fim else ""),
+						format_currency(total),
+						desc,
+						tipo_oper
+					))
 				
-			print(f"DEBUG: {len(self.itens_tree.get_children())} itens inseridos na tree")
-			self.atualizar_total()
-			
-		except sqlite3.Error as e:
-			print(f"ERRO ao carregar itens: {e}")
-			self.show_error(f"Erro ao carregar itens: {e}")
-		except Exception as e:
-			print(f"ERRO inesperado ao carregar itens: {e}")
-			print(f"DEBUG: Tipo de erro: {type(e)}")
-			import traceback
-			traceback.print_exc()
-			self.show_error(f"Erro inesperado ao carregar itens: {e}")
-		finally:
-			conn.close()
+				print(f"DEBUG: {len(self.itens_tree.get_children())} itens inseridos na tree")
+				self.atualizar_total()
+			
+			except sqlite3.Error as e:
+				print(f"ERRO ao carregar itens: {e}")
+				self.show_error(f"Erro ao carregar itens: {e}")
+			except Exception as e:
+				print(f"ERRO inesperado ao carregar itens: {e}")
+				print(f"DEBUG: Tipo de erro: {type(e)}")
+				import traceback
+				traceback.print_exc()
+				self.show_error(f"Erro inesperado ao carregar itens: {e}")
 
 	def duplicar_cotacao(self):
 		"""Duplicar cotação selecionada"""
@@ -1723,18 +1636,21 @@ class CotacoesModule(BaseModule):
 		cotacao_id = tags[0]
 		# Obter username do usuário atual para template personalizado
 		current_username = self._get_current_username()
-		sucesso, resultado = gerar_pdf_cotacao_nova(cotacao_id, DB_NAME, current_username, contato_nome=self.contato_cliente_var.get())
-		
-		if sucesso:
-			self.show_success(f"PDF gerado com sucesso!\nLocal: {resultado}")
-		else:
-			self.show_error(f"Erro ao gerar PDF: {resultado}")
+		self.gerar_pdf_em_segundo_plano(gerar_pdf_cotacao_nova, cotacao_id, DB_NAME, current_username,
+										contato_nome=self.contato_cliente_var.get())
 			
 	def handle_event(self, event_type, data=None):
 		"""Manipular eventos do sistema"""
-		if event_type == 'cliente_created':
+		if event_type in ('cliente_created', 'cliente_updated', 'cliente_deleted'):
 			self.refresh_clientes()
 			print("Lista de clientes atualizada automaticamente!")
-		elif event_type == 'produto_created':
+		elif event_type in ('produto_created', 'produto_updated'):
 			self.refresh_produtos()
-			print("Lista de produtos atualizada automaticamente!")
\ No newline at end of file
+			print("Lista de produtos atualizada automaticamente!")
+		elif event_type in ('cotacao_created', 'cotacao_updated'):
+			if data['ids'] is None:
+				self.carregar_cotacoes()
+			else:
+				self.lista_cotacoes.atualizar(data['ids'])
+		elif event_type == 'cotacoes_expiradas':
+			self.atualizar_status_na_lista(self.cotacoes_tree, data['ids'], data['status'])
\ No newline at end of file
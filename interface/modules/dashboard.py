@@ -3,9 +3,18 @@ from tkinter import ttk
 import sqlite3
 from datetime import datetime, timedelta
 from .base_module import BaseModule
-from database import DB_NAME
+from database import DB_NAME, obter_conexao
 from utils.formatters import format_currency
 
+# Partes do dashboard afetadas por eventos de cada entidade (prefixo do evento)
+PARTES_DASHBOARD = ('cards', 'cotacoes', 'relatorios')
+PARTES_POR_ENTIDADE = {
+    'cliente': {'cards'},
+    'produto': {'cards'},
+    'cotacao': {'cards', 'cotacoes'},
+    'relatorio': {'cards', 'relatorios'},
+}
+
 class DashboardModule(BaseModule):
     def setup_ui(self):
         # Container principal
@@ -161,77 +170,105 @@ class DashboardModule(BaseModule):
         self.reports_tree.pack(side="left", fill="both", expand=True, padx=5, pady=5)
         reports_scrollbar.pack(side="right", fill="y", pady=5)
         
-    def load_dashboard_data(self):
-        """Carregar dados do dashboard"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
+    def load_dashboard_data(self, partes=PARTES_DASHBOARD):
+        """Carregar dados do dashboard (as consultas rodam em segundo plano)"""
+        partes = set(partes)
+        # Uma carga ainda em andamento fica obsoleta: é cancelada e suas partes entram nesta
+        if getattr(self, '_carga_dashboard', None) is not None:
+            self._carga_dashboard.cancelar()
+            partes |= self._partes_carga
+        self._partes_carga = partes
+        self._carga_dashboard = self.executar_em_segundo_plano(
+            lambda tarefa: self.consultar_dashboard(partes),
+            descricao="Atualizando dashboard",
+            ao_concluir=self.exibir_dashboard,
+            ao_erro=lambda erro: self.show_error(f"Erro ao carregar dados: {erro}"))
+        
+    def consultar_dashboard(self, partes=PARTES_DASHBOARD):
+        """Ler os cards e/ou as listas recentes pedidos em partes (sem tocar na interface)"""
+        with obter_conexao() as conn:
+            c = conn.cursor()
+        
+            dados = {}
             # Carregar estatísticas baseadas no perfil do usuário
-            if self.has_role('admin'):
-                # Admin vê dados gerais de todos
-                # Clientes
-                c.execute("SELECT COUNT(*) FROM clientes")
-                clients_count = c.fetchone()[0]
-                self.clients_card.value_label.config(text=str(clients_count))
-                
-                # Produtos
-                c.execute("SELECT COUNT(*) FROM produtos WHERE ativo = 1")
-                products_count = c.fetchone()[0]
-                self.products_card.value_label.config(text=str(products_count))
-                
-                # Cotações
-                c.execute("SELECT COUNT(*) FROM cotacoes")
-                quotes_count = c.fetchone()[0]
-                self.quotes_card.value_label.config(text=str(quotes_count))
-                
-                # Relatórios
-                c.execute("SELECT COUNT(*) FROM relatorios_tecnicos")
-                reports_count = c.fetchone()[0]
-                self.reports_card.value_label.config(text=str(reports_count))
-            else:
-                # Usuários veem apenas seus dados
-                # Cotações do usuário
-                c.execute("SELECT COUNT(*) FROM cotacoes WHERE responsavel_id = ?", (self.user_id,))
-                quotes_count = c.fetchone()[0]
-                self.quotes_card.value_label.config(text=str(quotes_count))
-                
-                # Relatórios do usuário
-                c.execute("SELECT COUNT(*) FROM relatorios_tecnicos WHERE responsavel_id = ?", (self.user_id,))
-                reports_count = c.fetchone()[0]
-                self.reports_card.value_label.config(text=str(reports_count))
-                
-                # Faturamento do usuário (cotações aprovadas)
-                c.execute("SELECT SUM(valor_total) FROM cotacoes WHERE responsavel_id = ? AND status = 'Aprovada'", (self.user_id,))
-                faturamento = c.fetchone()[0] or 0
-                self.clients_card.value_label.config(text=format_currency(faturamento))
-                
-                # Quantidade de propostas feitas
-                c.execute("SELECT COUNT(*) FROM cotacoes WHERE responsavel_id = ?", (self.user_id,))
-                propostas_count = c.fetchone()[0]
-                self.products_card.value_label.config(text=str(propostas_count))
+            if 'cards' in partes:
+                dados['cards'] = self.load_cards(c)
             
             # Carregar cotações recentes
-            self.load_recent_quotes(c)
+            if 'cotacoes' in partes:
+                dados['cotacoes'] = self.load_recent_quotes(c)
             
             # Carregar relatórios recentes
-            self.load_recent_reports(c)
+            if 'relatorios' in partes:
+                dados['relatorios'] = self.load_recent_reports(c)
+            return dados
+            
+    def load_cards(self, cursor):
+        """Textos dos quatro cards (dashboard_resumo/dashboard_totais são mantidas por triggers)"""
+        if self.has_role('admin'):
+            # Admin vê dados gerais de todos
+            cursor.execute("SELECT chave, valor FROM dashboard_totais")
+            totais = dict(cursor.fetchall())
+            cursor.execute("""
+                SELECT COALESCE(SUM(total_cotacoes), 0), COALESCE(SUM(total_relatorios), 0)
+                FROM dashboard_resumo
+            """)
+            quotes_count, reports_count = cursor.fetchone()
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar dados: {e}")
-        finally:
-            conn.close()
+            return (str(totais.get('clientes', 0)), str(totais.get('produtos_ativos', 0)),
+                    str(quotes_count), str(reports_count))
+        
+        # Usuários veem apenas seus dados (somando as filiais)
+        cursor.execute("""
+            SELECT COALESCE(SUM(total_cotacoes), 0), COALESCE(SUM(total_relatorios), 0),
+                   COALESCE(SUM(faturamento_aprovado), 0)
+            FROM dashboard_resumo
+            WHERE responsavel_id = ?
+        """, (self.user_id,))
+        quotes_count, reports_count, faturamento = cursor.fetchone()
+        
+        # Faturamento do usuário (cotações aprovadas) e quantidade de propostas feitas
+        return (format_currency(faturamento), str(quotes_count),
+                str(quotes_count), str(reports_count))
             
-    def load_recent_quotes(self, cursor):
-        """Carregar cotações recentes"""
-        # Limpar lista atual
-        for item in self.quotes_tree.get_children():
-            self.quotes_tree.delete(item)
+    def exibir_dashboard(self, dados):
+        """Preencher cards e listas com o resultado de consultar_dashboard (só as partes lidas)"""
+        self._carga_dashboard = None
+        if 'cards' in dados:
+            clientes, produtos, cotacoes, relatorios = dados['cards']
+            self.clients_card.value_label.config(text=clientes)
+            self.products_card.value_label.config(text=produtos)
+            self.quotes_card.value_label.config(text=cotacoes)
+            self.reports_card.value_label.config(text=relatorios)
+        
+        if 'cotacoes' in dados:
+            self.quotes_tree.delete(*self.quotes_tree.get_children())
+            for cotacao_id, numero, cliente, data, valor, status in dados['cotacoes']:
+                self.quotes_tree.insert("", "end", values=(
+                    numero,
+                    cliente,
+                    data,
+                    format_currency(valor) if valor else "R$ 0,00",
+                    status
+                ), tags=(cotacao_id,))
+            
+        if 'relatorios' not in dados:
+            return
+        self.reports_tree.delete(*self.reports_tree.get_children())
+        for numero, cliente, data, responsavel, tipo in dados['relatorios']:
+            self.reports_tree.insert("", "end", values=(
+                numero,
+                cliente,
+                data,
+                responsavel,
+                tipo or "N/A"
+            ))
             
-        # Buscar cotações recentes baseadas no perfil
+    def load_recent_quotes(self, cursor):
+        """Buscar cotações recentes baseadas no perfil"""
         if self.has_role('admin'):
             cursor.execute("""
-                SELECT c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
+                SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
                 FROM cotacoes c
                 JOIN clientes cl ON c.cliente_id = cl.id
                 ORDER BY c.created_at DESC
@@ -239,31 +276,17 @@ class DashboardModule(BaseModule):
             """)
         else:
             cursor.execute("""
-                SELECT c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
+                SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
                 FROM cotacoes c
                 JOIN clientes cl ON c.cliente_id = cl.id
                 WHERE c.responsavel_id = ?
                 ORDER BY c.created_at DESC
                 LIMIT 10
             """, (self.user_id,))
-        
-        for row in cursor.fetchall():
-            numero, cliente, data, valor, status = row
-            self.quotes_tree.insert("", "end", values=(
-                numero,
-                cliente,
-                data,
-                format_currency(valor) if valor else "R$ 0,00",
-                status
-            ))
+        return cursor.fetchall()
             
     def load_recent_reports(self, cursor):
-        """Carregar relatórios recentes"""
-        # Limpar lista atual
-        for item in self.reports_tree.get_children():
-            self.reports_tree.delete(item)
-            
-        # Buscar relatórios recentes baseadas no perfil
+        """Buscar relatórios recentes baseados no perfil"""
         if self.has_role('admin'):
             cursor.execute("""
                 SELECT r.numero_relatorio, cl.nome, r.data_criacao, u.nome_completo, r.tipo_servico
@@ -283,19 +306,14 @@ class DashboardModule(BaseModule):
                 ORDER BY r.created_at DESC
                 LIMIT 10
             """, (self.user_id,))
-        
-        for row in cursor.fetchall():
-            numero, cliente, data, responsavel, tipo = row
-            self.reports_tree.insert("", "end", values=(
-                numero,
-                cliente,
-                data,
-                responsavel,
-                tipo or "N/A"
-            ))
+        return cursor.fetchall()
             
     def handle_event(self, event_type, data=None):
-        """Manipular eventos do sistema"""
-        # Recarregar dados quando houver mudanças
-        if event_type in ['cliente_created', 'produto_created', 'cotacao_created', 'relatorio_created']:
-            self.load_dashboard_data()
\ No newline at end of file
+        """Manipular eventos do sistema: relê só as partes que o evento afeta"""
+        if event_type == 'cotacoes_expiradas':
+            # Só o status muda: corrigir as linhas da lista, sem consultar o banco
+            self.atualizar_status_na_lista(self.quotes_tree, data['ids'], data['status'])
+            return
+        partes = PARTES_POR_ENTIDADE.get(event_type.split('_')[0])
+        if partes:
+            self.load_dashboard_data(partes)
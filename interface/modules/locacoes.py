@@ -46,7 +46,6 @@ class LocacoesModule(BaseModule):
 			self._collect_tipo_combobox(child, out_list)
 
 	def handle_event(self, event_type, data=None):
-		# Encaminhar para o módulo interno
-		if hasattr(self, '_cotacoes') and hasattr(self._cotacoes, 'handle_event'):
-			self._cotacoes.handle_event(event_type, data)
+		# O módulo interno se registra na MainWindow e já recebe cada evento uma vez
+		pass
 
@@ -4,8 +4,9 @@ import sqlite3
 from datetime import datetime
 
 from .base_module import BaseModule
-from database import DB_NAME
+from database import DB_NAME, obter_conexao, espiar_numero, alocar_numero
 from utils.formatters import format_currency, format_date, clean_number
+from utils.sugestoes import indice_clientes
 from pdf_generators.cotacao_nova import gerar_pdf_cotacao_nova
 
 
@@ -74,6 +75,9 @@ class LocacoesModule(BaseModule):
 		# Manter apenas o botão inferior direito de PDF
 		gerar_pdf_lista_btn = self.create_button(lista_buttons, "Gerar PDF", self.gerar_pdf, bg='#10b981')
 		gerar_pdf_lista_btn.pack(side="right")
+		exportar_btn = self.create_button(lista_buttons, "Exportar Excel", lambda: self.exportar_planilha('locacoes'),
+										  bg='#e2e8f0', fg='#475569')
+		exportar_btn.pack(side="right", padx=(0, 10))
 
 		columns = ("numero", "cliente", "data", "valor", "status")
 		self.tree = ttk.Treeview(lista_inner, columns=columns, show="headings")
@@ -89,6 +93,12 @@ class LocacoesModule(BaseModule):
 		self.tree.column("status", width=100)
 		lista_scrollbar = ttk.Scrollbar(lista_inner, orient="vertical", command=self.tree.yview)
 		self.tree.configure(yscrollcommand=lista_scrollbar.set)
+		self.lista = self.criar_lista_paginada(
+			self.tree, lista_scrollbar,
+			"id, numero_proposta, (SELECT nome FROM clientes WHERE id=cliente_id) AS cliente, "
+			"data_criacao, valor_total, status",
+			"cotacoes", ("created_at", "id"), self._valores_locacao,
+			condicao="tipo_cotacao = 'Locação'", descendente=True)
 		self.tree.pack(side="left", fill="both", expand=True)
 		lista_scrollbar.pack(side="right", fill="y")
 
@@ -139,8 +149,9 @@ class LocacoesModule(BaseModule):
 		self.cliente_combo = ttk.Combobox(cliente_frame, textvariable=self.cliente_var, width=25)
 		self.cliente_combo.pack(side="left", fill="x", expand=True)
 		self.cliente_combo.bind("<<ComboboxSelected>>", self._on_cliente_selected)
-		refresh_clientes_btn = self.create_button(cliente_frame, "🔄", self._refresh_clientes, bg='#10b981')
+		refresh_clientes_btn = self.create_button(cliente_frame, "🔄", lambda: self._refresh_clientes(recarregar=True), bg='#10b981')
 		refresh_clientes_btn.pack(side="right", padx=(5, 0))
+		self.configurar_sugestoes(self.cliente_combo, indice_clientes)
 		row += 1
 
 		tk.Label(dados, text="Contato:", font=('Arial', 10, 'bold'), bg='white').grid(row=row, column=0, sticky="w", pady=5)
@@ -356,21 +367,13 @@ class LocacoesModule(BaseModule):
 		self.total_label.config(text=f"Total: {format_currency(total)}")
 
 	# --- DB helpers ---
-	def _refresh_clientes(self):
+	def _refresh_clientes(self, recarregar=False):
 		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-			c.execute("SELECT id, nome FROM clientes ORDER BY nome")
-			clientes = c.fetchall()
-			self.clientes_dict = {f"{nome} (ID: {id})": id for id, nome in clientes}
-			self.cliente_combo['values'] = list(self.clientes_dict.keys())
+			indice = indice_clientes(recarregar)
+			self.clientes_dict = indice.ids_por_rotulo
+			self.cliente_combo['values'] = indice.buscar(self.cliente_var.get())
 		except Exception as e:
 			print(f"Erro ao carregar clientes: {e}")
-		finally:
-			try:
-				conn.close()
-			except Exception:
-				pass
 
 	def _on_cliente_selected(self, event=None):
 		"""Quando cliente é alterado"""
@@ -382,47 +385,34 @@ class LocacoesModule(BaseModule):
 		if not cliente_id:
 			return
 		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
+			with obter_conexao() as conn:
+				c = conn.cursor()
 			
-			# Buscar prazo de pagamento do cliente
-			c.execute("SELECT prazo_pagamento FROM clientes WHERE id = ?", (cliente_id,))
-			result = c.fetchone()
+				# Buscar prazo de pagamento do cliente
+				c.execute("SELECT prazo_pagamento FROM clientes WHERE id = ?", (cliente_id,))
+				result = c.fetchone()
 			
-			if result and result[0]:
-				# Preencher automaticamente a condição de pagamento
-				self.condicao_pagamento_var.set(result[0])
+				if result and result[0]:
+					# Preencher automaticamente a condição de pagamento
+					self.condicao_pagamento_var.set(result[0])
 			
-			c.execute("SELECT nome FROM contatos WHERE cliente_id = ? ORDER BY nome", (cliente_id,))
-			contatos = [row[0] for row in c.fetchall()]
-			self.contato_cliente_combo['values'] = contatos
-			if contatos:
-				self.contato_cliente_var.set(contatos[0])
-			else:
-				self.contato_cliente_var.set("")
+				c.execute("SELECT nome FROM contatos WHERE cliente_id = ? ORDER BY nome", (cliente_id,))
+				contatos = [row[0] for row in c.fetchall()]
+				self.contato_cliente_combo['values'] = contatos
+				if contatos:
+					self.contato_cliente_var.set(contatos[0])
+				else:
+					self.contato_cliente_var.set("")
 		except Exception as e:
 			print(f"Erro ao carregar contatos: {e}")
-		finally:
-			try:
-				conn.close()
-			except Exception:
-				pass
 
 	def _gerar_numero_sequencial(self) -> str:
+		# Apenas sugestão; o número definitivo é reservado em salvar()
 		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-			c.execute("SELECT MAX(CAST(SUBSTR(numero_proposta, 5) AS INTEGER)) FROM cotacoes WHERE tipo_cotacao='Locação' AND numero_proposta LIKE 'LOC-%'")
-			result = c.fetchone()
-			proximo = (result[0] + 1) if (result and result[0]) else 1
-			return f"LOC-{proximo:06d}"
+			self._numero_sugerido = espiar_numero('LOC')
 		except Exception:
-			return f"LOC-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-		finally:
-			try:
-				conn.close()
-			except Exception:
-				pass
+			self._numero_sugerido = f"LOC-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+		return self._numero_sugerido
 
 	# --- Persistência ---
 	def salvar(self):
@@ -458,83 +448,84 @@ class LocacoesModule(BaseModule):
 		filial_id = int(filial_str.split(' - ')[0]) if ' - ' in filial_str else int(filial_str)
 
 		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-
-			if self.current_cotacao_id:
-				c.execute(
-					"""
-					UPDATE cotacoes
-					SET numero_proposta=?, cliente_id=?, responsavel_id=?, filial_id=?, data_criacao=?,
-						data_validade=?, modelo_compressor=?, observacoes=?, valor_total=?, status=?,
-						condicao_pagamento=?, prazo_entrega=?, esboco_servico=?, relacao_pecas_substituir=?,
-						tipo_cotacao=?, contato_nome=?
-					WHERE id=?
-					""",
-					(
-						numero, cliente_id, self.user_id, filial_id, datetime.now().strftime('%Y-%m-%d'),
-						data_validade, self.modelo_var.get().strip(), self.observacoes_text.get("1.0", tk.END).strip(), total, "Em Aberto",
-						cond_pgto, "", "", "",
-						"Locação", self.contato_cliente_var.get().strip(),
-						self.current_cotacao_id,
-					),
-				)
-				c.execute("DELETE FROM itens_cotacao WHERE cotacao_id = ?", (self.current_cotacao_id,))
-				cotacao_id = self.current_cotacao_id
-			else:
-				c.execute(
-					"""
-					INSERT INTO cotacoes (
-						numero_proposta, cliente_id, responsavel_id, data_criacao, data_validade,
-						modelo_compressor, observacoes, valor_total, status, condicao_pagamento, prazo_entrega,
-						filial_id, esboco_servico, relacao_pecas_substituir, tipo_cotacao,
-						contato_nome
-					) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-					""",
-					(
-						numero, cliente_id, self.user_id, datetime.now().strftime('%Y-%m-%d'), None,
-						self.modelo_var.get().strip(), self.observacoes_text.get("1.0", tk.END).strip(), total, "Em Aberto", cond_pgto, "",
-						filial_id, "", "", "Locação",
-						self.contato_cliente_var.get().strip(),
-					),
-				)
-				cotacao_id = c.lastrowid
-				self.current_cotacao_id = cotacao_id
-
-			# Inserir itens com imagem por item
-			for iid in self.itens_tree.get_children():
-				(nome, qtd, valor_unit_fmt, meses, inicio_fmt, fim_fmt, total_fmt, desc, imagem) = self.itens_tree.item(iid)['values']
-				quantidade = float(qtd)
-				valor_unit = clean_number(valor_unit_fmt)
-				valor_total_item = clean_number(total_fmt)
-				inicio_iso = self._parse_date(inicio_fmt)
-				fim_iso = self._parse_date(fim_fmt)
-				meses_int = int(meses) if str(meses).isdigit() else None
-				c.execute(
-					"""
-					INSERT INTO itens_cotacao (
-						cotacao_id, tipo, item_nome, quantidade, valor_unitario, valor_total_item, descricao,
-						mao_obra, deslocamento, estadia, tipo_operacao, locacao_data_inicio, locacao_data_fim, locacao_qtd_meses,
-						locacao_imagem_path
-					) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-					""",
-					(
-						cotacao_id, "Produto", nome, quantidade, valor_unit, valor_total_item, desc,
-						0, 0, 0, "Locação", inicio_iso, fim_iso, meses_int,
-						imagem,
-					),
-				)
-
-			conn.commit()
-			self.show_success("Locação salva com sucesso!")
-			self._carregar_lista()
+			with obter_conexao() as conn:
+				c = conn.cursor()
+
+				if not self.current_cotacao_id and numero == getattr(self, '_numero_sugerido', None):
+					numero = alocar_numero('LOC')
+					self.numero_var.set(numero)
+
+				evento = 'cotacao_updated' if self.current_cotacao_id else 'cotacao_created'
+				if self.current_cotacao_id:
+					c.execute(
+						"""
+						UPDATE cotacoes
+						SET numero_proposta=?, cliente_id=?, responsavel_id=?, filial_id=?, data_criacao=?,
+							data_validade=?, modelo_compressor=?, observacoes=?, valor_total=?, status=?,
+							condicao_pagamento=?, prazo_entrega=?, esboco_servico=?, relacao_pecas_substituir=?,
+							tipo_cotacao=?, contato_nome=?
+						WHERE id=?
+						""",
+						(
+							numero, cliente_id, self.user_id, filial_id, datetime.now().strftime('%Y-%m-%d'),
+							data_validade, self.modelo_var.get().strip(), self.observacoes_text.get("1.0", tk.END).strip(), total, "Em Aberto",
+							cond_pgto, "", "", "",
+							"Locação", self.contato_cliente_var.get().strip(),
+							self.current_cotacao_id,
+						),
+					)
+					c.execute("DELETE FROM itens_cotacao WHERE cotacao_id = ?", (self.current_cotacao_id,))
+					cotacao_id = self.current_cotacao_id
+				else:
+					c.execute(
+						"""
+						INSERT INTO cotacoes (
+							numero_proposta, cliente_id, responsavel_id, data_criacao, data_validade,
+							modelo_compressor, observacoes, valor_total, status, condicao_pagamento, prazo_entrega,
+							filial_id, esboco_servico, relacao_pecas_substituir, tipo_cotacao,
+							contato_nome
+						) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+						""",
+						(
+							numero, cliente_id, self.user_id, datetime.now().strftime('%Y-%m-%d'), None,
+							self.modelo_var.get().strip(), self.observacoes_text.get("1.0", tk.END).strip(), total, "Em Aberto", cond_pgto, "",
+							filial_id, "", "", "Locação",
+							self.contato_cliente_var.get().strip(),
+						),
+					)
+					cotacao_id = c.lastrowid
+					self.current_cotacao_id = cotacao_id
+
+				# Inserir itens com imagem por item
+				for iid in self.itens_tree.get_children():
+					(nome, qtd, valor_unit_fmt, meses, inicio_fmt, fim_fmt, total_fmt, desc, imagem) = self.itens_tree.item(iid)['values']
+					quantidade = float(qtd)
+					valor_unit = clean_number(valor_unit_fmt)
+					valor_total_item = clean_number(total_fmt)
+					inicio_iso = self._parse_date(inicio_fmt)
+					fim_iso = self._parse_date(fim_fmt)
+					meses_int = int(meses) if str(meses).isdigit() else None
+					c.execute(
+						"""
+						INSERT INTO itens_cotacao (
+							cotacao_id, tipo, item_nome, quantidade, valor_unitario, valor_total_item, descricao,
+							mao_obra, deslocamento, estadia, tipo_operacao, locacao_data_inicio, locacao_data_fim, locacao_qtd_meses,
+							locacao_imagem_path
+						) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+						""",
+						(
+							cotacao_id, "Produto", nome, quantidade, valor_unit, valor_total_item, desc,
+							0, 0, 0, "Locação", inicio_iso, fim_iso, meses_int,
+							imagem,
+						),
+					)
+
+				conn.commit()
+				self.show_success("Locação salva com sucesso!")
+				# A própria lista também é atualizada pelo evento (só a linha da locação)
+				self.emit_event(evento, {'ids': [cotacao_id]})
 		except sqlite3.Error as e:
 			self.show_error(f"Erro ao salvar locação: {e}")
-		finally:
-			try:
-				conn.close()
-			except Exception:
-				pass
 
 	def nova(self):
 		self.current_cotacao_id = None
@@ -567,115 +558,44 @@ class LocacoesModule(BaseModule):
 		if not cotacao_id:
 			self.show_warning("Selecione uma locação na lista para gerar o PDF.")
 			return
-		try:
-			current_username = self._get_current_username()
-			sucesso, resultado = gerar_pdf_cotacao_nova(
-				cotacao_id,
-				DB_NAME,
-				current_username,
-				contato_nome=self.contato_cliente_var.get(),
-				locacao_pagina4_text=None,
-				locacao_pagina4_image=None,
-			)
-			if sucesso:
-				self.show_success(f"PDF gerado com sucesso!\nLocal: {resultado}")
-			else:
-				self.show_error(f"Erro ao gerar PDF: {resultado}")
-		except Exception as e:
-			self.show_error(f"Erro ao gerar PDF: {e}")
+		# A proposta de locação (13 páginas) é montada em segundo plano
+		current_username = self._get_current_username()
+		self.gerar_pdf_em_segundo_plano(
+			gerar_pdf_cotacao_nova,
+			cotacao_id,
+			DB_NAME,
+			current_username,
+			contato_nome=self.contato_cliente_var.get(),
+			locacao_pagina4_text=None,
+			locacao_pagina4_image=None,
+		)
 
 	def _get_current_username(self):
-		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-			c.execute("SELECT username FROM usuarios WHERE id = ?", (self.user_id,))
-			r = c.fetchone()
-			return r[0] if r else None
-		except Exception:
-			return None
-		finally:
-			try:
-				conn.close()
-			except Exception:
-				pass
+		return self.sessao.username
 
 	# --- List/Load ---
 	def _carregar_lista(self):
-		for iid in self.tree.get_children():
-			self.tree.delete(iid)
-		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-			c.execute(
-				"""
-				SELECT id, numero_proposta, (SELECT nome FROM clientes WHERE id=cliente_id) AS cliente,
-				       data_criacao, valor_total, status
-				FROM cotacoes
-				WHERE tipo_cotacao = 'Locação'
-				ORDER BY created_at DESC
-				"""
-			)
-			for (cid, numero, cliente, data, valor, status) in c.fetchall():
-				self.tree.insert("", "end", values=(
-					numero,
-					cliente,
-					format_date(data),
-					format_currency(valor) if valor else "R$ 0,00",
-					status or "Em Aberto",
-				), tags=(cid,))
-		except sqlite3.Error as e:
-			self.show_error(f"Erro ao carregar locações: {e}")
-		finally:
-			try:
-				conn.close()
-			except Exception:
-				pass
+		self.lista.carregar()
+
+	def _valores_locacao(self, dados):
+		cid, numero, cliente, data, valor, status = dados
+		return (
+			numero,
+			cliente,
+			format_date(data),
+			format_currency(valor) if valor else "R$ 0,00",
+			status or "Em Aberto",
+		)
 
 	def buscar(self):
 		termo = self.search_var.get().strip()
-		for iid in self.tree.get_children():
-			self.tree.delete(iid)
-		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-			if termo:
-				c.execute(
-					"""
-					SELECT id, numero_proposta, (SELECT nome FROM clientes WHERE id=cliente_id) AS cliente,
-					       data_criacao, valor_total, status
-					FROM cotacoes
-					WHERE tipo_cotacao = 'Locação' AND (numero_proposta LIKE ? OR cliente IN (
-						SELECT nome FROM clientes WHERE nome LIKE ?
-					))
-					ORDER BY created_at DESC
-					""",
-					(f"%{termo}%", f"%{termo}%"),
-				)
-			else:
-				c.execute(
-					"""
-					SELECT id, numero_proposta, (SELECT nome FROM clientes WHERE id=cliente_id) AS cliente,
-					       data_criacao, valor_total, status
-					FROM cotacoes
-					WHERE tipo_cotacao = 'Locação'
-					ORDER BY created_at DESC
-					"""
-				)
-			for (cid, numero, cliente, data, valor, status) in c.fetchall():
-				self.tree.insert("", "end", values=(
-					numero,
-					cliente,
-					format_date(data),
-					format_currency(valor) if valor else "R$ 0,00",
-					status or "Em Aberto",
-				), tags=(cid,))
-		except sqlite3.Error as e:
-			self.show_error(f"Erro ao buscar: {e}")
-		finally:
-			try:
-				conn.close()
-			except Exception:
-				pass
+		if termo:
+			self.lista.carregar(
+				"numero_proposta LIKE ? OR cliente_id IN (SELECT id FROM clientes WHERE nome LIKE ?)",
+				(f"%{termo}%", f"%{termo}%"),
+			)
+		else:
+			self.lista.carregar()
 
 	def editar(self):
 		sel = self.tree.selection()
@@ -687,89 +607,84 @@ class LocacoesModule(BaseModule):
 
 	def _carregar_cotacao(self, cotacao_id):
 		try:
-			conn = sqlite3.connect(DB_NAME)
-			c = conn.cursor()
-			c.execute(
-				"""
-				SELECT id, numero_proposta, cliente_id, responsavel_id, filial_id, data_validade, modelo_compressor,
-				       observacoes, valor_total, status, contato_nome, condicao_pagamento
-				FROM cotacoes
-				WHERE id = ? AND tipo_cotacao = 'Locação'
-				""",
-				(cotacao_id,),
-			)
-			row = c.fetchone()
-			if not row:
-				self.show_error("Locação não encontrada.")
-				return
-			(
-				cid, numero, cliente_id, responsavel_id, filial_id, data_validade, modelo_compressor,
-				observacoes, valor_total, status, contato_nome, cond_pgto
-			) = row
-			self.current_cotacao_id = cid
-			self.numero_var.set(numero)
-			# set cliente in combo
-			for display, _id in self.clientes_dict.items():
-				if _id == cliente_id:
-					self.cliente_var.set(display)
-					break
-			# contato
-			self._on_cliente_selected()
-			if contato_nome:
-				try:
-					self.contato_cliente_var.set(contato_nome)
-				except Exception:
-					pass
-			# filial e campos
-			self.filial_var.set(str(filial_id))
-			self.modelo_var.set(modelo_compressor or "")
-			self.condicao_pagamento_var.set(cond_pgto or "")
-			self.observacoes_text.delete("1.0", tk.END)
-			if observacoes:
-				self.observacoes_text.insert("1.0", observacoes)
-
-			# itens
-			for iid in self.itens_tree.get_children():
-				self.itens_tree.delete(iid)
-			c.execute(
-				"""
-				SELECT item_nome, quantidade, valor_unitario, locacao_qtd_meses, locacao_data_inicio,
-				       locacao_data_fim, valor_total_item, descricao, locacao_imagem_path
-				FROM itens_cotacao
-				WHERE cotacao_id = ?
-				ORDER BY id
-				""",
-				(cid,),
-			)
-			first_img = ""
-			for (nome, qtd, valor_unit, meses, inicio, fim, total_item, desc, img) in c.fetchall():
-				self.itens_tree.insert(
-					"", "end",
-					values=(
-						nome,
-						f"{qtd:.2f}",
-						format_currency(valor_unit),
-						str(meses or ""),
-						format_date(inicio) if inicio else "",
-						format_date(fim) if fim else "",
-						format_currency(total_item),
-						desc or "",
-						img or "",
-					),
+			with obter_conexao() as conn:
+				c = conn.cursor()
+				c.execute(
+					"""
+					SELECT id, numero_proposta, cliente_id, responsavel_id, filial_id, data_validade, modelo_compressor,
+					       observacoes, valor_total, status, contato_nome, condicao_pagamento
+					FROM cotacoes
+					WHERE id = ? AND tipo_cotacao = 'Locação'
+					""",
+					(cotacao_id,),
 				)
-				if not first_img and img:
-					first_img = img
-			self._update_total()
-			# Prefill image field with first item's image to allow keeping/changing
-			if first_img:
-				self.item_imagem_var.set(first_img)
+				row = c.fetchone()
+				if not row:
+					self.show_error("Locação não encontrada.")
+					return
+				(
+					cid, numero, cliente_id, responsavel_id, filial_id, data_validade, modelo_compressor,
+					observacoes, valor_total, status, contato_nome, cond_pgto
+				) = row
+				self.current_cotacao_id = cid
+				self.numero_var.set(numero)
+				# set cliente in combo
+				for display, _id in self.clientes_dict.items():
+					if _id == cliente_id:
+						self.cliente_var.set(display)
+						break
+				# contato
+				self._on_cliente_selected()
+				if contato_nome:
+					try:
+						self.contato_cliente_var.set(contato_nome)
+					except Exception:
+						pass
+				# filial e campos
+				self.filial_var.set(str(filial_id))
+				self.modelo_var.set(modelo_compressor or "")
+				self.condicao_pagamento_var.set(cond_pgto or "")
+				self.observacoes_text.delete("1.0", tk.END)
+				if observacoes:
+					self.observacoes_text.insert("1.0", observacoes)
+
+				# itens
+				for iid in self.itens_tree.get_children():
+					self.itens_tree.delete(iid)
+				c.execute(
+					"""
+					SELECT item_nome, quantidade, valor_unitario, locacao_qtd_meses, locacao_data_inicio,
+					       locacao_data_fim, valor_total_item, descricao, locacao_imagem_path
+					FROM itens_cotacao
+					WHERE cotacao_id = ?
+					ORDER BY id
+					""",
+					(cid,),
+				)
+				first_img = ""
+				for (nome, qtd, valor_unit, meses, inicio, fim, total_item, desc, img) in c.fetchall():
+					self.itens_tree.insert(
+						"", "end",
+						values=(
+							nome,
+							f"{qtd:.2f}",
+							format_currency(valor_unit),
+							str(meses or ""),
+							format_date(inicio) if inicio else "",
+							format_date(fim) if fim else "",
+							format_currency(total_item),
+							desc or "",
+							img or "",
+						),
+					)
+					if not first_img and img:
+						first_img = img
+				self._update_total()
+				# Prefill image field with first item's image to allow keeping/changing
+				if first_img:
+					self.item_imagem_var.set(first_img)
 		except sqlite3.Error as e:
 			self.show_error(f"Erro ao carregar locação: {e}")
-		finally:
-			try:
-				conn.close()
-			except Exception:
-				pass
 
 	# --- Utils ---
 	def _parse_date(self, s):
@@ -798,8 +713,15 @@ class LocacoesModule(BaseModule):
 		return months if months > 0 else 1
 
 	def handle_event(self, event_type, data=None):
-		if event_type in ('cliente_created', 'cliente_updated'):
+		if event_type in ('cliente_created', 'cliente_updated', 'cliente_deleted'):
 			self._refresh_clientes()
+		elif event_type in ('cotacao_created', 'cotacao_updated'):
+			if data['ids'] is None:
+				self._carregar_lista()
+			else:
+				self.lista.atualizar(data['ids'])
+		elif event_type == 'cotacoes_expiradas':
+			self.atualizar_status_na_lista(self.tree, data['ids'], data['status'])
 
 	def _on_item_double_click(self, event=None):
 		selected = self.itens_tree.selection()
@@ -2,7 +2,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 from .base_module import BaseModule
-from database import DB_NAME
+from database import DB_NAME, obter_conexao
+from interface.sessao import BITS_NIVEL_ACESSO
 
 class PermissoesModule(BaseModule):
     def setup_ui(self):
@@ -158,26 +159,24 @@ class PermissoesModule(BaseModule):
     def carregar_usuarios(self):
         """Carregar lista de usuários"""
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            with obter_conexao() as conn:
+                c = conn.cursor()
             
-            c.execute("SELECT id, username, nome_completo, role FROM usuarios ORDER BY nome_completo")
-            usuarios = c.fetchall()
+                c.execute("SELECT id, username, nome_completo, role FROM usuarios ORDER BY nome_completo")
+                usuarios = c.fetchall()
             
-            usuarios_list = []
-            self.usuarios_dict = {}
+                usuarios_list = []
+                self.usuarios_dict = {}
             
-            for user_id, username, nome_completo, role in usuarios:
-                display_name = f"{nome_completo} ({username}) - {role}"
-                usuarios_list.append(display_name)
-                self.usuarios_dict[display_name] = user_id
+                for user_id, username, nome_completo, role in usuarios:
+                    display_name = f"{nome_completo} ({username}) - {role}"
+                    usuarios_list.append(display_name)
+                    self.usuarios_dict[display_name] = user_id
                 
-            self.usuario_combo['values'] = usuarios_list
+                self.usuario_combo['values'] = usuarios_list
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar usuários: {e}")
-        finally:
-            conn.close()
             
     def on_usuario_changed(self, event=None):
         """Carregar permissões do usuário selecionado"""
@@ -190,25 +189,23 @@ class PermissoesModule(BaseModule):
             return
             
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            with obter_conexao() as conn:
+                c = conn.cursor()
             
-            # Buscar permissões existentes
-            c.execute("SELECT modulo, nivel_acesso FROM permissoes_usuarios WHERE usuario_id = ?", 
-                     (usuario_id,))
-            permissoes = dict(c.fetchall())
+                # Buscar permissões existentes
+                c.execute("SELECT modulo, nivel_acesso FROM permissoes_usuarios WHERE usuario_id = ?", 
+                         (usuario_id,))
+                permissoes = dict(c.fetchall())
             
-            # Aplicar permissões aos controles
-            for modulo_key in self.permission_vars:
-                if modulo_key in permissoes:
-                    self.permission_vars[modulo_key].set(permissoes[modulo_key])
-                else:
-                    self.permission_vars[modulo_key].set("sem_acesso")
+                # Aplicar permissões aos controles
+                for modulo_key in self.permission_vars:
+                    if modulo_key in permissoes:
+                        self.permission_vars[modulo_key].set(permissoes[modulo_key])
+                    else:
+                        self.permission_vars[modulo_key].set("sem_acesso")
                     
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar permissões: {e}")
-        finally:
-            conn.close()
             
     def salvar_permissoes(self):
         """Salvar permissões do usuário"""
@@ -223,28 +220,27 @@ class PermissoesModule(BaseModule):
             return
             
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            with obter_conexao() as conn:
+                c = conn.cursor()
             
-            # Remover permissões existentes
-            c.execute("DELETE FROM permissoes_usuarios WHERE usuario_id = ?", (usuario_id,))
+                # Remover permissões existentes
+                c.execute("DELETE FROM permissoes_usuarios WHERE usuario_id = ?", (usuario_id,))
             
-            # Inserir novas permissões
-            for modulo_key, var in self.permission_vars.items():
-                nivel_acesso = var.get()
-                if nivel_acesso != "sem_acesso":
-                    c.execute("""
-                        INSERT INTO permissoes_usuarios (usuario_id, modulo, nivel_acesso)
-                        VALUES (?, ?, ?)
-                    """, (usuario_id, modulo_key, nivel_acesso))
+                # Inserir novas permissões
+                for modulo_key, var in self.permission_vars.items():
+                    nivel_acesso = var.get()
+                    if nivel_acesso != "sem_acesso":
+                        c.execute("""
+                            INSERT INTO permissoes_usuarios (usuario_id, modulo, nivel_acesso)
+                            VALUES (?, ?, ?)
+                        """, (usuario_id, modulo_key, nivel_acesso))
             
-            conn.commit()
-            self.show_success("Permissões salvas com sucesso!")
+                conn.commit()
+                self.sessao.invalidar_usuario(usuario_id)
+                self.show_success("Permissões salvas com sucesso!")
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao salvar permissões: {e}")
-        finally:
-            conn.close()
             
     def limpar_permissoes(self):
         """Limpar todas as permissões"""
@@ -288,21 +284,24 @@ class PermissoesModule(BaseModule):
 
     def get_user_permissions(self, user_id):
         """Obter permissões de um usuário específico"""
+        if user_id == self.sessao.user_id:
+            niveis = {bits: nivel for nivel, bits in BITS_NIVEL_ACESSO.items()}
+            return {modulo: niveis[bits] for modulo, bits in self.sessao.permissoes.items() if bits}
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            with obter_conexao() as conn:
+                c = conn.cursor()
             
-            c.execute("SELECT modulo, nivel_acesso FROM permissoes_usuarios WHERE usuario_id = ?", 
-                     (user_id,))
-            return dict(c.fetchall())
+                c.execute("SELECT modulo, nivel_acesso FROM permissoes_usuarios WHERE usuario_id = ?", 
+                         (user_id,))
+                return dict(c.fetchall())
             
         except sqlite3.Error:
             return {}
-        finally:
-            conn.close()
             
     def user_has_permission(self, user_id, module, required_level='consulta'):
         """Verificar se usuário tem permissão específica"""
+        if user_id == self.sessao.user_id:
+            return self.sessao.tem_permissao(module, required_level)
         permissions = self.get_user_permissions(user_id)
         user_level = permissions.get(module, 'sem_acesso')
         
@@ -2,7 +2,9 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sqlite3
 from .base_module import BaseModule
-from database import DB_NAME
+from database import DB_NAME, obter_conexao, campos_busca_produto
+from utils.busca import buscar_produtos_texto
+from utils.kits import criaria_ciclo, invalidar_produto
 from utils.formatters import format_currency, clean_number
 
 class ProdutosModule(BaseModule):
@@ -367,6 +369,10 @@ class ProdutosModule(BaseModule):
         
         ativar_btn = self.create_button(lista_buttons, "Ativar/Desativar", self.toggle_ativo, bg='#f59e0b')
         ativar_btn.pack(side="left")
+        
+        importar_btn = self.create_button(lista_buttons, "Importar Planilha", self.importar_produtos,
+                                          bg='#e2e8f0', fg='#475569')
+        importar_btn.pack(side="right")
 
     def on_tipo_changed(self, event):
         """Controla visibilidade do campo NCM e seção de kit baseado no tipo"""
@@ -405,26 +411,24 @@ class ProdutosModule(BaseModule):
     def carregar_produtos_para_kit(self):
         """Carregar produtos e serviços disponíveis para o kit"""
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
+            with obter_conexao() as conn:
+                c = conn.cursor()
             
-            # Buscar apenas produtos e serviços (não kits)
-            c.execute("SELECT id, nome, tipo FROM produtos WHERE tipo IN ('Produto', 'Serviço') AND ativo = 1 ORDER BY nome")
-            produtos = c.fetchall()
+                # Produtos, serviços e outros kits (sub-kits)
+                c.execute("SELECT id, nome, tipo FROM produtos WHERE tipo IN ('Produto', 'Serviço', 'Kit') AND ativo = 1 ORDER BY nome")
+                produtos = c.fetchall()
             
-            # Limpar e popular combobox
-            if hasattr(self, 'produto_kit_combo'):
-                valores = [f"{row[1]} ({row[2]})" for row in produtos]
-                self.produto_kit_combo['values'] = valores
+                # Limpar e popular combobox
+                if hasattr(self, 'produto_kit_combo'):
+                    valores = [f"{row[1]} ({row[2]})" for row in produtos]
+                    self.produto_kit_combo['values'] = valores
                 
-                # Armazenar mapeamento id -> index
-                self.produtos_kit_map = {i: row[0] for i, row in enumerate(produtos)}
-                self.produtos_kit_data = produtos
+                    # Armazenar mapeamento id -> index
+                    self.produtos_kit_map = {i: row[0] for i, row in enumerate(produtos)}
+                    self.produtos_kit_data = produtos
                 
         except sqlite3.Error as e:
             messagebox.showerror("Erro", f"Erro ao carregar produtos: {e}")
-        finally:
-            conn.close()
     
     def adicionar_item_kit(self):
         """Adicionar item à composição do kit"""
@@ -449,6 +453,11 @@ class ProdutosModule(BaseModule):
         produto_id = self.produtos_kit_map[index]
         produto_nome, produto_tipo = self.produtos_kit_data[index][1], self.produtos_kit_data[index][2]
         
+        # Um sub-kit não pode conter o kit em edição (direta ou indiretamente)
+        if produto_tipo == "Kit" and criaria_ciclo(self.current_produto_id, produto_id):
+            messagebox.showwarning("Aviso", "Este kit contém o kit em edição e não pode ser adicionado!")
+            return
+        
         # Verificar se já existe
         for item in self.kit_items:
             if item['produto_id'] == produto_id:
@@ -539,69 +548,82 @@ class ProdutosModule(BaseModule):
             self.show_warning("Valor inválido.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            dados = (
-                nome, tipo, self.ncm_var.get().strip(),
-                valor, self.descricao_var.get().strip(),
-                1 if self.ativo_var.get() else 0
-            )
-            
-            if self.current_produto_id:
-                # Atualizar produto
-                c.execute("""
-                    UPDATE produtos SET
-                        nome = ?, tipo = ?, ncm = ?, valor_unitario = ?,
-                        descricao = ?, ativo = ?, updated_at = datetime('now')
-                    WHERE id = ?
-                """, (nome, tipo, self.ncm_var.get().strip(), valor, self.descricao_var.get().strip(), 1 if self.ativo_var.get() else 0, self.current_produto_id))
+            try:
+                dados = (
+                    nome, tipo, self.ncm_var.get().strip(),
+                    valor, self.descricao_var.get().strip(),
+                    1 if self.ativo_var.get() else 0
+                )
+                busca = campos_busca_produto(nome, tipo, self.descricao_var.get().strip())
+                evento = 'produto_updated' if self.current_produto_id else 'produto_created'
+            
+                if self.current_produto_id:
+                    # Atualizar produto
+                    c.execute("""
+                        UPDATE produtos SET
+                            nome = ?, tipo = ?, ncm = ?, valor_unitario = ?,
+                            descricao = ?, ativo = ?, nome_busca = ?, detalhes_busca = ?,
+                            updated_at = datetime('now')
+                        WHERE id = ?
+                    """, dados + busca + (self.current_produto_id,))
                 
-                # Se for kit, limpar itens existentes
-                if tipo == "Kit":
-                    c.execute("DELETE FROM kit_items WHERE kit_id = ?", (self.current_produto_id,))
-            else:
-                # Inserir novo produto
-                c.execute("""
-                    INSERT INTO produtos (nome, tipo, ncm, valor_unitario, descricao, ativo)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, dados)
-                self.current_produto_id = c.lastrowid
-            
-            # Se for kit, salvar itens
-            if tipo == "Kit":
-                for item in self.kit_items:
+                    # Se for kit, limpar itens existentes
+                    if tipo == "Kit":
+                        c.execute("DELETE FROM kit_items WHERE kit_id = ?", (self.current_produto_id,))
+                else:
+                    # Inserir novo produto
                     c.execute("""
-                        INSERT INTO kit_items (kit_id, produto_id, quantidade)
-                        VALUES (?, ?, ?)
-                    """, (self.current_produto_id, item['produto_id'], item['quantidade']))
+                        INSERT INTO produtos (nome, tipo, ncm, valor_unitario, descricao, ativo,
+                                              nome_busca, detalhes_busca)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, dados + busca)
+                    self.current_produto_id = c.lastrowid
             
-            conn.commit()
+                # Se for kit, salvar itens
+                if tipo == "Kit":
+                    for item in self.kit_items:
+                        c.execute("""
+                            INSERT INTO kit_items (kit_id, produto_id, quantidade)
+                            VALUES (?, ?, ?)
+                        """, (self.current_produto_id, item['produto_id'], item['quantidade']))
             
-            tipo_nome = "Kit" if tipo == "Kit" else "Produto"
-            self.show_success(f"{tipo_nome} salvo com sucesso!")
+                conn.commit()
+                # Composições em cache que usam este produto/kit ficaram desatualizadas
+                invalidar_produto(self.current_produto_id)
             
-            # Emitir evento
-            self.emit_event('produto_created')
+                tipo_nome = "Kit" if tipo == "Kit" else "Produto"
+                self.show_success(f"{tipo_nome} salvo com sucesso!")
             
-            self.carregar_produtos()
-            self.carregar_produtos_para_kit()  # Atualizar lista para kits
-            # Evitar reaproveitar composição anterior em um novo kit
-            if tipo == "Kit":
-                self.kit_items = []
-                if hasattr(self, 'kit_items_tree'):
-                    self.atualizar_kit_tree()
-                # opcional: limpar campos de item
-                self.item_produto_var.set("")
-                self.item_quantidade_var.set("1")
-                # manter dados do kit na tela para revisão, ou usar self.novo_kit() se desejar limpar tudo
-                # self.novo_kit()
+                # Emitir evento
+                self.emit_event(evento, {'ids': [self.current_produto_id]})
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao salvar {tipo.lower()}: {e}")
-        finally:
-            conn.close()
+                self.carregar_produtos()
+                self.carregar_produtos_para_kit()  # Atualizar lista para kits
+                # Evitar reaproveitar composição anterior em um novo kit
+                if tipo == "Kit":
+                    self.kit_items = []
+                    if hasattr(self, 'kit_items_tree'):
+                        self.atualizar_kit_tree()
+                    # opcional: limpar campos de item
+                    self.item_produto_var.set("")
+                    self.item_quantidade_var.set("1")
+                    # manter dados do kit na tela para revisão, ou usar self.novo_kit() se desejar limpar tudo
+                    # self.novo_kit()
+            
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao salvar {tipo.lower()}: {e}")
+            
+    def importar_produtos(self):
+        """Importar produtos e serviços de planilha e atualizar as listas"""
+        self.importar_planilha('produtos', ao_concluir=self._produtos_importados)
+        
+    def _produtos_importados(self, resultado):
+        if resultado['importadas']:
+            self.carregar_produtos()
+            self.emit_event('produto_created')
             
     def carregar_produtos(self):
         """Carregar lista de produtos em três abas por tipo"""
@@ -611,35 +633,36 @@ class ProdutosModule(BaseModule):
                 for item in tree.get_children():
                     tree.delete(item)
          
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
          
-        try:
-            # Buscar produtos
-            c.execute("""
-                SELECT id, nome, tipo, valor_unitario, ativo
-                FROM produtos
-                ORDER BY nome
-            """)
-            for row in c.fetchall():
-                produto_id, nome, tipo, valor, ativo = row
-                tree = self.trees_por_tipo.get(tipo)
-                if tree is None:
-                    continue
-                tree.insert("", "end", values=(
-                    nome,
-                    format_currency(valor),
-                    "Sim" if ativo else "Não"
-                ), tags=(produto_id,))
+            try:
+                # Buscar produtos
+                c.execute("""
+                    SELECT id, nome, tipo, valor_unitario, ativo
+                    FROM produtos
+                    ORDER BY nome
+                """)
+                for row in c.fetchall():
+                    produto_id, nome, tipo, valor, ativo = row
+                    tree = self.trees_por_tipo.get(tipo)
+                    if tree is None:
+                        continue
+                    tree.insert("", "end", values=(
+                        nome,
+                        format_currency(valor),
+                        "Sim" if ativo else "Não"
+                    ), tags=(produto_id,))
          
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar produtos: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao carregar produtos: {e}")
              
     def buscar_produtos(self):
-        """Buscar produtos com filtro nas três abas"""
+        """Buscar produtos nas três abas por nome, tipo ou descrição (sem diferenciar acentos)"""
         termo = self.search_var.get().strip()
+        if not termo:
+            self.carregar_produtos()
+            return
          
         # Limpar listas atuais
         if hasattr(self, 'trees_por_tipo'):
@@ -647,39 +670,16 @@ class ProdutosModule(BaseModule):
                 for item in tree.get_children():
                     tree.delete(item)
          
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-         
-        try:
-            if termo:
-                c.execute("""
-                    SELECT id, nome, tipo, valor_unitario, ativo
-                    FROM produtos
-                    WHERE nome LIKE ? OR tipo LIKE ? OR descricao LIKE ?
-                    ORDER BY nome
-                """, (f"%{termo}%", f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT id, nome, tipo, valor_unitario, ativo
-                    FROM produtos
-                    ORDER BY nome
-                """)
-             
-            for row in c.fetchall():
-                produto_id, nome, tipo, valor, ativo = row
-                tree = self.trees_por_tipo.get(tipo)
-                if tree is None:
-                    continue
-                tree.insert("", "end", values=(
-                    nome,
-                    format_currency(valor),
-                    "Sim" if ativo else "Não"
-                ), tags=(produto_id,))
-         
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao buscar produtos: {e}")
-        finally:
-            conn.close()
+        for row in buscar_produtos_texto(termo):
+            produto_id, nome, tipo, valor, ativo = row
+            tree = self.trees_por_tipo.get(tipo)
+            if tree is None:
+                continue
+            tree.insert("", "end", values=(
+                nome,
+                format_currency(valor),
+                "Sim" if ativo else "Não"
+            ), tags=(produto_id,))
             
     def editar_produto(self):
         """Editar produto selecionado (qualquer aba)."""
@@ -691,88 +691,86 @@ class ProdutosModule(BaseModule):
         
     def carregar_produto_para_edicao(self, produto_id):
         """Carregar dados do produto para edição"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            c.execute("SELECT * FROM produtos WHERE id = ?", (produto_id,))
-            produto = c.fetchone()
+            try:
+                c.execute("SELECT * FROM produtos WHERE id = ?", (produto_id,))
+                produto = c.fetchone()
             
-            if not produto:
-                self.show_error("Produto não encontrado.")
-                return
+                if not produto:
+                    self.show_error("Produto não encontrado.")
+                    return
                 
-            self.current_produto_id = produto_id
-            
-            if produto[2] == "Kit":
-                print(f"DEBUG: Carregando Kit ID {produto_id}")  # Debug
-                # Carregar kit - usar as variáveis padrão
-                self.nome_var.set(produto[1] or "")  # nome
-                self.tipo_var.set("Kit")
-                self.descricao_var.set(produto[5] or "")  # descricao
-                self.ativo_var.set(bool(produto[6]))  # ativo
+                self.current_produto_id = produto_id
+            
+                if produto[2] == "Kit":
+                    print(f"DEBUG: Carregando Kit ID {produto_id}")  # Debug
+                    # Carregar kit - usar as variáveis padrão
+                    self.nome_var.set(produto[1] or "")  # nome
+                    self.tipo_var.set("Kit")
+                    self.descricao_var.set(produto[5] or "")  # descricao
+                    self.ativo_var.set(bool(produto[6]))  # ativo
                 
-                # Garantir estado da UI
-                self.on_tipo_changed(None)
-                self.notebook.select(0)
+                    # Garantir estado da UI
+                    self.on_tipo_changed(None)
+                    self.notebook.select(0)
                 
-                # Carregar itens do kit
-                self.kit_items = []
-                c.execute("""
-                    SELECT p.id, p.nome, p.tipo, p.valor_unitario, ki.quantidade
-                    FROM kit_items ki
-                    JOIN produtos p ON ki.produto_id = p.id
-                    WHERE ki.kit_id = ?
-                """, (produto_id,))
+                    # Carregar itens do kit
+                    self.kit_items = []
+                    c.execute("""
+                        SELECT p.id, p.nome, p.tipo, p.valor_unitario, ki.quantidade
+                        FROM kit_items ki
+                        JOIN produtos p ON ki.produto_id = p.id
+                        WHERE ki.kit_id = ?
+                    """, (produto_id,))
                 
-                kit_items_data = c.fetchall()
-                print(f"DEBUG: Encontrados {len(kit_items_data)} itens para o kit")  # Debug
+                    kit_items_data = c.fetchall()
+                    print(f"DEBUG: Encontrados {len(kit_items_data)} itens para o kit")  # Debug
                 
-                for item_row in kit_items_data:
-                    item_id, nome, tipo, valor_unitario, quantidade = item_row
-                    self.kit_items.append({
-                        'produto_id': item_id,
-                        'tipo': tipo,
-                        'nome': nome,
-                        'quantidade': quantidade
-                    })
-                    print(f"DEBUG: Item adicionado: {nome} ({tipo}) - Qtd: {quantidade}")  # Debug
+                    for item_row in kit_items_data:
+                        item_id, nome, tipo, valor_unitario, quantidade = item_row
+                        self.kit_items.append({
+                            'produto_id': item_id,
+                            'tipo': tipo,
+                            'nome': nome,
+                            'quantidade': quantidade
+                        })
+                        print(f"DEBUG: Item adicionado: {nome} ({tipo}) - Qtd: {quantidade}")  # Debug
                 
-                # Atualizar interface do kit
-                self.atualizar_kit_tree()
+                    # Atualizar interface do kit
+                    self.atualizar_kit_tree()
                 
-                # Garantir que a seção de kit seja exibida
-                if hasattr(self, 'kit_section_frame'):
-                    self.kit_section_frame.pack(fill="both", expand=True, pady=(15, 0))
-                    print("DEBUG: Seção de kit exibida")  # Debug
-                else:
-                    print("DEBUG: ERRO - kit_section_frame não encontrado")  # Debug
+                    # Garantir que a seção de kit seja exibida
+                    if hasattr(self, 'kit_section_frame'):
+                        self.kit_section_frame.pack(fill="both", expand=True, pady=(15, 0))
+                        print("DEBUG: Seção de kit exibida")  # Debug
+                    else:
+                        print("DEBUG: ERRO - kit_section_frame não encontrado")  # Debug
                     
-                # Recarregar produtos para o combobox
-                self.carregar_produtos_para_kit()
+                    # Recarregar produtos para o combobox
+                    self.carregar_produtos_para_kit()
                 
-            else:
-                print(f"DEBUG: Carregando {produto[2]} ID {produto_id}")  # Debug
-                # Carregar produto/serviço
-                self.nome_var.set(produto[1] or "")  # nome
-                self.tipo_var.set(produto[2] or "Produto")  # tipo
-                self.ncm_var.set(produto[3] or "")  # ncm
-                self.valor_var.set(f"{produto[4]:.2f}" if produto[4] else "0.00")  # valor_unitario
-                self.descricao_var.set(produto[5] or "")  # descricao
-                self.ativo_var.set(bool(produto[6]))  # ativo
+                else:
+                    print(f"DEBUG: Carregando {produto[2]} ID {produto_id}")  # Debug
+                    # Carregar produto/serviço
+                    self.nome_var.set(produto[1] or "")  # nome
+                    self.tipo_var.set(produto[2] or "Produto")  # tipo
+                    self.ncm_var.set(produto[3] or "")  # ncm
+                    self.valor_var.set(f"{produto[4]:.2f}" if produto[4] else "0.00")  # valor_unitario
+                    self.descricao_var.set(produto[5] or "")  # descricao
+                    self.ativo_var.set(bool(produto[6]))  # ativo
                 
-                # Garantir estado da UI (NCM/Kit)
-                self.on_tipo_changed(None)
-                self.notebook.select(0)  # Ir para aba de produto/serviço
-                # Se não for kit, ocultar a seção de kit
-                if hasattr(self, 'kit_section_frame'):
-                    self.kit_section_frame.pack_forget()
-                    print("DEBUG: Seção de kit ocultada")  # Debug
+                    # Garantir estado da UI (NCM/Kit)
+                    self.on_tipo_changed(None)
+                    self.notebook.select(0)  # Ir para aba de produto/serviço
+                    # Se não for kit, ocultar a seção de kit
+                    if hasattr(self, 'kit_section_frame'):
+                        self.kit_section_frame.pack_forget()
+                        print("DEBUG: Seção de kit ocultada")  # Debug
                 
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar produto: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao carregar produto: {e}")
             
     def toggle_ativo(self):
         """Ativar/desativar produto selecionado (qualquer aba)."""
@@ -781,20 +779,19 @@ class ProdutosModule(BaseModule):
             self.show_warning("Selecione um produto para ativar/desativar.")
             return
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            c.execute("UPDATE produtos SET ativo = NOT ativo WHERE id = ?", (produto_id,))
-            conn.commit()
+            try:
+                c.execute("UPDATE produtos SET ativo = NOT ativo WHERE id = ?", (produto_id,))
+                conn.commit()
             
-            self.show_success("Status do produto alterado com sucesso!")
-            self.carregar_produtos()
+                self.show_success("Status do produto alterado com sucesso!")
+                self.emit_event('produto_updated', {'ids': [produto_id]})
+                self.carregar_produtos()
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao alterar status: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao alterar status: {e}")
 
     def atualizar_combo_items(self):
         """Atualizar combo com produtos e serviços disponíveis"""
@@ -804,24 +801,22 @@ class ProdutosModule(BaseModule):
         """Atualizar combo de itens baseado no tipo selecionado"""
         tipo = self.item_tipo_var.get()
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            c.execute("SELECT id, nome, valor_unitario FROM produtos WHERE tipo = ? AND ativo = 1 ORDER BY nome", (tipo,))
-            items = c.fetchall()
+            try:
+                c.execute("SELECT id, nome, valor_unitario FROM produtos WHERE tipo = ? AND ativo = 1 ORDER BY nome", (tipo,))
+                items = c.fetchall()
             
-            values = [f"{item[1]} - R$ {item[2]:.2f}" for item in items]
-            self.item_combo['values'] = values
-            self.item_combo.set("")
+                values = [f"{item[1]} - R$ {item[2]:.2f}" for item in items]
+                self.item_combo['values'] = values
+                self.item_combo.set("")
             
-            # Armazenar dados para uso posterior
-            self.items_data = {f"{item[1]} - R$ {item[2]:.2f}": item for item in items}
+                # Armazenar dados para uso posterior
+                self.items_data = {f"{item[1]} - R$ {item[2]:.2f}": item for item in items}
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar itens: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao carregar itens: {e}")
             
     def adicionar_item_kit(self):
         """Adicionar item à composição do kit"""
@@ -850,6 +845,11 @@ class ProdutosModule(BaseModule):
         produto_id = self.produtos_kit_map[index]
         produto_nome, produto_tipo = self.produtos_kit_data[index][1], self.produtos_kit_data[index][2]
         
+        # Um sub-kit não pode conter o kit em edição (direta ou indiretamente)
+        if produto_tipo == "Kit" and criaria_ciclo(self.current_produto_id, produto_id):
+            messagebox.showwarning("Aviso", "Este kit contém o kit em edição e não pode ser adicionado!")
+            return
+        
         # Verificar se já existe
         for item in self.kit_items:
             if item['produto_id'] == produto_id:
@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog
 import sqlite3
-import json
 from datetime import datetime
 from .base_module import BaseModule
-from database import DB_NAME
+from database import DB_NAME, obter_conexao, espiar_numero, alocar_numero
+from utils.busca import buscar_relatorios_texto
+from utils.anexos import ingerir_arquivo, listar_anexos, salvar_anexos
 from utils.formatters import format_date
+from utils.sugestoes import indice_clientes
 # Import adiado para evitar falhas na importação do módulo quando bibliotecas de PDF não estiverem presentes
 def _lazy_gerar_pdf_relatorio():
     from pdf_generators.relatorio_tecnico import gerar_pdf_relatorio as _gpr
@@ -109,21 +111,28 @@ class RelatoriosModule(BaseModule):
         lista_buttons.pack(side="bottom", fill="x", pady=(10, 0))
         
         # Treeview
-        columns = ("numero", "cliente", "data", "responsavel", "tipo")
+        columns = ("numero", "cliente", "data", "responsavel", "tipo", "trecho")
         self.relatorios_tree = ttk.Treeview(lista_inner, columns=columns, show="headings")
         self.relatorios_tree.heading("numero", text="Número")
         self.relatorios_tree.heading("cliente", text="Cliente")
         self.relatorios_tree.heading("data", text="Data")
         self.relatorios_tree.heading("responsavel", text="Responsável")
         self.relatorios_tree.heading("tipo", text="Tipo")
+        self.relatorios_tree.heading("trecho", text="Trecho encontrado")
         self.relatorios_tree.column("numero", width=150)
         self.relatorios_tree.column("cliente", width=200)
         self.relatorios_tree.column("data", width=100)
         self.relatorios_tree.column("responsavel", width=150)
         self.relatorios_tree.column("tipo", width=120)
+        self.relatorios_tree.column("trecho", width=300)
         
         lista_scrollbar = ttk.Scrollbar(lista_inner, orient="vertical", command=self.relatorios_tree.yview)
         self.relatorios_tree.configure(yscrollcommand=lista_scrollbar.set)
+        self.lista_relatorios = self.criar_lista_paginada(
+            self.relatorios_tree, lista_scrollbar,
+            "r.id, r.numero_relatorio, cl.nome, r.data_criacao, u.nome_completo, r.tipo_servico",
+            "relatorios_tecnicos r JOIN clientes cl ON r.cliente_id = cl.id JOIN usuarios u ON r.responsavel_id = u.id",
+            ("r.created_at", "r.id"), self._valores_relatorio, descendente=True)
         
         self.relatorios_tree.pack(side="left", fill="both", expand=True)
         lista_scrollbar.pack(side="right", fill="y")
@@ -141,6 +150,10 @@ class RelatoriosModule(BaseModule):
         excluir_btn = self.create_button(lista_buttons, "Excluir", self.excluir_relatorio, bg='#dc2626')
         excluir_btn.pack(side="right", padx=(10, 0))
         
+        exportar_btn = self.create_button(lista_buttons, "Exportar Excel", lambda: self.exportar_planilha('relatorios'),
+                                          bg='#e2e8f0', fg='#475569')
+        exportar_btn.pack(side="right", padx=(10, 0))
+        
         # Dados iniciais
         self.refresh_all_data()
         
@@ -204,8 +217,9 @@ class RelatoriosModule(BaseModule):
         self.cliente_combo.pack(side="left", fill="x", expand=True)
         
         # Botão para buscar/atualizar clientes
-        refresh_clientes_btn = self.create_button(cliente_frame, "🔄", self.refresh_clientes, bg='#10b981')
+        refresh_clientes_btn = self.create_button(cliente_frame, "🔄", lambda: self.refresh_clientes(recarregar=True), bg='#10b981')
         refresh_clientes_btn.pack(side="right", padx=(5, 0))
+        self.configurar_sugestoes(self.cliente_combo, indice_clientes)
         
         # Filial
         tk.Label(fields_frame, text="Filial *:", 
@@ -316,52 +330,48 @@ class RelatoriosModule(BaseModule):
         self.equipamento_notebook = ttk.Notebook(section_frame)
         self.equipamento_notebook.pack(fill="both", expand=True, pady=(10, 0))
         
-        # Aba 1: Condição Inicial
-        self.create_aba1_condicao_inicial()
-        
-        # Aba 2: Peritagem do Subconjunto
-        self.create_aba2_peritagem()
-        
-        # Aba 3: Desmembrando Unidade Compressora
-        self.create_aba3_desmembrando()
-        
-        # Aba 4: Relação de Peças e Serviços
-        self.create_aba4_pecas_servicos()
-        
-    def create_aba1_condicao_inicial(self):
-        frame1 = tk.Frame(self.equipamento_notebook, bg='white')
-        self.equipamento_notebook.add(frame1, text="1. Condição Inicial")
+        # Valores das abas (lidos e preenchidos mesmo com a aba ainda não montada)
+        self.aba1_vars = {campo: tk.StringVar() for campo in [
+            "Cond. Encontrada", "Placa/N.Série", "Acoplamento",
+            "Aspectos Rotores", "Válvulas Acopladas", "Data Recebimento"]}
+        self.aba2_vars = {campo: tk.StringVar() for campo in [
+            "Parafusos/Pinos", "Superfície Vedação", "Engrenagens", "Bico Injetor",
+            "Rolamentos", "Aspecto Óleo", "Data"]}
+        self.aba3_vars = {campo: tk.StringVar() for campo in [
+            "Interf. Desmontagem", "Aspecto Rotores", "Aspecto Carcaça",
+            "Interf. Mancais", "Galeria Hidráulica", "Data Desmembração"]}
+        self.data_pecas_var = tk.StringVar()
+        self._textos_aba4 = {'servicos': "", 'pecas': ""}
+        
+        # As abas entram vazias e cada uma é montada na primeira vez que é aberta
+        abas = [
+            ("1. Condição Inicial", self.create_aba1_condicao_inicial),
+            ("2. Peritagem do Subconjunto", self.create_aba2_peritagem),
+            ("3. Desmembrando Unidade Compressora", self.create_aba3_desmembrando),
+            ("4. Relação de Peças e Serviços", self.create_aba4_pecas_servicos),
+        ]
+        for numero, (titulo, construir) in enumerate(abas, start=1):
+            aba_frame = tk.Frame(self.equipamento_notebook, bg='white')
+            self.equipamento_notebook.add(aba_frame, text=titulo)
+            self.adiar_construcao(aba_frame, f'equipamento_aba{numero}', construir)
         
+    def create_aba1_condicao_inicial(self, frame1):
         # Título
         tk.Label(frame1, text="CONDIÇÃO ATUAL DO EQUIPAMENTO", 
                 font=('Arial', 12, 'bold'), bg='white').pack(anchor="w", pady=5)
         
-        # Campos da aba 1
-        campos_aba1 = [
-            "Cond. Encontrada",
-            "Placa/N.Série",
-            "Acoplamento",
-            "Aspectos Rotores",
-            "Válvulas Acopladas",
-            "Data Recebimento"
-        ]
-        
-        self.aba1_vars = {}
         fields_frame = tk.Frame(frame1, bg='white')
         fields_frame.pack(fill="x", padx=10, pady=5)
         
-        for i, campo in enumerate(campos_aba1):
+        for i, (campo, var) in enumerate(self.aba1_vars.items()):
             row = i // 2
             col = (i % 2) * 2
             
             tk.Label(fields_frame, text=f"{campo}:", font=('Arial', 9, 'bold'), 
                     bg='white').grid(row=row, column=col, sticky="w", padx=5, pady=2)
             
-            var = tk.StringVar()
             entry = tk.Entry(fields_frame, textvariable=var, font=('Arial', 9), width=25)
             entry.grid(row=row, column=col+1, sticky="ew", padx=5, pady=2)
-            
-            self.aba1_vars[campo] = var
         
         # Configurar grid
         for i in range(2):
@@ -369,42 +379,25 @@ class RelatoriosModule(BaseModule):
         
         # Seção de anexos
         self.create_anexos_section(frame1, 1)
+        self._exibir_anexos(1)
         
-    def create_aba2_peritagem(self):
-        frame2 = tk.Frame(self.equipamento_notebook, bg='white')
-        self.equipamento_notebook.add(frame2, text="2. Peritagem do Subconjunto")
-        
+    def create_aba2_peritagem(self, frame2):
         # Título
         tk.Label(frame2, text="DESACOPLANDO ELEMENTO COMPRESSOR DA CAIXA DE ACIONAMENTO", 
                 font=('Arial', 12, 'bold'), bg='white').pack(anchor="w", pady=5)
         
-        # Campos da aba 2
-        campos_aba2 = [
-            "Parafusos/Pinos",
-            "Superfície Vedação",
-            "Engrenagens",
-            "Bico Injetor",
-            "Rolamentos",
-            "Aspecto Óleo",
-            "Data"
-        ]
-        
-        self.aba2_vars = {}
         fields_frame = tk.Frame(frame2, bg='white')
         fields_frame.pack(fill="x", padx=10, pady=5)
         
-        for i, campo in enumerate(campos_aba2):
+        for i, (campo, var) in enumerate(self.aba2_vars.items()):
             row = i // 2
             col = (i % 2) * 2
             
             tk.Label(fields_frame, text=f"{campo}:", font=('Arial', 9, 'bold'), 
                     bg='white').grid(row=row, column=col, sticky="w", padx=5, pady=2)
             
-            var = tk.StringVar()
             entry = tk.Entry(fields_frame, textvariable=var, font=('Arial', 9), width=25)
             entry.grid(row=row, column=col+1, sticky="ew", padx=5, pady=2)
-            
-            self.aba2_vars[campo] = var
         
         # Configurar grid
         for i in range(2):
@@ -412,41 +405,25 @@ class RelatoriosModule(BaseModule):
         
         # Seção de anexos
         self.create_anexos_section(frame2, 2)
+        self._exibir_anexos(2)
         
-    def create_aba3_desmembrando(self):
-        frame3 = tk.Frame(self.equipamento_notebook, bg='white')
-        self.equipamento_notebook.add(frame3, text="3. Desmembrando Unidade Compressora")
-        
+    def create_aba3_desmembrando(self, frame3):
         # Título
         tk.Label(frame3, text="GRAU DE INTERFERÊNCIA NA DESMONTAGEM", 
                 font=('Arial', 12, 'bold'), bg='white').pack(anchor="w", pady=5)
         
-        # Campos da aba 3
-        campos_aba3 = [
-            "Interf. Desmontagem",
-            "Aspecto Rotores",
-            "Aspecto Carcaça",
-            "Interf. Mancais",
-            "Galeria Hidráulica",
-            "Data Desmembração"
-        ]
-        
-        self.aba3_vars = {}
         fields_frame = tk.Frame(frame3, bg='white')
         fields_frame.pack(fill="x", padx=10, pady=5)
         
-        for i, campo in enumerate(campos_aba3):
+        for i, (campo, var) in enumerate(self.aba3_vars.items()):
             row = i // 2
             col = (i % 2) * 2
             
             tk.Label(fields_frame, text=f"{campo}:", font=('Arial', 9, 'bold'), 
                     bg='white').grid(row=row, column=col, sticky="w", padx=5, pady=2)
             
-            var = tk.StringVar()
             entry = tk.Entry(fields_frame, textvariable=var, font=('Arial', 9), width=25)
             entry.grid(row=row, column=col+1, sticky="ew", padx=5, pady=2)
-            
-            self.aba3_vars[campo] = var
         
         # Configurar grid
         for i in range(2):
@@ -454,17 +431,16 @@ class RelatoriosModule(BaseModule):
         
         # Seção de anexos
         self.create_anexos_section(frame3, 3)
+        self._exibir_anexos(3)
         
-    def create_aba4_pecas_servicos(self):
-        frame4 = tk.Frame(self.equipamento_notebook, bg='white')
-        self.equipamento_notebook.add(frame4, text="4. Relação de Peças e Serviços")
-        
+    def create_aba4_pecas_servicos(self, frame4):
         # Serviços Propostos
         tk.Label(frame4, text="SERVIÇOS PROPOSTO PARA REFORMA DO SUBCONJUNTO:", 
                 font=('Arial', 10, 'bold'), bg='white').pack(anchor="w", pady=5)
         
         self.servicos_text = scrolledtext.ScrolledText(frame4, height=5, wrap=tk.WORD)
         self.servicos_text.pack(fill="x", padx=10, pady=2)
+        self.servicos_text.insert("1.0", self._textos_aba4['servicos'])
         
         # Peças Recomendadas
         tk.Label(frame4, text="PEÇAS RECOMENDADAS PARA REFORMA:", 
@@ -472,17 +448,41 @@ class RelatoriosModule(BaseModule):
         
         self.pecas_text = scrolledtext.ScrolledText(frame4, height=5, wrap=tk.WORD)
         self.pecas_text.pack(fill="x", padx=10, pady=2)
+        self.pecas_text.insert("1.0", self._textos_aba4['pecas'])
         
         # Data
         data_frame = tk.Frame(frame4, bg='white')
         data_frame.pack(fill="x", padx=10, pady=5)
         
         tk.Label(data_frame, text="DATA:", font=('Arial', 10, 'bold'), bg='white').pack(side="left")
-        self.data_pecas_var = tk.StringVar()
         tk.Entry(data_frame, textvariable=self.data_pecas_var, font=('Arial', 10), width=20).pack(side="left", padx=(10, 0))
         
         # Seção de anexos
         self.create_anexos_section(frame4, 4)
+        self._exibir_anexos(4)
+        
+    def _exibir_anexos(self, aba_numero):
+        """Mostrar os anexos da aba na sua lista, se a aba já foi montada"""
+        if self.secao_pendente(f'equipamento_aba{aba_numero}'):
+            return
+        listbox = getattr(self, f'anexos_listbox_aba{aba_numero}')
+        listbox.delete(0, tk.END)
+        for anexo in self.anexos_aba[aba_numero]:
+            listbox.insert(tk.END, anexo['nome'] or 'Arquivo sem nome')
+        
+    def _definir_textos_aba4(self, servicos="", pecas=""):
+        """Serviços propostos e peças recomendadas (guardados até a aba 4 ser montada)"""
+        self._textos_aba4 = {'servicos': servicos, 'pecas': pecas}
+        if not self.secao_pendente('equipamento_aba4'):
+            self.servicos_text.delete("1.0", tk.END)
+            self.servicos_text.insert("1.0", servicos)
+            self.pecas_text.delete("1.0", tk.END)
+            self.pecas_text.insert("1.0", pecas)
+        
+    def _textos_aba4_atuais(self):
+        if self.secao_pendente('equipamento_aba4'):
+            return self._textos_aba4['servicos'], self._textos_aba4['pecas']
+        return self.servicos_text.get("1.0", tk.END).strip(), self.pecas_text.get("1.0", tk.END).strip()
         
     def create_anexos_section(self, parent, aba_numero):
         # Título da seção de anexos
@@ -554,67 +554,54 @@ class RelatoriosModule(BaseModule):
         print("DEBUG: Evento usuario_created recebido, atualizando lista de técnicos...")
         self.refresh_tecnicos()
         
-    def refresh_clientes(self):
-        """Atualizar lista de clientes"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
+    def refresh_clientes(self, recarregar=False):
+        """Atualizar lista de clientes (o combo mostra só as sugestões do texto digitado)"""
         try:
-            c.execute("SELECT id, nome FROM clientes ORDER BY nome")
-            clientes = c.fetchall()
-            
-            self.clientes_dict = {f"{nome} (ID: {id})": id for id, nome in clientes}
-            cliente_values = list(self.clientes_dict.keys())
+            indice = indice_clientes(recarregar)
+            self.clientes_dict = indice.ids_por_rotulo
+            self.cliente_combo['values'] = indice.buscar(self.cliente_var.get())
             
-            self.cliente_combo['values'] = cliente_values
-            
-            print(f"Clientes carregados no relatório: {len(cliente_values)}")  # Debug
+            print(f"Clientes carregados no relatório: {len(indice)}")  # Debug
             
         except sqlite3.Error as e:
             self.show_error(f"Erro ao carregar clientes: {e}")
-        finally:
-            conn.close()
             
     def refresh_tecnicos(self):
         """Atualizar lista de técnicos (agora baseado em usuários)"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            # Buscar usuários em vez de técnicos
-            c.execute("SELECT id, nome_completo FROM usuarios WHERE nome_completo IS NOT NULL ORDER BY nome_completo")
-            tecnicos = c.fetchall()
+            try:
+                # Buscar usuários em vez de técnicos
+                c.execute("SELECT id, nome_completo FROM usuarios WHERE nome_completo IS NOT NULL ORDER BY nome_completo")
+                tecnicos = c.fetchall()
             
-            self.tecnicos_dict = {f"{nome} (ID: {id})": id for id, nome in tecnicos}
-            tecnico_values = list(self.tecnicos_dict.keys())
+                self.tecnicos_dict = {f"{nome} (ID: {id})": id for id, nome in tecnicos}
+                tecnico_values = list(self.tecnicos_dict.keys())
             
-            self.tecnico_combo['values'] = tecnico_values
+                self.tecnico_combo['values'] = tecnico_values
             
-            print(f"Técnicos carregados: {len(tecnico_values)}")  # Debug
+                print(f"Técnicos carregados: {len(tecnico_values)}")  # Debug
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar técnicos: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao carregar técnicos: {e}")
             
     def refresh_cotacoes(self):
         """Atualizar lista de cotações"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            c.execute("SELECT id, numero_proposta FROM cotacoes ORDER BY numero_proposta")
-            cotacoes = c.fetchall()
+            try:
+                c.execute("SELECT id, numero_proposta FROM cotacoes ORDER BY numero_proposta")
+                cotacoes = c.fetchall()
             
-            self.cotacoes_dict = {f"{numero} (ID: {id})": id for id, numero in cotacoes}
-            cotacao_values = [""] + list(self.cotacoes_dict.keys())  # Incluir opção vazia
+                self.cotacoes_dict = {f"{numero} (ID: {id})": id for id, numero in cotacoes}
+                cotacao_values = [""] + list(self.cotacoes_dict.keys())  # Incluir opção vazia
             
-            self.cotacao_combo['values'] = cotacao_values
+                self.cotacao_combo['values'] = cotacao_values
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar cotações: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao carregar cotações: {e}")
             
     def adicionar_tecnico(self):
         """Adicionar técnico ao relatório"""
@@ -633,11 +620,27 @@ class RelatoriosModule(BaseModule):
             self.show_warning("Técnico já foi adicionado.")
             return
             
-        # Criar aba para o técnico
+        # Criar aba para o técnico (os campos são montados quando a aba é aberta)
         tecnico_nome = tecnico_str.split(' (ID:')[0]
         tecnico_frame = tk.Frame(self.tecnicos_notebook, bg='white')
         self.tecnicos_notebook.add(tecnico_frame, text=tecnico_nome)
         
+        # Eventos ficam na lista; a Treeview só existe depois de montada a aba
+        self.tecnicos_eventos[tecnico_id] = {
+            'nome': tecnico_nome,
+            'eventos': [],
+            'tree': None
+        }
+        self.adiar_construcao(tecnico_frame, f'tecnico_{tecnico_id}',
+                              lambda frame: self.create_aba_tecnico(frame, tecnico_id))
+        
+        # Limpar seleção
+        self.tecnico_var.set("")
+        
+    def create_aba_tecnico(self, tecnico_frame, tecnico_id):
+        """Campos e lista de eventos da aba de um técnico"""
+        tecnico_data = self.tecnicos_eventos[tecnico_id]
+        
         # Frame para adicionar eventos
         add_evento_frame = tk.Frame(tecnico_frame, bg='white')
         add_evento_frame.pack(fill="x", padx=10, pady=5)
@@ -658,8 +661,8 @@ class RelatoriosModule(BaseModule):
         evento_entry.grid(row=1, column=1, columnspan=2, padx=5, sticky="ew")
         
         # Substitui botão grande por Enter para adicionar
-        evento_entry.bind('<Return>', lambda e: self.adicionar_evento(tecnico_id, data_hora_var, tipo_var, evento_var, eventos_tree))
-        tipo_combo.bind('<Return>', lambda e: self.adicionar_evento(tecnico_id, data_hora_var, tipo_var, evento_var, eventos_tree))
+        evento_entry.bind('<Return>', lambda e: self.adicionar_evento(tecnico_id))
+        tipo_combo.bind('<Return>', lambda e: self.adicionar_evento(tecnico_id))
         
         # Grid de eventos
         eventos_tree = ttk.Treeview(tecnico_frame, columns=("data_hora", "tipo", "evento"), show="headings", height=8)
@@ -667,49 +670,66 @@ class RelatoriosModule(BaseModule):
         eventos_tree.heading("tipo", text="Tipo")
         eventos_tree.heading("evento", text="Evento")
         eventos_tree.pack(fill="both", expand=True, padx=10, pady=5)
+        for evento in tecnico_data['eventos']:
+            eventos_tree.insert("", "end", values=evento)
         
         # Botão para remover evento
         remove_evento_btn = self.create_button(tecnico_frame, "Remover Evento", 
-                                              lambda: self.remover_evento(eventos_tree), bg='#dc2626')
+                                              lambda: self.remover_evento(tecnico_id), bg='#dc2626')
         remove_evento_btn.pack(pady=5)
         
         # Armazenar referências
-        self.tecnicos_eventos[tecnico_id] = {
-            'nome': tecnico_nome,
+        tecnico_data.update({
             'tree': eventos_tree,
             'data_hora_var': data_hora_var,
             'tipo_var': tipo_var,
             'evento_var': evento_var
-        }
+        })
         
-        # Limpar seleção
-        self.tecnico_var.set("")
+    def _inserir_evento_tecnico(self, tecnico_id, data_hora, tipo, evento):
+        tecnico_data = self.tecnicos_eventos[tecnico_id]
+        tecnico_data['eventos'].append((data_hora, tipo, evento))
+        if tecnico_data['tree'] is not None:
+            tecnico_data['tree'].insert("", "end", values=(data_hora, tipo, evento))
+        
+    def _limpar_tecnicos(self):
+        """Remover as abas de técnicos (e as que ainda não tinham sido montadas)"""
+        for tab in self.tecnicos_notebook.tabs():
+            self.tecnicos_notebook.forget(tab)
+        for tecnico_id in self.tecnicos_eventos:
+            self.descartar_secao(f'tecnico_{tecnico_id}')
+        self.tecnicos_eventos = {}
         
-    def adicionar_evento(self, tecnico_id, data_hora_var, tipo_var, evento_var, tree):
+    def adicionar_evento(self, tecnico_id):
         """Adicionar evento ao técnico"""
-        data_hora = data_hora_var.get().strip()
-        tipo = tipo_var.get()
-        evento = evento_var.get().strip()
+        tecnico_data = self.tecnicos_eventos[tecnico_id]
+        data_hora = tecnico_data['data_hora_var'].get().strip()
+        tipo = tecnico_data['tipo_var'].get()
+        evento = tecnico_data['evento_var'].get().strip()
         
         if not data_hora or not evento:
             self.show_warning("Preencha data/hora e evento.")
             return
             
         # Adicionar à lista
-        tree.insert("", "end", values=(data_hora, tipo, evento))
+        self._inserir_evento_tecnico(tecnico_id, data_hora, tipo, evento)
         
         # Limpar campos
-        evento_var.set("")
-        data_hora_var.set(datetime.now().strftime('%d/%m/%Y %H:%M'))
+        tecnico_data['evento_var'].set("")
+        tecnico_data['data_hora_var'].set(datetime.now().strftime('%d/%m/%Y %H:%M'))
         
-    def remover_evento(self, tree):
+    def remover_evento(self, tecnico_id):
         """Remover evento selecionado"""
+        tecnico_data = self.tecnicos_eventos[tecnico_id]
+        tree = tecnico_data['tree']
         selected = tree.selection()
         if not selected:
             self.show_warning("Selecione um evento para remover.")
             return
             
-        for item in selected:
+        # Do fim para o começo, para as posições na lista continuarem valendo
+        for item in sorted(selected, key=tree.index, reverse=True):
+            del tecnico_data['eventos'][tree.index(item)]
             tree.delete(item)
             
     def adicionar_anexo(self, aba_numero):
@@ -725,14 +745,14 @@ class RelatoriosModule(BaseModule):
         listbox = getattr(self, f'anexos_listbox_aba{aba_numero}')
         
         for filepath in filepaths:
-            nome_arquivo = filepath.split('/')[-1]
-            anexo_info = {
-                'nome': nome_arquivo,
-                'caminho': filepath,
-                'descricao': f'Anexo da Aba {aba_numero}'
-            }
+            # Copiar para o armazenamento de anexos (deduplicado pelo conteúdo)
+            try:
+                anexo_info = ingerir_arquivo(filepath, f'Anexo da Aba {aba_numero}')
+            except OSError as e:
+                self.show_error(f"Erro ao adicionar anexo {filepath}: {e}")
+                continue
             self.anexos_aba[aba_numero].append(anexo_info)
-            listbox.insert(tk.END, nome_arquivo)
+            listbox.insert(tk.END, anexo_info['nome'])
         
     def remover_anexo(self, aba_numero):
         """Remover anexo selecionado"""
@@ -751,34 +771,15 @@ class RelatoriosModule(BaseModule):
         # Remover da listbox
         listbox.delete(index)
         
-    def _debug_anexos_json(self, aba_num):
-        """Debug function para ver o que está sendo salvo nos anexos"""
-        anexos = self.anexos_aba[aba_num] if self.anexos_aba[aba_num] else []
-        json_result = json.dumps(anexos) if anexos else "[]"
-        print(f"DEBUG: Aba {aba_num} tem {len(anexos)} anexos: {json_result}")
-        return json_result
-    
     def gerar_numero_sequencial_relatorio(self) -> str:
-        """Gerar número sequencial para relatório técnico (formato REL-000001)."""
+        """Sugerir o próximo número de relatório (formato REL-000001), reservado ao salvar."""
         try:
-            conn = sqlite3.connect(DB_NAME)
-            c = conn.cursor()
-            c.execute("SELECT MAX(CAST(SUBSTR(numero_relatorio, 5) AS INTEGER)) FROM relatorios_tecnicos WHERE numero_relatorio LIKE 'REL-%'")
-            result = c.fetchone()
-            if result and result[0]:
-                proximo = result[0] + 1
-            else:
-                proximo = 1
-            return f"REL-{proximo:06d}"
+            self._numero_sugerido = espiar_numero('REL')
         except sqlite3.Error as e:
             print(f"Erro ao gerar número sequencial de relatório: {e}")
             from datetime import datetime
-            return f"REL-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
+            self._numero_sugerido = f"REL-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        return self._numero_sugerido
 
     def novo_relatorio(self):
         """Limpar formulário para novo relatório"""
@@ -798,20 +799,16 @@ class RelatoriosModule(BaseModule):
             for var in var_dict.values():
                 var.set("")
                 
-        self.servicos_text.delete("1.0", tk.END)
-        self.pecas_text.delete("1.0", tk.END)
+        self._definir_textos_aba4()
         self.data_pecas_var.set("")
         
         # Limpar técnicos
-        for tab in self.tecnicos_notebook.tabs():
-            self.tecnicos_notebook.forget(tab)
-        self.tecnicos_eventos = {}
+        self._limpar_tecnicos()
         
         # Limpar anexos
         for aba_num in range(1, 5):
             self.anexos_aba[aba_num] = []
-            listbox = getattr(self, f'anexos_listbox_aba{aba_num}')
-            listbox.delete(0, tk.END)
+            self._exibir_anexos(aba_num)
         
         # Limpar cotação
         self.cotacao_var.set("")
@@ -838,14 +835,11 @@ class RelatoriosModule(BaseModule):
             for var in var_dict.values():
                 var.set("")
                 
-        self.servicos_text.delete("1.0", tk.END)
-        self.pecas_text.delete("1.0", tk.END)
+        self._definir_textos_aba4()
         self.data_pecas_var.set("")
         
         # Limpar técnicos
-        for tab in self.tecnicos_notebook.tabs():
-            self.tecnicos_notebook.forget(tab)
-        self.tecnicos_eventos = {}
+        self._limpar_tecnicos()
         
         # Limpar cotação
         self.cotacao_var.set("")
@@ -882,210 +876,155 @@ class RelatoriosModule(BaseModule):
         filial_str = self.filial_var.get()
         filial_id = int(filial_str.split(' - ')[0]) if ' - ' in filial_str else int(filial_str or 2)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            # Preparar dados do relatório
-            dados_relatorio = (
-                numero,
-                cliente_id,
-                self.user_id,
-                datetime.now().strftime('%Y-%m-%d') if not self.current_relatorio_id else None,
-                self.formulario_servico_var.get().strip(),
-                self.tipo_servico_var.get().strip(),
-                self.descricao_text.get("1.0", tk.END).strip(),
-                self.data_recebimento_var.get().strip(),
+            try:
+                # Número sugerido pelo formulário: reservar atomicamente o definitivo
+                if not self.current_relatorio_id and numero == getattr(self, '_numero_sugerido', None):
+                    numero = alocar_numero('REL')
+                    self.numero_relatorio_var.set(numero)
+            
+                # Preparar dados do relatório
+                dados_relatorio = (
+                    numero,
+                    cliente_id,
+                    self.user_id,
+                    datetime.now().strftime('%Y-%m-%d') if not self.current_relatorio_id else None,
+                    self.formulario_servico_var.get().strip(),
+                    self.tipo_servico_var.get().strip(),
+                    self.descricao_text.get("1.0", tk.END).strip(),
+                    self.data_recebimento_var.get().strip(),
                 
-                # Aba 1
-                self.aba1_vars.get("Cond. Encontrada", tk.StringVar()).get(),
-                self.aba1_vars.get("Placa/N.Série", tk.StringVar()).get(),
-                self.aba1_vars.get("Acoplamento", tk.StringVar()).get(),
-                self.aba1_vars.get("Aspectos Rotores", tk.StringVar()).get(),
-                self.aba1_vars.get("Válvulas Acopladas", tk.StringVar()).get(),
-                self.aba1_vars.get("Data Recebimento", tk.StringVar()).get(),
+                    # Aba 1
+                    self.aba1_vars.get("Cond. Encontrada", tk.StringVar()).get(),
+                    self.aba1_vars.get("Placa/N.Série", tk.StringVar()).get(),
+                    self.aba1_vars.get("Acoplamento", tk.StringVar()).get(),
+                    self.aba1_vars.get("Aspectos Rotores", tk.StringVar()).get(),
+                    self.aba1_vars.get("Válvulas Acopladas", tk.StringVar()).get(),
+                    self.aba1_vars.get("Data Recebimento", tk.StringVar()).get(),
                 
-                # Aba 2
-                self.aba2_vars.get("Parafusos/Pinos", tk.StringVar()).get(),
-                self.aba2_vars.get("Superfície Vedação", tk.StringVar()).get(),
-                self.aba2_vars.get("Engrenagens", tk.StringVar()).get(),
-                self.aba2_vars.get("Bico Injetor", tk.StringVar()).get(),
-                self.aba2_vars.get("Rolamentos", tk.StringVar()).get(),
-                self.aba2_vars.get("Aspecto Óleo", tk.StringVar()).get(),
-                self.aba2_vars.get("Data", tk.StringVar()).get(),
+                    # Aba 2
+                    self.aba2_vars.get("Parafusos/Pinos", tk.StringVar()).get(),
+                    self.aba2_vars.get("Superfície Vedação", tk.StringVar()).get(),
+                    self.aba2_vars.get("Engrenagens", tk.StringVar()).get(),
+                    self.aba2_vars.get("Bico Injetor", tk.StringVar()).get(),
+                    self.aba2_vars.get("Rolamentos", tk.StringVar()).get(),
+                    self.aba2_vars.get("Aspecto Óleo", tk.StringVar()).get(),
+                    self.aba2_vars.get("Data", tk.StringVar()).get(),
                 
-                # Aba 3
-                self.aba3_vars.get("Interf. Desmontagem", tk.StringVar()).get(),
-                self.aba3_vars.get("Aspecto Rotores", tk.StringVar()).get(),
-                self.aba3_vars.get("Aspecto Carcaça", tk.StringVar()).get(),
-                self.aba3_vars.get("Interf. Mancais", tk.StringVar()).get(),
-                self.aba3_vars.get("Galeria Hidráulica", tk.StringVar()).get(),
-                self.aba3_vars.get("Data Desmembração", tk.StringVar()).get(),
+                    # Aba 3
+                    self.aba3_vars.get("Interf. Desmontagem", tk.StringVar()).get(),
+                    self.aba3_vars.get("Aspecto Rotores", tk.StringVar()).get(),
+                    self.aba3_vars.get("Aspecto Carcaça", tk.StringVar()).get(),
+                    self.aba3_vars.get("Interf. Mancais", tk.StringVar()).get(),
+                    self.aba3_vars.get("Galeria Hidráulica", tk.StringVar()).get(),
+                    self.aba3_vars.get("Data Desmembração", tk.StringVar()).get(),
                 
-                # Aba 4
-                self.servicos_text.get("1.0", tk.END).strip(),
-                self.pecas_text.get("1.0", tk.END).strip(),
-                self.data_pecas_var.get().strip(),
+                    # Aba 4
+                    *self._textos_aba4_atuais(),
+                    self.data_pecas_var.get().strip(),
                 
-                # Outros
-                cotacao_id,
-                "",  # tempo_trabalho_total
-                "",  # tempo_deslocamento_total
-                "",  # fotos
-                self._debug_anexos_json(1),  # anexos_aba1
-                self._debug_anexos_json(2),  # anexos_aba2
-                self._debug_anexos_json(3),  # anexos_aba3
-                self._debug_anexos_json(4),  # anexos_aba4
-                filial_id
-            )
-            
-            if self.current_relatorio_id:
-                # Atualizar relatório existente
-                c.execute("""
-                    UPDATE relatorios_tecnicos SET
-                        numero_relatorio = ?, cliente_id = ?, formulario_servico = ?,
-                        tipo_servico = ?, descricao_servico = ?, data_recebimento = ?,
-                        condicao_encontrada = ?, placa_identificacao = ?, acoplamento = ?,
-                        aspectos_rotores = ?, valvulas_acopladas = ?, data_recebimento_equip = ?,
-                        parafusos_pinos = ?, superficie_vedacao = ?, engrenagens = ?,
-                        bico_injetor = ?, rolamentos = ?, aspecto_oleo = ?, data_peritagem = ?,
-                        interf_desmontagem = ?, aspecto_rotores_aba3 = ?, aspecto_carcaca = ?,
-                        interf_mancais = ?, galeria_hidraulica = ?, data_desmembracao = ?,
-                        servicos_propostos = ?, pecas_recomendadas = ?, data_pecas = ?,
-                        cotacao_id = ?, tempo_trabalho_total = ?, tempo_deslocamento_total = ?,
-                        fotos = ?, anexos_aba1 = ?, anexos_aba2 = ?, anexos_aba3 = ?, anexos_aba4 = ?,
-                        filial_id = ?
-                    WHERE id = ?
-                """, (dados_relatorio[0], dados_relatorio[1]) + dados_relatorio[4:-1] + (dados_relatorio[-1], self.current_relatorio_id,))
+                    # Outros
+                    cotacao_id,
+                    "",  # tempo_trabalho_total
+                    "",  # tempo_deslocamento_total
+                    "",  # fotos
+                    None,  # anexos_aba1 (legado: anexos ficam em relatorio_anexos)
+                    None,  # anexos_aba2 (legado: anexos ficam em relatorio_anexos)
+                    None,  # anexos_aba3 (legado: anexos ficam em relatorio_anexos)
+                    None,  # anexos_aba4 (legado: anexos ficam em relatorio_anexos)
+                    filial_id
+                )
+            
+                evento = 'relatorio_updated' if self.current_relatorio_id else 'relatorio_created'
+                if self.current_relatorio_id:
+                    # Atualizar relatório existente
+                    c.execute("""
+                        UPDATE relatorios_tecnicos SET
+                            numero_relatorio = ?, cliente_id = ?, formulario_servico = ?,
+                            tipo_servico = ?, descricao_servico = ?, data_recebimento = ?,
+                            condicao_encontrada = ?, placa_identificacao = ?, acoplamento = ?,
+                            aspectos_rotores = ?, valvulas_acopladas = ?, data_recebimento_equip = ?,
+                            parafusos_pinos = ?, superficie_vedacao = ?, engrenagens = ?,
+                            bico_injetor = ?, rolamentos = ?, aspecto_oleo = ?, data_peritagem = ?,
+                            interf_desmontagem = ?, aspecto_rotores_aba3 = ?, aspecto_carcaca = ?,
+                            interf_mancais = ?, galeria_hidraulica = ?, data_desmembracao = ?,
+                            servicos_propostos = ?, pecas_recomendadas = ?, data_pecas = ?,
+                            cotacao_id = ?, tempo_trabalho_total = ?, tempo_deslocamento_total = ?,
+                            fotos = ?, anexos_aba1 = ?, anexos_aba2 = ?, anexos_aba3 = ?, anexos_aba4 = ?,
+                            filial_id = ?
+                        WHERE id = ?
+                    """, (dados_relatorio[0], dados_relatorio[1]) + dados_relatorio[4:-1] + (dados_relatorio[-1], self.current_relatorio_id,))
                 
-                # Remover eventos antigos
-                c.execute("DELETE FROM eventos_campo WHERE relatorio_id = ?", (self.current_relatorio_id,))
-                relatorio_id = self.current_relatorio_id
-            else:
-                # Inserir novo relatório
-                c.execute("""
-                    INSERT INTO relatorios_tecnicos (
-                        numero_relatorio, cliente_id, responsavel_id, data_criacao,
-                        formulario_servico, tipo_servico, descricao_servico, data_recebimento,
-                        condicao_encontrada, placa_identificacao, acoplamento, aspectos_rotores,
-                        valvulas_acopladas, data_recebimento_equip, parafusos_pinos, superficie_vedacao,
-                        engrenagens, bico_injetor, rolamentos, aspecto_oleo, data_peritagem,
-                        interf_desmontagem, aspecto_rotores_aba3, aspecto_carcaca, interf_mancais,
-                        galeria_hidraulica, data_desmembracao, servicos_propostos, pecas_recomendadas,
-                        data_pecas, cotacao_id, tempo_trabalho_total, tempo_deslocamento_total,
-                        fotos, anexos_aba1, anexos_aba2, anexos_aba3, anexos_aba4, filial_id
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, dados_relatorio)
+                    # Remover eventos antigos
+                    c.execute("DELETE FROM eventos_campo WHERE relatorio_id = ?", (self.current_relatorio_id,))
+                    relatorio_id = self.current_relatorio_id
+                else:
+                    # Inserir novo relatório
+                    c.execute("""
+                        INSERT INTO relatorios_tecnicos (
+                            numero_relatorio, cliente_id, responsavel_id, data_criacao,
+                            formulario_servico, tipo_servico, descricao_servico, data_recebimento,
+                            condicao_encontrada, placa_identificacao, acoplamento, aspectos_rotores,
+                            valvulas_acopladas, data_recebimento_equip, parafusos_pinos, superficie_vedacao,
+                            engrenagens, bico_injetor, rolamentos, aspecto_oleo, data_peritagem,
+                            interf_desmontagem, aspecto_rotores_aba3, aspecto_carcaca, interf_mancais,
+                            galeria_hidraulica, data_desmembracao, servicos_propostos, pecas_recomendadas,
+                            data_pecas, cotacao_id, tempo_trabalho_total, tempo_deslocamento_total,
+                            fotos, anexos_aba1, anexos_aba2, anexos_aba3, anexos_aba4, filial_id
+                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, dados_relatorio)
                 
-                relatorio_id = c.lastrowid
-                self.current_relatorio_id = relatorio_id
+                    relatorio_id = c.lastrowid
+                    self.current_relatorio_id = relatorio_id
             
-            # Inserir eventos dos técnicos
-            for tecnico_id, tecnico_data in self.tecnicos_eventos.items():
-                tree = tecnico_data['tree']
-                for item in tree.get_children():
-                    data_hora, tipo, evento = tree.item(item)['values']
-                    c.execute("""
-                        INSERT INTO eventos_campo (relatorio_id, tecnico_id, data_hora, evento, tipo)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (relatorio_id, tecnico_id, data_hora, evento, tipo))
+                # Inserir eventos dos técnicos
+                for tecnico_id, tecnico_data in self.tecnicos_eventos.items():
+                    for data_hora, tipo, descricao_evento in tecnico_data['eventos']:
+                        c.execute("""
+                            INSERT INTO eventos_campo (relatorio_id, tecnico_id, data_hora, evento, tipo)
+                            VALUES (?, ?, ?, ?, ?)
+                        """, (relatorio_id, tecnico_id, data_hora, descricao_evento, tipo))
             
-            conn.commit()
-            self.show_success("Relatório salvo com sucesso!")
+                # Anexos das 4 abas
+                salvar_anexos(conn, relatorio_id, self.anexos_aba)
             
-            # Emitir evento para atualizar outros módulos
-            self.emit_event('relatorio_created')
+                conn.commit()
+                self.show_success("Relatório salvo com sucesso!")
             
-            # Recarregar lista
-            self.carregar_relatorios()
+                # Emitir evento para atualizar outros módulos (e a linha na própria lista)
+                self.emit_event(evento, {'ids': [relatorio_id]})
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao salvar relatório: {e}")
-            import traceback
-            print(f"Erro completo: {traceback.format_exc()}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao salvar relatório: {e}")
+                import traceback
+                print(f"Erro completo: {traceback.format_exc()}")
             
     def carregar_relatorios(self):
-        """Carregar lista de relatórios"""
-        # Limpar lista atual
-        for item in self.relatorios_tree.get_children():
-            self.relatorios_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            c.execute("""
-                SELECT r.id, r.numero_relatorio, cl.nome, r.data_criacao, 
-                       u.nome_completo, r.tipo_servico
-                FROM relatorios_tecnicos r
-                JOIN clientes cl ON r.cliente_id = cl.id
-                JOIN usuarios u ON r.responsavel_id = u.id
-                ORDER BY r.created_at DESC
-            """)
-            
-            for row in c.fetchall():
-                relatorio_id, numero, cliente, data, responsavel, tipo = row
-                self.relatorios_tree.insert("", "end", values=(
-                    numero,
-                    cliente,
-                    format_date(data),
-                    responsavel,
-                    tipo or ""
-                ), tags=(relatorio_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar relatórios: {e}")
-        finally:
-            conn.close()
+        """Carregar lista de relatórios (primeira página; as demais ao rolar)"""
+        self.lista_relatorios.carregar()
+        
+    def _valores_relatorio(self, dados):
+        # A busca por texto traz também o trecho encontrado
+        relatorio_id, numero, cliente, data, responsavel, tipo, *trecho = dados
+        return (
+            numero,
+            cliente,
+            format_date(data),
+            responsavel,
+            tipo or "",
+            (trecho[0] or "").strip() if trecho else ""
+        )
             
     def buscar_relatorios(self):
-        """Buscar relatórios com filtro"""
+        """Buscar relatórios pelo texto (número, cliente, campos técnicos e eventos)"""
         termo = self.search_var.get().strip()
+        if not termo:
+            self.carregar_relatorios()
+            return
         
-        # Limpar lista atual
-        for item in self.relatorios_tree.get_children():
-            self.relatorios_tree.delete(item)
-            
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            if termo:
-                c.execute("""
-                    SELECT r.id, r.numero_relatorio, cl.nome, r.data_criacao, 
-                           u.nome_completo, r.tipo_servico
-                    FROM relatorios_tecnicos r
-                    JOIN clientes cl ON r.cliente_id = cl.id
-                    JOIN usuarios u ON r.responsavel_id = u.id
-                    WHERE r.numero_relatorio LIKE ? OR cl.nome LIKE ?
-                    ORDER BY r.created_at DESC
-                """, (f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT r.id, r.numero_relatorio, cl.nome, r.data_criacao, 
-                           u.nome_completo, r.tipo_servico
-                    FROM relatorios_tecnicos r
-                    JOIN clientes cl ON r.cliente_id = cl.id
-                    JOIN usuarios u ON r.responsavel_id = u.id
-                    ORDER BY r.created_at DESC
-                """)
-            
-            for row in c.fetchall():
-                relatorio_id, numero, cliente, data, responsavel, tipo = row
-                self.relatorios_tree.insert("", "end", values=(
-                    numero,
-                    cliente,
-                    format_date(data),
-                    responsavel,
-                    tipo or ""
-                ), tags=(relatorio_id,))
-                
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao buscar relatórios: {e}")
-        finally:
-            conn.close()
+        self.lista_relatorios.exibir(buscar_relatorios_texto(termo))
             
     def editar_relatorio(self):
         """Editar relatório selecionado"""
@@ -1106,145 +1045,113 @@ class RelatoriosModule(BaseModule):
         
     def carregar_relatorio_para_edicao(self, relatorio_id):
         """Carregar dados do relatório para edição"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            # Carregar dados do relatório
-            c.execute("SELECT * FROM relatorios_tecnicos WHERE id = ?", (relatorio_id,))
-            relatorio = c.fetchone()
+            try:
+                # Carregar dados do relatório
+                c.execute("SELECT * FROM relatorios_tecnicos WHERE id = ?", (relatorio_id,))
+                relatorio = c.fetchone()
             
-            if not relatorio:
-                self.show_error("Relatório não encontrado.")
-                return
+                if not relatorio:
+                    self.show_error("Relatório não encontrado.")
+                    return
                 
-            # Limpar campos básicos (mas preservar anexos)
-            self.current_relatorio_id = relatorio_id
-            self.numero_relatorio_var.set("")
-            self.cliente_var.set("")
-            self.data_criacao_var.set("")
-            self.formulario_servico_var.set("")
-            self.tipo_servico_var.set("")
-            self.descricao_text.delete("1.0", tk.END)
-            self.data_recebimento_var.set("")
-            
-            # Limpar abas do equipamento
-            for var_dict in [self.aba1_vars, self.aba2_vars, self.aba3_vars]:
-                for var in var_dict.values():
-                    var.set("")
+                # Limpar campos básicos (mas preservar anexos)
+                self.current_relatorio_id = relatorio_id
+                self.numero_relatorio_var.set("")
+                self.cliente_var.set("")
+                self.data_criacao_var.set("")
+                self.formulario_servico_var.set("")
+                self.tipo_servico_var.set("")
+                self.descricao_text.delete("1.0", tk.END)
+                self.data_recebimento_var.set("")
+            
+                # Limpar abas do equipamento
+                for var_dict in [self.aba1_vars, self.aba2_vars, self.aba3_vars]:
+                    for var in var_dict.values():
+                        var.set("")
                     
-            self.servicos_text.delete("1.0", tk.END)
-            self.pecas_text.delete("1.0", tk.END)
-            self.data_pecas_var.set("")
+                self.data_pecas_var.set("")
             
-            # Limpar técnicos
-            for tab in self.tecnicos_notebook.tabs():
-                self.tecnicos_notebook.forget(tab)
-            self.tecnicos_eventos = {}
+                # Limpar técnicos
+                self._limpar_tecnicos()
             
-            # Limpar cotação
-            self.cotacao_var.set("")
+                # Limpar cotação
+                self.cotacao_var.set("")
             
-            # Preencher campos básicos
-            self.numero_relatorio_var.set(relatorio[1] or "")  # numero_relatorio
+                # Preencher campos básicos
+                self.numero_relatorio_var.set(relatorio[1] or "")  # numero_relatorio
             
-            # Encontrar cliente no combo
-            for key, value in self.clientes_dict.items():
-                if value == relatorio[2]:  # cliente_id
-                    self.cliente_var.set(key)
-                    break
+                # Encontrar cliente no combo
+                for key, value in self.clientes_dict.items():
+                    if value == relatorio[2]:  # cliente_id
+                        self.cliente_var.set(key)
+                        break
                     
-            self.data_criacao_var.set(format_date(relatorio[4]) if relatorio[4] else "")
-            self.formulario_servico_var.set(relatorio[5] or "")
-            self.tipo_servico_var.set(relatorio[6] or "")
+                self.data_criacao_var.set(format_date(relatorio[4]) if relatorio[4] else "")
+                self.formulario_servico_var.set(relatorio[5] or "")
+                self.tipo_servico_var.set(relatorio[6] or "")
             
-            # Descrição do serviço
-            if relatorio[7]:
-                self.descricao_text.insert("1.0", relatorio[7])
+                # Descrição do serviço
+                if relatorio[7]:
+                    self.descricao_text.insert("1.0", relatorio[7])
                 
-            self.data_recebimento_var.set(relatorio[8] or "")
-            
-            # Carregar dados das abas (índices 9-30)
-            # Aba 1 (índices 9-14)
-            aba1_campos = ["Cond. Encontrada", "Placa/N.Série", "Acoplamento", "Aspectos Rotores", "Válvulas Acopladas", "Data Recebimento"]
-            for i, campo in enumerate(aba1_campos):
-                if campo in self.aba1_vars:
-                    self.aba1_vars[campo].set(relatorio[9 + i] or "")
-            
-            # Aba 2 (índices 15-21)
-            aba2_campos = ["Parafusos/Pinos", "Superfície Vedação", "Engrenagens", "Bico Injetor", "Rolamentos", "Aspecto Óleo", "Data"]
-            for i, campo in enumerate(aba2_campos):
-                if campo in self.aba2_vars:
-                    self.aba2_vars[campo].set(relatorio[15 + i] or "")
-            
-            # Aba 3 (índices 22-27)
-            aba3_campos = ["Interf. Desmontagem", "Aspecto Rotores", "Aspecto Carcaça", "Interf. Mancais", "Galeria Hidráulica", "Data Desmembração"]
-            for i, campo in enumerate(aba3_campos):
-                if campo in self.aba3_vars:
-                    self.aba3_vars[campo].set(relatorio[22 + i] or "")
-            
-            # Aba 4 (índices 28-30)
-            if relatorio[28]:  # servicos_propostos
-                self.servicos_text.insert("1.0", relatorio[28])
-            if relatorio[29]:  # pecas_recomendadas
-                self.pecas_text.insert("1.0", relatorio[29])
-            self.data_pecas_var.set(relatorio[30] or "")
-            
-            # Cotação vinculada
-            if relatorio[31]:  # cotacao_id
-                for key, value in self.cotacoes_dict.items():
-                    if value == relatorio[31]:
-                        self.cotacao_var.set(key)
-                        break
+                self.data_recebimento_var.set(relatorio[8] or "")
+            
+                # Carregar dados das abas (índices 9-30)
+                # Aba 1 (índices 9-14)
+                aba1_campos = ["Cond. Encontrada", "Placa/N.Série", "Acoplamento", "Aspectos Rotores", "Válvulas Acopladas", "Data Recebimento"]
+                for i, campo in enumerate(aba1_campos):
+                    if campo in self.aba1_vars:
+                        self.aba1_vars[campo].set(relatorio[9 + i] or "")
+            
+                # Aba 2 (índices 15-21)
+                aba2_campos = ["Parafusos/Pinos", "Superfície Vedação", "Engrenagens", "Bico Injetor", "Rolamentos", "Aspecto Óleo", "Data"]
+                for i, campo in enumerate(aba2_campos):
+                    if campo in self.aba2_vars:
+                        self.aba2_vars[campo].set(relatorio[15 + i] or "")
+            
+                # Aba 3 (índices 22-27)
+                aba3_campos = ["Interf. Desmontagem", "Aspecto Rotores", "Aspecto Carcaça", "Interf. Mancais", "Galeria Hidráulica", "Data Desmembração"]
+                for i, campo in enumerate(aba3_campos):
+                    if campo in self.aba3_vars:
+                        self.aba3_vars[campo].set(relatorio[22 + i] or "")
+            
+                # Aba 4 (índices 28-30): servicos_propostos, pecas_recomendadas
+                self._definir_textos_aba4(relatorio[28] or "", relatorio[29] or "")
+                self.data_pecas_var.set(relatorio[30] or "")
+            
+                # Cotação vinculada
+                if relatorio[31]:  # cotacao_id
+                    for key, value in self.cotacoes_dict.items():
+                        if value == relatorio[31]:
+                            self.cotacao_var.set(key)
+                            break
             
-            # Filial: buscar de forma robusta
-            try:
-                c.execute("SELECT filial_id FROM relatorios_tecnicos WHERE id = ?", (relatorio_id,))
-                row_f = c.fetchone()
-                if row_f and row_f[0] in (1, 2):
-                    filial_id = row_f[0]
-                    nome_filial = "WORLD COMP COMPRESSORES LTDA" if filial_id == 1 else "WORLD COMP DO BRASIL COMPRESSORES LTDA"
-                    self.filial_var.set(f"{filial_id} - {nome_filial}")
-            except Exception:
-                pass
-            
-            # Carregar anexos (índices 35-38)
-            for aba_num in range(1, 5):
-                # Limpar anexos e listbox desta aba primeiro
-                self.anexos_aba[aba_num] = []
-                listbox = getattr(self, f'anexos_listbox_aba{aba_num}')
-                listbox.delete(0, tk.END)
-                
-                anexos_str = relatorio[34 + aba_num]  # anexos_aba1, anexos_aba2, etc.
-                if anexos_str:
-                    try:
-                        # Tentar carregar como JSON
-                        self.anexos_aba[aba_num] = json.loads(anexos_str)
-                    except (json.JSONDecodeError, TypeError):
-                        # Fallback para formato antigo (separado por ;)
-                        anexos_list = anexos_str.split(';')
-                        self.anexos_aba[aba_num] = [anexo for anexo in anexos_list if anexo]
-                    
-                    # Atualizar listbox
-                    for anexo in self.anexos_aba[aba_num]:
-                        # Se for dict, usar nome; se for string, usar o nome do arquivo
-                        if isinstance(anexo, dict):
-                            nome_anexo = anexo.get('nome', anexo.get('path', 'Arquivo sem nome'))
-                            if isinstance(nome_anexo, str) and '/' in nome_anexo:
-                                nome_anexo = nome_anexo.split('/')[-1]
-                        else:
-                            nome_anexo = str(anexo).split('/')[-1] if isinstance(anexo, str) else str(anexo)
-                        listbox.insert(tk.END, nome_anexo)
-            
-            # Carregar eventos dos técnicos
-            self.carregar_eventos_relatorio(relatorio_id)
-            
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar relatório: {e}")
-            import traceback
-            print(f"Erro completo: {traceback.format_exc()}")
-        finally:
-            conn.close()
+                # Filial: buscar de forma robusta
+                try:
+                    c.execute("SELECT filial_id FROM relatorios_tecnicos WHERE id = ?", (relatorio_id,))
+                    row_f = c.fetchone()
+                    if row_f and row_f[0] in (1, 2):
+                        filial_id = row_f[0]
+                        nome_filial = "WORLD COMP COMPRESSORES LTDA" if filial_id == 1 else "WORLD COMP DO BRASIL COMPRESSORES LTDA"
+                        self.filial_var.set(f"{filial_id} - {nome_filial}")
+                except Exception:
+                    pass
+            
+                # Carregar anexos das 4 abas
+                self.anexos_aba = listar_anexos(relatorio_id, conn)
+                for aba_num in range(1, 5):
+                    self._exibir_anexos(aba_num)
+            
+                # Carregar eventos dos técnicos
+                self.carregar_eventos_relatorio(relatorio_id)
+            
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao carregar relatório: {e}")
+                import traceback
+                print(f"Erro completo: {traceback.format_exc()}")
             
     def abrir_relatorio_editor_pdf(self, relatorio_id):
         """Método descontinuado: editor de templates removido."""
@@ -1253,43 +1160,40 @@ class RelatoriosModule(BaseModule):
 
     def carregar_eventos_relatorio(self, relatorio_id):
         """Carregar eventos dos técnicos do relatório"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            c.execute("""
-                SELECT ec.tecnico_id, u.nome_completo, ec.data_hora, ec.evento, ec.tipo
-                FROM eventos_campo ec
-                JOIN usuarios u ON ec.tecnico_id = u.id
-                WHERE ec.relatorio_id = ?
-                ORDER BY ec.tecnico_id, ec.data_hora
-            """, (relatorio_id,))
-            
-            eventos = c.fetchall()
-            tecnicos_adicionados = set()
-            
-            for evento in eventos:
-                tecnico_id, tecnico_nome, data_hora, descricao, tipo = evento
+            try:
+                c.execute("""
+                    SELECT ec.tecnico_id, u.nome_completo, ec.data_hora, ec.evento, ec.tipo
+                    FROM eventos_campo ec
+                    JOIN usuarios u ON ec.tecnico_id = u.id
+                    WHERE ec.relatorio_id = ?
+                    ORDER BY ec.tecnico_id, ec.data_hora
+                """, (relatorio_id,))
+            
+                eventos = c.fetchall()
+                tecnicos_adicionados = set()
+            
+                for evento in eventos:
+                    tecnico_id, tecnico_nome, data_hora, descricao, tipo = evento
                 
-                # Adicionar técnico se ainda não foi adicionado
-                if tecnico_id not in tecnicos_adicionados:
-                    # Simular seleção do técnico
-                    for key, value in self.tecnicos_dict.items():
-                        if value == tecnico_id:
-                            self.tecnico_var.set(key)
-                            self.adicionar_tecnico()
-                            break
-                    tecnicos_adicionados.add(tecnico_id)
+                    # Adicionar técnico se ainda não foi adicionado
+                    if tecnico_id not in tecnicos_adicionados:
+                        # Simular seleção do técnico
+                        for key, value in self.tecnicos_dict.items():
+                            if value == tecnico_id:
+                                self.tecnico_var.set(key)
+                                self.adicionar_tecnico()
+                                break
+                        tecnicos_adicionados.add(tecnico_id)
                 
-                # Adicionar evento
-                if tecnico_id in self.tecnicos_eventos:
-                    tree = self.tecnicos_eventos[tecnico_id]['tree']
-                    tree.insert("", "end", values=(data_hora, tipo, descricao))
+                    # Adicionar evento
+                    if tecnico_id in self.tecnicos_eventos:
+                        self._inserir_evento_tecnico(tecnico_id, data_hora, tipo, descricao)
                     
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar eventos: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao carregar eventos: {e}")
             
     def duplicar_relatorio(self):
         """Duplicar relatório selecionado"""
@@ -1320,13 +1224,7 @@ class RelatoriosModule(BaseModule):
             self.show_warning("Salve o relatório antes de gerar o PDF.")
             return
             
-        gerar_pdf_relatorio = _lazy_gerar_pdf_relatorio()
-        sucesso, resultado = gerar_pdf_relatorio(self.current_relatorio_id, DB_NAME)
-        
-        if sucesso:
-            self.show_success(f"PDF gerado com sucesso!\nLocal: {resultado}")
-        else:
-            self.show_error(f"Erro ao gerar PDF: {resultado}")
+        self.gerar_pdf_em_segundo_plano(_lazy_gerar_pdf_relatorio(), self.current_relatorio_id, DB_NAME)
             
     def gerar_pdf_selecionado(self):
         """Gerar PDF do relatório selecionado"""
@@ -1341,19 +1239,20 @@ class RelatoriosModule(BaseModule):
             return
             
         relatorio_id = tags[0]
-        gerar_pdf_relatorio = _lazy_gerar_pdf_relatorio()
-        sucesso, resultado = gerar_pdf_relatorio(relatorio_id, DB_NAME)
-        
-        if sucesso:
-            self.show_success(f"PDF gerado com sucesso!\nLocal: {resultado}")
-        else:
-            self.show_error(f"Erro ao gerar PDF: {resultado}")
+        self.gerar_pdf_em_segundo_plano(_lazy_gerar_pdf_relatorio(), relatorio_id, DB_NAME)
             
     def handle_event(self, event_type, data=None):
         """Manipular eventos recebidos do sistema"""
         if event_type == 'usuario_created':
             print("DEBUG: Evento usuario_created recebido via handle_event, atualizando lista de técnicos...")
             self.refresh_tecnicos()
+        elif event_type in ('relatorio_created', 'relatorio_updated', 'relatorio_deleted'):
+            if data['ids'] is None:
+                self.carregar_relatorios()
+            else:
+                self.lista_relatorios.atualizar(data['ids'])
+        elif event_type in ('cliente_created', 'cliente_updated', 'cliente_deleted'):
+            self.refresh_clientes()
 
     def excluir_relatorio(self):
         selected = self.relatorios_tree.selection()
@@ -1366,15 +1265,13 @@ class RelatoriosModule(BaseModule):
         relatorio_id = tags[0]
         if not messagebox.askyesno("Confirmar Exclusão", "Tem certeza que deseja excluir o relatório selecionado?"):
             return
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        try:
-            c.execute("DELETE FROM eventos_campo WHERE relatorio_id = ?", (relatorio_id,))
-            c.execute("DELETE FROM relatorios_tecnicos WHERE id = ?", (relatorio_id,))
-            conn.commit()
-            self.show_success("Relatório excluído com sucesso!")
-            self.carregar_relatorios()
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao excluir relatório: {e}")
-        finally:
-            conn.close()
\ No newline at end of file
+        with obter_conexao() as conn:
+            c = conn.cursor()
+            try:
+                c.execute("DELETE FROM eventos_campo WHERE relatorio_id = ?", (relatorio_id,))
+                c.execute("DELETE FROM relatorios_tecnicos WHERE id = ?", (relatorio_id,))
+                conn.commit()
+                self.show_success("Relatório excluído com sucesso!")
+                self.emit_event('relatorio_deleted', {'ids': [relatorio_id]})
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao excluir relatório: {e}")
\ No newline at end of file
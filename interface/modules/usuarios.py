@@ -3,7 +3,7 @@ from tkinter import ttk, messagebox
 import sqlite3
 import hashlib
 from .base_module import BaseModule
-from database import DB_NAME
+from database import DB_NAME, obter_conexao
 from utils.formatters import format_phone, validate_email
 
 class UsuariosModule(BaseModule):
@@ -255,81 +255,78 @@ class UsuariosModule(BaseModule):
             self.show_warning("Email inválido.")
             return
             
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            if self.current_usuario_id:
-                # Atualizar usuário existente (sem senha)
-                c.execute("""
-                    UPDATE usuarios SET username = ?, role = ?, nome_completo = ?, 
-                                      email = ?, telefone = ?, template_personalizado = ?, template_image_path = ?
-                    WHERE id = ?
-                """, (username, role, self.nome_completo_var.get().strip(),
-                     email if email else None, self.telefone_var.get().strip(),
-                     self.template_personalizado_var.get(), self.template_image_path_var.get().strip() or None,
-                     self.current_usuario_id))
-            else:
-                # Novo usuário
-                password_hash = hashlib.sha256(password.encode()).hexdigest()
-                c.execute("""
-                    INSERT INTO usuarios (username, password, role, nome_completo, email, telefone, template_personalizado, template_image_path)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (username, password_hash, role, self.nome_completo_var.get().strip(),
-                     email if email else None, self.telefone_var.get().strip(), 
-                     self.template_personalizado_var.get(), self.template_image_path_var.get().strip() or None))
-                self.current_usuario_id = c.lastrowid
-            
-            conn.commit()
-            self.show_success("Usuário salvo com sucesso!")
-            
-            # Emitir evento para atualizar outros módulos
-            self.emit_event('usuario_created')
-            
-            self.carregar_usuarios()
-            
-        except sqlite3.IntegrityError as e:
-            self.show_error(f"Erro ao salvar usuário: {e}")
-        finally:
-            conn.close()
+        with obter_conexao() as conn:
+            c = conn.cursor()
+        
+            try:
+                if self.current_usuario_id:
+                    # Atualizar usuário existente (sem senha)
+                    c.execute("""
+                        UPDATE usuarios SET username = ?, role = ?, nome_completo = ?, 
+                                          email = ?, telefone = ?, template_personalizado = ?, template_image_path = ?
+                        WHERE id = ?
+                    """, (username, role, self.nome_completo_var.get().strip(),
+                         email if email else None, self.telefone_var.get().strip(),
+                         self.template_personalizado_var.get(), self.template_image_path_var.get().strip() or None,
+                         self.current_usuario_id))
+                else:
+                    # Novo usuário
+                    password_hash = hashlib.sha256(password.encode()).hexdigest()
+                    c.execute("""
+                        INSERT INTO usuarios (username, password, role, nome_completo, email, telefone, template_personalizado, template_image_path)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """, (username, password_hash, role, self.nome_completo_var.get().strip(),
+                         email if email else None, self.telefone_var.get().strip(), 
+                         self.template_personalizado_var.get(), self.template_image_path_var.get().strip() or None))
+                    self.current_usuario_id = c.lastrowid
+            
+                conn.commit()
+                self.sessao.invalidar_usuario(self.current_usuario_id)
+                self.show_success("Usuário salvo com sucesso!")
+            
+                # Emitir evento para atualizar outros módulos
+                self.emit_event('usuario_created')
+            
+                self.carregar_usuarios()
+            
+            except sqlite3.IntegrityError as e:
+                self.show_error(f"Erro ao salvar usuário: {e}")
             
     def carregar_usuarios(self):
         for item in self.usuarios_tree.get_children():
             self.usuarios_tree.delete(item)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            termo = self.search_var.get().strip() if hasattr(self, 'search_var') else ''
-            if termo:
-                c.execute("""
-                    SELECT id, username, nome_completo, role, email, telefone
-                    FROM usuarios
-                    WHERE username LIKE ? OR nome_completo LIKE ?
-                    ORDER BY username
-                """, (f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT id, username, nome_completo, role, email, telefone
-                    FROM usuarios
-                    ORDER BY username
-                """)
-            
-            for row in c.fetchall():
-                usuario_id, username, nome_completo, role, email, telefone = row
-                self.usuarios_tree.insert("", "end", values=(
-                    username,
-                    nome_completo or "",
-                    role,
-                    email or "",
-                    format_phone(telefone) if telefone else ""
-                ), tags=(usuario_id,))
+        with obter_conexao() as conn:
+            c = conn.cursor()
+        
+            try:
+                termo = self.search_var.get().strip() if hasattr(self, 'search_var') else ''
+                if termo:
+                    c.execute("""
+                        SELECT id, username, nome_completo, role, email, telefone
+                        FROM usuarios
+                        WHERE username LIKE ? OR nome_completo LIKE ?
+                        ORDER BY username
+                    """, (f"%{termo}%", f"%{termo}%"))
+                else:
+                    c.execute("""
+                        SELECT id, username, nome_completo, role, email, telefone
+                        FROM usuarios
+                        ORDER BY username
+                    """)
+            
+                for row in c.fetchall():
+                    usuario_id, username, nome_completo, role, email, telefone = row
+                    self.usuarios_tree.insert("", "end", values=(
+                        username,
+                        nome_completo or "",
+                        role,
+                        email or "",
+                        format_phone(telefone) if telefone else ""
+                    ), tags=(usuario_id,))
                 
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao buscar usuários: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao buscar usuários: {e}")
             
     def buscar_usuarios(self):
         termo = self.search_var.get().strip()
@@ -337,38 +334,36 @@ class UsuariosModule(BaseModule):
         for item in self.usuarios_tree.get_children():
             self.usuarios_tree.delete(item)
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        try:
-            if termo:
-                c.execute("""
-                    SELECT id, username, nome_completo, role, email, telefone
-                    FROM usuarios
-                    WHERE username LIKE ? OR nome_completo LIKE ?
-                    ORDER BY username
-                """, (f"%{termo}%", f"%{termo}%"))
-            else:
-                c.execute("""
-                    SELECT id, username, nome_completo, role, email, telefone
-                    FROM usuarios
-                    ORDER BY username
-                """)
-            
-            for row in c.fetchall():
-                usuario_id, username, nome_completo, role, email, telefone = row
-                self.usuarios_tree.insert("", "end", values=(
-                    username,
-                    nome_completo or "",
-                    role,
-                    email or "",
-                    format_phone(telefone) if telefone else ""
-                ), tags=(usuario_id,))
+        with obter_conexao() as conn:
+            c = conn.cursor()
+        
+            try:
+                if termo:
+                    c.execute("""
+                        SELECT id, username, nome_completo, role, email, telefone
+                        FROM usuarios
+                        WHERE username LIKE ? OR nome_completo LIKE ?
+                        ORDER BY username
+                    """, (f"%{termo}%", f"%{termo}%"))
+                else:
+                    c.execute("""
+                        SELECT id, username, nome_completo, role, email, telefone
+                        FROM usuarios
+                        ORDER BY username
+                    """)
+            
+                for row in c.fetchall():
+                    usuario_id, username, nome_completo, role, email, telefone = row
+                    self.usuarios_tree.insert("", "end", values=(
+                        username,
+                        nome_completo or "",
+                        role,
+                        email or "",
+                        format_phone(telefone) if telefone else ""
+                    ), tags=(usuario_id,))
                 
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao buscar usuários: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao buscar usuários: {e}")
             
     def editar_usuario(self):
         selected = self.usuarios_tree.selection()
@@ -385,42 +380,40 @@ class UsuariosModule(BaseModule):
         self.notebook.select(0)
         
     def carregar_usuario_para_edicao(self, usuario_id):
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            c.execute("SELECT * FROM usuarios WHERE id = ?", (usuario_id,))
-            usuario = c.fetchone()
+            try:
+                c.execute("SELECT * FROM usuarios WHERE id = ?", (usuario_id,))
+                usuario = c.fetchone()
             
-            if not usuario:
-                self.show_error("Usuário não encontrado.")
-                return
+                if not usuario:
+                    self.show_error("Usuário não encontrado.")
+                    return
                 
-            self.current_usuario_id = usuario_id
-            self.username_var.set(usuario[1] or "")  # username
-            self.password_var.set("")  # Não mostrar senha
-            self.confirm_password_var.set("")
-            role_str = usuario[3] or "operador"
-            self.role_var.set(role_str)
-            roles = set([r.strip().lower() for r in role_str.split(',') if r.strip()])
-            self.role_admin_var.set('admin' in roles)
-            self.role_operador_var.set('operador' in roles)
-            self.role_tecnico_var.set('tecnico' in roles)
-            self.nome_completo_var.set(usuario[4] or "")  # nome_completo
-            self.email_var.set(usuario[5] or "")  # email
-            self.telefone_var.set(format_phone(usuario[6]) if usuario[6] else "")  # telefone
-            # template_personalizado está na posição 7 (após telefone)
-            self.template_personalizado_var.set(bool(usuario[7]) if len(usuario) > 7 and usuario[7] is not None else False)
-            # template_image_path está na posição 8
-            self.template_image_path_var.set(usuario[8] if len(usuario) > 8 and usuario[8] else "")
-            
-            # Mostrar/ocultar upload baseado no checkbox
-            self.toggle_template_upload()
-            
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao carregar usuário: {e}")
-        finally:
-            conn.close()
+                self.current_usuario_id = usuario_id
+                self.username_var.set(usuario[1] or "")  # username
+                self.password_var.set("")  # Não mostrar senha
+                self.confirm_password_var.set("")
+                role_str = usuario[3] or "operador"
+                self.role_var.set(role_str)
+                roles = set([r.strip().lower() for r in role_str.split(',') if r.strip()])
+                self.role_admin_var.set('admin' in roles)
+                self.role_operador_var.set('operador' in roles)
+                self.role_tecnico_var.set('tecnico' in roles)
+                self.nome_completo_var.set(usuario[4] or "")  # nome_completo
+                self.email_var.set(usuario[5] or "")  # email
+                self.telefone_var.set(format_phone(usuario[6]) if usuario[6] else "")  # telefone
+                # template_personalizado está na posição 7 (após telefone)
+                self.template_personalizado_var.set(bool(usuario[7]) if len(usuario) > 7 and usuario[7] is not None else False)
+                # template_image_path está na posição 8
+                self.template_image_path_var.set(usuario[8] if len(usuario) > 8 and usuario[8] else "")
+            
+                # Mostrar/ocultar upload baseado no checkbox
+                self.toggle_template_upload()
+            
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao carregar usuário: {e}")
         
     def resetar_senha(self):
         selected = self.usuarios_tree.selection()
@@ -438,22 +431,20 @@ class UsuariosModule(BaseModule):
             
         usuario_id = tags[0]
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            nova_senha = "123456"
-            password_hash = hashlib.sha256(nova_senha.encode()).hexdigest()
+            try:
+                nova_senha = "123456"
+                password_hash = hashlib.sha256(nova_senha.encode()).hexdigest()
             
-            c.execute("UPDATE usuarios SET password = ? WHERE id = ?", (password_hash, usuario_id))
-            conn.commit()
+                c.execute("UPDATE usuarios SET password = ? WHERE id = ?", (password_hash, usuario_id))
+                conn.commit()
             
-            self.show_success(f"Senha resetada para '{nova_senha}' com sucesso!")
+                self.show_success(f"Senha resetada para '{nova_senha}' com sucesso!")
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao resetar senha: {e}")
-        finally:
-            conn.close()
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao resetar senha: {e}")
         
     def excluir_usuario(self):
         selected = self.usuarios_tree.selection()
@@ -476,33 +467,31 @@ class UsuariosModule(BaseModule):
             self.show_warning("Você não pode excluir seu próprio usuário.")
             return
         
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        try:
-            # Verificar se usuário tem cotações ou relatórios
-            c.execute("SELECT COUNT(*) FROM cotacoes WHERE responsavel_id = ?", (usuario_id,))
-            cotacoes_count = c.fetchone()[0]
+            try:
+                # Verificar se usuário tem cotações ou relatórios
+                c.execute("SELECT COUNT(*) FROM cotacoes WHERE responsavel_id = ?", (usuario_id,))
+                cotacoes_count = c.fetchone()[0]
             
-            c.execute("SELECT COUNT(*) FROM relatorios_tecnicos WHERE responsavel_id = ?", (usuario_id,))
-            relatorios_count = c.fetchone()[0]
+                c.execute("SELECT COUNT(*) FROM relatorios_tecnicos WHERE responsavel_id = ?", (usuario_id,))
+                relatorios_count = c.fetchone()[0]
             
-            if cotacoes_count > 0 or relatorios_count > 0:
-                self.show_warning(f"Este usuário possui {cotacoes_count} cotações e {relatorios_count} relatórios.\n"
-                                 "Não é possível excluir.")
-                return
+                if cotacoes_count > 0 or relatorios_count > 0:
+                    self.show_warning(f"Este usuário possui {cotacoes_count} cotações e {relatorios_count} relatórios.\n"
+                                     "Não é possível excluir.")
+                    return
             
-            c.execute("DELETE FROM usuarios WHERE id = ?", (usuario_id,))
-            conn.commit()
+                c.execute("DELETE FROM usuarios WHERE id = ?", (usuario_id,))
+                conn.commit()
             
-            self.show_success("Usuário excluído com sucesso!")
+                self.show_success("Usuário excluído com sucesso!")
             
-            self.carregar_usuarios()
+                self.carregar_usuarios()
             
-        except sqlite3.Error as e:
-            self.show_error(f"Erro ao excluir usuário: {e}")
-        finally:
-            conn.close()    
+            except sqlite3.Error as e:
+                self.show_error(f"Erro ao excluir usuário: {e}")
     def toggle_template_upload(self):
         """Mostrar/ocultar campo de upload quando checkbox é marcado"""
         if self.template_personalizado_var.get():
@@ -0,0 +1,67 @@
+import logging
+import sqlite3
+
+from database import obter_conexao
+
+logger = logging.getLogger(__name__)
+
+# Bits de acesso por módulo: controle total inclui consulta
+PERMISSAO_CONSULTA = 1
+PERMISSAO_CONTROLE_TOTAL = 2
+BITS_NIVEL_ACESSO = {
+    'sem_acesso': 0,
+    'consulta': PERMISSAO_CONSULTA,
+    'controle_total': PERMISSAO_CONSULTA | PERMISSAO_CONTROLE_TOTAL,
+}
+
+
+class Sessao:
+    """Usuário logado: dados do cadastro, perfis e permissões, lidos uma vez no login.
+
+    Uma única instância é compartilhada pela MainWindow e por todos os
+    módulos. Os dados só são relidos quando o cadastro ou as permissões
+    desse usuário são salvos (invalidar_usuario).
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.carregar()
+
+    def carregar(self):
+        """Ler do banco o cadastro e as permissões do usuário"""
+        with obter_conexao() as conn:
+            c = conn.cursor()
+            try:
+                c.execute("""
+                    SELECT username, role, COALESCE(nome_completo, username), email, telefone,
+                           template_personalizado, template_image_path
+                    FROM usuarios WHERE id = ?
+                """, (self.user_id,))
+                row = c.fetchone() or (None,) * 7
+                (self.username, self.role, self.nome_completo, self.email, self.telefone,
+                 self.template_personalizado, self.template_image_path) = row
+                c.execute("SELECT modulo, nivel_acesso FROM permissoes_usuarios WHERE usuario_id = ?",
+                          (self.user_id,))
+                self.permissoes = {modulo: BITS_NIVEL_ACESSO.get(nivel, 0) for modulo, nivel in c.fetchall()}
+            except sqlite3.Error as e:
+                logger.error("Erro ao carregar sessão do usuário %s: %s", self.user_id, e)
+                self.permissoes = {}
+        self.roles = frozenset(r.strip().lower() for r in (self.role or '').split(',') if r.strip())
+
+    def invalidar_usuario(self, usuario_id):
+        """Reler os dados se o usuário alterado for o da sessão"""
+        if usuario_id == self.user_id:
+            self.carregar()
+
+    def has_role(self, role_name):
+        return role_name.lower() in self.roles
+
+    def tem_permissao(self, modulo, nivel='consulta'):
+        """Se o usuário tem ao menos o nível informado ('consulta' ou 'controle_total') no módulo"""
+        exigido = BITS_NIVEL_ACESSO.get(nivel, 0)
+        return bool(exigido) and self.permissoes.get(modulo, 0) & exigido == exigido
+
+    @property
+    def template_capa(self):
+        """Imagem da capa personalizada dos PDFs, se ativada no cadastro"""
+        return self.template_image_path if self.template_personalizado else None
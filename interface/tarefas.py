@@ -0,0 +1,153 @@
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads para o trabalho pesado (PDFs, exportações, importações, agregados do dashboard)
+TAREFAS_THREADS = int(os.environ.get('CRM_TAREFAS_THREADS', '2'))
+# Intervalo (ms) em que a interface recolhe progresso e resultados enquanto há tarefas
+INTERVALO_TAREFAS_MS = 100
+
+
+class TarefaCancelada(Exception):
+    """Interrompe a função de uma tarefa cancelada (levantada por Tarefa.progresso)"""
+
+
+class Tarefa:
+    """Operação em segundo plano: a função recebe a Tarefa para informar progresso e ver se foi cancelada"""
+
+    def __init__(self, executor, descricao):
+        self.descricao = descricao
+        self.futuro = None
+        self._executor = executor
+        self._cancelamento = threading.Event()
+
+    @property
+    def cancelada(self):
+        return self._cancelamento.is_set()
+
+    def cancelar(self):
+        """Pedir a interrupção; se ainda não começou, a tarefa nem chega a rodar"""
+        self._cancelamento.set()
+        if self.futuro is not None:
+            self.futuro.cancel()
+
+    def progresso(self, *valores):
+        """Repassar o progresso para a interface (ao_progresso) e parar aqui se a tarefa foi cancelada"""
+        if self.cancelada:
+            raise TarefaCancelada(self.descricao)
+        self._executor._mensagens.put((self, 'progresso', valores))
+
+
+class ExecutorTarefas:
+    """Pool de threads cujos resultados voltam para a thread do Tk.
+
+    As funções rodam fora da interface e não podem tocar em widgets; o
+    progresso, o resultado e os erros passam por uma fila que o laço do Tk
+    esvazia com after() enquanto houver tarefas. Todos os callbacks
+    (ao_concluir, ao_erro, ao_progresso, ao_fim) rodam na thread da
+    interface. ao_ocupacao(descricoes) é avisado sempre que o conjunto de
+    tarefas em andamento muda (indicador de ocupado).
+    """
+
+    def __init__(self, widget, max_threads=TAREFAS_THREADS, ao_ocupacao=None):
+        self.widget = widget
+        self.ao_ocupacao = ao_ocupacao
+        self._pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix='crm-tarefa')
+        self._mensagens = queue.Queue()
+        self._callbacks = {}
+        self._agendado = None
+        # Futuros ainda não concluídos, cancelados em encerrar()
+        self._futuros = set()
+        self._trava_futuros = threading.Lock()
+
+    def executar(self, funcao, *args, descricao="", ao_concluir=None, ao_erro=None,
+                 ao_progresso=None, ao_fim=None, **kwargs):
+        """Rodar funcao(tarefa, *args, **kwargs) no pool e devolver a Tarefa (para cancelar)"""
+        tarefa = Tarefa(self, descricao)
+        self._callbacks[tarefa] = (ao_concluir, ao_erro, ao_progresso, ao_fim)
+        tarefa.futuro = self._pool.submit(self._rodar, tarefa, funcao, args, kwargs)
+        with self._trava_futuros:
+            self._futuros.add(tarefa.futuro)
+
+        def _futuro_encerrado(futuro):
+            with self._trava_futuros:
+                self._futuros.discard(futuro)
+            # O pool não chama _rodar para um futuro cancelado: avisamos o fim aqui
+            if futuro.cancelled():
+                self._mensagens.put((tarefa, 'cancelada', None))
+        tarefa.futuro.add_done_callback(_futuro_encerrado)
+        self._avisar_ocupacao()
+        if self._agendado is None:
+            self._agendado = self.widget.after(INTERVALO_TAREFAS_MS, self._entregar)
+        return tarefa
+
+    def _rodar(self, tarefa, funcao, args, kwargs):
+        try:
+            resultado = funcao(tarefa, *args, **kwargs)
+        except TarefaCancelada:
+            self._mensagens.put((tarefa, 'cancelada', None))
+        except Exception as e:
+            self._mensagens.put((tarefa, 'erro', e))
+        else:
+            self._mensagens.put((tarefa, 'concluida', resultado))
+
+    def _entregar(self):
+        while True:
+            try:
+                tarefa, tipo, valor = self._mensagens.get_nowait()
+            except queue.Empty:
+                break
+            callbacks = self._callbacks.get(tarefa)
+            if callbacks is None:
+                continue
+            ao_concluir, ao_erro, ao_progresso, ao_fim = callbacks
+            try:
+                if tipo == 'progresso':
+                    if ao_progresso and not tarefa.cancelada:
+                        ao_progresso(*valor)
+                    continue
+                del self._callbacks[tarefa]
+                # O resultado de uma tarefa cancelada no meio do caminho é descartado
+                if tipo == 'concluida' and not tarefa.cancelada:
+                    if ao_concluir:
+                        ao_concluir(valor)
+                elif tipo == 'erro' and not tarefa.cancelada:
+                    if ao_erro:
+                        ao_erro(valor)
+                    else:
+                        print(f"❌ Erro na tarefa {tarefa.descricao}: {valor}")
+                if ao_fim:
+                    ao_fim()
+            except Exception as e:
+                print(f"Erro ao entregar tarefa {tarefa.descricao}: {e}")
+            self._avisar_ocupacao()
+        if self._callbacks:
+            self._agendado = self.widget.after(INTERVALO_TAREFAS_MS, self._entregar)
+        else:
+            self._agendado = None
+
+    def _avisar_ocupacao(self):
+        if self.ao_ocupacao:
+            self.ao_ocupacao([tarefa.descricao for tarefa in self._callbacks])
+
+    def em_andamento(self):
+        return list(self._callbacks)
+
+    def cancelar_todas(self):
+        for tarefa in list(self._callbacks):
+            tarefa.cancelar()
+
+    def encerrar(self):
+        """Cancelar o que houver e liberar as threads (logout)"""
+        self.cancelar_todas()
+        self._callbacks.clear()
+        if self._agendado is not None:
+            self.widget.after_cancel(self._agendado)
+            self._agendado = None
+        # shutdown(cancel_futures=True) só existe a partir do Python 3.9
+        with self._trava_futuros:
+            futuros = list(self._futuros)
+        for futuro in futuros:
+            futuro.cancel()
+        self._pool.shutdown(wait=False)
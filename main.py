@@ -20,13 +20,30 @@ def main():
         
         # Criar banco de dados
         print("Criando/verificando banco de dados...")
-        from database import criar_banco, verificar_banco, DB_NAME
+        from database import criar_banco, verificar_banco, fechar_conexoes, DB_NAME, USAR_SNAPSHOT_LEITURA
+        from utils.perfil_sql import PERFIL_ATIVO, salvar_perfil
         
         # Verificar se o banco existe e é válido
         if verificar_banco():
             print("🔄 Banco recriado com sucesso!")
         else:
             print("✅ Banco de dados OK")
+
+        # Concluir um arquivamento interrompido entre a cópia e a exclusão (utils.arquivamento)
+        from utils.arquivamento import concluir_arquivamento_pendente
+        try:
+            concluir_arquivamento_pendente()
+        except Exception as e:
+            print(f"⚠️ Não foi possível concluir o arquivamento pendente: {e}")
+
+        # Snapshot diário em segundo plano (data/backups)
+        from utils.backup import iniciar_backup_automatico
+        iniciar_backup_automatico()
+
+        # Cópia somente leitura para estatísticas e exportações (CRM_SNAPSHOT_LEITURA=1)
+        if USAR_SNAPSHOT_LEITURA:
+            from utils.backup import iniciar_snapshot_leitura
+            iniciar_snapshot_leitura()
         
         # Importar após verificar banco
         print("Carregando interface...")
@@ -61,6 +78,9 @@ def main():
         print("Teste com: python test_tkinter.py")
         
         root.mainloop()
+        fechar_conexoes()
+        if PERFIL_ATIVO:
+            print(f"📈 Perfil das consultas salvo em {salvar_perfil()}")
         print("Sistema encerrado.")
         
     except ImportError as e:
@@ -2,7 +2,7 @@ import os
 import sqlite3
 from datetime import datetime
 from fpdf import FPDF
-from database import DB_NAME
+from database import DB_NAME, obter_conexao
 
 TITLE = "Proposta Comercial"
 
@@ -48,8 +48,7 @@ def _list_modules() -> list:
 
 def _db_overview() -> dict:
 	info = {"tables": []}
-	try:
-		conn = sqlite3.connect(DB_NAME)
+	with obter_conexao() as conn:
 		c = conn.cursor()
 		c.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
 		tables = [r[0] for r in c.fetchall()]
@@ -60,11 +59,6 @@ def _db_overview() -> dict:
 				info["tables"].append((t, cols))
 			except sqlite3.Error:
 				info["tables"].append((t, []))
-	finally:
-		try:
-			conn.close()
-		except Exception:
-			pass
 	return info
 
 
@@ -4,7 +4,9 @@ import datetime
 import sys
 import re
 from fpdf import FPDF
-from database import DB_NAME
+from database import DB_NAME, obter_conexao
+from interface.tarefas import TarefaCancelada
+from utils.kits import explodir_kits, linhas_composicao
 from utils.formatters import format_cep, format_phone, format_currency, format_date, format_cnpj
 
 # Adicionar o diretório assets ao path para importar os templates
@@ -47,6 +49,8 @@ class PDFCotacao(FPDF):
         self.baby_blue = (137, 207, 240)  # Azul bebê #89CFF0
         self.dados_filial = dados_filial
         self.dados_usuario = dados_usuario
+        # Chamado com o número de cada página nova (progresso da geração)
+        self.ao_nova_pagina = None
         
         # Configurar encoding para suportar mais caracteres
         self.set_doc_option('core_fonts_encoding', 'latin-1')
@@ -95,6 +99,8 @@ class PDFCotacao(FPDF):
         return True
 
     def header(self):
+        if self.ao_nova_pagina:
+            self.ao_nova_pagina(self.page_no())
         # NÃO exibir header na página 1 (capa JPEG)
         if self.page_no() == 1:
             return
@@ -164,266 +170,250 @@ class PDFCotacao(FPDF):
     
     @staticmethod
     def obter_composicao_kit(kit_id):
-        """Obtém a composição de um kit a partir do banco de dados"""
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        composicao = []
-        
+        """Obtém a composição de um kit (incluindo sub-kits) a partir do banco de dados"""
         try:
-            c.execute("""
-                SELECT p.nome, kc.quantidade 
-                FROM kit_items kc
-                JOIN produtos p ON kc.produto_id = p.id
-                WHERE kc.kit_id = ?
-            """, (kit_id,))
-            
-            for row in c.fetchall():
-                nome, quantidade = row
-                composicao.append(f"{quantidade} x {nome}")
-                
+            composicao = explodir_kits([kit_id]).get(kit_id)
         except sqlite3.Error:
-            composicao = ["Erro ao carregar composição"]
-        finally:
-            conn.close()
-        
-        return composicao
+            return ["Erro ao carregar composição"]
+        return linhas_composicao(composicao) if composicao else []
 
-def gerar_pdf_cotacao_nova(cotacao_id, db_name, current_user=None, contato_nome=None, locacao_pagina4_text=None, locacao_pagina4_image=None):
+def gerar_pdf_cotacao_nova(cotacao_id, db_name, current_user=None, contato_nome=None, locacao_pagina4_text=None, locacao_pagina4_image=None, ao_progresso=None):
     """
     Versão melhorada do gerador de PDF de cotações
     - Corrige problemas de logo
     - Adiciona capa personalizada por usuário
     - Corrige problemas de descrição e valores
     - Inclui CNPJ da filial no rodapé
+    - ao_progresso(pagina) é chamado a cada página criada
     """
-    conn = None
     try:
-        conn = sqlite3.connect(db_name)
-        c = conn.cursor()   
-
-        # Obter dados da cotação (incluindo filial_id)
-        c.execute("""
-            SELECT 
-                cot.id, cot.numero_proposta, cot.modelo_compressor, cot.numero_serie_compressor, 
-                cot.descricao_atividade, cot.observacoes, cot.data_criacao,
-                cot.valor_total, cot.tipo_frete, cot.condicao_pagamento, cot.prazo_entrega,
-                cli.id AS cliente_id, cli.nome AS cliente_nome, COALESCE(cli.nome_fantasia, cli.nome) AS cliente_nome_fantasia, cli.endereco, cli.email, 
-                cli.telefone, cli.site, cli.cnpj, cli.cidade, cli.estado, cli.cep,
-                usr.id AS responsavel_id, usr.nome_completo, usr.email AS usr_email, usr.telefone AS usr_telefone, usr.username,
-                cot.moeda, cot.relacao_pecas, cot.filial_id, cot.esboco_servico, cot.relacao_pecas_substituir, cot.tipo_cotacao,
-                cot.locacao_nome_equipamento, cot.locacao_imagem_path
-            FROM cotacoes AS cot
-            JOIN clientes AS cli ON cot.cliente_id = cli.id
-            JOIN usuarios AS usr ON cot.responsavel_id = usr.id
-            WHERE cot.id = ?
-        """, (cotacao_id,))
-        cotacao_data = c.fetchone()
-
-        if not cotacao_data:
-            return False, "Cotação não encontrada para gerar PDF."
-
-        (
-            cot_id, numero_proposta, modelo_compressor, numero_serie_compressor,
-            descricao_atividade, observacoes, data_criacao,
-            valor_total, tipo_frete, condicao_pagamento, prazo_entrega,
-            cliente_id, cliente_nome, cliente_nome_fantasia, cliente_endereco, cliente_email, 
-            cliente_telefone, cliente_site, cliente_cnpj, cliente_cidade, 
-            cliente_estado, cliente_cep,
-            responsavel_id, responsavel_nome, responsavel_email, responsavel_telefone, responsavel_username,
-            moeda, relacao_pecas, filial_id, esboco_servico, relacao_pecas_substituir, tipo_cotacao,
-            locacao_nome_equipamento_db, locacao_imagem_path_db
-        ) = cotacao_data
-
-        # Obter dados da filial
-        dados_filial = obter_filial(filial_id or 2)  # Default para filial 2
-        if not dados_filial:
-            return False, "Dados da filial não encontrados."
-
-        # Obter configurações do usuário
-        dados_usuario = obter_usuario_cotacao(responsavel_username)
-        if not dados_usuario:
-            dados_usuario = {
-                'nome_completo': responsavel_nome,
-                'assinatura': f"{responsavel_nome}\nVendas"
-            }
-        
-        # Usar email do usuário que já vem da query principal
-        if responsavel_email:
-            dados_usuario['email'] = responsavel_email
+        with obter_conexao(db_name) as conn:
+            c = conn.cursor()   
 
-        # Obter contato do parâmetro ou buscar principal
-        if not contato_nome:
+            # Obter dados da cotação (incluindo filial_id)
             c.execute("""
-                SELECT nome FROM contatos 
-                WHERE cliente_id = ? 
-                LIMIT 1
-            """, (cliente_id,))
-            contato_principal = c.fetchone()
-            contato_nome = contato_principal[0] if contato_principal else "Não informado"
-
-        # Obter itens da cotação - QUERY SIMPLIFICADA (como modelo antigo)
-        c.execute("""
-            SELECT 
-                id, tipo, item_nome, quantidade, descricao, 
-                valor_unitario, valor_total_item, 
-                mao_obra, deslocamento, estadia, produto_id, tipo_operacao
-            FROM itens_cotacao 
-            WHERE cotacao_id=?
-        """, (cotacao_id,))
-        itens_cotacao = c.fetchall()
-
-        # Criar o PDF
-        pdf = PDFCotacao(dados_filial, dados_usuario, orientation='P', unit='mm', format='A4')
-        pdf.set_auto_page_break(auto=True, margin=30)
+                SELECT 
+                    cot.id, cot.numero_proposta, cot.modelo_compressor, cot.numero_serie_compressor, 
+                    cot.descricao_atividade, cot.observacoes, cot.data_criacao,
+                    cot.valor_total, cot.tipo_frete, cot.condicao_pagamento, cot.prazo_entrega,
+                    cli.id AS cliente_id, cli.nome AS cliente_nome, COALESCE(cli.nome_fantasia, cli.nome) AS cliente_nome_fantasia, cli.endereco, cli.email, 
+                    cli.telefone, cli.site, cli.cnpj, cli.cidade, cli.estado, cli.cep,
+                    usr.id AS responsavel_id, usr.nome_completo, usr.email AS usr_email, usr.telefone AS usr_telefone, usr.username,
+                    cot.moeda, cot.relacao_pecas, cot.filial_id, cot.esboco_servico, cot.relacao_pecas_substituir, cot.tipo_cotacao,
+                    cot.locacao_nome_equipamento, cot.locacao_imagem_path
+                FROM cotacoes AS cot
+                JOIN clientes AS cli ON cot.cliente_id = cli.id
+                JOIN usuarios AS usr ON cot.responsavel_id = usr.id
+                WHERE cot.id = ?
+            """, (cotacao_id,))
+            cotacao_data = c.fetchone()
+
+            if not cotacao_data:
+                return False, "Cotação não encontrada para gerar PDF."
+
+            (
+                cot_id, numero_proposta, modelo_compressor, numero_serie_compressor,
+                descricao_atividade, observacoes, data_criacao,
+                valor_total, tipo_frete, condicao_pagamento, prazo_entrega,
+                cliente_id, cliente_nome, cliente_nome_fantasia, cliente_endereco, cliente_email, 
+                cliente_telefone, cliente_site, cliente_cnpj, cliente_cidade, 
+                cliente_estado, cliente_cep,
+                responsavel_id, responsavel_nome, responsavel_email, responsavel_telefone, responsavel_username,
+                moeda, relacao_pecas, filial_id, esboco_servico, relacao_pecas_substituir, tipo_cotacao,
+                locacao_nome_equipamento_db, locacao_imagem_path_db
+            ) = cotacao_data
+
+            # Obter dados da filial
+            dados_filial = obter_filial(filial_id or 2)  # Default para filial 2
+            if not dados_filial:
+                return False, "Dados da filial não encontrados."
+
+            # Obter configurações do usuário
+            dados_usuario = obter_usuario_cotacao(responsavel_username)
+            if not dados_usuario:
+                dados_usuario = {
+                    'nome_completo': responsavel_nome,
+                    'assinatura': f"{responsavel_nome}\nVendas"
+                }
         
-        # Configurar dados para cabeçalho/footer (como modelo antigo)
-        pdf.numero_proposta = numero_proposta
-        pdf.data_proposta = format_date(data_criacao)
-        pdf.cliente_nome = cliente_nome_fantasia if cliente_nome_fantasia else cliente_nome
-        pdf.cliente_cnpj = cliente_cnpj
-        pdf.cliente_telefone = cliente_telefone
-        pdf.contato_nome = contato_nome
-        pdf.responsavel_nome = responsavel_nome
-
-        # PÁGINA 1: CAPA
-        # ===============
-        pdf.add_page()
+            # Usar email do usuário que já vem da query principal
+            if responsavel_email:
+                dados_usuario['email'] = responsavel_email
+
+            # Obter contato do parâmetro ou buscar principal
+            if not contato_nome:
+                c.execute("""
+                    SELECT nome FROM contatos 
+                    WHERE cliente_id = ? 
+                    LIMIT 1
+                """, (cliente_id,))
+                contato_principal = c.fetchone()
+                contato_nome = contato_principal[0] if contato_principal else "Não informado"
+
+            # Obter itens da cotação - QUERY SIMPLIFICADA (como modelo antigo)
+            c.execute("""
+                SELECT 
+                    id, tipo, item_nome, quantidade, descricao, 
+                    valor_unitario, valor_total_item, 
+                    mao_obra, deslocamento, estadia, produto_id, tipo_operacao
+                FROM itens_cotacao 
+                WHERE cotacao_id=?
+            """, (cotacao_id,))
+            itens_cotacao = c.fetchall()
+
+            # Criar o PDF
+            pdf = PDFCotacao(dados_filial, dados_usuario, orientation='P', unit='mm', format='A4')
+            pdf.ao_nova_pagina = ao_progresso
+            pdf.set_auto_page_break(auto=True, margin=30)
         
-        # Se for Locação, usar capaloc.jpg na raiz; caso contrário, capa padrão
-        if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
-            capa_loc_path = os.path.join(os.path.dirname(__file__), '..', 'capaloc.jpg')
-            if os.path.exists(capa_loc_path):
-                pdf.image(capa_loc_path, x=0, y=0, w=210, h=297)
-            else:
-                capa_loc_path2 = os.path.join(os.path.dirname(__file__), '..', 'caploc.jpg')
-                if os.path.exists(capa_loc_path2):
-                    pdf.image(capa_loc_path2, x=0, y=0, w=210, h=297)
-        else:
-            fundo_padrao = os.path.join(os.path.dirname(__file__), '..', 'imgfundo.jpg')
-            if os.path.exists(fundo_padrao):
-                pdf.image(fundo_padrao, x=0, y=0, w=210, h=297)
+            # Configurar dados para cabeçalho/footer (como modelo antigo)
+            pdf.numero_proposta = numero_proposta
+            pdf.data_proposta = format_date(data_criacao)
+            pdf.cliente_nome = cliente_nome_fantasia if cliente_nome_fantasia else cliente_nome
+            pdf.cliente_cnpj = cliente_cnpj
+            pdf.cliente_telefone = cliente_telefone
+            pdf.contato_nome = contato_nome
+            pdf.responsavel_nome = responsavel_nome
+
+            # PÁGINA 1: CAPA
+            # ===============
+            pdf.add_page()
+        
+            # Se for Locação, usar capaloc.jpg na raiz; caso contrário, capa padrão
+            if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
+                capa_loc_path = os.path.join(os.path.dirname(__file__), '..', 'capaloc.jpg')
+                if os.path.exists(capa_loc_path):
+                    pdf.image(capa_loc_path, x=0, y=0, w=210, h=297)
+                else:
+                    capa_loc_path2 = os.path.join(os.path.dirname(__file__), '..', 'caploc.jpg')
+                    if os.path.exists(capa_loc_path2):
+                        pdf.image(capa_loc_path2, x=0, y=0, w=210, h=297)
             else:
-                # fallback para fundo antigo da capa se existir
-                fundo_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'backgrounds', 'capa_fundo.jpg')
-                if os.path.exists(fundo_path):
-                    pdf.image(fundo_path, x=0, y=0, w=210, h=297)
+                fundo_padrao = os.path.join(os.path.dirname(__file__), '..', 'imgfundo.jpg')
+                if os.path.exists(fundo_padrao):
+                    pdf.image(fundo_padrao, x=0, y=0, w=210, h=297)
+                else:
+                    # fallback para fundo antigo da capa se existir
+                    fundo_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'backgrounds', 'capa_fundo.jpg')
+                    if os.path.exists(fundo_path):
+                        pdf.image(fundo_path, x=0, y=0, w=210, h=297)
         
-        # 2. CAPA PERSONALIZADA SOBREPOSTA (se disponível)
-        # 2.1 Tentar template do banco (template_image_path) do usuário
-        template_jpeg_path = None
-        print(f"DEBUG: Buscando template para usuário: {responsavel_username}")
+            # 2. CAPA PERSONALIZADA SOBREPOSTA (se disponível)
+            # 2.1 Tentar template do banco (template_image_path) do usuário
+            template_jpeg_path = None
+            print(f"DEBUG: Buscando template para usuário: {responsavel_username}")
         
-        c.execute("SELECT template_personalizado, template_image_path FROM usuarios WHERE username = ?", (responsavel_username,))
-        tu = c.fetchone()
-        if tu:
-            print(f"DEBUG: Template encontrado - Personalizado: {tu[0]}, Caminho: {tu[1]}")
-            if tu[0] and tu[1] and os.path.exists(tu[1]):
-                template_jpeg_path = tu[1]
-                print(f"DEBUG: Usando template do banco: {template_jpeg_path}")
+            c.execute("SELECT template_personalizado, template_image_path FROM usuarios WHERE username = ?", (responsavel_username,))
+            tu = c.fetchone()
+            if tu:
+                print(f"DEBUG: Template encontrado - Personalizado: {tu[0]}, Caminho: {tu[1]}")
+                if tu[0] and tu[1] and os.path.exists(tu[1]):
+                    template_jpeg_path = tu[1]
+                    print(f"DEBUG: Usando template do banco: {template_jpeg_path}")
+                else:
+                    print(f"DEBUG: Template não encontrado ou arquivo não existe")
             else:
-                print(f"DEBUG: Template não encontrado ou arquivo não existe")
-        else:
-            print(f"DEBUG: Usuário não encontrado na tabela usuarios")
+                print(f"DEBUG: Usuário não encontrado na tabela usuarios")
         
-        if not template_jpeg_path:
-            # fallback para mapeamento estático
-            template_jpeg_path = obter_template_capa_jpeg(responsavel_username)
-            print(f"DEBUG: Usando template estático: {template_jpeg_path}")
+            if not template_jpeg_path:
+                # fallback para mapeamento estático
+                template_jpeg_path = obter_template_capa_jpeg(responsavel_username)
+                print(f"DEBUG: Usando template estático: {template_jpeg_path}")
             
-        if template_jpeg_path and os.path.exists(template_jpeg_path):
-            print(f"DEBUG: Aplicando template na capa: {template_jpeg_path}")
-            # Adicionar capa personalizada reduzida e posicionada
-            capa_width = 120  # Largura reduzida
-            capa_height = 120  # Altura reduzida  
-            x_pos = (210 - capa_width) / 2  # Centralizada
-            y_pos = 105  # Posição Y no terço superior
+            if template_jpeg_path and os.path.exists(template_jpeg_path):
+                print(f"DEBUG: Aplicando template na capa: {template_jpeg_path}")
+                # Adicionar capa personalizada reduzida e posicionada
+                capa_width = 120  # Largura reduzida
+                capa_height = 120  # Altura reduzida  
+                x_pos = (210 - capa_width) / 2  # Centralizada
+                y_pos = 105  # Posição Y no terço superior
             
-            pdf.image(template_jpeg_path, x=x_pos, y=y_pos, w=capa_width, h=capa_height)
-        else:
-            print(f"DEBUG: Nenhum template válido encontrado para {responsavel_username}")
-        # Não exibir nenhum texto na capa
-        pdf.set_text_color(0, 0, 0)
-
-        # PÁGINA 2: APRESENTAÇÃO COM LOGO E DADOS (COMO ESTAVA ANTES)
-        # ===========================================================
-        pdf.add_page()
-        # (Sem fundo padrão nas páginas subsequentes)
+                pdf.image(template_jpeg_path, x=x_pos, y=y_pos, w=capa_width, h=capa_height)
+            else:
+                print(f"DEBUG: Nenhum template válido encontrado para {responsavel_username}")
+            # Não exibir nenhum texto na capa
+            pdf.set_text_color(0, 0, 0)
+
+            # PÁGINA 2: APRESENTAÇÃO COM LOGO E DADOS (COMO ESTAVA ANTES)
+            # ===========================================================
+            pdf.add_page()
+            # (Sem fundo padrão nas páginas subsequentes)
         
-        # Logo centralizado (como estava antes)
-        logo_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'logos', 'world_comp_brasil.jpg')
-        if os.path.exists(logo_path):
-            logo_height = 30
-            logo_width = logo_height * 1.5
-            pdf.image(logo_path, x=(210 - logo_width) / 2, y=20, w=logo_width)
+            # Logo centralizado (como estava antes)
+            logo_path = os.path.join(os.path.dirname(__file__), '..', 'assets', 'logos', 'world_comp_brasil.jpg')
+            if os.path.exists(logo_path):
+                logo_height = 30
+                logo_width = logo_height * 1.5
+                pdf.image(logo_path, x=(210 - logo_width) / 2, y=20, w=logo_width)
         
-        # Posição para dados do cliente e empresa
-        pdf.set_y(80)  # Aumentado para 80 para dar espaço ao logo maior
+            # Posição para dados do cliente e empresa
+            pdf.set_y(80)  # Aumentado para 80 para dar espaço ao logo maior
         
-        # Dados do cliente (lado esquerdo) e empresa (lado direito)
-        pdf.set_font("Arial", 'B', 10)  # Fonte menor para acomodar mais texto
-        pdf.cell(95, 7, clean_text("APRESENTADO PARA:"), 0, 0, 'L')
-        pdf.set_x(105)  # Reduzido ainda mais para dar espaço
-        pdf.cell(95, 7, clean_text("APRESENTADO POR:"), 0, 1, 'L')
+            # Dados do cliente (lado esquerdo) e empresa (lado direito)
+            pdf.set_font("Arial", 'B', 10)  # Fonte menor para acomodar mais texto
+            pdf.cell(95, 7, clean_text("APRESENTADO PARA:"), 0, 0, 'L')
+            pdf.set_x(105)  # Reduzido ainda mais para dar espaço
+            pdf.cell(95, 7, clean_text("APRESENTADO POR:"), 0, 1, 'L')
         
-        # Nome do cliente/empresa
-        pdf.set_font("Arial", 'B', 10)
-        cliente_nome_display = getattr(pdf, 'cliente_nome', 'N/A')
-        pdf.cell(95, 5, clean_text(cliente_nome_display), 0, 0, 'L')
+            # Nome do cliente/empresa
+            pdf.set_font("Arial", 'B', 10)
+            cliente_nome_display = getattr(pdf, 'cliente_nome', 'N/A')
+            pdf.cell(95, 5, clean_text(cliente_nome_display), 0, 0, 'L')
         
-        pdf.set_x(105)
-        nome_filial = dados_filial.get('nome', 'N/A')
-        pdf.cell(95, 5, clean_text(nome_filial), 0, 1, 'L')
+            pdf.set_x(105)
+            nome_filial = dados_filial.get('nome', 'N/A')
+            pdf.cell(95, 5, clean_text(nome_filial), 0, 1, 'L')
         
-        # CNPJ
-        pdf.set_font("Arial", '', 10)
-        cliente_cnpj = getattr(pdf, 'cliente_cnpj', '')
-        if cliente_cnpj:
-            cnpj_texto = f"CNPJ: {format_cnpj(cliente_cnpj)}"
-        else:
-            cnpj_texto = "CNPJ: N/A"
-        pdf.cell(95, 5, clean_text(cnpj_texto), 0, 0, 'L')
+            # CNPJ
+            pdf.set_font("Arial", '', 10)
+            cliente_cnpj = getattr(pdf, 'cliente_cnpj', '')
+            if cliente_cnpj:
+                cnpj_texto = f"CNPJ: {format_cnpj(cliente_cnpj)}"
+            else:
+                cnpj_texto = "CNPJ: N/A"
+            pdf.cell(95, 5, clean_text(cnpj_texto), 0, 0, 'L')
         
-        pdf.set_x(105)
-        cnpj_filial = dados_filial.get('cnpj', 'N/A')
-        pdf.cell(95, 5, clean_text(f"CNPJ: {cnpj_filial}"), 0, 1, 'L')
+            pdf.set_x(105)
+            cnpj_filial = dados_filial.get('cnpj', 'N/A')
+            pdf.cell(95, 5, clean_text(f"CNPJ: {cnpj_filial}"), 0, 1, 'L')
         
-        # Telefone
-        cliente_telefone = getattr(pdf, 'cliente_telefone', '')
-        if cliente_telefone:
-            telefone_texto = f"FONE: {format_phone(cliente_telefone)}"
-        else:
-            telefone_texto = "FONE: N/A"
-        pdf.cell(95, 5, clean_text(telefone_texto), 0, 0, 'L')
+            # Telefone
+            cliente_telefone = getattr(pdf, 'cliente_telefone', '')
+            if cliente_telefone:
+                telefone_texto = f"FONE: {format_phone(cliente_telefone)}"
+            else:
+                telefone_texto = "FONE: N/A"
+            pdf.cell(95, 5, clean_text(telefone_texto), 0, 0, 'L')
         
-        pdf.set_x(105)
-        telefones_filial = dados_filial.get('telefones', 'N/A')
-        pdf.cell(95, 5, clean_text(f"FONE: {telefones_filial}"), 0, 1, 'L')
+            pdf.set_x(105)
+            telefones_filial = dados_filial.get('telefones', 'N/A')
+            pdf.cell(95, 5, clean_text(f"FONE: {telefones_filial}"), 0, 1, 'L')
         
-        # Contato/Email
-        contato_nome = getattr(pdf, 'contato_nome', '')
-        if contato_nome:
-            contato_texto = f"Sr(a). {contato_nome}"
-        else:
-            contato_texto = "Contato: N/A"
-        pdf.cell(95, 5, clean_text(contato_texto), 0, 0, 'L')
+            # Contato/Email
+            contato_nome = getattr(pdf, 'contato_nome', '')
+            if contato_nome:
+                contato_texto = f"Sr(a). {contato_nome}"
+            else:
+                contato_texto = "Contato: N/A"
+            pdf.cell(95, 5, clean_text(contato_texto), 0, 0, 'L')
         
-        pdf.set_x(105)
-        # Buscar e-mail do responsável da cotação
-        email_responsavel = dados_usuario.get('email', dados_filial.get('email', 'N/A'))
-        pdf.cell(95, 5, clean_text(f"E-mail: {email_responsavel}"), 0, 1, 'L')
+            pdf.set_x(105)
+            # Buscar e-mail do responsável da cotação
+            email_responsavel = dados_usuario.get('email', dados_filial.get('email', 'N/A'))
+            pdf.cell(95, 5, clean_text(f"E-mail: {email_responsavel}"), 0, 1, 'L')
         
-        # Linha adicional - Responsável
-        pdf.cell(95, 5, "", 0, 0, 'L')  # Espaço vazio no lado esquerdo
-        pdf.set_x(105)
-        responsavel_nome = getattr(pdf, 'responsavel_nome', 'N/A')
-        pdf.cell(95, 5, clean_text(f"Responsável: {responsavel_nome}"), 0, 1, 'L')
+            # Linha adicional - Responsável
+            pdf.cell(95, 5, "", 0, 0, 'L')  # Espaço vazio no lado esquerdo
+            pdf.set_x(105)
+            responsavel_nome = getattr(pdf, 'responsavel_nome', 'N/A')
+            pdf.cell(95, 5, clean_text(f"Responsável: {responsavel_nome}"), 0, 1, 'L')
         
-        pdf.ln(10)  # Espaço antes do conteúdo
+            pdf.ln(10)  # Espaço antes do conteúdo
         
-        # Texto de apresentação
-        pdf.set_font("Arial", size=11)
-        if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
-            texto_apresentacao = clean_text(
+            # Texto de apresentação
+            pdf.set_font("Arial", size=11)
+            if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
+                texto_apresentacao = clean_text(
 "Prezados Senhores:\n\n"
 "Agradecemos por nos conceder a oportunidade de apresentarmos nossa proposta para\n"
 "fornecimento de LOCACAO DE COMPRESSOR DE AR.\n\n"
@@ -434,11 +424,11 @@ def gerar_pdf_cotacao_nova(cotacao_id, db_name, current_user=None, contato_nome=
 "Com profissionais altamente qualificados e atendimento especializado, colocamo-nos a\n"
 "disposicao para analisar, corrigir e prestar os devidos esclarecimentos, sempre buscando atender as\n"
 "especificacoes e necessidades dos nossos clientes."
-            )
-            texto_apresentacao = replace_company_names(texto_apresentacao, dados_filial.get('nome'))
-        else:
-            modelo_text = f" {modelo_compressor}" if modelo_compressor else ""
-            texto_apresentacao = clean_text(f"""
+                )
+                texto_apresentacao = replace_company_names(texto_apresentacao, dados_filial.get('nome'))
+            else:
+                modelo_text = f" {modelo_compressor}" if modelo_compressor else ""
+                texto_apresentacao = clean_text(f"""
 Prezados Senhores,
 
 Agradecemos a sua solicitação e apresentamos nossas condições comerciais para fornecimento de peças para o compressor{modelo_text}.
@@ -447,40 +437,40 @@ A World Comp coloca-se a disposição para analisar, corrigir, prestar esclareci
 
 
 Atenciosamente,
-            """)
-        pdf.multi_cell(0, 5, texto_apresentacao)
+                """)
+            pdf.multi_cell(0, 5, texto_apresentacao)
         
-        # Assinatura na parte inferior da página 2
-        pdf.set_y(240)  # Posiciona mais baixo para garantir que fique na página 2
-        if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
-            pdf.set_font("Arial", '', 11)
-            pdf.cell(0, 5, clean_text("Atenciosamente,"), 0, 1, 'L')
-            pdf.set_font("Arial", 'B', 11)
-            filial_nome_ass = dados_filial.get('nome', 'WORLD COMP')
-            pdf.cell(0, 5, clean_text(filial_nome_ass), 0, 1, 'L')
-        else:
-            pdf.set_font("Arial", 'B', 11)
-            pdf.cell(0, 6, clean_text(responsavel_nome.upper()), 0, 1, 'L')
-            pdf.set_font("Arial", '', 11)
-            pdf.cell(0, 5, clean_text("Vendas"), 0, 1, 'L')
-            pdf.cell(0, 5, clean_text(f"Fone: {dados_filial.get('telefones', '')}"), 0, 1, 'L')
-            pdf.cell(0, 5, clean_text(dados_filial.get('nome', '')), 0, 1, 'L')
-
-        # PÁGINA 3: SOBRE A EMPRESA
-        # ==========================
-        pdf.add_page()
-        pdf.set_y(45)
-        if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
-            # Locação: usar textos específicos fornecidos
-            secoes_loc = [
-                ("SOBRE A WORLD COMP", clean_text(
+            # Assinatura na parte inferior da página 2
+            pdf.set_y(240)  # Posiciona mais baixo para garantir que fique na página 2
+            if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
+                pdf.set_font("Arial", '', 11)
+                pdf.cell(0, 5, clean_text("Atenciosamente,"), 0, 1, 'L')
+                pdf.set_font("Arial", 'B', 11)
+                filial_nome_ass = dados_filial.get('nome', 'WORLD COMP')
+                pdf.cell(0, 5, clean_text(filial_nome_ass), 0, 1, 'L')
+            else:
+                pdf.set_font("Arial", 'B', 11)
+                pdf.cell(0, 6, clean_text(responsavel_nome.upper()), 0, 1, 'L')
+                pdf.set_font("Arial", '', 11)
+                pdf.cell(0, 5, clean_text("Vendas"), 0, 1, 'L')
+                pdf.cell(0, 5, clean_text(f"Fone: {dados_filial.get('telefones', '')}"), 0, 1, 'L')
+                pdf.cell(0, 5, clean_text(dados_filial.get('nome', '')), 0, 1, 'L')
+
+            # PÁGINA 3: SOBRE A EMPRESA
+            # ==========================
+            pdf.add_page()
+            pdf.set_y(45)
+            if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
+                # Locação: usar textos específicos fornecidos
+                secoes_loc = [
+                    ("SOBRE A WORLD COMP", clean_text(
 "A World Comp Compressores e uma empresa com mais de uma decada de atuacao no\n"
 "mercado nacional, especializada na manutencao de compressores de ar do tipo parafuso. Seu\n"
 "atendimento abrange todo o territorio brasileiro, oferecendo solucoes tecnicas e comerciais voltadas a\n"
 "maximizacao do desempenho e da confiabilidade dos sistemas de ar comprimido utilizados por seus\n"
 "clientes.\n"
-                )),
-                ("NOSSOS SERVICOS", clean_text(
+                    )),
+                    ("NOSSOS SERVICOS", clean_text(
 "A empresa oferece um portfolio completo de servicos, que contempla a manutencao\n"
 "preventiva e corretiva de compressores e unidades compressoras, a venda de pecas de reposicao\n"
 "para diversas marcas, a locacao de compressores de parafuso — incluindo modelos lubrificados e\n"
@@ -488,790 +478,799 @@ Atenciosamente,
 "A World Comp tambem disponibiliza contratos de manutencao personalizados, adaptados as\n"
 "necessidades operacionais especificas de cada cliente. Dentre os principais fabricantes atendidos,\n"
 "destacam-se marcas reconhecidas como Atlas Copco, Ingersoll Rand e Chicago Pneumatic.\n"
-                )),
-                ("QUALIDADE DOS SERVICOS & MELHORIA CONTINUA", clean_text(
+                    )),
+                    ("QUALIDADE DOS SERVICOS & MELHORIA CONTINUA", clean_text(
 "A empresa investe continuamente na capacitacao de sua equipe, na modernizacao de\n"
 "processos e no aprimoramento da estrutura de atendimento, assegurando alto padrao de qualidade,\n"
 "agilidade e eficacia nos servicos. Mantem ainda uma politica ativa de melhoria continua, com\n"
 "avaliacoes periodicas que visam atualizar tecnologias, aperfeicoar metodos e garantir excelencia\n"
 "tecnica.\n"
-                )),
-                ("CONTE CONOSCO PARA UMA PARCERIA!", clean_text(
+                    )),
+                    ("CONTE CONOSCO PARA UMA PARCERIA!", clean_text(
 "Nossa missao e ser sua melhor parceria com sinonimo de qualidade, garantia e o melhor\n"
 "custo beneficio.\n"
-                ))
-            ]
-            for titulo, texto in secoes_loc:
-                pdf.set_text_color(*pdf.baby_blue)
+                    ))
+                ]
+                for titulo, texto in secoes_loc:
+                    pdf.set_text_color(*pdf.baby_blue)
+                    pdf.set_font("Arial", 'B', 12)
+                    pdf.cell(0, 8, titulo, 0, 1, 'L')
+                    pdf.set_text_color(0, 0, 0)
+                    pdf.set_font("Arial", '', 11)
+                    pdf.multi_cell(0, 5, replace_company_names(texto, dados_filial.get('nome')))
+                    pdf.ln(3)
+                pdf.ln(7)
+            else:
+                # Cotação (padrão): manter conteúdo original
                 pdf.set_font("Arial", 'B', 12)
-                pdf.cell(0, 8, titulo, 0, 1, 'L')
-                pdf.set_text_color(0, 0, 0)
+                pdf.cell(0, 8, clean_text("SOBRE A WORLD COMP"), 0, 1, 'L')
                 pdf.set_font("Arial", '', 11)
-                pdf.multi_cell(0, 5, replace_company_names(texto, dados_filial.get('nome')))
-                pdf.ln(3)
-            pdf.ln(7)
-        else:
-            # Cotação (padrão): manter conteúdo original
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 8, clean_text("SOBRE A WORLD COMP"), 0, 1, 'L')
-            pdf.set_font("Arial", '', 11)
-            sobre_empresa = clean_text("Há mais de uma década no mercado de manutenção de compressores de ar de parafuso, de diversas marcas, atendemos clientes em todo território brasileiro.")
-            pdf.multi_cell(0, 5, sobre_empresa)
-            pdf.ln(5)
-            secoes = [
-                ("FORNECIMENTO, SERVIÇO E LOCAÇÃO", """
+                sobre_empresa = clean_text("Há mais de uma década no mercado de manutenção de compressores de ar de parafuso, de diversas marcas, atendemos clientes em todo território brasileiro.")
+                pdf.multi_cell(0, 5, sobre_empresa)
+                pdf.ln(5)
+                secoes = [
+                    ("FORNECIMENTO, SERVIÇO E LOCAÇÃO", """
 A World Comp oferece os serviços de Manutenção Preventiva e Corretiva em Compressores e Unidades Compressoras, Venda de peças, Locação de compressores, Recuperação de Unidades Compressoras, Recuperação de Trocadores de Calor e Contrato de Manutenção em compressores de marcas como: Atlas Copco, Ingersoll Rand, Chicago Pneumatic entre outros.
-                """),
-                ("CONTE CONOSCO PARA UMA PARCERIA", """
+                    """),
+                    ("CONTE CONOSCO PARA UMA PARCERIA", """
 Adaptamos nossa oferta para suas necessidades, objetivos e planejamento. Trabalhamos para que seu processo seja eficiente.
-                """),
-                ("MELHORIA CONTÍNUA", """
+                    """),
+                    ("MELHORIA CONTÍNUA", """
 Continuamente investindo em comprometimento, competência e eficiência de nossos serviços, produtos e estrutura para garantirmos a máxima eficiência de sua produtividade.
-                """),
-                ("QUALIDADE DE SERVIÇOS", """
+                    """),
+                    ("QUALIDADE DE SERVIÇOS", """
 Com uma equipe de técnicos altamente qualificados e constantemente treinados para atendimentos em todos os modelos de compressores de ar, a World Comp oferece garantia de excelente atendimento e produtividade superior com rapidez e eficácia.
-                """)
-            ]
-            for titulo, texto in secoes:
+                    """)
+                ]
+                for titulo, texto in secoes:
+                    pdf.set_text_color(*pdf.baby_blue)
+                    pdf.set_font("Arial", 'B', 12)
+                    pdf.cell(0, 8, clean_text(titulo), 0, 1, 'L')
+                    pdf.set_text_color(0, 0, 0)
+                    pdf.set_font("Arial", '', 11)
+                    pdf.multi_cell(0, 5, clean_text(texto))
+                    pdf.ln(3)
+                texto_final = clean_text("Nossa missão é ser sua melhor parceria com sinônimo de qualidade, garantia e o melhor custo benefício.")
+                pdf.multi_cell(0, 5, texto_final)
+                pdf.ln(10)
+        
+            # =====================================================
+            # PÁGINA 4: ESBOÇO DO SERVIÇO A SER EXECUTADO (COMPRA)
+            # OU PÁGINA 4 DE LOCAÇÃO COM TEXTO + IMAGEM
+            # =====================================================
+            if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
+                # Página 4 específica de Locação
+                pdf.add_page()
+                pdf.set_y(50)
+
+                # Determinar título dinâmico a partir do "Modelo do Compressor" informado na Locação
+                modelo_titulo = None
+                try:
+                    for it in itens_cotacao or []:
+                        desc = it[4] if len(it) > 4 else None
+                        tipo_oper = (it[11] if len(it) > 11 else '') or ''
+                        if 'loca' in tipo_oper.lower() and desc:
+                            m = re.search(r"(?i)modelo\s*:\s*(.+)$", str(desc))
+                            if m:
+                                modelo_titulo = m.group(1).strip()
+                                break
+                except Exception:
+                    pass
+                # Remover título do modelo acima da cobertura: não imprimiremos título de equipamento aqui
+                # Imagem dinâmica (se fornecida) ou fallback do banco de dados
+                imagem_pagina4 = None
+                if locacao_pagina4_image and os.path.exists(locacao_pagina4_image):
+                    imagem_pagina4 = locacao_pagina4_image
+                elif 'locacao_imagem_path_db' in locals() and locacao_imagem_path_db and os.path.exists(locacao_imagem_path_db):
+                    imagem_pagina4 = locacao_imagem_path_db
+
+                # Imagem será renderizada apenas uma vez mais abaixo com tamanho padronizado
+                # Bloco de cobertura total conforme especificação
                 pdf.set_text_color(*pdf.baby_blue)
                 pdf.set_font("Arial", 'B', 12)
-                pdf.cell(0, 8, clean_text(titulo), 0, 1, 'L')
+                pdf.cell(0, 8, clean_text("COBERTURA TOTAL"), 0, 1, 'L')
                 pdf.set_text_color(0, 0, 0)
                 pdf.set_font("Arial", '', 11)
-                pdf.multi_cell(0, 5, clean_text(texto))
-                pdf.ln(3)
-            texto_final = clean_text("Nossa missão é ser sua melhor parceria com sinônimo de qualidade, garantia e o melhor custo benefício.")
-            pdf.multi_cell(0, 5, texto_final)
-            pdf.ln(10)
-        
-        # =====================================================
-        # PÁGINA 4: ESBOÇO DO SERVIÇO A SER EXECUTADO (COMPRA)
-        # OU PÁGINA 4 DE LOCAÇÃO COM TEXTO + IMAGEM
-        # =====================================================
-        if (tipo_cotacao or '').lower() == 'locação' or (tipo_cotacao or '').lower() == 'locacao':
-            # Página 4 específica de Locação
-            pdf.add_page()
-            pdf.set_y(50)
-
-            # Determinar título dinâmico a partir do "Modelo do Compressor" informado na Locação
-            modelo_titulo = None
-            try:
-                for it in itens_cotacao or []:
-                    desc = it[4] if len(it) > 4 else None
-                    tipo_oper = (it[11] if len(it) > 11 else '') or ''
-                    if 'loca' in tipo_oper.lower() and desc:
-                        m = re.search(r"(?i)modelo\s*:\s*(.+)$", str(desc))
-                        if m:
-                            modelo_titulo = m.group(1).strip()
-                            break
-            except Exception:
-                pass
-            # Remover título do modelo acima da cobertura: não imprimiremos título de equipamento aqui
-            # Imagem dinâmica (se fornecida) ou fallback do banco de dados
-            imagem_pagina4 = None
-            if locacao_pagina4_image and os.path.exists(locacao_pagina4_image):
-                imagem_pagina4 = locacao_pagina4_image
-            elif 'locacao_imagem_path_db' in locals() and locacao_imagem_path_db and os.path.exists(locacao_imagem_path_db):
-                imagem_pagina4 = locacao_imagem_path_db
-
-            # Imagem será renderizada apenas uma vez mais abaixo com tamanho padronizado
-            # Bloco de cobertura total conforme especificação
-            pdf.set_text_color(*pdf.baby_blue)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 8, clean_text("COBERTURA TOTAL"), 0, 1, 'L')
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", '', 11)
-            texto_cobertura = (
-                "O Contrato de Locação cobre todos os serviços e manutenções, isso significa que não existe custos \n"
-                "inesperados com o seu sistema de ar comprimido. O cronograma de manutenções preventivas é \n"
-                "seguido à risca e gerenciado por um time de engenheiros especializados para garantir o mais alto nível \n"
-                "de eficiência. Além de você contar com a cobertura completa para reparos, intervenções emergenciais \n"
-                "e atendimento proativo completa para reparos, intervenções emergenciais e atendimento proativo. "
-            )
-            pdf.multi_cell(0, 5, clean_text(texto_cobertura))
-            pdf.ln(4)
-            pdf.set_text_color(*pdf.baby_blue)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 8, clean_text("EQUIPAMENTO A SER OFERTADO:"), 0, 1, 'L')
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", 'B', 12)
-            # Não imprimir o nome do modelo aqui conforme solicitado
-            pdf.ln(2)
-
-            # Tentar obter do primeiro item de locação
-            try:
-                c.execute("SELECT item_nome, locacao_imagem_path FROM itens_cotacao WHERE cotacao_id = ? AND tipo_operacao = 'Locação' ORDER BY id LIMIT 1", (cot_id,))
-                row_first = c.fetchone()
-                if row_first:
-                    equipamento_nome = row_first[0]
-                    locacao_imagem_path_db = locacao_imagem_path_db or row_first[1]
-            except Exception:
-                pass
-            if not equipamento_nome:
-                equipamento_nome = locacao_nome_equipamento_db or modelo_titulo or "COMPRESSOR DE PARAFUSO LUBRIFICADO REFRIGERADO À AR"
-            pdf.multi_cell(0, 6, clean_text(equipamento_nome))
-            pdf.ln(3)
-            # Debug: verificar parâmetros recebidos
-            print(f"DEBUG PDF - Tipo cotação: {tipo_cotacao}")
-            print(f"DEBUG PDF - Texto: {locacao_pagina4_text}")
-            print(f"DEBUG PDF - Imagem: {locacao_pagina4_image}")
-            print(f"DEBUG PDF - Imagem existe: {locacao_pagina4_image and os.path.exists(locacao_pagina4_image) if locacao_pagina4_image else False}")
-            # Imagem dinâmica (se fornecida) ou fallback do banco de dados
-            imagem_pagina4 = None
-            if locacao_pagina4_image and os.path.exists(locacao_pagina4_image):
-                imagem_pagina4 = locacao_pagina4_image
-            elif 'locacao_imagem_path_db' in locals() and locacao_imagem_path_db and os.path.exists(locacao_imagem_path_db):
-                imagem_pagina4 = locacao_imagem_path_db
-
-            if imagem_pagina4:
-                # Padronizar tamanho como página 7 (~70x24)
-                max_w, max_h = 70, 24
+                texto_cobertura = (
+                    "O Contrato de Locação cobre todos os serviços e manutenções, isso significa que não existe custos \n"
+                    "inesperados com o seu sistema de ar comprimido. O cronograma de manutenções preventivas é \n"
+                    "seguido à risca e gerenciado por um time de engenheiros especializados para garantir o mais alto nível \n"
+                    "de eficiência. Além de você contar com a cobertura completa para reparos, intervenções emergenciais \n"
+                    "e atendimento proativo completa para reparos, intervenções emergenciais e atendimento proativo. "
+                )
+                pdf.multi_cell(0, 5, clean_text(texto_cobertura))
+                pdf.ln(4)
+                pdf.set_text_color(*pdf.baby_blue)
+                pdf.set_font("Arial", 'B', 12)
+                pdf.cell(0, 8, clean_text("EQUIPAMENTO A SER OFERTADO:"), 0, 1, 'L')
+                pdf.set_text_color(0, 0, 0)
+                pdf.set_font("Arial", 'B', 12)
+                # Não imprimir o nome do modelo aqui conforme solicitado
+                pdf.ln(2)
+
+                # Tentar obter do primeiro item de locação
                 try:
-                    from PIL import Image
-                    img = Image.open(imagem_pagina4)
-                    iw, ih = img.size
-                    ratio = min(max_w / iw, max_h / ih)
-                    w = iw * ratio
-                    h = ih * ratio
+                    c.execute("SELECT item_nome, locacao_imagem_path FROM itens_cotacao WHERE cotacao_id = ? AND tipo_operacao = 'Locação' ORDER BY id LIMIT 1", (cot_id,))
+                    row_first = c.fetchone()
+                    if row_first:
+                        equipamento_nome = row_first[0]
+                        locacao_imagem_path_db = locacao_imagem_path_db or row_first[1]
                 except Exception:
-                    w, h = 70, 24
-                x = (210 - w) / 2
-                y = pdf.get_y() + 10
-                if y + h > 270:
-                    pdf.add_page()
-                    y = 35
-                pdf.image(imagem_pagina4, x=x, y=y, w=w, h=h)
-                pdf.set_y(y + h + 6)
+                    pass
+                if not equipamento_nome:
+                    equipamento_nome = locacao_nome_equipamento_db or modelo_titulo or "COMPRESSOR DE PARAFUSO LUBRIFICADO REFRIGERADO À AR"
+                pdf.multi_cell(0, 6, clean_text(equipamento_nome))
+                pdf.ln(3)
+                # Debug: verificar parâmetros recebidos
+                print(f"DEBUG PDF - Tipo cotação: {tipo_cotacao}")
+                print(f"DEBUG PDF - Texto: {locacao_pagina4_text}")
+                print(f"DEBUG PDF - Imagem: {locacao_pagina4_image}")
+                print(f"DEBUG PDF - Imagem existe: {locacao_pagina4_image and os.path.exists(locacao_pagina4_image) if locacao_pagina4_image else False}")
+                # Imagem dinâmica (se fornecida) ou fallback do banco de dados
+                imagem_pagina4 = None
+                if locacao_pagina4_image and os.path.exists(locacao_pagina4_image):
+                    imagem_pagina4 = locacao_pagina4_image
+                elif 'locacao_imagem_path_db' in locals() and locacao_imagem_path_db and os.path.exists(locacao_imagem_path_db):
+                    imagem_pagina4 = locacao_imagem_path_db
+
+                if imagem_pagina4:
+                    # Padronizar tamanho como página 7 (~70x24)
+                    max_w, max_h = 70, 24
+                    try:
+                        from PIL import Image
+                        img = Image.open(imagem_pagina4)
+                        iw, ih = img.size
+                        ratio = min(max_w / iw, max_h / ih)
+                        w = iw * ratio
+                        h = ih * ratio
+                    except Exception:
+                        w, h = 70, 24
+                    x = (210 - w) / 2
+                    y = pdf.get_y() + 10
+                    if y + h > 270:
+                        pdf.add_page()
+                        y = 35
+                    pdf.image(imagem_pagina4, x=x, y=y, w=w, h=h)
+                    pdf.set_y(y + h + 6)
+
+                # (Cobertura já adicionada acima)
+
+                # =====================================================
+                # PÁGINA 5: TABELA DE ITENS VENDIDOS (EQUIPAMENTOS DA LOCAÇÃO)
+                # =====================================================
+                pdf.add_page()
+                pdf.set_y(50)
+                pdf.set_text_color(*pdf.baby_blue)
+                pdf.set_font("Arial", 'B', 14)
+                pdf.cell(0, 10, clean_text("EQUIPAMENTOS"), 0, 1, 'L')
+                pdf.ln(2)
+
+                # Buscar itens de locação com meses
+                c.execute(
+                    """
+                    SELECT item_nome, quantidade, valor_unitario, COALESCE(locacao_qtd_meses, 0) AS meses
+                    FROM itens_cotacao
+                    WHERE cotacao_id = ? AND (tipo_operacao = 'Locação' OR (tipo_operacao IS NULL AND ? IN ('locação','locacao')))
+                    ORDER BY id
+                    """,
+                    (cot_id, (tipo_cotacao or '').lower(),)
+                )
+                itens_loc = c.fetchall() or []
+
+                # Cabeçalho da tabela
+                pdf.set_x(10)
+                pdf.set_fill_color(50, 100, 150)
+                pdf.set_text_color(255, 255, 255)
+                pdf.set_font("Arial", 'B', 11)
+                # Larguras: Nome 105, Qtd 20, Valor Mensal 35, Período 35 (total ~195)
+                col_w = [105, 20, 35, 35]
+                pdf.cell(col_w[0], 8, clean_text("Nome do Equipamento"), 1, 0, 'L', 1)
+                pdf.cell(col_w[1], 8, clean_text("Qtd"), 1, 0, 'C', 1)
+                pdf.cell(col_w[2], 8, clean_text("Valor Mensal"), 1, 0, 'R', 1)
+                pdf.cell(col_w[3], 8, clean_text("Período (meses)"), 1, 1, 'C', 1)
 
-            # (Cobertura já adicionada acima)
+                pdf.set_text_color(0, 0, 0)
+                pdf.set_font("Arial", '', 11)
+                total_geral = 0.0
+                for (nome_eq, qtd, valor_mensal, meses) in itens_loc:
+                    qtd_num = float(qtd or 0)
+                    vm_num = float(valor_mensal or 0)
+                    meses_num = int(meses or 0)
+                    total_geral += (vm_num * meses_num * qtd_num)
+
+                    # Nome com quebra automática
+                    x0 = pdf.get_x()
+                    y0 = pdf.get_y()
+                    pdf.multi_cell(col_w[0], 6, clean_text(str(nome_eq or '')), 1, 'L')
+                    y1 = pdf.get_y()
+                    h = max(6, y1 - y0)
+                    pdf.set_xy(x0 + col_w[0], y0)
+                    pdf.cell(col_w[1], h, clean_text(f"{int(qtd_num)}"), 1, 0, 'C')
+                    pdf.cell(col_w[2], h, clean_text(f"R$ {vm_num:.2f}"), 1, 0, 'R')
+                    pdf.cell(col_w[3], h, clean_text(str(meses_num)), 1, 1, 'C')
+
+                pdf.ln(6)
+                pdf.set_x(10)
+                pdf.set_font("Arial", 'B', 12)
+                pdf.set_fill_color(200, 200, 200)
+                pdf.set_text_color(0, 0, 0)
+                # Formatar em pt-BR: 32.500,00
+                def brl(v):
+                    try:
+                        return ("R$ " + f"{v:,.2f}").replace(",", "@").replace(".", ",").replace("@", ".")
+                    except Exception:
+                        return f"R$ {v:.2f}"
+                pdf.cell(sum(col_w[:-1]), 10, clean_text("TOTAL GERAL:"), 1, 0, 'R', 1)
+                pdf.cell(col_w[-1], 10, clean_text(brl(total_geral)), 1, 1, 'R', 1)
+
+                # =====================================================
+                # PÁGINA 6: CONDIÇÕES DE PAGAMENTO e CONDIÇÕES COMERCIAIS
+                # =====================================================
+                pdf.add_page()
+                pdf.set_y(35)
 
-            # =====================================================
-            # PÁGINA 5: TABELA DE ITENS VENDIDOS (EQUIPAMENTOS DA LOCAÇÃO)
-            # =====================================================
-            pdf.add_page()
-            pdf.set_y(50)
-            pdf.set_text_color(*pdf.baby_blue)
-            pdf.set_font("Arial", 'B', 14)
-            pdf.cell(0, 10, clean_text("EQUIPAMENTOS"), 0, 1, 'L')
-            pdf.ln(2)
-
-            # Buscar itens de locação com meses
-            c.execute(
-                """
-                SELECT item_nome, quantidade, valor_unitario, COALESCE(locacao_qtd_meses, 0) AS meses
-                FROM itens_cotacao
-                WHERE cotacao_id = ? AND (tipo_operacao = 'Locação' OR (tipo_operacao IS NULL AND ? IN ('locação','locacao')))
-                ORDER BY id
-                """,
-                (cot_id, (tipo_cotacao or '').lower(),)
-            )
-            itens_loc = c.fetchall() or []
-
-            # Cabeçalho da tabela
-            pdf.set_x(10)
-            pdf.set_fill_color(50, 100, 150)
-            pdf.set_text_color(255, 255, 255)
-            pdf.set_font("Arial", 'B', 11)
-            # Larguras: Nome 105, Qtd 20, Valor Mensal 35, Período 35 (total ~195)
-            col_w = [105, 20, 35, 35]
-            pdf.cell(col_w[0], 8, clean_text("Nome do Equipamento"), 1, 0, 'L', 1)
-            pdf.cell(col_w[1], 8, clean_text("Qtd"), 1, 0, 'C', 1)
-            pdf.cell(col_w[2], 8, clean_text("Valor Mensal"), 1, 0, 'R', 1)
-            pdf.cell(col_w[3], 8, clean_text("Período (meses)"), 1, 1, 'C', 1)
+                # Título principal
+                pdf.set_text_color(*pdf.baby_blue)
+                pdf.set_font("Arial", 'B', 12)
+                pdf.cell(0, 8, clean_text("CONDIÇÕES DE PAGAMENTO:"), 0, 1, 'L')
+                pdf.set_text_color(0, 0, 0)
+                pdf.set_font("Arial", '', 11)
 
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", '', 11)
-            total_geral = 0.0
-            for (nome_eq, qtd, valor_mensal, meses) in itens_loc:
-                qtd_num = float(qtd or 0)
-                vm_num = float(valor_mensal or 0)
-                meses_num = int(meses or 0)
-                total_geral += (vm_num * meses_num * qtd_num)
-
-                # Nome com quebra automática
-                x0 = pdf.get_x()
-                y0 = pdf.get_y()
-                pdf.multi_cell(col_w[0], 6, clean_text(str(nome_eq or '')), 1, 'L')
-                y1 = pdf.get_y()
-                h = max(6, y1 - y0)
-                pdf.set_xy(x0 + col_w[0], y0)
-                pdf.cell(col_w[1], h, clean_text(f"{int(qtd_num)}"), 1, 0, 'C')
-                pdf.cell(col_w[2], h, clean_text(f"R$ {vm_num:.2f}"), 1, 0, 'R')
-                pdf.cell(col_w[3], h, clean_text(str(meses_num)), 1, 1, 'C')
-
-            pdf.ln(6)
-            pdf.set_x(10)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.set_fill_color(200, 200, 200)
-            pdf.set_text_color(0, 0, 0)
-            # Formatar em pt-BR: 32.500,00
-            def brl(v):
+                # DDL dinâmico a partir de condicao_pagamento
+                ddl_valor = None
                 try:
-                    return ("R$ " + f"{v:,.2f}").replace(",", "@").replace(".", ",").replace("@", ".")
+                    m = re.search(r"(\d+)\s*DDL", (condicao_pagamento or ''), flags=re.IGNORECASE)
+                    if m:
+                        ddl_valor = m.group(1)
                 except Exception:
-                    return f"R$ {v:.2f}"
-            pdf.cell(sum(col_w[:-1]), 10, clean_text("TOTAL GERAL:"), 1, 0, 'R', 1)
-            pdf.cell(col_w[-1], 10, clean_text(brl(total_geral)), 1, 1, 'R', 1)
-
-            # =====================================================
-            # PÁGINA 6: CONDIÇÕES DE PAGAMENTO e CONDIÇÕES COMERCIAIS
-            # =====================================================
-            pdf.add_page()
-            pdf.set_y(35)
-
-            # Título principal
-            pdf.set_text_color(*pdf.baby_blue)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 8, clean_text("CONDIÇÕES DE PAGAMENTO:"), 0, 1, 'L')
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", '', 11)
-
-            # DDL dinâmico a partir de condicao_pagamento
-            ddl_valor = None
-            try:
-                m = re.search(r"(\d+)\s*DDL", (condicao_pagamento or ''), flags=re.IGNORECASE)
-                if m:
-                    ddl_valor = m.group(1)
-            except Exception:
-                pass
-            ddl_texto = f"{ddl_valor} DDL" if ddl_valor else (condicao_pagamento or "30 DDL")
-
-            texto_pagamento = (
-                "O preço inclui: Uso do equipamento listado no Resumo da Proposta Preço, partida técnica, serviços \n"
-                "preventivos e corretivos, peças, deslocamento e acomodação dos técnicos, quando necessário. \n"
-                "Pelos serviços objeto desta proposta, após a entrega do(s) equipamento(s) previsto neste contrato, o \n"
-                "CONTRATANTE deverá iniciar os respectivos pagamentos mensais referentes a locação no valor de \n"
-                "R$ ____ (______reais) taxa fixa mensal, com vencimento à " + ddl_texto + ", Data esta que \n"
-                "contará a partir da entrega do equipamento nas dependencias da contratante, ( COM \n"
-                "FATURAMENTO ATRAVÉS DE RECIBO DE LOCAÇÃO)."
-            )
-            pdf.multi_cell(0, 6, clean_text(texto_pagamento))
-            pdf.ln(6)
-
-            # Título secundário
-            pdf.set_text_color(*pdf.baby_blue)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 8, clean_text("CONDIÇÕES COMERCIAIS"), 0, 1, 'L')
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", '', 11)
-
-            condicoes_texto = (
-                "- Os equipamentos objetos desta proposta serão fornecidos em caráter de Locação, cujas regras \n"
-                "dessa modalidade estão descritas nos Termos e Condições Gerais de Locação de Equipamento, \n"
-                "parte integrante deste documento.\n"
-                "- Assim que V. Sa. receber os equipamentos e materiais, entrar em contato conosco para agendar \n"
-                "o serviço de partida(s) técnica(s). \n"
-                "- Validade do Contrato 5 anos \n"
-                "- Informar sobre a necessidade de envio de documentos necessários para integração de técnicos. \n"
-                "- Antes da compra do serviço, o cliente deve informar a World Comp, ou seu representante, se \n"
-                "existem quaisquer riscos ou circunstâncias na sua operação que possam provocar acidentes \n"
-                "envolvendo as pessoas que realizarão o serviço, assim como as medidas de proteção ou outras \n"
-                "ações necessárias que a World Comp deva tomar a fim de reduzir tais riscos. \n"
-                "- É de responsabilidade do cliente fornecer todas as condições necessárias para a execução das \n"
-                "manutenções, tais como equipamentos para elevação/transporte interno, iluminação, água e local \n"
-                "adequados para limpeza de resfriadores e demais componentes, mão de obra para eventuais \n"
-                "necessidades, etc. \n"
-                "- Os resíduos gerados pelas atividades da World Comp são de responsabilidade do cliente. \n"
-                "- Todos os preços são para horário de trabalho definido como horário comercial, de segunda a \n"
-                "sexta-feira, das 8h às 17h. \n"
-                "- A World Comp não se responsabiliza perante o cliente, seus funcionários ou terceiros por perdas \n"
-                "ou danos pessoais, diretos e indiretos, de imagem, lucros cessantes e perda econômica \n"
-                "decorrentes dos serviços ora contratados ou de acidentes de qualquer tipo causados pelos \n"
-                "equipamentos que sofrerão manutenção."
-            )
-            # Espaçamento leve entre tópicos: quebrar com linha em branco entre bullets
-            for paragraph in condicoes_texto.split("- "):
-                if paragraph.strip():
-                    txt = ("- " + paragraph).strip()
-                    pdf.multi_cell(0, 6, clean_text(txt))
-                    pdf.ln(1)
+                    pass
+                ddl_texto = f"{ddl_valor} DDL" if ddl_valor else (condicao_pagamento or "30 DDL")
+
+                texto_pagamento = (
+                    "O preço inclui: Uso do equipamento listado no Resumo da Proposta Preço, partida técnica, serviços \n"
+                    "preventivos e corretivos, peças, deslocamento e acomodação dos técnicos, quando necessário. \n"
+                    "Pelos serviços objeto desta proposta, após a entrega do(s) equipamento(s) previsto neste contrato, o \n"
+                    "CONTRATANTE deverá iniciar os respectivos pagamentos mensais referentes a locação no valor de \n"
+                    "R$ ____ (______reais) taxa fixa mensal, com vencimento à " + ddl_texto + ", Data esta que \n"
+                    "contará a partir da entrega do equipamento nas dependencias da contratante, ( COM \n"
+                    "FATURAMENTO ATRAVÉS DE RECIBO DE LOCAÇÃO)."
+                )
+                pdf.multi_cell(0, 6, clean_text(texto_pagamento))
+                pdf.ln(6)
+
+                # Título secundário
+                pdf.set_text_color(*pdf.baby_blue)
+                pdf.set_font("Arial", 'B', 12)
+                pdf.cell(0, 8, clean_text("CONDIÇÕES COMERCIAIS"), 0, 1, 'L')
+                pdf.set_text_color(0, 0, 0)
+                pdf.set_font("Arial", '', 11)
 
-            # =====================================================
-            # PÁGINAS 7 A 13: TERMOS E CONDIÇÕES GERAIS (LOCAÇÃO)
-            # =====================================================
-            # Ajustar margens para corpo do contrato (mais afastado do cabeçalho/rodapé)
-            pdf.set_top_margin(77)
-            pdf.set_auto_page_break(auto=True, margin=35)
-            pdf.add_page()
-            pdf.set_y(77)
-            imagem_p7 = None
-            try:
-                # Reaproveitar a imagem do primeiro item de locação, se houver
-                c.execute("SELECT locacao_imagem_path FROM itens_cotacao WHERE cotacao_id=? AND (tipo_operacao='Locação' OR tipo_operacao IS NULL) AND locacao_imagem_path IS NOT NULL AND TRIM(locacao_imagem_path)<>'' ORDER BY id LIMIT 1", (cot_id,))
-                row_img = c.fetchone()
-                if row_img and row_img[0] and os.path.exists(row_img[0]):
-                    imagem_p7 = row_img[0]
-                elif locacao_imagem_path_db and os.path.exists(locacao_imagem_path_db):
-                    imagem_p7 = locacao_imagem_path_db
-            except Exception:
-                pass
-            if imagem_p7:
+                condicoes_texto = (
+                    "- Os equipamentos objetos desta proposta serão fornecidos em caráter de Locação, cujas regras \n"
+                    "dessa modalidade estão descritas nos Termos e Condições Gerais de Locação de Equipamento, \n"
+                    "parte integrante deste documento.\n"
+                    "- Assim que V. Sa. receber os equipamentos e materiais, entrar em contato conosco para agendar \n"
+                    "o serviço de partida(s) técnica(s). \n"
+                    "- Validade do Contrato 5 anos \n"
+                    "- Informar sobre a necessidade de envio de documentos necessários para integração de técnicos. \n"
+                    "- Antes da compra do serviço, o cliente deve informar a World Comp, ou seu representante, se \n"
+                    "existem quaisquer riscos ou circunstâncias na sua operação que possam provocar acidentes \n"
+                    "envolvendo as pessoas que realizarão o serviço, assim como as medidas de proteção ou outras \n"
+                    "ações necessárias que a World Comp deva tomar a fim de reduzir tais riscos. \n"
+                    "- É de responsabilidade do cliente fornecer todas as condições necessárias para a execução das \n"
+                    "manutenções, tais como equipamentos para elevação/transporte interno, iluminação, água e local \n"
+                    "adequados para limpeza de resfriadores e demais componentes, mão de obra para eventuais \n"
+                    "necessidades, etc. \n"
+                    "- Os resíduos gerados pelas atividades da World Comp são de responsabilidade do cliente. \n"
+                    "- Todos os preços são para horário de trabalho definido como horário comercial, de segunda a \n"
+                    "sexta-feira, das 8h às 17h. \n"
+                    "- A World Comp não se responsabiliza perante o cliente, seus funcionários ou terceiros por perdas \n"
+                    "ou danos pessoais, diretos e indiretos, de imagem, lucros cessantes e perda econômica \n"
+                    "decorrentes dos serviços ora contratados ou de acidentes de qualquer tipo causados pelos \n"
+                    "equipamentos que sofrerão manutenção."
+                )
+                # Espaçamento leve entre tópicos: quebrar com linha em branco entre bullets
+                for paragraph in condicoes_texto.split("- "):
+                    if paragraph.strip():
+                        txt = ("- " + paragraph).strip()
+                        pdf.multi_cell(0, 6, clean_text(txt))
+                        pdf.ln(1)
+
+                # =====================================================
+                # PÁGINAS 7 A 13: TERMOS E CONDIÇÕES GERAIS (LOCAÇÃO)
+                # =====================================================
+                # Ajustar margens para corpo do contrato (mais afastado do cabeçalho/rodapé)
+                pdf.set_top_margin(77)
+                pdf.set_auto_page_break(auto=True, margin=35)
+                pdf.add_page()
+                pdf.set_y(77)
+                imagem_p7 = None
                 try:
-                    from PIL import Image
-                    # Reduzir em ~30% com bounding box menor (70x24)
-                    max_w, max_h = 70, 24
-                    img = Image.open(imagem_p7)
-                    iw, ih = img.size
-                    ratio = min(max_w / iw, max_h / ih)
-                    w = iw * ratio
-                    h = ih * ratio
+                    # Reaproveitar a imagem do primeiro item de locação, se houver
+                    c.execute("SELECT locacao_imagem_path FROM itens_cotacao WHERE cotacao_id=? AND (tipo_operacao='Locação' OR tipo_operacao IS NULL) AND locacao_imagem_path IS NOT NULL AND TRIM(locacao_imagem_path)<>'' ORDER BY id LIMIT 1", (cot_id,))
+                    row_img = c.fetchone()
+                    if row_img and row_img[0] and os.path.exists(row_img[0]):
+                        imagem_p7 = row_img[0]
+                    elif locacao_imagem_path_db and os.path.exists(locacao_imagem_path_db):
+                        imagem_p7 = locacao_imagem_path_db
                 except Exception:
-                    w, h = 70, 24
-                x = (210 - w) / 2
-                y = 77
-                pdf.image(imagem_p7, x=x, y=y, w=w, h=h)
-                pdf.set_y(y + h + 8)
-            else:
-                pdf.set_y(82)
-            pdf.set_text_color(*pdf.baby_blue)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 8, clean_text("TERMOS E CONDIÇÕES GERAIS DE LOCAÇÃO DE EQUIPAMENTO"), 0, 1, 'L')
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", '', 11)
-
-            # Montar texto do contrato com substituições dinâmicas
-            locadora_nome = dados_filial.get('nome', 'WORLD COMP')
-            locadora_endereco = dados_filial.get('endereco', '')
-            locadora_cnpj = dados_filial.get('cnpj', 'N/A')
-            locataria_nome = cliente_nome
-            proposta_num = numero_proposta
-            proposta_data = format_date(data_criacao)
-
-            intro_dyn = (
-                f"Pelo presente instrumento particular,\n"
-                f"LOCADORA: {locadora_nome}, com sede em {locadora_endereco}, inscrita no CNPJ/MF sob nº {locadora_cnpj}.\n"
-                f"LOCATÁRIA: {locataria_nome}\n"
-                f"{locadora_nome} e CONTRATANTE serão referidas individualmente como Parte e, em conjunto, Partes.\n"
-                f"As partes qualificadas, por seus representantes legais ao final assinados, têm entre si justo e acertado os presentes Termos e Condições Gerais de Locação de Equipamento, denominado simplesmente Contrato, que se regerá pelas cláusulas e condições seguintes, com efeitos a partir da data {proposta_data} da Proposta Comercial nº {proposta_num}.\n\n"
-            )
-
-            contrato_base = (
-                "1 -CLÁUSULA PRIMEIRA – DO OBJETO\n"
-                "O presente Contrato consiste na locação do(s) Equipamento(s) mencionado(s) NA Proposta Comercial Preço anexa, denominados simplesmente Equipamento(s), de propriedade da World Comp, como parte da Locação de Compressores oferecida ao CONTRATANTE, para uso em suas atividades industriais, sendo proibido o uso para outros fins.\n"
-                "Caberá ao CONTRATANTE a obrigação de manter o(s) Equipamento(s) em suas dependências, em endereço descrito como sua sede no preâmbulo do presente instrumento, obrigando-se a solicitar previamente e por escrito à World Comp eventual alteração de sua localização, sob pena de expressa e inequívoca violação do presente instrumento, o que autorizará a incidência de multa de 10% (dez por cento), em caráter não compensatório, sobre o valor do Contrato, bem como facultará à World Comp a rescisão do presente instrumento, com a imediata retomada liminar do(s) Equipamento(s).\n"
-                "Referida Proposta Comercial dispõe as descrições e especificações técnicas do(s) equipamento(s) locado(s), bem como as condições comerciais para a presente locação.\n"
-                "Caso ocorra qualquer alteração relevante nas condições de operação dos Equipamento(s) (tais como condições de operação, escopo do trabalho, ou ainda nas condições ambientais, qualidade do ar, ventilação, temperatura, fornecimento de água e energia elétrica) ou do local ou regime de trabalho do equipamento, a World Comp deverá ser notificada previamente, por escrito.\n"
-                "Nessa hipótese, o presente Contrato deverá ser revisto pelas Partes, a fim de adaptá-lo à nova realidade, assumindo a CONTRATANTE integral responsabilidade antes da avaliação pela World Comp das novas condições e/ou da celebração de termo aditivo que reflita as novas condições.\n"
-                "Estão incluídos no objeto deste instrumento:\n"
-                "Equipamento(s): Equipamentos listados de acordo com relação descrita na Proposta Comercial Preço.\n"
-                "Partida técnica dos Equipamento(s), sendo obrigatório sua realização somente, e exclusivamente, por funcionários especializados da World Comp, em horário comercial, sendo de responsabilidade do CONTRATANTE a instalação do(s) equipamento(s) contratados de acordo com o manual de instalação.\n"
-                "Peças, componentes e insumos específicos para cada visita de manutenção preventiva ou corretiva\n"
-                "A World Comp, reserva o direito realizar as intervenções técnicas que entender necessárias para o bom funcionamento e manutenção do(s) Equipamento(s), incluindo substituição de peças e produtos utilizados nas manutenções preventivas e/ou corretivas, em especial alterando o lubrificante utilizado conforme recomendação para melhor desempenho, consumo energético e extensão da vida útil do(s) Equipamento(s) e seus componentes.\n"
-                "Estão excluídos do objeto deste instrumento:\n"
-                "Atendimento para manutenções preventivas e/ou corretivas fora do horário comercial entendido como das 8:00h às 17:00h, de segunda a sexta-feira, salvo especificação em contrário na Proposta.\n"
-                "Custos com componentes ou peças que tenham sido danificados por negligência, mau uso, falha operacional ou elétrica da contratante.\n"
-                "O presente Contrato, alcança não apenas o(s) Equipamento(s) já relacionados na Proposta Comercial, mas também todos os demais que poderão vir a ser enviados, através de solicitação do CONTRATANTE, conforme as respectivas propostas comerciais futuras, e por meio de Notas Fiscais de Remessa emitidas pela World Comp e termos aditivos a serem celebrados entre as Partes.\n"
-                "– CLÁUSULA SEGUNDA – DA VIGÊNCIA EXECUÇÃO\n"
-                "O presente Contrato terá o seu início, com efeitos a partir da data de assinatura desta Proposta Comercial nº {num} de disponibilização do(s) Equipamento(s) pela World Comp, vigerá pelo prazo definido na Proposta Comercial, sendo renovado automaticamente ao final do contrato até que haja manifestação das partes.\n"
-                "Quando do encerramento do presente Contrato o CONTRATANTE se compromete a devolver o(s) Equipamento(s) nas mesmas condições de uso e manutenção em que entregue(s), salvo desgaste natural do tempo, conforme condições normais e aprovada de uso.\n"
-                " No término deste Contrato será realizada uma nova inspeção em conjunto pelas Partes, da qual será elaborado um relatório, que deverá ser assinado por representantes de ambas as Partes, detalhando as condições do(s) Equipamento(s), para devolução.\n"
-                "Se na inspeção conjunta, forem constatados que o(s) Equipamento(s), por razões técnicas ou mecânicas, não se encontra(m) dentro das condições mínimas exigidas para o seu funcionamento e/ou operação, em decorrência de mau uso ou quaisquer atos, fatos ou danos imputáveis ou causados pelo CONTRATANTE, este arcará com os custos de reparo do(s) Equipamento(s).\n"
-                "Não obstante, será de responsabilidade do CONTRATANTE qualquer manutenção corretiva, cuja necessidade seja identificada durante a vigência contratual, em decorrência de negligência ou má operação do(s) Equipamento(s), a qual será cobrada à parte, mediante apresentação de orçamento pela World Comp, em cada caso.\n"
-                "Durante o período em que permanecer na posse do(s) Equipamento(s), o representante legal do CONTRATANTE, qualificado abaixo e que assina este documento, ficará como depositário fiel do(s) Equipamento(s).\n"
-                "3- CLÁUSULA TERCEIRA – DAS CONDIÇÕES DE PAGAMENTO\n"
-                "3.1 O CONTRATANTE pagará à World Comp o valor descrito e em conformidade com as condições constantes da Proposta Comercial.\n"
-                "3.1.2 A CONTRATANTE efetuará os pagamentos através de boleto bancário ou depósito em conta, servindo os respectivos comprovantes de pagamento claramente identificados como prova de quitação, salvo se previsto de forma contrária na Proposta.\n"
-                "3.2 A ausência de pagamento na data estipulada, inclusive na hipótese de não recebimento do boleto bancário, observado o disposto na Cláusula acima, implicará na incidência de multa moratória de 2% (doia por cento) sobre o valor do débito, além de juros de 1% (um por cento) ao mês, calculados 'pro rata dia', a partir do dia seguinte ao do vencimento.\n"
-                "3.2.1 Caso o atraso dos pagamentos devidos pelo CONTRATANTE prolongue-se por prazo superior a 03 (três) meses consecutivos, a World Comp poderá encerrar o Contrato imediatamente.\n"
-                "3.3 O preço mencionado na proposta comercial será reajustado automaticamente a cada 12 (doze) meses de vigência contratual ou em períodos inferiores, caso a legislação da época assim permita.\n"
-                "3.4 O preço ora estabelecido está sujeito à renegociação, na hipótese de qualquer mudança nas condições operacionais dos equipamentos sob contrato.\n"
-                "4- CLÁUSULA QUARTA – DAS RESPONSABILIDADES DA WORLD COMP\n"
-                "4.1 A partida técnica, ou seja, acionar o funcionamento do(s) Equipamento(s) no início da locação, bem como o seu desligamento no término deste Contrato\n"
-                "4.1.1 Contatar o CONTRATANTE previamente à data de cada visita.\n"
-                "4.1.2 Fornecer ao CONTRATANTE, após cada visita, ordem de serviço que deverá ser assinada por esta., relatando o estado do(s) Equipamento(s) após as visitas realizadas e incluindo a lista de peças aplicadas, bem como relação das intervenções realizadas.\n"
-                "4.1.3 Enviar técnicos para as manutenções munidos de equipamentos de proteção pessoal, trajando uniformes devidamente identificados.\n"
-                "4.1.4 Informar a necessidade de eventuais manutenções corretivas necessárias à boa operação do compressor, iniciando a execução de tais atendimentos, se aplicável.\n"
-                "4.2 Não obstante os esforços da World Comp, fica desde já estabelecido que o atendimento aqui disposto não configura a imediata solução de eventual problema, já que somente durante o atendimento corretivo a World Comp avaliará necessidade de utilização/substituição de peça(s) a(s) qual(is) poderá(ão) não estar disponível(is) no momento do atendimento.\n"
-                "4.3 Em caso de morosidade superior a 1 (uma) hora entre a chegada ao CONTRATANTE e a liberação do técnico da World Comp para executar as intervenções programadas ou, ainda, não disponibilidade do(s) Equipamento(s) à World Comp, os custos da espera ou reprogramação da visita serão repassados ao CONTRATANTE, conforme tabela vigente de preços praticados.\n"
-                "5 - CLÁUSULA QUINTA - DAS RESPONSABILIDADES DO CONTRATANTE\n"
-                "5.1 Solicitar a partida técnica após a instalação do(s) Equipamento(s).\n"
-                "5.1.1 Utilizar o(s) Equipamento(s) para os seus estritos fins, obedecendo às recomendações fornecidas pela World Comp, sob pena de, em assim não procedendo, incorrer nos ônus previstos no artigo 570 do novo Código Civil e demais cominações contratuais e legais.\n"
-                "5.1.2Manter e guardar o(s) Equipamento(s) como se seu fosse(m), desde a sua [retirada | entrega] até sua efetiva devolução a World Comp, ficando responsável pela sua conservação e obrigando-se a devolvê-lo em perfeito estado, respeito desgastes naturais de uso, limpo e nas condições de uso que o encontrou quando da retirada, sem qualquer dano ou avaria, mesmo se provocados por incêndios, roubo, uso indevido ou qualquer outra coisa, quer por sua culpa, quer por culpa de terceiros, obrigando-se ao ressarcimento dos danos causados e ficando responsável ainda pela sua conservação e contratação de seguro, nos termos da Cláusula Sexta, abaixo.\n"
-                "5.1.3Devolver o(s) Equipamento(s) tão logo rescindido de direito o presente Contrato, incorrendo, se assim não o fizer, no arbitramento de aluguéis e demais consectários a que alude o artigo 575 do Código Civil.\n"
-                "5.1.4 Manter, na qualidade de única responsável pelo(s) Equipamento(s), a World Comp isenta de todas e quaisquer reclamações, reivindicações, responsabilidades, perdas, danos, custos e despesas que possam a ela serem imputados por terceiros, decorrentes da locação ora ajustada, incluindo empregados e terceiros sob a responsabilidade do CONTRATANTE. Cabe ao CONTRATANTE, informar imediatamente e por escrito à World Comp quaisquer reclamações dessa natureza, contra ele próprio ou contra a World Comp.\n"
-                "5.1.5 Indenizar a World Comp , por qualquer perda ou dano causado ao(s) Equipamento(s), pelo valor total de cada componente eventualmente perdido ou avariado.\n"
-                "5.1.6 Realizar a inspeção/manutenção diária e semanal (8 e 40 horas) da(s) máquina(s), conforme indicado Manual de Instruções.\n"
-                "5.1.7 Utilizar somente lubrificantes, filtros de ar e de óleo, separador de óleo – quando aplicável, e peças originais, genuínas ou aprovadas pela World Comp.\n"
-                "5.1.8 Disponibilizar ventilação adequada ao redor do(s) Equipamento(s) (de acordo com recomendações da World Comp e limpar regulamente o(s) Equipamento(s)\n"
-                "5.1.9 Notificar a World Comp imediatamente e por escrito sobre quaisquer mudanças na operação ou nas condições do local e de quaisquer problemas no funcionamento ou falhas que possam influenciar o funcionamento apropriado do(s) Equipamento(s).\n"
-                "5.1.10Permitir que a World Comp tenha acesso livre e integral aos equipamentos durante o horário comercial normal a fim de realizar visitas de serviço programadas, assegurando ainda, o direito de vistoria a qualquer momento dentro do horário comercial normal, independente de prévio aviso.\n"
-                "5.1.11 Tomar as medidas necessárias recomendadas pela World Comp a título de reparo.\n"
-                "5.1.12 Prestar assistência médica gratuita ao pessoal da World Comp nas mesmas condições que a oferecida aos funcionários do CONTRATANTE, em caso de acidente ou emergência dentro de suas dependências. Se o acidente ou emergência exigir maiores cuidados ou tratamentos médicos, a(s) pessoa(s) acidentada(as) deverá(ão) ser conduzida(s) ao centro médico mais próximo.\n"
-                "5.1.13 Fornecer todas as condições necessárias para a execução das manutenções, tais como equipamentos para elevação/transporte interno, iluminação, água e local adequados para limpeza de resfriadores e demais componentes, mão de obra para eventuais necessidades, etc.\n"
-                "5.1.14 Fornecer toda a instalação elétrica de acordo com manual de instruções do equipamento, e seguir as recomendações para a sala de compressores e o meio ambiente.\n"
-                "5.1.15 Fornecer edificações ou modificações para a sala de compressores, dutos para cabos elétricos e outros fins, bem como instalações de água se necessário, e todas as instalações diferentes do sistema de ar comprimido.\n"
-                "5.1.16Preparar todas as instalações de tubulação necessária para a passagem de ar comprimido a partir da sala do compressor para o local de consumo.\n"
-                "5.1.17 Não realizar qualquer intervenção no equipamento sem prévio consentimento da World Comp, por escrito.\n"
-                "5.1.18 Manter registro atualizado das ocorrências com o(s) Equipamento(s)\n"
-                "5.1.19 Solicitar formalmente as manutenções corretivas à World Comp e confirmar, antecipadamente, que o equipamento está disponível para a realização da manutenção preventiva na data combinada, sob pena de se caracterizar mau uso do(s) Equipamento(s), sendo permitido apenas um aditamento de manutenção já agendada, observado período máximo de adiamento de 45 (quarenta e cinco) dias. A hipótese de adiamento de qualquer manutenção por indisponibilidade do(s) Equipamento(s) por prazo superior a 45 (quarenta e cinco) dias facultará à World Comp a rescisão do presente instrumento, com a imediata retomada liminar do(s) Equipamento(s).\n"
-                "5.1.20 Efetivar o pagamento devido na Proposta Comercial, nos termos da Cláusula 3ª do presente Contrato.\n"
-                "5.1.21 Em caso de acidente de qualquer natureza envolvendo o(s) Equipamento(s), o CONTRATANTE é responsável por fornecer notificação imediata e escrita à World Comp, em prazo não superior a 24 (vinte e quatro) horas após o evento.\n"
-                "6 - CLÁUSULA SEXTA – SEGURO\n"
-                "6.1 O CONTRATANTE deverá providenciar o seguro do(s) Equipamento(s), de modo a cobrir o seu valor de propriedade, conforme estipulado nas respectivas Notas Fiscais de Remessa do(s) Equipamento(s), no qual a World Comp é a única beneficiária, abrangendo todos os riscos, inclusive contra terceiros, cobrindo, mas não se limitando a roubo, furto, incêndio, riscos de explosão, raios e inundações.\n"
-                "6.1.1 Caso o CONTRATANTE possua uma apólice coletiva de seguros que cubra todo o seu parque de máquinas em operação em seu estabelecimento, deverá incluir o(s) referido(s) Equipamento(s) objeto deste Contrato, na cobertura deste seguro.\n"
-                "6.1.2 Caso o CONTRATANTE não efetue o seguro na forma aqui estabelecida, assumirá total responsabilidade pelos riscos inerentes à operação do(s) Equipamento(s), e deverá indenizar integralmente a World Comp pelos danos causados ao mesmo.\n"
-                "6.1.3 A vigência do seguro deverá iniciar-se no primeiro dia posterior à liberação do(s) Equipamento(s) no local de operação, devendo o CONTRATANTE entregar uma cópia da apólice correspondente, tão logo a tenha disponível.\n"
-                "7 – CLÁUSULA SÉTIMA – RESCISÃO\n"
-                "7.1 As partes, desde já, manifestam sua ciência e concordância de que em caso de solicitação de resilição unilateral do presente, do contratado pelo CONTRATANTE, durante os três (03) primeiros meses de vigência, este arcará com multa não-compensatória a ser calculada da seguinte maneira: Valor da multa a a ser pago pela CONTRATANTE = Valor equivalente ao custo de 01 mês de locação.\n"
-                "7.1.1 Transcorrido os três (03) primeiros meses iniciais de vigência, o CONTRATANTE poderá resilir o presente Contrato desde que informe a World Comp com antecedência mínima de 30 (trinta) dias, através de notificação por escrito, não cabendo qualquer indenização ou multa.\n"
-                "7.1.2 A resilição unilateral por denúncia da World Comp independerá de decurso de qualquer prazo, devendo apenas observar a antecedência mínima de 30 (trinta) dias, através de notificação por escrito, não cabendo qualquer indenização ou multa.\n"
-                "7.2 As Partes poderão ainda considerar rescindido de pleno direito o presente Contrato, com imediata reintegração na posse do equipamento, mediante comunicação expressa, nos seguintes casos\n"
-                "7.2.1 Se o CONTRATANTE sublocar, penhorar ou repassar qualquer direito relativo ao(s) Equipamento(s) para terceiros, sem aprovação prévia e por escrito da World Comp..\n"
-                "7.2.2 Se o CONTRATANTE não efetuar o seguro do(s) Equipamento(s) na forma estabelecida na Cláusula Sexta.\n"
-                "7.2.3 Se o CONTRATANTE não utilizar corretamente o(s) Equipamento(s) e/ou não permitir a realização de intervenções de manutenção, de forma a mantê-lo(s) em boas condições de operação e funcionamento, conforme avaliação feita de comum acordo entre as Partes.\n"
-                "7.2.4 Se algum embargo, execução ou outro processo legal for aplicado contra o(s) Equipamento(s) ou parte dele ou ainda, contra quaisquer instalações onde estiver sendo usado.\n"
-                "7.2.5 Se o CONTRATANTE ceder ou transferir os direitos e obrigações oriundas do presente contrato para terceiros, sem a prévia e expressa autorização por parte da World Comp.\n"
-                "7.2.6 Se qualquer uma das Partes entrar em liquidação ou falência, convocar credores ou apontar um curador com respeito a qualquer dos seus empreendimentos ou bens.\n"
-                "7.3 Acordam as Partes, ainda, na possibilidade de busca e apreensão do(s) Equipamento(s) de forma imediata, mediante envio de notificação extrajudicial da World Comp ou protesto deste título.\n"
-                "7.4 Caso o(s) Equipamento(s) não seja(m) localizado(s) pela World Comp, esta poderá, independentemente de qualquer aviso ou notificação, cobrá-lo por via judicial, pleiteando o valor constante da(s) Nota(s) Fiscal(is) de Remessa, custas e outras despesas, além de honorários advocatícios desde já arbitrados em 20% (vinte por cento) sobre o valor pleiteado.\n"
-                "8- CLÁUSULA OITAVA – CASO FORTUITO OU FORÇA MAIOR\n"
-                "8.1 As Partes não responderão pelo eventual descumprimento de suas obrigações contratuais, se este resultar de caso fortuito ou força maior, nos termos do art. 393 do Código Civil Brasileiro.\n"
-                "a) Comunicar o fato à outra Parte, por escrito, no prazo de 10 (dez) dias da sua ocorrência ou de seu início, fornecendo-lhe detalhes sobre o evento.\n"
-                "b) Comprovar, perante a outra Parte, que o fato alegado realmente contribuiu para o descumprimento da obrigação.\n"
-                "8.3 Não poderá invocar a exceção de força maior ou caso fortuito a Parte que houver agido com culpa, concomitante ou anteriormente ao evento.\n"
-                "9– CLÁUSULA NONA – DA RESPONSABILIDADE TRABALHISTA\n"
-                "10.1Cada Parte será única e exclusivamente responsável pelas obrigações decorrentes dos acordos de trabalho de seus empregados, inclusive por eventuais inadimplementos trabalhistas em que possa incorrer, não podendo ser arguida solidariamente entre as Partes nem responsabilidade subsidiária, não existindo, por conseguinte, vinculação empregatícia entre os empregados das Partes, sendo cada uma responsável pelos salários, encargos, refeições e transporte de seus funcionários/prepostos.\n"
-                "10- CLÁUSULA DÉCIMA – DAS DISPOSIÇÕES GERAIS\n"
-                "11.1 Os termos e condições deste Contrato e dos demais documentos aqui presentes constituirão o completo acordo e entendimento entre as Partes e substituirão quaisquer comunicações prévias entre as partes, sejam elas verbais ou por escrito, incluindo qualquer acordo ou entendimento, variando ou estendendo o mesmo assunto.\n"
-                "11.2 Qualquer alteração no presente Contrato deverá ser feita mediante termo aditivo assinado pelas Partes.\n"
-                "11.3 Caso quaisquer das disposições deste Contrato sejam ou venham a se tornar legalmente ineficazes ou inválidas, a validade e o efeito das disposições restantes não serão afetados.\n"
-                "11.4 Não haverá responsabilidade da World Comp por perda de produção, perda de lucro, perda de uso, perda de contrato ou qualquer outra perda consequente ou indireta que seja.\n"
-                "11.5 O presente Contrato não estabelece entre as Partes qualquer forma de sociedade, associação, relação de emprego, responsabilidade solidária e conjunta, nem poderá ser entendido como mandato ou agenciamento.\n"
-                "11.6 A tolerância por qualquer das Partes, no que tange ao cumprimento das obrigações da outra Parte, não será considerada novação ou perdão, permanecendo as cláusulas deste Contrato em pleno vigor e efeito, na forma aqui prevista.\n"
-                "11.7 As Partes contratantes declaram, sob as penas da Lei, que os signatários do presente instrumento são seus representantes/procuradores legais, devidamente constituídos na forma dos respectivos atos constitutivos, com poderes para assumir as obrigações ora contraídas.\n"
-                "11.8 Todas as correspondências, notificações e comunicações permitidas ou exigidas entre as Partes deverão ser feitas por escrito, por meio de carta protocolada ou qualquer outro meio idôneo que confirme o recebimento (correio eletrônico,e-mail etc.), devendo ser encaminhadas aos endereços constantes do preâmbulo desse instrumento, sendo que, caso, no curso do presente instrumento ocorra modificação nos endereços de quaisquer das partes, a parte que tiver a mudança de endereço deverá comunicar a outra parte imediatamente.\n"
-                "11.9 O presente Contrato e suas obrigações vinculam as Partes, seus herdeiros e sucessores a qualquer título.\n"
-                "11.10 O presente Contrato e os direitos e obrigações dele decorrentes não poderão ser cedidos, transferidos ou sub-rogados por quaisquer das partes sem o prévio consentimento por escrito da outra.\n"
-                "11– CLÁUSULA DÉCIMA PRIMEIRA – FORO\n"
-                "Para dirimir definitivamente quaisquer dúvidas decorrentes do presente ajuste, as partes elegem, de comum acordo, o foro de São Bernardo do Campo, São Paulo, com renúncia expressa de qualquer outro, por mais especial que seja.\n"
-            ).format(num=numero_proposta)
-
-            # Substituir 'World Comp' pelo nome da filial (case-insensitive)
-            contrato_texto = re.sub(r"(?i)world\s*comp", locadora_nome, contrato_base)
-
-            # Concatenar introdução dinâmica + contrato
-            full_text = intro_dyn + contrato_texto
-
-            # Renderizar texto com quebras automáticas até o fim (páginas 7..13)
-            pdf.multi_cell(0, 5, clean_text(full_text))
-            # Página 14 - Assinaturas e encerramento (com margens seguras)
-            pdf.add_page()
-            left_margin = 15
-            right_margin = 15
-            usable_width = 210 - left_margin - right_margin
-            pdf.set_xy(left_margin, 35)
-            pdf.set_text_color(*pdf.baby_blue)
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(usable_width, 8, clean_text("ENCERRAMENTO E ASSINATURAS"), 0, 1, 'L')
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", '', 11)
-            texto_final = (
-                "Para dirimir definitivamente quaisquer dúvidas decorrentes do presente ajuste, as partes elegem, de comum acordo, o foro de São Bernardo do Campo, São Paulo, com renúncia expressa de qualquer outro, por mais especial que seja. \n\n"
-                "E, por estarem assim justas e contratadas, as partes assinam o presente instrumento em 02 (duas) vias de igual teor e para os mesmos fins e efeitos de direito, juntamente com as 02 (duas) testemunhas abaixo."
-            )
-            pdf.set_x(left_margin)
-            pdf.multi_cell(usable_width, 6, clean_text(texto_final))
-            pdf.ln(8)
-            data_long = format_date_long_pt(data_criacao)
-            pdf.set_x(left_margin)
-            pdf.cell(usable_width, 6, clean_text(f"São Bernardo do Campo, {data_long}."), 0, 1, 'L')
-            pdf.ln(16)
-            # Linhas e labels de assinatura com margens
-            col_w = (usable_width - 10) / 2
-            pdf.set_x(left_margin)
-            pdf.cell(col_w, 6, clean_text("______________________________________"), 0, 0, 'L')
-            pdf.cell(10, 6, "", 0, 0)
-            pdf.cell(col_w, 6, clean_text("______________________________________"), 0, 1, 'L')
-            # Contratante / Contratada com quebras
-            x_left = left_margin
-            y_row = pdf.get_y()
-            pdf.set_xy(x_left, y_row)
-            pdf.multi_cell(col_w, 6, clean_text(f"Contratante: {cliente_nome}"), 0, 'L')
-            height_left = pdf.get_y() - y_row
-            x_right = left_margin + col_w + 10
-            pdf.set_xy(x_right, y_row)
-            pdf.multi_cell(col_w, 6, clean_text(f"Contratada: {dados_filial.get('nome', '')}"), 0, 'L')
-            height_right = pdf.get_y() - y_row
-            row_h = max(height_left, height_right)
-            pdf.set_y(y_row + row_h)
-            cnpj_cli = format_cnpj(cliente_cnpj) if cliente_cnpj else ""
-            y_row = pdf.get_y()
-            pdf.set_xy(x_left, y_row)
-            pdf.multi_cell(col_w, 6, clean_text(f"CNPJ: {cnpj_cli}"), 0, 'L')
-            height_left = pdf.get_y() - y_row
-            pdf.set_xy(x_right, y_row)
-            pdf.multi_cell(col_w, 6, clean_text(f"CNPJ: {dados_filial.get('cnpj', '')}"), 0, 'L')
-            height_right = pdf.get_y() - y_row
-            row_h = max(height_left, height_right)
-            pdf.set_y(y_row + row_h)
-            pdf.ln(16)
-            # Testemunhas
-            for i in range(2):
+                    pass
+                if imagem_p7:
+                    try:
+                        from PIL import Image
+                        # Reduzir em ~30% com bounding box menor (70x24)
+                        max_w, max_h = 70, 24
+                        img = Image.open(imagem_p7)
+                        iw, ih = img.size
+                        ratio = min(max_w / iw, max_h / ih)
+                        w = iw * ratio
+                        h = ih * ratio
+                    except Exception:
+                        w, h = 70, 24
+                    x = (210 - w) / 2
+                    y = 77
+                    pdf.image(imagem_p7, x=x, y=y, w=w, h=h)
+                    pdf.set_y(y + h + 8)
+                else:
+                    pdf.set_y(82)
+                pdf.set_text_color(*pdf.baby_blue)
+                pdf.set_font("Arial", 'B', 12)
+                pdf.cell(0, 8, clean_text("TERMOS E CONDIÇÕES GERAIS DE LOCAÇÃO DE EQUIPAMENTO"), 0, 1, 'L')
+                pdf.set_text_color(0, 0, 0)
+                pdf.set_font("Arial", '', 11)
+
+                # Montar texto do contrato com substituições dinâmicas
+                locadora_nome = dados_filial.get('nome', 'WORLD COMP')
+                locadora_endereco = dados_filial.get('endereco', '')
+                locadora_cnpj = dados_filial.get('cnpj', 'N/A')
+                locataria_nome = cliente_nome
+                proposta_num = numero_proposta
+                proposta_data = format_date(data_criacao)
+
+                intro_dyn = (
+                    f"Pelo presente instrumento particular,\n"
+                    f"LOCADORA: {locadora_nome}, com sede em {locadora_endereco}, inscrita no CNPJ/MF sob nº {locadora_cnpj}.\n"
+                    f"LOCATÁRIA: {locataria_nome}\n"
+                    f"{locadora_nome} e CONTRATANTE serão referidas individualmente como Parte e, em conjunto, Partes.\n"
+                    f"As partes qualificadas, por seus representantes legais ao final assinados, têm entre si justo e acertado os presentes Termos e Condições Gerais de Locação de Equipamento, denominado simplesmente Contrato, que se regerá pelas cláusulas e condições seguintes, com efeitos a partir da data {proposta_data} da Proposta Comercial nº {proposta_num}.\n\n"
+                )
+
+                contrato_base = (
+                    "1 -CLÁUSULA PRIMEIRA – DO OBJETO\n"
+                    "O presente Contrato consiste na locação do(s) Equipamento(s) mencionado(s) NA Proposta Comercial Preço anexa, denominados simplesmente Equipamento(s), de propriedade da World Comp, como parte da Locação de Compressores oferecida ao CONTRATANTE, para uso em suas atividades industriais, sendo proibido o uso para outros fins.\n"
+                    "Caberá ao CONTRATANTE a obrigação de manter o(s) Equipamento(s) em suas dependências, em endereço descrito como sua sede no preâmbulo do presente instrumento, obrigando-se a solicitar previamente e por escrito à World Comp eventual alteração de sua localização, sob pena de expressa e inequívoca violação do presente instrumento, o que autorizará a incidência de multa de 10% (dez por cento), em caráter não compensatório, sobre o valor do Contrato, bem como facultará à World Comp a rescisão do presente instrumento, com a imediata retomada liminar do(s) Equipamento(s).\n"
+                    "Referida Proposta Comercial dispõe as descrições e especificações técnicas do(s) equipamento(s) locado(s), bem como as condições comerciais para a presente locação.\n"
+                    "Caso ocorra qualquer alteração relevante nas condições de operação dos Equipamento(s) (tais como condições de operação, escopo do trabalho, ou ainda nas condições ambientais, qualidade do ar, ventilação, temperatura, fornecimento de água e energia elétrica) ou do local ou regime de trabalho do equipamento, a World Comp deverá ser notificada previamente, por escrito.\n"
+                    "Nessa hipótese, o presente Contrato deverá ser revisto pelas Partes, a fim de adaptá-lo à nova realidade, assumindo a CONTRATANTE integral responsabilidade antes da avaliação pela World Comp das novas condições e/ou da celebração de termo aditivo que reflita as novas condições.\n"
+                    "Estão incluídos no objeto deste instrumento:\n"
+                    "Equipamento(s): Equipamentos listados de acordo com relação descrita na Proposta Comercial Preço.\n"
+                    "Partida técnica dos Equipamento(s), sendo obrigatório sua realização somente, e exclusivamente, por funcionários especializados da World Comp, em horário comercial, sendo de responsabilidade do CONTRATANTE a instalação do(s) equipamento(s) contratados de acordo com o manual de instalação.\n"
+                    "Peças, componentes e insumos específicos para cada visita de manutenção preventiva ou corretiva\n"
+                    "A World Comp, reserva o direito realizar as intervenções técnicas que entender necessárias para o bom funcionamento e manutenção do(s) Equipamento(s), incluindo substituição de peças e produtos utilizados nas manutenções preventivas e/ou corretivas, em especial alterando o lubrificante utilizado conforme recomendação para melhor desempenho, consumo energético e extensão da vida útil do(s) Equipamento(s) e seus componentes.\n"
+                    "Estão excluídos do objeto deste instrumento:\n"
+                    "Atendimento para manutenções preventivas e/ou corretivas fora do horário comercial entendido como das 8:00h às 17:00h, de segunda a sexta-feira, salvo especificação em contrário na Proposta.\n"
+                    "Custos com componentes ou peças que tenham sido danificados por negligência, mau uso, falha operacional ou elétrica da contratante.\n"
+                    "O presente Contrato, alcança não apenas o(s) Equipamento(s) já relacionados na Proposta Comercial, mas também todos os demais que poderão vir a ser enviados, através de solicitação do CONTRATANTE, conforme as respectivas propostas comerciais futuras, e por meio de Notas Fiscais de Remessa emitidas pela World Comp e termos aditivos a serem celebrados entre as Partes.\n"
+                    "– CLÁUSULA SEGUNDA – DA VIGÊNCIA EXECUÇÃO\n"
+                    "O presente Contrato terá o seu início, com efeitos a partir da data de assinatura desta Proposta Comercial nº {num} de disponibilização do(s) Equipamento(s) pela World Comp, vigerá pelo prazo definido na Proposta Comercial, sendo renovado automaticamente ao final do contrato até que haja manifestação das partes.\n"
+                    "Quando do encerramento do presente Contrato o CONTRATANTE se compromete a devolver o(s) Equipamento(s) nas mesmas condições de uso e manutenção em que entregue(s), salvo desgaste natural do tempo, conforme condições normais e aprovada de uso.\n"
+                    " No término deste Contrato será realizada uma nova inspeção em conjunto pelas Partes, da qual será elaborado um relatório, que deverá ser assinado por representantes de ambas as Partes, detalhando as condições do(s) Equipamento(s), para devolução.\n"
+                    "Se na inspeção conjunta, forem constatados que o(s) Equipamento(s), por razões técnicas ou mecânicas, não se encontra(m) dentro das condições mínimas exigidas para o seu funcionamento e/ou operação, em decorrência de mau uso ou quaisquer atos, fatos ou danos imputáveis ou causados pelo CONTRATANTE, este arcará com os custos de reparo do(s) Equipamento(s).\n"
+                    "Não obstante, será de responsabilidade do CONTRATANTE qualquer manutenção corretiva, cuja necessidade seja identificada durante a vigência contratual, em decorrência de negligência ou má operação do(s) Equipamento(s), a qual será cobrada à parte, mediante apresentação de orçamento pela World Comp, em cada caso.\n"
+                    "Durante o período em que permanecer na posse do(s) Equipamento(s), o representante legal do CONTRATANTE, qualificado abaixo e que assina este documento, ficará como depositário fiel do(s) Equipamento(s).\n"
+                    "3- CLÁUSULA TERCEIRA – DAS CONDIÇÕES DE PAGAMENTO\n"
+                    "3.1 O CONTRATANTE pagará à World Comp o valor descrito e em conformidade com as condições constantes da Proposta Comercial.\n"
+                    "3.1.2 A CONTRATANTE efetuará os pagamentos através de boleto bancário ou depósito em conta, servindo os respectivos comprovantes de pagamento claramente identificados como prova de quitação, salvo se previsto de forma contrária na Proposta.\n"
+                    "3.2 A ausência de pagamento na data estipulada, inclusive na hipótese de não recebimento do boleto bancário, observado o disposto na Cláusula acima, implicará na incidência de multa moratória de 2% (doia por cento) sobre o valor do débito, além de juros de 1% (um por cento) ao mês, calculados 'pro rata dia', a partir do dia seguinte ao do vencimento.\n"
+                    "3.2.1 Caso o atraso dos pagamentos devidos pelo CONTRATANTE prolongue-se por prazo superior a 03 (três) meses consecutivos, a World Comp poderá encerrar o Contrato imediatamente.\n"
+                    "3.3 O preço mencionado na proposta comercial será reajustado automaticamente a cada 12 (doze) meses de vigência contratual ou em períodos inferiores, caso a legislação da época assim permita.\n"
+                    "3.4 O preço ora estabelecido está sujeito à renegociação, na hipótese de qualquer mudança nas condições operacionais dos equipamentos sob contrato.\n"
+                    "4- CLÁUSULA QUARTA – DAS RESPONSABILIDADES DA WORLD COMP\n"
+                    "4.1 A partida técnica, ou seja, acionar o funcionamento do(s) Equipamento(s) no início da locação, bem como o seu desligamento no término deste Contrato\n"
+                    "4.1.1 Contatar o CONTRATANTE previamente à data de cada visita.\n"
+                    "4.1.2 Fornecer ao CONTRATANTE, após cada visita, ordem de serviço que deverá ser assinada por esta., relatando o estado do(s) Equipamento(s) após as visitas realizadas e incluindo a lista de peças aplicadas, bem como relação das intervenções realizadas.\n"
+                    "4.1.3 Enviar técnicos para as manutenções munidos de equipamentos de proteção pessoal, trajando uniformes devidamente identificados.\n"
+                    "4.1.4 Informar a necessidade de eventuais manutenções corretivas necessárias à boa operação do compressor, iniciando a execução de tais atendimentos, se aplicável.\n"
+                    "4.2 Não obstante os esforços da World Comp, fica desde já estabelecido que o atendimento aqui disposto não configura a imediata solução de eventual problema, já que somente durante o atendimento corretivo a World Comp avaliará necessidade de utilização/substituição de peça(s) a(s) qual(is) poderá(ão) não estar disponível(is) no momento do atendimento.\n"
+                    "4.3 Em caso de morosidade superior a 1 (uma) hora entre a chegada ao CONTRATANTE e a liberação do técnico da World Comp para executar as intervenções programadas ou, ainda, não disponibilidade do(s) Equipamento(s) à World Comp, os custos da espera ou reprogramação da visita serão repassados ao CONTRATANTE, conforme tabela vigente de preços praticados.\n"
+                    "5 - CLÁUSULA QUINTA - DAS RESPONSABILIDADES DO CONTRATANTE\n"
+                    "5.1 Solicitar a partida técnica após a instalação do(s) Equipamento(s).\n"
+                    "5.1.1 Utilizar o(s) Equipamento(s) para os seus estritos fins, obedecendo às recomendações fornecidas pela World Comp, sob pena de, em assim não procedendo, incorrer nos ônus previstos no artigo 570 do novo Código Civil e demais cominações contratuais e legais.\n"
+                    "5.1.2Manter e guardar o(s) Equipamento(s) como se seu fosse(m), desde a sua [retirada | entrega] até sua efetiva devolução a World Comp, ficando responsável pela sua conservação e obrigando-se a devolvê-lo em perfeito estado, respeito desgastes naturais de uso, limpo e nas condições de uso que o encontrou quando da retirada, sem qualquer dano ou avaria, mesmo se provocados por incêndios, roubo, uso indevido ou qualquer outra coisa, quer por sua culpa, quer por culpa de terceiros, obrigando-se ao ressarcimento dos danos causados e ficando responsável ainda pela sua conservação e contratação de seguro, nos termos da Cláusula Sexta, abaixo.\n"
+                    "5.1.3Devolver o(s) Equipamento(s) tão logo rescindido de direito o presente Contrato, incorrendo, se assim não o fizer, no arbitramento de aluguéis e demais consectários a que alude o artigo 575 do Código Civil.\n"
+                    "5.1.4 Manter, na qualidade de única responsável pelo(s) Equipamento(s), a World Comp isenta de todas e quaisquer reclamações, reivindicações, responsabilidades, perdas, danos, custos e despesas que possam a ela serem imputados por terceiros, decorrentes da locação ora ajustada, incluindo empregados e terceiros sob a responsabilidade do CONTRATANTE. Cabe ao CONTRATANTE, informar imediatamente e por escrito à World Comp quaisquer reclamações dessa natureza, contra ele próprio ou contra a World Comp.\n"
+                    "5.1.5 Indenizar a World Comp , por qualquer perda ou dano causado ao(s) Equipamento(s), pelo valor total de cada componente eventualmente perdido ou avariado.\n"
+                    "5.1.6 Realizar a inspeção/manutenção diária e semanal (8 e 40 horas) da(s) máquina(s), conforme indicado Manual de Instruções.\n"
+                    "5.1.7 Utilizar somente lubrificantes, filtros de ar e de óleo, separador de óleo – quando aplicável, e peças originais, genuínas ou aprovadas pela World Comp.\n"
+                    "5.1.8 Disponibilizar ventilação adequada ao redor do(s) Equipamento(s) (de acordo com recomendações da World Comp e limpar regulamente o(s) Equipamento(s)\n"
+                    "5.1.9 Notificar a World Comp imediatamente e por escrito sobre quaisquer mudanças na operação ou nas condições do local e de quaisquer problemas no funcionamento ou falhas que possam influenciar o funcionamento apropriado do(s) Equipamento(s).\n"
+                    "5.1.10Permitir que a World Comp tenha acesso livre e integral aos equipamentos durante o horário comercial normal a fim de realizar visitas de serviço programadas, assegurando ainda, o direito de vistoria a qualquer momento dentro do horário comercial normal, independente de prévio aviso.\n"
+                    "5.1.11 Tomar as medidas necessárias recomendadas pela World Comp a título de reparo.\n"
+                    "5.1.12 Prestar assistência médica gratuita ao pessoal da World Comp nas mesmas condições que a oferecida aos funcionários do CONTRATANTE, em caso de acidente ou emergência dentro de suas dependências. Se o acidente ou emergência exigir maiores cuidados ou tratamentos médicos, a(s) pessoa(s) acidentada(as) deverá(ão) ser conduzida(s) ao centro médico mais próximo.\n"
+                    "5.1.13 Fornecer todas as condições necessárias para a execução das manutenções, tais como equipamentos para elevação/transporte interno, iluminação, água e local adequados para limpeza de resfriadores e demais componentes, mão de obra para eventuais necessidades, etc.\n"
+                    "5.1.14 Fornecer toda a instalação elétrica de acordo com manual de instruções do equipamento, e seguir as recomendações para a sala de compressores e o meio ambiente.\n"
+                    "5.1.15 Fornecer edificações ou modificações para a sala de compressores, dutos para cabos elétricos e outros fins, bem como instalações de água se necessário, e todas as instalações diferentes do sistema de ar comprimido.\n"
+                    "5.1.16Preparar todas as instalações de tubulação necessária para a passagem de ar comprimido a partir da sala do compressor para o local de consumo.\n"
+                    "5.1.17 Não realizar qualquer intervenção no equipamento sem prévio consentimento da World Comp, por escrito.\n"
+                    "5.1.18 Manter registro atualizado das ocorrências com o(s) Equipamento(s)\n"
+                    "5.1.19 Solicitar formalmente as manutenções corretivas à World Comp e confirmar, antecipadamente, que o equipamento está disponível para a realização da manutenção preventiva na data combinada, sob pena de se caracterizar mau uso do(s) Equipamento(s), sendo permitido apenas um aditamento de manutenção já agendada, observado período máximo de adiamento de 45 (quarenta e cinco) dias. A hipótese de adiamento de qualquer manutenção por indisponibilidade do(s) Equipamento(s) por prazo superior a 45 (quarenta e cinco) dias facultará à World Comp a rescisão do presente instrumento, com a imediata retomada liminar do(s) Equipamento(s).\n"
+                    "5.1.20 Efetivar o pagamento devido na Proposta Comercial, nos termos da Cláusula 3ª do presente Contrato.\n"
+                    "5.1.21 Em caso de acidente de qualquer natureza envolvendo o(s) Equipamento(s), o CONTRATANTE é responsável por fornecer notificação imediata e escrita à World Comp, em prazo não superior a 24 (vinte e quatro) horas após o evento.\n"
+                    "6 - CLÁUSULA SEXTA – SEGURO\n"
+                    "6.1 O CONTRATANTE deverá providenciar o seguro do(s) Equipamento(s), de modo a cobrir o seu valor de propriedade, conforme estipulado nas respectivas Notas Fiscais de Remessa do(s) Equipamento(s), no qual a World Comp é a única beneficiária, abrangendo todos os riscos, inclusive contra terceiros, cobrindo, mas não se limitando a roubo, furto, incêndio, riscos de explosão, raios e inundações.\n"
+                    "6.1.1 Caso o CONTRATANTE possua uma apólice coletiva de seguros que cubra todo o seu parque de máquinas em operação em seu estabelecimento, deverá incluir o(s) referido(s) Equipamento(s) objeto deste Contrato, na cobertura deste seguro.\n"
+                    "6.1.2 Caso o CONTRATANTE não efetue o seguro na forma aqui estabelecida, assumirá total responsabilidade pelos riscos inerentes à operação do(s) Equipamento(s), e deverá indenizar integralmente a World Comp pelos danos causados ao mesmo.\n"
+                    "6.1.3 A vigência do seguro deverá iniciar-se no primeiro dia posterior à liberação do(s) Equipamento(s) no local de operação, devendo o CONTRATANTE entregar uma cópia da apólice correspondente, tão logo a tenha disponível.\n"
+                    "7 – CLÁUSULA SÉTIMA – RESCISÃO\n"
+                    "7.1 As partes, desde já, manifestam sua ciência e concordância de que em caso de solicitação de resilição unilateral do presente, do contratado pelo CONTRATANTE, durante os três (03) primeiros meses de vigência, este arcará com multa não-compensatória a ser calculada da seguinte maneira: Valor da multa a a ser pago pela CONTRATANTE = Valor equivalente ao custo de 01 mês de locação.\n"
+                    "7.1.1 Transcorrido os três (03) primeiros meses iniciais de vigência, o CONTRATANTE poderá resilir o presente Contrato desde que informe a World Comp com antecedência mínima de 30 (trinta) dias, através de notificação por escrito, não cabendo qualquer indenização ou multa.\n"
+                    "7.1.2 A resilição unilateral por denúncia da World Comp independerá de decurso de qualquer prazo, devendo apenas observar a antecedência mínima de 30 (trinta) dias, através de notificação por escrito, não cabendo qualquer indenização ou multa.\n"
+                    "7.2 As Partes poderão ainda considerar rescindido de pleno direito o presente Contrato, com imediata reintegração na posse do equipamento, mediante comunicação expressa, nos seguintes casos\n"
+                    "7.2.1 Se o CONTRATANTE sublocar, penhorar ou repassar qualquer direito relativo ao(s) Equipamento(s) para terceiros, sem aprovação prévia e por escrito da World Comp..\n"
+                    "7.2.2 Se o CONTRATANTE não efetuar o seguro do(s) Equipamento(s) na forma estabelecida na Cláusula Sexta.\n"
+                    "7.2.3 Se o CONTRATANTE não utilizar corretamente o(s) Equipamento(s) e/ou não permitir a realização de intervenções de manutenção, de forma a mantê-lo(s) em boas condições de operação e funcionamento, conforme avaliação feita de comum acordo entre as Partes.\n"
+                    "7.2.4 Se algum embargo, execução ou outro processo legal for aplicado contra o(s) Equipamento(s) ou parte dele ou ainda, contra quaisquer instalações onde estiver sendo usado.\n"
+                    "7.2.5 Se o CONTRATANTE ceder ou transferir os direitos e obrigações oriundas do presente contrato para terceiros, sem a prévia e expressa autorização por parte da World Comp.\n"
+                    "7.2.6 Se qualquer uma das Partes entrar em liquidação ou falência, convocar credores ou apontar um curador com respeito a qualquer dos seus empreendimentos ou bens.\n"
+                    "7.3 Acordam as Partes, ainda, na possibilidade de busca e apreensão do(s) Equipamento(s) de forma imediata, mediante envio de notificação extrajudicial da World Comp ou protesto deste título.\n"
+                    "7.4 Caso o(s) Equipamento(s) não seja(m) localizado(s) pela World Comp, esta poderá, independentemente de qualquer aviso ou notificação, cobrá-lo por via judicial, pleiteando o valor constante da(s) Nota(s) Fiscal(is) de Remessa, custas e outras despesas, além de honorários advocatícios desde já arbitrados em 20% (vinte por cento) sobre o valor pleiteado.\n"
+                    "8- CLÁUSULA OITAVA – CASO FORTUITO OU FORÇA MAIOR\n"
+                    "8.1 As Partes não responderão pelo eventual descumprimento de suas obrigações contratuais, se este resultar de caso fortuito ou força maior, nos termos do art. 393 do Código Civil Brasileiro.\n"
+                    "a) Comunicar o fato à outra Parte, por escrito, no prazo de 10 (dez) dias da sua ocorrência ou de seu início, fornecendo-lhe detalhes sobre o evento.\n"
+                    "b) Comprovar, perante a outra Parte, que o fato alegado realmente contribuiu para o descumprimento da obrigação.\n"
+                    "8.3 Não poderá invocar a exceção de força maior ou caso fortuito a Parte que houver agido com culpa, concomitante ou anteriormente ao evento.\n"
+                    "9– CLÁUSULA NONA – DA RESPONSABILIDADE TRABALHISTA\n"
+                    "10.1Cada Parte será única e exclusivamente responsável pelas obrigações decorrentes dos acordos de trabalho de seus empregados, inclusive por eventuais inadimplementos trabalhistas em que possa incorrer, não podendo ser arguida solidariamente entre as Partes nem responsabilidade subsidiária, não existindo, por conseguinte, vinculação empregatícia entre os empregados das Partes, sendo cada uma responsável pelos salários, encargos, refeições e transporte de seus funcionários/prepostos.\n"
+                    "10- CLÁUSULA DÉCIMA – DAS DISPOSIÇÕES GERAIS\n"
+                    "11.1 Os termos e condições deste Contrato e dos demais documentos aqui presentes constituirão o completo acordo e entendimento entre as Partes e substituirão quaisquer comunicações prévias entre as partes, sejam elas verbais ou por escrito, incluindo qualquer acordo ou entendimento, variando ou estendendo o mesmo assunto.\n"
+                    "11.2 Qualquer alteração no presente Contrato deverá ser feita mediante termo aditivo assinado pelas Partes.\n"
+                    "11.3 Caso quaisquer das disposições deste Contrato sejam ou venham a se tornar legalmente ineficazes ou inválidas, a validade e o efeito das disposições restantes não serão afetados.\n"
+                    "11.4 Não haverá responsabilidade da World Comp por perda de produção, perda de lucro, perda de uso, perda de contrato ou qualquer outra perda consequente ou indireta que seja.\n"
+                    "11.5 O presente Contrato não estabelece entre as Partes qualquer forma de sociedade, associação, relação de emprego, responsabilidade solidária e conjunta, nem poderá ser entendido como mandato ou agenciamento.\n"
+                    "11.6 A tolerância por qualquer das Partes, no que tange ao cumprimento das obrigações da outra Parte, não será considerada novação ou perdão, permanecendo as cláusulas deste Contrato em pleno vigor e efeito, na forma aqui prevista.\n"
+                    "11.7 As Partes contratantes declaram, sob as penas da Lei, que os signatários do presente instrumento são seus representantes/procuradores legais, devidamente constituídos na forma dos respectivos atos constitutivos, com poderes para assumir as obrigações ora contraídas.\n"
+                    "11.8 Todas as correspondências, notificações e comunicações permitidas ou exigidas entre as Partes deverão ser feitas por escrito, por meio de carta protocolada ou qualquer outro meio idôneo que confirme o recebimento (correio eletrônico,e-mail etc.), devendo ser encaminhadas aos endereços constantes do preâmbulo desse instrumento, sendo que, caso, no curso do presente instrumento ocorra modificação nos endereços de quaisquer das partes, a parte que tiver a mudança de endereço deverá comunicar a outra parte imediatamente.\n"
+                    "11.9 O presente Contrato e suas obrigações vinculam as Partes, seus herdeiros e sucessores a qualquer título.\n"
+                    "11.10 O presente Contrato e os direitos e obrigações dele decorrentes não poderão ser cedidos, transferidos ou sub-rogados por quaisquer das partes sem o prévio consentimento por escrito da outra.\n"
+                    "11– CLÁUSULA DÉCIMA PRIMEIRA – FORO\n"
+                    "Para dirimir definitivamente quaisquer dúvidas decorrentes do presente ajuste, as partes elegem, de comum acordo, o foro de São Bernardo do Campo, São Paulo, com renúncia expressa de qualquer outro, por mais especial que seja.\n"
+                ).format(num=numero_proposta)
+
+                # Substituir 'World Comp' pelo nome da filial (case-insensitive)
+                contrato_texto = re.sub(r"(?i)world\s*comp", locadora_nome, contrato_base)
+
+                # Concatenar introdução dinâmica + contrato
+                full_text = intro_dyn + contrato_texto
+
+                # Renderizar texto com quebras automáticas até o fim (páginas 7..13)
+                pdf.multi_cell(0, 5, clean_text(full_text))
+                # Página 14 - Assinaturas e encerramento (com margens seguras)
+                pdf.add_page()
+                left_margin = 15
+                right_margin = 15
+                usable_width = 210 - left_margin - right_margin
+                pdf.set_xy(left_margin, 35)
+                pdf.set_text_color(*pdf.baby_blue)
+                pdf.set_font("Arial", 'B', 12)
+                pdf.cell(usable_width, 8, clean_text("ENCERRAMENTO E ASSINATURAS"), 0, 1, 'L')
+                pdf.set_text_color(0, 0, 0)
+                pdf.set_font("Arial", '', 11)
+                texto_final = (
+                    "Para dirimir definitivamente quaisquer dúvidas decorrentes do presente ajuste, as partes elegem, de comum acordo, o foro de São Bernardo do Campo, São Paulo, com renúncia expressa de qualquer outro, por mais especial que seja. \n\n"
+                    "E, por estarem assim justas e contratadas, as partes assinam o presente instrumento em 02 (duas) vias de igual teor e para os mesmos fins e efeitos de direito, juntamente com as 02 (duas) testemunhas abaixo."
+                )
                 pdf.set_x(left_margin)
-                pdf.cell(col_w, 6, clean_text("______________________________________"), 0, 0, 'L')
-                pdf.cell(10, 6, "", 0, 0)
-                pdf.cell(col_w, 6, clean_text("_______________________________________"), 0, 1, 'L')
+                pdf.multi_cell(usable_width, 6, clean_text(texto_final))
+                pdf.ln(8)
+                data_long = format_date_long_pt(data_criacao)
                 pdf.set_x(left_margin)
-                pdf.cell(col_w, 6, clean_text("Nome:"), 0, 0, 'L')
-                pdf.cell(10, 6, "", 0, 0)
-                pdf.cell(col_w, 6, clean_text("Nome:"), 0, 1, 'L')
+                pdf.cell(usable_width, 6, clean_text(f"São Bernardo do Campo, {data_long}."), 0, 1, 'L')
+                pdf.ln(16)
+                # Linhas e labels de assinatura com margens
+                col_w = (usable_width - 10) / 2
                 pdf.set_x(left_margin)
-                pdf.cell(col_w, 6, clean_text("CPF:"), 0, 0, 'L')
+                pdf.cell(col_w, 6, clean_text("______________________________________"), 0, 0, 'L')
                 pdf.cell(10, 6, "", 0, 0)
-                pdf.cell(col_w, 6, clean_text("CPF:"), 0, 1, 'L')
-        else:
-            # Compra: manter comportamento existente
-            if esboco_servico:
+                pdf.cell(col_w, 6, clean_text("______________________________________"), 0, 1, 'L')
+                # Contratante / Contratada com quebras
+                x_left = left_margin
+                y_row = pdf.get_y()
+                pdf.set_xy(x_left, y_row)
+                pdf.multi_cell(col_w, 6, clean_text(f"Contratante: {cliente_nome}"), 0, 'L')
+                height_left = pdf.get_y() - y_row
+                x_right = left_margin + col_w + 10
+                pdf.set_xy(x_right, y_row)
+                pdf.multi_cell(col_w, 6, clean_text(f"Contratada: {dados_filial.get('nome', '')}"), 0, 'L')
+                height_right = pdf.get_y() - y_row
+                row_h = max(height_left, height_right)
+                pdf.set_y(y_row + row_h)
+                cnpj_cli = format_cnpj(cliente_cnpj) if cliente_cnpj else ""
+                y_row = pdf.get_y()
+                pdf.set_xy(x_left, y_row)
+                pdf.multi_cell(col_w, 6, clean_text(f"CNPJ: {cnpj_cli}"), 0, 'L')
+                height_left = pdf.get_y() - y_row
+                pdf.set_xy(x_right, y_row)
+                pdf.multi_cell(col_w, 6, clean_text(f"CNPJ: {dados_filial.get('cnpj', '')}"), 0, 'L')
+                height_right = pdf.get_y() - y_row
+                row_h = max(height_left, height_right)
+                pdf.set_y(y_row + row_h)
+                pdf.ln(16)
+                # Testemunhas
+                for i in range(2):
+                    pdf.set_x(left_margin)
+                    pdf.cell(col_w, 6, clean_text("______________________________________"), 0, 0, 'L')
+                    pdf.cell(10, 6, "", 0, 0)
+                    pdf.cell(col_w, 6, clean_text("_______________________________________"), 0, 1, 'L')
+                    pdf.set_x(left_margin)
+                    pdf.cell(col_w, 6, clean_text("Nome:"), 0, 0, 'L')
+                    pdf.cell(10, 6, "", 0, 0)
+                    pdf.cell(col_w, 6, clean_text("Nome:"), 0, 1, 'L')
+                    pdf.set_x(left_margin)
+                    pdf.cell(col_w, 6, clean_text("CPF:"), 0, 0, 'L')
+                    pdf.cell(10, 6, "", 0, 0)
+                    pdf.cell(col_w, 6, clean_text("CPF:"), 0, 1, 'L')
+            else:
+                # Compra: manter comportamento existente
+                if esboco_servico:
+                    pdf.add_page()
+                    # Primeira página da seção: mais alto; complementares: afastar ainda mais do cabeçalho
+                    pdf.begin_section('esboco', top_first=35, bottom_first=40, top_cont=130, bottom_cont=40, title="ESBOÇO DO SERVIÇO A SER EXECUTADO")
+                    pdf.set_y(35)
+                    pdf.set_font("Arial", 'B', 14)
+                    pdf.cell(0, 8, clean_text("ESBOÇO DO SERVIÇO A SER EXECUTADO"), 0, 1, 'L')
+                    pdf.ln(5)
+                    pdf.set_font("Arial", '', 11)
+                    pdf.multi_cell(0, 6, clean_text(esboco_servico))
+                    # Restaurar margens padrão
+                    pdf.end_section()
+        
+            # =====================================================
+            # PÁGINA 5: RELAÇÃO DE PEÇAS A SEREM SUBSTITUÍDAS
+            # =====================================================
+            if relacao_pecas_substituir and not ((tipo_cotacao or '').lower() in ('locação','locacao')):
                 pdf.add_page()
-                # Primeira página da seção: mais alto; complementares: afastar ainda mais do cabeçalho
-                pdf.begin_section('esboco', top_first=35, bottom_first=40, top_cont=130, bottom_cont=40, title="ESBOÇO DO SERVIÇO A SER EXECUTADO")
+                pdf.begin_section('relacao', top_first=35, bottom_first=40, top_cont=130, bottom_cont=40, title="RELAÇÃO DE PEÇAS A SEREM SUBSTITUÍDAS")
                 pdf.set_y(35)
                 pdf.set_font("Arial", 'B', 14)
-                pdf.cell(0, 8, clean_text("ESBOÇO DO SERVIÇO A SER EXECUTADO"), 0, 1, 'L')
+                pdf.cell(0, 8, clean_text("RELAÇÃO DE PEÇAS A SEREM SUBSTITUÍDAS"), 0, 1, 'L')
                 pdf.ln(5)
                 pdf.set_font("Arial", '', 11)
-                pdf.multi_cell(0, 6, clean_text(esboco_servico))
-                # Restaurar margens padrão
+                pdf.multi_cell(0, 6, clean_text(relacao_pecas_substituir))
                 pdf.end_section()
-        
-        # =====================================================
-        # PÁGINA 5: RELAÇÃO DE PEÇAS A SEREM SUBSTITUÍDAS
-        # =====================================================
-        if relacao_pecas_substituir and not ((tipo_cotacao or '').lower() in ('locação','locacao')):
-            pdf.add_page()
-            pdf.begin_section('relacao', top_first=35, bottom_first=40, top_cont=130, bottom_cont=40, title="RELAÇÃO DE PEÇAS A SEREM SUBSTITUÍDAS")
-            pdf.set_y(35)
-            pdf.set_font("Arial", 'B', 14)
-            pdf.cell(0, 8, clean_text("RELAÇÃO DE PEÇAS A SEREM SUBSTITUÍDAS"), 0, 1, 'L')
-            pdf.ln(5)
-            pdf.set_font("Arial", '', 11)
-            pdf.multi_cell(0, 6, clean_text(relacao_pecas_substituir))
-            pdf.end_section()
-
-        # =====================================================
-        # PÁGINAS SEGUINTES: DETALHES DA PROPOSTA (somente não-locação)
-        # =====================================================
-        if not ((tipo_cotacao or '').lower() in ('locação','locacao')):
-            pdf.add_page()
-            # Dados da proposta
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 8, clean_text(f"PROPOSTA Nº {numero_proposta}"), 0, 1, 'L')
-            pdf.set_font("Arial", '', 11)
-            pdf.cell(0, 6, clean_text(f"Data: {format_date(data_criacao)}"), 0, 1, 'L')
-            pdf.cell(0, 6, clean_text(f"Responsável: {responsavel_nome}"), 0, 1, 'L')
-            pdf.cell(0, 6, clean_text(f"Telefone Responsável: {format_phone(responsavel_telefone)}"), 0, 1, 'L')
-            pdf.ln(10)
-
-            # Dados do cliente
-            pdf.set_font("Arial", 'B', 11)
-            pdf.cell(0, 6, clean_text("DADOS DO CLIENTE:"), 0, 1, 'L')
-            pdf.set_font("Arial", '', 11)
-            
-            cliente_nome_display = cliente_nome_fantasia if cliente_nome_fantasia else cliente_nome
-            pdf.cell(0, 5, clean_text(f"Empresa: {cliente_nome_display}"), 0, 1, 'L')
-            if cliente_cnpj:
-                pdf.cell(0, 5, clean_text(f"CNPJ: {format_cnpj(cliente_cnpj)}"), 0, 1, 'L')
-            if contato_nome and contato_nome != "Não informado":
-                pdf.cell(0, 5, clean_text(f"Contato: {contato_nome}"), 0, 1, 'L')
-            pdf.ln(5)
 
-            # Dados do compressor
-            if modelo_compressor or numero_serie_compressor:
+            # =====================================================
+            # PÁGINAS SEGUINTES: DETALHES DA PROPOSTA (somente não-locação)
+            # =====================================================
+            if not ((tipo_cotacao or '').lower() in ('locação','locacao')):
+                pdf.add_page()
+                # Dados da proposta
+                pdf.set_font("Arial", 'B', 12)
+                pdf.cell(0, 8, clean_text(f"PROPOSTA Nº {numero_proposta}"), 0, 1, 'L')
+                pdf.set_font("Arial", '', 11)
+                pdf.cell(0, 6, clean_text(f"Data: {format_date(data_criacao)}"), 0, 1, 'L')
+                pdf.cell(0, 6, clean_text(f"Responsável: {responsavel_nome}"), 0, 1, 'L')
+                pdf.cell(0, 6, clean_text(f"Telefone Responsável: {format_phone(responsavel_telefone)}"), 0, 1, 'L')
+                pdf.ln(10)
+
+                # Dados do cliente
                 pdf.set_font("Arial", 'B', 11)
-                pdf.cell(0, 6, clean_text("DADOS DO COMPRESSOR:"), 0, 1, 'L')
+                pdf.cell(0, 6, clean_text("DADOS DO CLIENTE:"), 0, 1, 'L')
                 pdf.set_font("Arial", '', 11)
-                if modelo_compressor:
-                    pdf.cell(0, 5, clean_text(f"Modelo: {modelo_compressor}"), 0, 1, 'L')
-                if numero_serie_compressor:
-                    pdf.cell(0, 5, clean_text(f"Nº de Série: {numero_serie_compressor}"), 0, 1, 'L')
+            
+                cliente_nome_display = cliente_nome_fantasia if cliente_nome_fantasia else cliente_nome
+                pdf.cell(0, 5, clean_text(f"Empresa: {cliente_nome_display}"), 0, 1, 'L')
+                if cliente_cnpj:
+                    pdf.cell(0, 5, clean_text(f"CNPJ: {format_cnpj(cliente_cnpj)}"), 0, 1, 'L')
+                if contato_nome and contato_nome != "Não informado":
+                    pdf.cell(0, 5, clean_text(f"Contato: {contato_nome}"), 0, 1, 'L')
                 pdf.ln(5)
 
-            # Descrição - GARANTIR que não seja vazia
-            pdf.set_font("Arial", 'B', 11)
-            pdf.cell(0, 6, clean_text("DESCRIÇÃO DO SERVIÇO:"), 0, 1, 'L')
-            pdf.set_font("Arial", '', 11)
-            descricao_final = descricao_atividade if descricao_atividade and descricao_atividade.strip() else "Fornecimento de peças e serviços para compressor"
-            pdf.multi_cell(0, 5, clean_text(descricao_final))
-            pdf.ln(10)
-
-            # Relação de Peças - GARANTIR que seja exibida corretamente
-            if relacao_pecas and relacao_pecas.strip():
-                relacao_sem_prefixo = relacao_pecas.replace("Serviço: ", "").replace("Produto: ", "").replace("Kit: ", "")
+                # Dados do compressor
+                if modelo_compressor or numero_serie_compressor:
+                    pdf.set_font("Arial", 'B', 11)
+                    pdf.cell(0, 6, clean_text("DADOS DO COMPRESSOR:"), 0, 1, 'L')
+                    pdf.set_font("Arial", '', 11)
+                    if modelo_compressor:
+                        pdf.cell(0, 5, clean_text(f"Modelo: {modelo_compressor}"), 0, 1, 'L')
+                    if numero_serie_compressor:
+                        pdf.cell(0, 5, clean_text(f"Nº de Série: {numero_serie_compressor}"), 0, 1, 'L')
+                    pdf.ln(5)
+
+                # Descrição - GARANTIR que não seja vazia
                 pdf.set_font("Arial", 'B', 11)
-                pdf.cell(0, 6, clean_text("RELAÇÃO DE PEÇAS A SEREM SUBSTITUÍDAS:"), 0, 1, 'L')
+                pdf.cell(0, 6, clean_text("DESCRIÇÃO DO SERVIÇO:"), 0, 1, 'L')
                 pdf.set_font("Arial", '', 11)
-                pdf.multi_cell(0, 5, clean_text(relacao_sem_prefixo))
-                pdf.ln(5)
+                descricao_final = descricao_atividade if descricao_atividade and descricao_atividade.strip() else "Fornecimento de peças e serviços para compressor"
+                pdf.multi_cell(0, 5, clean_text(descricao_final))
+                pdf.ln(10)
 
-            # ITENS DA PROPOSTA - CORRIGIDO
-            # =============================
-            # SEMPRE mostrar tabela de itens para cotações de compra (não locação)
-            if itens_cotacao and (tipo_cotacao or '').lower() not in ['locação', 'locacao']:
-                print(f"DEBUG: Gerando tabela de itens para cotação de COMPRA com {len(itens_cotacao)} itens")
+                # Relação de Peças - GARANTIR que seja exibida corretamente
+                if relacao_pecas and relacao_pecas.strip():
+                    relacao_sem_prefixo = relacao_pecas.replace("Serviço: ", "").replace("Produto: ", "").replace("Kit: ", "")
+                    pdf.set_font("Arial", 'B', 11)
+                    pdf.cell(0, 6, clean_text("RELAÇÃO DE PEÇAS A SEREM SUBSTITUÍDAS:"), 0, 1, 'L')
+                    pdf.set_font("Arial", '', 11)
+                    pdf.multi_cell(0, 5, clean_text(relacao_sem_prefixo))
+                    pdf.ln(5)
+
+                # ITENS DA PROPOSTA - CORRIGIDO
+                # =============================
+                # SEMPRE mostrar tabela de itens para cotações de compra (não locação)
+                if itens_cotacao and (tipo_cotacao or '').lower() not in ['locação', 'locacao']:
+                    print(f"DEBUG: Gerando tabela de itens para cotação de COMPRA com {len(itens_cotacao)} itens")
                 
-                pdf.set_font("Arial", 'B', 12)
-                pdf.cell(0, 8, clean_text("ITENS DA PROPOSTA"), 0, 1, 'C')
-                pdf.ln(5)
-
-                # Configurar larguras das colunas para ocupar toda a largura da página
-                # Largura total disponível: ~195 (210 - 10 - 5) para margens
-                page_width = 195
-                col_widths = [20, 85, 25, 35, 30]  # Total: 195
+                    pdf.set_font("Arial", 'B', 12)
+                    pdf.cell(0, 8, clean_text("ITENS DA PROPOSTA"), 0, 1, 'C')
+                    pdf.ln(5)
+
+                    # Configurar larguras das colunas para ocupar toda a largura da página
+                    # Largura total disponível: ~195 (210 - 10 - 5) para margens
+                    page_width = 195
+                    col_widths = [20, 85, 25, 35, 30]  # Total: 195
                 
-                # Cabeçalho da tabela - posicionando nas bordas
-                pdf.set_x(10)  # Margem esquerda
-                pdf.set_fill_color(50, 100, 150)
-                pdf.set_text_color(255, 255, 255)
-                pdf.set_font("Arial", 'B', 11)
-                pdf.cell(col_widths[0], 8, clean_text("Item"), 1, 0, 'C', 1)
-                pdf.cell(col_widths[1], 8, clean_text("Descrição"), 1, 0, 'L', 1)
-                pdf.cell(col_widths[2], 8, clean_text("Qtd."), 1, 0, 'C', 1)
-                pdf.cell(col_widths[3], 8, clean_text("Valor Unitário"), 1, 0, 'R', 1)
-                pdf.cell(col_widths[4], 8, clean_text("Valor Total"), 1, 1, 'R', 1)
-
-                pdf.set_text_color(0, 0, 0)
-                pdf.set_font("Arial", '', 11)
-                item_counter = 1
+                    # Cabeçalho da tabela - posicionando nas bordas
+                    pdf.set_x(10)  # Margem esquerda
+                    pdf.set_fill_color(50, 100, 150)
+                    pdf.set_text_color(255, 255, 255)
+                    pdf.set_font("Arial", 'B', 11)
+                    pdf.cell(col_widths[0], 8, clean_text("Item"), 1, 0, 'C', 1)
+                    pdf.cell(col_widths[1], 8, clean_text("Descrição"), 1, 0, 'L', 1)
+                    pdf.cell(col_widths[2], 8, clean_text("Qtd."), 1, 0, 'C', 1)
+                    pdf.cell(col_widths[3], 8, clean_text("Valor Unitário"), 1, 0, 'R', 1)
+                    pdf.cell(col_widths[4], 8, clean_text("Valor Total"), 1, 1, 'R', 1)
+
+                    pdf.set_text_color(0, 0, 0)
+                    pdf.set_font("Arial", '', 11)
+                    item_counter = 1
+                
+                    # Composições de todos os kits da cotação, em uma consulta
+                    try:
+                        composicoes_kits = explodir_kits([item[10] for item in itens_cotacao if item[1] == "Kit"], conn)
+                    except sqlite3.Error as e:
+                        print(f"Erro ao carregar composição dos kits: {e}")
+                        composicoes_kits = {}
                 
-                for item in itens_cotacao:
-                    (item_id, item_tipo, item_nome, quantidade, descricao, 
-                     valor_unitario, valor_total_item, 
-                     mao_obra, deslocamento, estadia, produto_id, tipo_operacao) = item
+                    for item in itens_cotacao:
+                        (item_id, item_tipo, item_nome, quantidade, descricao, 
+                         valor_unitario, valor_total_item, 
+                         mao_obra, deslocamento, estadia, produto_id, tipo_operacao) = item
                     
-                    # DEBUG: Verificar valores vindos do banco
-                    print(f"DEBUG Item {item_counter}:")
-                    print(f"  - ID: {item_id}")
-                    print(f"  - Tipo: {item_tipo}")
-                    print(f"  - Nome: {item_nome}")
-                    print(f"  - Quantidade: {quantidade}")
-                    print(f"  - Descrição: '{descricao}'")
-                    print(f"  - Valor Unitário: {valor_unitario}")
-                    print(f"  - Valor Total: {valor_total_item}")
-                    print(f"  - Produto ID: {produto_id}")
+                        # DEBUG: Verificar valores vindos do banco
+                        print(f"DEBUG Item {item_counter}:")
+                        print(f"  - ID: {item_id}")
+                        print(f"  - Tipo: {item_tipo}")
+                        print(f"  - Nome: {item_nome}")
+                        print(f"  - Quantidade: {quantidade}")
+                        print(f"  - Descrição: '{descricao}'")
+                        print(f"  - Valor Unitário: {valor_unitario}")
+                        print(f"  - Valor Total: {valor_total_item}")
+                        print(f"  - Produto ID: {produto_id}")
                     
-                    # GARANTIR que descrição não seja vazia ou None
-                    if not descricao or str(descricao).strip() == '' or str(descricao).lower() in ['none', 'null']:
-                        descricao = item_nome if item_nome else "Descrição não informada"
-                        print(f"  - Descrição corrigida para: '{descricao}'")
+                        # GARANTIR que descrição não seja vazia ou None
+                        if not descricao or str(descricao).strip() == '' or str(descricao).lower() in ['none', 'null']:
+                            descricao = item_nome if item_nome else "Descrição não informada"
+                            print(f"  - Descrição corrigida para: '{descricao}'")
                     
-                    # TRATAMENTO ESPECIAL PARA KITS E SERVIÇOS (como modelo antigo)
-                    descricao_final = descricao
+                        # TRATAMENTO ESPECIAL PARA KITS E SERVIÇOS (como modelo antigo)
+                        descricao_final = descricao
                     
-                    # Adicionar prefixo baseado no tipo de operação
-                    if tipo_operacao == "Locação":
-                        prefixo = "Locação - "
-                    else:
-                        prefixo = ""
+                        # Adicionar prefixo baseado no tipo de operação
+                        if tipo_operacao == "Locação":
+                            prefixo = "Locação - "
+                        else:
+                            prefixo = ""
                     
-                    if item_tipo == "Kit" and produto_id:
-                        # Obter composição do kit
-                        composicao = PDFCotacao.obter_composicao_kit(produto_id)
-                        descricao_final = f"{prefixo}Kit: {item_nome}\nComposição:\n" + "\n".join(composicao)
+                        if item_tipo == "Kit" and produto_id:
+                            # Obter composição do kit
+                            if produto_id in composicoes_kits:
+                                composicao = linhas_composicao(composicoes_kits[produto_id])
+                            else:
+                                composicao = ["Erro ao carregar composição"]
+                            descricao_final = f"{prefixo}Kit: {item_nome}\nComposição:\n" + "\n".join(composicao)
                     
-                    elif item_tipo == "Serviço":
-                        descricao_final = f"{prefixo}Serviço: {item_nome}"
-                        if mao_obra or deslocamento or estadia:
-                            descricao_final += "\nDetalhes:"
-                            if mao_obra:
-                                descricao_final += f"\n- Mão de obra: R${mao_obra:.2f}"
-                            if deslocamento:
-                                descricao_final += f"\n- Deslocamento: R${deslocamento:.2f}"
-                            if estadia:
-                                descricao_final += f"\n- Estadia: R${estadia:.2f}"
+                        elif item_tipo == "Serviço":
+                            descricao_final = f"{prefixo}Serviço: {item_nome}"
+                            if mao_obra or deslocamento or estadia:
+                                descricao_final += "\nDetalhes:"
+                                if mao_obra:
+                                    descricao_final += f"\n- Mão de obra: R${mao_obra:.2f}"
+                                if deslocamento:
+                                    descricao_final += f"\n- Deslocamento: R${deslocamento:.2f}"
+                                if estadia:
+                                    descricao_final += f"\n- Estadia: R${estadia:.2f}"
                     
-                    else:  # Produto
-                        descricao_final = f"{prefixo}{item_nome}"
+                        else:  # Produto
+                            descricao_final = f"{prefixo}{item_nome}"
                     
-                    # Calcular altura baseada no número de linhas
-                    num_linhas = descricao_final.count('\n') + 1
-                    altura_total = max(num_linhas * 6, 6)
+                        # Calcular altura baseada no número de linhas
+                        num_linhas = descricao_final.count('\n') + 1
+                        altura_total = max(num_linhas * 6, 6)
 
-                    # Primeira linha - nome principal do item
-                    pdf.set_x(10)
-                    pdf.cell(col_widths[0], altura_total, str(item_counter), 1, 0, 'C')
+                        # Primeira linha - nome principal do item
+                        pdf.set_x(10)
+                        pdf.cell(col_widths[0], altura_total, str(item_counter), 1, 0, 'C')
 
-                    # Descrição principal - usar multi_cell para quebrar texto
-                    x_pos = pdf.get_x()
-                    y_pos = pdf.get_y()
+                        # Descrição principal - usar multi_cell para quebrar texto
+                        x_pos = pdf.get_x()
+                        y_pos = pdf.get_y()
 
-                    # Usar multi_cell para quebrar texto automaticamente
-                    pdf.multi_cell(col_widths[1], 6, clean_text(descricao_final), 1, 'L')
+                        # Usar multi_cell para quebrar texto automaticamente
+                        pdf.multi_cell(col_widths[1], 6, clean_text(descricao_final), 1, 'L')
 
-                    # Calcular nova posição Y após o texto
-                    new_y = pdf.get_y()
-                    altura_real = new_y - y_pos
+                        # Calcular nova posição Y após o texto
+                        new_y = pdf.get_y()
+                        altura_real = new_y - y_pos
 
-                    # Voltar para posição original das outras colunas
-                    pdf.set_xy(x_pos + col_widths[1], y_pos)
+                        # Voltar para posição original das outras colunas
+                        pdf.set_xy(x_pos + col_widths[1], y_pos)
 
-                    # Quantidade
-                    pdf.cell(col_widths[2], altura_real, str(int(quantidade)), 1, 0, 'C')
+                        # Quantidade
+                        pdf.cell(col_widths[2], altura_real, str(int(quantidade)), 1, 0, 'C')
 
-                    # Valor Unitário
-                    pdf.cell(col_widths[3], altura_real, clean_text(f"R$ {valor_unitario:.2f}"), 1, 0, 'R')
+                        # Valor Unitário
+                        pdf.cell(col_widths[3], altura_real, clean_text(f"R$ {valor_unitario:.2f}"), 1, 0, 'R')
 
-                    # Valor Total
-                    pdf.cell(col_widths[4], altura_real, clean_text(f"R$ {valor_total_item:.2f}"), 1, 1, 'R')
+                        # Valor Total
+                        pdf.cell(col_widths[4], altura_real, clean_text(f"R$ {valor_total_item:.2f}"), 1, 1, 'R')
                     
-                    item_counter += 1
-
-                # Linha do valor total - alinhada com a tabela
-                pdf.set_x(10)  # Mesma margem esquerda da tabela
-                pdf.set_font("Arial", 'B', 12)
-                pdf.set_fill_color(200, 200, 200)
-                pdf.set_text_color(0, 0, 0)
-                pdf.cell(sum(col_widths[0:4]), 10, clean_text("VALOR TOTAL DA PROPOSTA:"), 1, 0, 'R', 1)
-                pdf.cell(col_widths[4], 10, clean_text(f"R$ {valor_total:.2f}"), 1, 1, 'R', 1)
-                pdf.ln(10)
-            else:
-                print(f"DEBUG: Não gerando tabela de itens - Tipo: {tipo_cotacao}, Itens: {len(itens_cotacao) if itens_cotacao else 0}")
-
-            # Condições comerciais
-            pdf.set_font("Arial", 'B', 11)
-            pdf.cell(0, 6, clean_text("CONDIÇÕES COMERCIAIS:"), 0, 1, 'L')
-            pdf.set_font("Arial", '', 11)
-            pdf.cell(0, 5, clean_text(f"Tipo de Frete: {tipo_frete if tipo_frete else 'FOB'}"), 0, 1, 'L')
-            pdf.cell(0, 5, clean_text(f"Condição de Pagamento: {condicao_pagamento if condicao_pagamento else 'A combinar'}"), 0, 1, 'L')
-            pdf.cell(0, 5, clean_text(f"Prazo de Entrega: {prazo_entrega if prazo_entrega else 'A combinar'}"), 0, 1, 'L')
-            pdf.cell(0, 5, clean_text(f"Moeda: {moeda if moeda else 'BRL (Real Brasileiro)'}"), 0, 1, 'L')
-            pdf.ln(5)
-
-            # Observações se houver
-            if observacoes and observacoes.strip():
+                        item_counter += 1
+
+                    # Linha do valor total - alinhada com a tabela
+                    pdf.set_x(10)  # Mesma margem esquerda da tabela
+                    pdf.set_font("Arial", 'B', 12)
+                    pdf.set_fill_color(200, 200, 200)
+                    pdf.set_text_color(0, 0, 0)
+                    pdf.cell(sum(col_widths[0:4]), 10, clean_text("VALOR TOTAL DA PROPOSTA:"), 1, 0, 'R', 1)
+                    pdf.cell(col_widths[4], 10, clean_text(f"R$ {valor_total:.2f}"), 1, 1, 'R', 1)
+                    pdf.ln(10)
+                else:
+                    print(f"DEBUG: Não gerando tabela de itens - Tipo: {tipo_cotacao}, Itens: {len(itens_cotacao) if itens_cotacao else 0}")
+
+                # Condições comerciais
                 pdf.set_font("Arial", 'B', 11)
-                pdf.cell(0, 6, clean_text("OBSERVAÇÕES:"), 0, 1, 'L')
+                pdf.cell(0, 6, clean_text("CONDIÇÕES COMERCIAIS:"), 0, 1, 'L')
                 pdf.set_font("Arial", '', 11)
-                pdf.multi_cell(0, 5, clean_text(observacoes))
-
-            # Salvar PDF
-            output_dir = os.path.join("data", "cotacoes", "arquivos")
-            os.makedirs(output_dir, exist_ok=True)
-            file_name = f"Proposta_{numero_proposta.replace('/', '_').replace(' ', '')}.pdf"
-            pdf_path = os.path.join(output_dir, file_name)
-            pdf.output(pdf_path)
-
-            # Atualizar caminho do PDF no banco de dados
-            c.execute("UPDATE cotacoes SET caminho_arquivo_pdf=? WHERE id=?", (pdf_path, cot_id))
-            conn.commit()
-
-            return True, pdf_path
-
-        # Garantir salvamento/retorno para Locação também
-        if (tipo_cotacao or '').lower() in ('locação','locacao'):
-            output_dir = os.path.join("data", "cotacoes", "arquivos")
-            os.makedirs(output_dir, exist_ok=True)
-            file_name = f"Proposta_{numero_proposta.replace('/', '_').replace(' ', '')}.pdf"
-            pdf_path = os.path.join(output_dir, file_name)
-            pdf.output(pdf_path)
-            c.execute("UPDATE cotacoes SET caminho_arquivo_pdf=? WHERE id= ?", (pdf_path, cot_id))
-            conn.commit()
-            return True, pdf_path
+                pdf.cell(0, 5, clean_text(f"Tipo de Frete: {tipo_frete if tipo_frete else 'FOB'}"), 0, 1, 'L')
+                pdf.cell(0, 5, clean_text(f"Condição de Pagamento: {condicao_pagamento if condicao_pagamento else 'A combinar'}"), 0, 1, 'L')
+                pdf.cell(0, 5, clean_text(f"Prazo de Entrega: {prazo_entrega if prazo_entrega else 'A combinar'}"), 0, 1, 'L')
+                pdf.cell(0, 5, clean_text(f"Moeda: {moeda if moeda else 'BRL (Real Brasileiro)'}"), 0, 1, 'L')
+                pdf.ln(5)
 
+                # Observações se houver
+                if observacoes and observacoes.strip():
+                    pdf.set_font("Arial", 'B', 11)
+                    pdf.cell(0, 6, clean_text("OBSERVAÇÕES:"), 0, 1, 'L')
+                    pdf.set_font("Arial", '', 11)
+                    pdf.multi_cell(0, 5, clean_text(observacoes))
+
+                # Salvar PDF
+                output_dir = os.path.join("data", "cotacoes", "arquivos")
+                os.makedirs(output_dir, exist_ok=True)
+                file_name = f"Proposta_{numero_proposta.replace('/', '_').replace(' ', '')}.pdf"
+                pdf_path = os.path.join(output_dir, file_name)
+                pdf.output(pdf_path)
+
+                # Atualizar caminho do PDF no banco de dados
+                c.execute("UPDATE cotacoes SET caminho_arquivo_pdf=? WHERE id=?", (pdf_path, cot_id))
+                conn.commit()
+
+                return True, pdf_path
+
+            # Garantir salvamento/retorno para Locação também
+            if (tipo_cotacao or '').lower() in ('locação','locacao'):
+                output_dir = os.path.join("data", "cotacoes", "arquivos")
+                os.makedirs(output_dir, exist_ok=True)
+                file_name = f"Proposta_{numero_proposta.replace('/', '_').replace(' ', '')}.pdf"
+                pdf_path = os.path.join(output_dir, file_name)
+                pdf.output(pdf_path)
+                c.execute("UPDATE cotacoes SET caminho_arquivo_pdf=? WHERE id= ?", (pdf_path, cot_id))
+                conn.commit()
+                return True, pdf_path
+
+    except TarefaCancelada:
+        raise
     except Exception as e:
         return False, f"Erro ao gerar PDF: {str(e)}"
-    finally:
-        if conn:
-            conn.close()
 
 # Manter compatibilidade com versão antiga
 def gerar_pdf_cotacao(cotacao_id, db_name):
@@ -2,8 +2,10 @@ import sqlite3
 import os
 from fpdf import FPDF
 from datetime import datetime
-import json
 from utils.formatters import format_date, format_cnpj, format_phone
+from database import obter_conexao
+from interface.tarefas import TarefaCancelada
+from utils.anexos import listar_anexos, MIMES_IMAGEM_PDF
 from PIL import Image
 import tempfile
 from assets.filiais.filiais_config import obter_filial
@@ -72,6 +74,8 @@ class RelatorioPDF(FPDF):
         self.light_gray = (245, 245, 245) # Cinza claro para backgrounds
         self.first_page = True
         self.dados_filial = dados_filial or {}
+        # Chamado com o número de cada página nova (progresso da geração)
+        self.ao_nova_pagina = None
         
         # Adicionar fonte Unicode para suportar caracteres especiais
         try:
@@ -93,6 +97,8 @@ class RelatorioPDF(FPDF):
                 print("Usando fonte padrão sem Unicode - texto será limpo agressivamente")
     
     def header(self):
+        if self.ao_nova_pagina:
+            self.ao_nova_pagina(self.page_no())
         # Desenha a borda em todas as páginas
         self.set_line_width(0.5)
         self.set_draw_color(70, 70, 70)  # Cor cinza escura para bordas
@@ -228,42 +234,50 @@ class RelatorioPDF(FPDF):
         self.set_left_margin(10)  # Voltar margem normal
         self.ln(2)
     
-    def add_image_to_pdf(self, image_path, max_width=80, max_height=60):
-        """Adiciona imagem ao PDF com redimensionamento automático"""
+    def add_image_to_pdf(self, image_path, max_width=80, max_height=60, dimensoes=None):
+        """Adiciona imagem ao PDF com redimensionamento automático.
+
+        dimensoes=(largura, altura) já conhecidas evita abrir a imagem só para medi-la;
+        sem elas, apenas arquivos .jpg/.jpeg/.png são aceitos.
+        """
         try:
             if not os.path.exists(image_path):
                 return False
                 
-            # Verificar se é uma imagem suportada
-            supported_formats = ['.jpg', '.jpeg', '.png']
-            file_ext = os.path.splitext(image_path)[1].lower()
-            
-            if file_ext not in supported_formats:
-                return False
-            
-            # Obter dimensões da imagem
-            with Image.open(image_path) as img:
-                img_width, img_height = img.size
-                
-                # Calcular proporção para redimensionamento
-                width_ratio = max_width / img_width
-                height_ratio = max_height / img_height
-                ratio = min(width_ratio, height_ratio)
-                
-                new_width = img_width * ratio
-                new_height = img_height * ratio
-                
-                # Verificar se há espaço suficiente na página
-                if self.get_y() + new_height > 270:  # 270 é próximo ao fim da página
-                    self.add_page()
+            img_width, img_height = dimensoes or (None, None)
+            if not (img_width and img_height):
+                # Verificar se é uma imagem suportada
+                supported_formats = ['.jpg', '.jpeg', '.png']
+                file_ext = os.path.splitext(image_path)[1].lower()
                 
-                # Adicionar imagem centralizada
-                x_pos = (210 - new_width) / 2
-                self.image(image_path, x=x_pos, y=self.get_y(), w=new_width, h=new_height)
-                self.ln(new_height + 3)
-                
-                return True
+                if file_ext not in supported_formats:
+                    return False
                 
+                # Obter dimensões da imagem
+                with Image.open(image_path) as img:
+                    img_width, img_height = img.size
+            
+            # Calcular proporção para redimensionamento
+            width_ratio = max_width / img_width
+            height_ratio = max_height / img_height
+            ratio = min(width_ratio, height_ratio)
+            
+            new_width = img_width * ratio
+            new_height = img_height * ratio
+            
+            # Verificar se há espaço suficiente na página
+            if self.get_y() + new_height > 270:  # 270 é próximo ao fim da página
+                self.add_page()
+            
+            # Adicionar imagem centralizada
+            x_pos = (210 - new_width) / 2
+            self.image(image_path, x=x_pos, y=self.get_y(), w=new_width, h=new_height)
+            self.ln(new_height + 3)
+            
+            return True
+            
+        except TarefaCancelada:
+            raise
         except Exception as e:
             print(f"Erro ao adicionar imagem {image_path}: {str(e)}")
             return False
@@ -355,6 +369,8 @@ class RelatorioPDF(FPDF):
             self.cell(0, 5, "World Compressores - Soluções em Compressão", 0, 1, 'C')
             self.cell(0, 5, "Relatório Técnico Especializado", 0, 1, 'C')
             
+        except TarefaCancelada:
+            raise
         except Exception as e:
             print(f"Erro ao criar capa personalizada: {e}")
             # Se der erro, continuar sem a capa
@@ -370,17 +386,6 @@ class RelatorioPDF(FPDF):
         self.cell(0, 6, self.clean_pdf_text(section_title), 0, 1)
         self.set_text_color(0, 0, 0)
         
-        images_in_module = []
-        
-        # Primeiro, contar quantas imagens existem
-        for anexo in anexos:
-            if isinstance(anexo, dict):
-                caminho = anexo.get('caminho', '')
-                if caminho and os.path.exists(caminho):
-                    file_ext = os.path.splitext(caminho)[1].lower()
-                    if file_ext in ['.jpg', '.jpeg', '.png']:
-                        images_in_module.append(anexo)
-        
         # Se há muitas imagens e não há espaço suficiente, continuar no mesmo módulo
         # mas em páginas adicionais do mesmo módulo
         for i, anexo in enumerate(anexos, 1):
@@ -389,20 +394,20 @@ class RelatorioPDF(FPDF):
                 caminho = anexo.get('caminho', '')
                 descricao = anexo.get('descricao', '')
                 
+                eh_imagem = anexo.get('mime') in MIMES_IMAGEM_PDF and caminho and os.path.exists(caminho)
+                
                 # Verificar se há espaço suficiente para a próxima imagem (aproximadamente 80mm)
-                if caminho and os.path.exists(caminho):
-                    file_ext = os.path.splitext(caminho)[1].lower()
-                    if file_ext in ['.jpg', '.jpeg', '.png']:
-                        # Se não há espaço, adicionar nova página DENTRO do mesmo módulo
-                        if self.get_y() > 200:  # Próximo ao fim da página
-                            self.add_page()
-                            # Repetir título do módulo (não criar novo módulo)
-                            if same_module:
-                                self.set_pdf_font('B', 10)
-                                self.set_text_color(*self.dark_blue)
-                                self.cell(0, 6, self.clean_pdf_text(f"{section_title} - Continuação"), 0, 1)
-                                self.set_text_color(0, 0, 0)
-                                self.ln(2)
+                if eh_imagem:
+                    # Se não há espaço, adicionar nova página DENTRO do mesmo módulo
+                    if self.get_y() > 200:  # Próximo ao fim da página
+                        self.add_page()
+                        # Repetir título do módulo (não criar novo módulo)
+                        if same_module:
+                            self.set_pdf_font('B', 10)
+                            self.set_text_color(*self.dark_blue)
+                            self.cell(0, 6, self.clean_pdf_text(f"{section_title} - Continuação"), 0, 1)
+                            self.set_text_color(0, 0, 0)
+                            self.ln(2)
                 
                 # Exibir nome do arquivo
                 self.set_pdf_font('B', 9)
@@ -418,455 +423,440 @@ class RelatorioPDF(FPDF):
                     self.set_text_color(0, 0, 0)
                 
                 # Tentar exibir a imagem se for um arquivo de imagem
-                if caminho and os.path.exists(caminho):
-                    file_ext = os.path.splitext(caminho)[1].lower()
-                    if file_ext in ['.jpg', '.jpeg', '.png']:
-                        self.ln(2)
-                        if self.add_image_to_pdf(caminho):
-                            # Adicionar legenda
-                            self.set_pdf_font('I', 8)
-                            self.set_text_color(100, 100, 100)
-                            self.cell(0, 4, self.clean_pdf_text(f"Figura {i}: {nome}"), 0, 1, 'C')
-                            self.set_text_color(0, 0, 0)
+                if eh_imagem:
+                    self.ln(2)
+                    if self.add_image_to_pdf(caminho, dimensoes=(anexo.get('width'), anexo.get('height'))):
+                        # Adicionar legenda
+                        self.set_pdf_font('I', 8)
+                        self.set_text_color(100, 100, 100)
+                        self.cell(0, 4, self.clean_pdf_text(f"Figura {i}: {nome}"), 0, 1, 'C')
+                        self.set_text_color(0, 0, 0)
                 
                 self.ln(3)
 
-def gerar_pdf_relatorio(relatorio_id, db_name):
-    conn = sqlite3.connect(db_name)
-    c = conn.cursor()
+def gerar_pdf_relatorio(relatorio_id, db_name, ao_progresso=None):
+    with obter_conexao(db_name) as conn:
+        c = conn.cursor()
     
-    try:
-        # Primeiro obter os nomes das colunas existentes na tabela
-        c.execute("PRAGMA table_info(relatorios_tecnicos)")
-        columns_info = c.fetchall()
-        column_names = [column[1] for column in columns_info]
-        
-        # Construir a query dinamicamente com base nas colunas existentes - EXPANDIDA PARA 4 ABAS
-        base_columns = ["r.numero_relatorio", "r.data_criacao", "c.nome", "c.cnpj", "c.endereco", "c.cidade", "c.estado", "r.filial_id"]
-        
-        # Verificar quais colunas existem na tabela para as 4 abas
-        report_columns = []
-        column_map = {
-            # Dados básicos do serviço
-            "formulario_servico": "r.formulario_servico",
-            "tipo_servico": "r.tipo_servico",
-            "descricao_servico": "r.descricao_servico",
-            "data_recebimento": "r.data_recebimento",
-            
-            # ABA 1: Condição Atual do Equipamento
-            "condicao_encontrada": "r.condicao_encontrada",
-            "placa_identificacao": "r.placa_identificacao",
-            "acoplamento": "r.acoplamento",
-            "aspectos_rotores": "r.aspectos_rotores",
-            "valvulas_acopladas": "r.valvulas_acopladas",
-            "data_recebimento_equip": "r.data_recebimento_equip",
-            
-            # ABA 2: Peritagem do Subconjunto
-            "parafusos_pinos": "r.parafusos_pinos",
-            "superficie_vedacao": "r.superficie_vedacao",
-            "engrenagens": "r.engrenagens",
-            "bico_injetor": "r.bico_injetor",
-            "rolamentos": "r.rolamentos",
-            "aspecto_oleo": "r.aspecto_oleo",
-            "data_peritagem": "r.data_peritagem",
-            
-            # ABA 3: Desmembrando Unidade Compressora
-            "interf_desmontagem": "r.interf_desmontagem",
-            "aspecto_rotores_aba3": "r.aspecto_rotores_aba3",
-            "aspecto_carcaca": "r.aspecto_carcaca",
-            "interf_mancais": "r.interf_mancais",
-            "galeria_hidraulica": "r.galeria_hidraulica",
-            "data_desmembracao": "r.data_desmembracao",
-            
-            # ABA 4: Relação de Peças e Serviços
-            "servicos_propostos": "r.servicos_propostos",
-            "pecas_recomendadas": "r.pecas_recomendadas",
-            "data_pecas": "r.data_pecas",
-            "tempo_trabalho_total": "r.tempo_trabalho_total",
-            "tempo_deslocamento_total": "r.tempo_deslocamento_total",
-            
-            # Campos adicionais
-            "condicao_inicial": "r.condicao_inicial",
-            "condicao_atual": "r.condicao_atual"
-        }
-        
-        for col_name, sql_col in column_map.items():
-            if col_name in column_names:
-                report_columns.append(sql_col)
-            else:
-                report_columns.append("NULL as " + col_name)
-        
-        # Construir a query completa
-        query = f"""
-            SELECT {', '.join(base_columns)}, {', '.join(report_columns)}
-            FROM relatorios_tecnicos r
-            JOIN clientes c ON r.cliente_id = c.id
-            WHERE r.id = ?
-        """
-        
-        c.execute(query, (relatorio_id,))
-        relatorio_data = c.fetchone()
-        
-        if not relatorio_data:
-            return False, "Relatório não encontrado"
+        try:
+            # Primeiro obter os nomes das colunas existentes na tabela
+            c.execute("PRAGMA table_info(relatorios_tecnicos)")
+            columns_info = c.fetchall()
+            column_names = [column[1] for column in columns_info]
+        
+            # Construir a query dinamicamente com base nas colunas existentes - EXPANDIDA PARA 4 ABAS
+            base_columns = ["r.numero_relatorio", "r.data_criacao", "c.nome", "c.cnpj", "c.endereco", "c.cidade", "c.estado", "r.filial_id"]
+        
+            # Verificar quais colunas existem na tabela para as 4 abas
+            report_columns = []
+            column_map = {
+                # Dados básicos do serviço
+                "formulario_servico": "r.formulario_servico",
+                "tipo_servico": "r.tipo_servico",
+                "descricao_servico": "r.descricao_servico",
+                "data_recebimento": "r.data_recebimento",
+            
+                # ABA 1: Condição Atual do Equipamento
+                "condicao_encontrada": "r.condicao_encontrada",
+                "placa_identificacao": "r.placa_identificacao",
+                "acoplamento": "r.acoplamento",
+                "aspectos_rotores": "r.aspectos_rotores",
+                "valvulas_acopladas": "r.valvulas_acopladas",
+                "data_recebimento_equip": "r.data_recebimento_equip",
+            
+                # ABA 2: Peritagem do Subconjunto
+                "parafusos_pinos": "r.parafusos_pinos",
+                "superficie_vedacao": "r.superficie_vedacao",
+                "engrenagens": "r.engrenagens",
+                "bico_injetor": "r.bico_injetor",
+                "rolamentos": "r.rolamentos",
+                "aspecto_oleo": "r.aspecto_oleo",
+                "data_peritagem": "r.data_peritagem",
+            
+                # ABA 3: Desmembrando Unidade Compressora
+                "interf_desmontagem": "r.interf_desmontagem",
+                "aspecto_rotores_aba3": "r.aspecto_rotores_aba3",
+                "aspecto_carcaca": "r.aspecto_carcaca",
+                "interf_mancais": "r.interf_mancais",
+                "galeria_hidraulica": "r.galeria_hidraulica",
+                "data_desmembracao": "r.data_desmembracao",
+            
+                # ABA 4: Relação de Peças e Serviços
+                "servicos_propostos": "r.servicos_propostos",
+                "pecas_recomendadas": "r.pecas_recomendadas",
+                "data_pecas": "r.data_pecas",
+                "tempo_trabalho_total": "r.tempo_trabalho_total",
+                "tempo_deslocamento_total": "r.tempo_deslocamento_total",
+            
+                # Campos adicionais
+                "condicao_inicial": "r.condicao_inicial",
+                "condicao_atual": "r.condicao_atual"
+            }
+        
+            for col_name, sql_col in column_map.items():
+                if col_name in column_names:
+                    report_columns.append(sql_col)
+                else:
+                    report_columns.append("NULL as " + col_name)
+        
+            # Construir a query completa
+            query = f"""
+                SELECT {', '.join(base_columns)}, {', '.join(report_columns)}
+                FROM relatorios_tecnicos r
+                JOIN clientes c ON r.cliente_id = c.id
+                WHERE r.id = ?
+            """
+        
+            c.execute(query, (relatorio_id,))
+            relatorio_data = c.fetchone()
+        
+            if not relatorio_data:
+                return False, "Relatório não encontrado"
+        
+            # Criar um dicionário para acessar valores por nome
+            column_indices = {}
+        
+            # Mapear colunas base para índices
+            for i, col_name in enumerate(base_columns):
+                col_key = col_name.split('.')[-1]
+                column_indices[col_name] = i
+                column_indices[col_key] = i
+            
+            # Mapear colunas de relatório para índices
+            for i, col_full in enumerate(report_columns):
+                idx = i + len(base_columns)
+                if " as " in col_full:
+                    col_name = col_full.split(" as ")[1]
+                    column_indices[col_name] = idx
+                else:
+                    col_name = col_full.split('.')[-1]
+                    column_indices[col_full] = idx
+                    column_indices[col_name] = idx
+        
+            # Função auxiliar para acessar dados de forma segura
+            def get_value(key, default=""):
+                idx = -1
+                if key in column_indices:
+                    idx = column_indices[key]
+                elif f"r.{key}" in column_indices:
+                    idx = column_indices[f"r.{key}"]
+                elif f"c.{key}" in column_indices:
+                    idx = column_indices[f"c.{key}"]
+                
+                if idx >= 0 and idx < len(relatorio_data):
+                    return relatorio_data[idx] or default
+                return default
         
-        # Criar um dicionário para acessar valores por nome
-        column_indices = {}
+            # Obter eventos
+            c.execute("""
+                SELECT u.nome_completo, e.data_hora, e.evento, e.tipo
+                FROM eventos_campo e
+                JOIN usuarios u ON e.tecnico_id = u.id
+                WHERE e.relatorio_id = ?
+                ORDER BY e.data_hora
+            """, (relatorio_id,))
+            eventos = c.fetchall()
         
-        # Mapear colunas base para índices
-        for i, col_name in enumerate(base_columns):
-            col_key = col_name.split('.')[-1]
-            column_indices[col_name] = i
-            column_indices[col_key] = i
-            
-        # Mapear colunas de relatório para índices
-        for i, col_full in enumerate(report_columns):
-            idx = i + len(base_columns)
-            if " as " in col_full:
-                col_name = col_full.split(" as ")[1]
-                column_indices[col_name] = idx
-            else:
-                col_name = col_full.split('.')[-1]
-                column_indices[col_full] = idx
-                column_indices[col_name] = idx
-        
-        # Função auxiliar para acessar dados de forma segura
-        def get_value(key, default=""):
-            idx = -1
-            if key in column_indices:
-                idx = column_indices[key]
-            elif f"r.{key}" in column_indices:
-                idx = column_indices[f"r.{key}"]
-            elif f"c.{key}" in column_indices:
-                idx = column_indices[f"c.{key}"]
-                
-            if idx >= 0 and idx < len(relatorio_data):
-                return relatorio_data[idx] or default
-            return default
-        
-        # Obter eventos
-        c.execute("""
-            SELECT u.nome_completo, e.data_hora, e.evento, e.tipo
-            FROM eventos_campo e
-            JOIN usuarios u ON e.tecnico_id = u.id
-            WHERE e.relatorio_id = ?
-            ORDER BY e.data_hora
-        """, (relatorio_id,))
-        eventos = c.fetchall()
-        
-        # Obter anexos das 4 abas
-        anexos_abas = {}
-        for aba_num in range(1, 5):
-            aba_col = f'anexos_aba{aba_num}'
-            if aba_col in column_names:
-                c.execute(f"SELECT {aba_col} FROM relatorios_tecnicos WHERE id = ?", (relatorio_id,))
-                anexos_result = c.fetchone()
-                if anexos_result and anexos_result[0]:
-                    try:
-                        anexos_data = anexos_result[0]
-                        if isinstance(anexos_data, str):
-                            anexos_abas[aba_num] = json.loads(anexos_data)
-                        elif isinstance(anexos_data, list):
-                            anexos_abas[aba_num] = anexos_data
-                    except (json.JSONDecodeError, TypeError):
-                        anexos_abas[aba_num] = []
+            # Obter anexos das 4 abas (uma consulta indexada)
+            anexos_abas = listar_anexos(relatorio_id, conn)
         
-        # Criar PDF com filial
-        filial_id = get_value("filial_id") or 2
-        dados_filial = obter_filial(int(filial_id)) or {}
-        pdf = RelatorioPDF(dados_filial)
+            # Criar PDF com filial
+            filial_id = get_value("filial_id") or 2
+            dados_filial = obter_filial(int(filial_id)) or {}
+            pdf = RelatorioPDF(dados_filial)
+            pdf.ao_nova_pagina = ao_progresso
         
-        # Configurar dados para cabeçalho
-        pdf.numero_relatorio = get_value("numero_relatorio")
-        pdf.data_relatorio = format_date(get_value("data_criacao"))
+            # Configurar dados para cabeçalho
+            pdf.numero_relatorio = get_value("numero_relatorio")
+            pdf.data_relatorio = format_date(get_value("data_criacao"))
         
-        # Iniciar diretamente com o conteúdo
-        pdf.add_page()
+            # Iniciar diretamente com o conteúdo
+            pdf.add_page()
         
-        # === PÁGINA 1: INFORMAÇÕES GERAIS ===
-        pdf.section_title("IDENTIFICAÇÃO DO CLIENTE")
+            # === PÁGINA 1: INFORMAÇÕES GERAIS ===
+            pdf.section_title("IDENTIFICAÇÃO DO CLIENTE")
         
-        nome_cliente = get_value("nome")
-        pdf.field_label_value("RAZÃO SOCIAL", nome_cliente)
+            nome_cliente = get_value("nome")
+            pdf.field_label_value("RAZÃO SOCIAL", nome_cliente)
         
-        cnpj_cliente = get_value("cnpj")
-        if cnpj_cliente:
-            pdf.field_label_value("CNPJ", format_cnpj(cnpj_cliente))
+            cnpj_cliente = get_value("cnpj")
+            if cnpj_cliente:
+                pdf.field_label_value("CNPJ", format_cnpj(cnpj_cliente))
         
-        endereco_cliente = get_value("endereco")
-        pdf.field_label_value("ENDEREÇO", endereco_cliente)
+            endereco_cliente = get_value("endereco")
+            pdf.field_label_value("ENDEREÇO", endereco_cliente)
         
-        cidade = get_value("cidade")
-        estado = get_value("estado")
-        if cidade and estado:
-            pdf.field_label_value("CIDADE/UF", f"{cidade}/{estado}")
+            cidade = get_value("cidade")
+            estado = get_value("estado")
+            if cidade and estado:
+                pdf.field_label_value("CIDADE/UF", f"{cidade}/{estado}")
         
-        pdf.ln(5)
+            pdf.ln(5)
         
-        # === DADOS DO SERVIÇO ===
-        pdf.section_title("DADOS DO SERVIÇO")
+            # === DADOS DO SERVIÇO ===
+            pdf.section_title("DADOS DO SERVIÇO")
         
-        numero_rel = get_value("numero_relatorio")
-        pdf.field_label_value("Nº RELATÓRIO", numero_rel)
+            numero_rel = get_value("numero_relatorio")
+            pdf.field_label_value("Nº RELATÓRIO", numero_rel)
         
-        data_criacao = get_value("data_criacao")
-        if data_criacao:
-            pdf.field_label_value("DATA", format_date(data_criacao))
+            data_criacao = get_value("data_criacao")
+            if data_criacao:
+                pdf.field_label_value("DATA", format_date(data_criacao))
         
-        formulario = get_value("formulario_servico")
-        pdf.field_label_value("FORMULÁRIO DE SERVIÇO", formulario)
+            formulario = get_value("formulario_servico")
+            pdf.field_label_value("FORMULÁRIO DE SERVIÇO", formulario)
         
-        tipo_servico = get_value("tipo_servico")
-        pdf.field_label_value("TIPO DE SERVIÇO", tipo_servico)
+            tipo_servico = get_value("tipo_servico")
+            pdf.field_label_value("TIPO DE SERVIÇO", tipo_servico)
         
-        descricao_servico = get_value("descricao_servico")
-        pdf.multi_line_field("DESCRIÇÃO DO SERVIÇO", descricao_servico)
+            descricao_servico = get_value("descricao_servico")
+            pdf.multi_line_field("DESCRIÇÃO DO SERVIÇO", descricao_servico)
         
-        pdf.ln(5)
+            pdf.ln(5)
         
-        # === TÉCNICOS E EVENTOS ===
-        pdf.section_title("REGISTRO DE EVENTOS E TÉCNICOS")
+            # === TÉCNICOS E EVENTOS ===
+            pdf.section_title("REGISTRO DE EVENTOS E TÉCNICOS")
 
-        def format_datetime(dt_val):
-            try:
-                # Aceita formatos ISO ou já formatados
-                if isinstance(dt_val, str):
-                    try:
-                        # Tentar parse ISO completo
-                        dt = datetime.fromisoformat(dt_val.replace('Z', ''))
-                    except ValueError:
-                        # Tentar formatos comuns
-                        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%d/%m/%Y %H:%M", "%d/%m/%Y"):
-                            try:
-                                dt = datetime.strptime(dt_val, fmt)
-                                break
-                            except ValueError:
-                                dt = None
-                        if dt is None:
-                            return str(dt_val)
-                else:
-                    dt = dt_val
-                return dt.strftime("%d/%m/%Y %H:%M")
-            except Exception:
-                return str(dt_val)
-
-        # Renderizar tabela somente se houver eventos
-        if eventos:
-            # Larguras das colunas somando 190mm (área útil entre as margens)
-            col_widths = [50, 40, 20, 80]  # Técnico, Data/Hora, Tipo, Evento
-            start_x = 10
-            max_y = 270
-
-            # Cabeçalho da tabela
-            pdf.set_x(start_x)
-            pdf.set_fill_color(*pdf.dark_blue)
-            pdf.set_text_color(255, 255, 255)
-            pdf.set_pdf_font('B', 9)
-            headers = ["TÉCNICO", "DATA/HORA", "TIPO", "EVENTO"]
-            for w, htext in zip(col_widths, headers):
-                pdf.cell(w, 7, pdf.clean_pdf_text(htext), 1, 0, 'C', True)
-            pdf.ln(7)
+            def format_datetime(dt_val):
+                try:
+                    # Aceita formatos ISO ou já formatados
+                    if isinstance(dt_val, str):
+                        try:
+                            # Tentar parse ISO completo
+                            dt = datetime.fromisoformat(dt_val.replace('Z', ''))
+                        except ValueError:
+                            # Tentar formatos comuns
+                            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%d/%m/%Y %H:%M", "%d/%m/%Y"):
+                                try:
+                                    dt = datetime.strptime(dt_val, fmt)
+                                    break
+                                except ValueError:
+                                    dt = None
+                            if dt is None:
+                                return str(dt_val)
+                    else:
+                        dt = dt_val
+                    return dt.strftime("%d/%m/%Y %H:%M")
+                except Exception:
+                    return str(dt_val)
 
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_pdf_font('', 9)
-            line_height = 5
+            # Renderizar tabela somente se houver eventos
+            if eventos:
+                # Larguras das colunas somando 190mm (área útil entre as margens)
+                col_widths = [50, 40, 20, 80]  # Técnico, Data/Hora, Tipo, Evento
+                start_x = 10
+                max_y = 270
 
-            for tecnico, data_hora, desc_evento, tipo_evento in eventos:
-                # Quebra de página se necessário (antes de desenhar a linha)
+                # Cabeçalho da tabela
                 pdf.set_x(start_x)
-                # Calcular altura necessária com base no campo EVENTO
-                evento_text = pdf.clean_pdf_text(str(desc_evento or ''))
-                # Usar split_only=True do fpdf2 para obter linhas sem renderizar
-                try:
-                    lines = pdf.multi_cell(col_widths[3], line_height, evento_text, border=0, align='L', ln=0, split_only=True)
-                    num_lines = max(1, len(lines))
-                except TypeError:
-                    # Fallback se split_only não estiver disponível
-                    approx_chars_per_line = int(col_widths[3] / (pdf.get_string_width('M') or 1) * 1.8)
-                    if approx_chars_per_line <= 0:
-                        approx_chars_per_line = 40
-                    num_lines = max(1, (len(evento_text) // approx_chars_per_line) + 1)
-                row_height = max(line_height, num_lines * line_height)
+                pdf.set_fill_color(*pdf.dark_blue)
+                pdf.set_text_color(255, 255, 255)
+                pdf.set_pdf_font('B', 9)
+                headers = ["TÉCNICO", "DATA/HORA", "TIPO", "EVENTO"]
+                for w, htext in zip(col_widths, headers):
+                    pdf.cell(w, 7, pdf.clean_pdf_text(htext), 1, 0, 'C', True)
+                pdf.ln(7)
 
-                if pdf.get_y() + row_height > max_y:
-                    pdf.add_page()
-                    # Reimprimir cabeçalho da tabela na nova página
+                pdf.set_text_color(0, 0, 0)
+                pdf.set_pdf_font('', 9)
+                line_height = 5
+
+                for tecnico, data_hora, desc_evento, tipo_evento in eventos:
+                    # Quebra de página se necessário (antes de desenhar a linha)
                     pdf.set_x(start_x)
-                    pdf.set_fill_color(*pdf.dark_blue)
-                    pdf.set_text_color(255, 255, 255)
-                    pdf.set_pdf_font('B', 9)
-                    for w, htext in zip(col_widths, headers):
-                        pdf.cell(w, 7, pdf.clean_pdf_text(htext), 1, 0, 'C', True)
-                    pdf.ln(7)
-                    pdf.set_text_color(0, 0, 0)
-                    pdf.set_pdf_font('', 9)
+                    # Calcular altura necessária com base no campo EVENTO
+                    evento_text = pdf.clean_pdf_text(str(desc_evento or ''))
+                    # Usar split_only=True do fpdf2 para obter linhas sem renderizar
+                    try:
+                        lines = pdf.multi_cell(col_widths[3], line_height, evento_text, border=0, align='L', ln=0, split_only=True)
+                        num_lines = max(1, len(lines))
+                    except TypeError:
+                        # Fallback se split_only não estiver disponível
+                        approx_chars_per_line = int(col_widths[3] / (pdf.get_string_width('M') or 1) * 1.8)
+                        if approx_chars_per_line <= 0:
+                            approx_chars_per_line = 40
+                        num_lines = max(1, (len(evento_text) // approx_chars_per_line) + 1)
+                    row_height = max(line_height, num_lines * line_height)
 
-                # Posição inicial da linha
-                x0 = start_x
-                y0 = pdf.get_y()
+                    if pdf.get_y() + row_height > max_y:
+                        pdf.add_page()
+                        # Reimprimir cabeçalho da tabela na nova página
+                        pdf.set_x(start_x)
+                        pdf.set_fill_color(*pdf.dark_blue)
+                        pdf.set_text_color(255, 255, 255)
+                        pdf.set_pdf_font('B', 9)
+                        for w, htext in zip(col_widths, headers):
+                            pdf.cell(w, 7, pdf.clean_pdf_text(htext), 1, 0, 'C', True)
+                        pdf.ln(7)
+                        pdf.set_text_color(0, 0, 0)
+                        pdf.set_pdf_font('', 9)
 
-                # Coluna Técnico
-                pdf.set_xy(x0, y0)
-                pdf.cell(col_widths[0], row_height, pdf.clean_pdf_text(str(tecnico or '')), 1, 0, 'L')
-                x0 += col_widths[0]
+                    # Posição inicial da linha
+                    x0 = start_x
+                    y0 = pdf.get_y()
 
-                # Coluna Data/Hora
-                pdf.set_xy(x0, y0)
-                pdf.cell(col_widths[1], row_height, pdf.clean_pdf_text(format_datetime(data_hora)), 1, 0, 'C')
-                x0 += col_widths[1]
+                    # Coluna Técnico
+                    pdf.set_xy(x0, y0)
+                    pdf.cell(col_widths[0], row_height, pdf.clean_pdf_text(str(tecnico or '')), 1, 0, 'L')
+                    x0 += col_widths[0]
 
-                # Coluna Tipo
-                pdf.set_xy(x0, y0)
-                pdf.cell(col_widths[2], row_height, pdf.clean_pdf_text(str(tipo_evento or '')), 1, 0, 'C')
-                x0 += col_widths[2]
+                    # Coluna Data/Hora
+                    pdf.set_xy(x0, y0)
+                    pdf.cell(col_widths[1], row_height, pdf.clean_pdf_text(format_datetime(data_hora)), 1, 0, 'C')
+                    x0 += col_widths[1]
 
-                # Coluna Evento (quebra automática)
-                pdf.set_xy(x0, y0)
-                pdf.multi_cell(col_widths[3], line_height, evento_text, border=1, align='L')
+                    # Coluna Tipo
+                    pdf.set_xy(x0, y0)
+                    pdf.cell(col_widths[2], row_height, pdf.clean_pdf_text(str(tipo_evento or '')), 1, 0, 'C')
+                    x0 += col_widths[2]
 
-                # Garantir que o cursor vá para o início da próxima linha
-                pdf.set_y(y0 + row_height)
-            pdf.ln(2)
-        else:
-            pdf.set_pdf_font('', 9)
-            pdf.set_text_color(100, 100, 100)
-            pdf.cell(0, 5, "Nenhum evento de campo registrado até o momento.", 0, 1)
-            pdf.set_text_color(0, 0, 0)
-            pdf.ln(2)
+                    # Coluna Evento (quebra automática)
+                    pdf.set_xy(x0, y0)
+                    pdf.multi_cell(col_widths[3], line_height, evento_text, border=1, align='L')
+
+                    # Garantir que o cursor vá para o início da próxima linha
+                    pdf.set_y(y0 + row_height)
+                pdf.ln(2)
+            else:
+                pdf.set_pdf_font('', 9)
+                pdf.set_text_color(100, 100, 100)
+                pdf.cell(0, 5, "Nenhum evento de campo registrado até o momento.", 0, 1)
+                pdf.set_text_color(0, 0, 0)
+                pdf.ln(2)
 
-        # Adicionar informações de tempo se disponíveis
-        tempo_trabalho = get_value("tempo_trabalho_total")
-        if tempo_trabalho:
-            pdf.field_label_value("TEMPO DE TRABALHO TOTAL", tempo_trabalho)
+            # Adicionar informações de tempo se disponíveis
+            tempo_trabalho = get_value("tempo_trabalho_total")
+            if tempo_trabalho:
+                pdf.field_label_value("TEMPO DE TRABALHO TOTAL", tempo_trabalho)
             
-        tempo_deslocamento = get_value("tempo_deslocamento_total")
-        if tempo_deslocamento:
-            pdf.field_label_value("TEMPO DE DESLOCAMENTO TOTAL", tempo_deslocamento)
+            tempo_deslocamento = get_value("tempo_deslocamento_total")
+            if tempo_deslocamento:
+                pdf.field_label_value("TEMPO DE DESLOCAMENTO TOTAL", tempo_deslocamento)
         
-        # === PÁGINA 2: MÓDULO A - CONDIÇÃO INICIAL ===
-        pdf.add_page()
-        pdf.section_title("MÓDULO A - CONDIÇÃO INICIAL DO EQUIPAMENTO")
+            # === PÁGINA 2: MÓDULO A - CONDIÇÃO INICIAL ===
+            pdf.add_page()
+            pdf.section_title("MÓDULO A - CONDIÇÃO INICIAL DO EQUIPAMENTO")
         
-        condicao_encontrada = get_value("condicao_encontrada")
-        pdf.smart_field("CONDIÇÃO ENCONTRADA", condicao_encontrada)
+            condicao_encontrada = get_value("condicao_encontrada")
+            pdf.smart_field("CONDIÇÃO ENCONTRADA", condicao_encontrada)
             
-        placa_id = get_value("placa_identificacao")
-        pdf.smart_field("PLACA DE IDENTIFICAÇÃO/Nº SÉRIE", placa_id)
+            placa_id = get_value("placa_identificacao")
+            pdf.smart_field("PLACA DE IDENTIFICAÇÃO/Nº SÉRIE", placa_id)
         
-        acoplamento = get_value("acoplamento")
-        pdf.smart_field("ACOPLAMENTO", acoplamento)
+            acoplamento = get_value("acoplamento")
+            pdf.smart_field("ACOPLAMENTO", acoplamento)
         
-        aspectos_rotores = get_value("aspectos_rotores")
-        pdf.smart_field("ASPECTOS DOS ROTORES", aspectos_rotores)
+            aspectos_rotores = get_value("aspectos_rotores")
+            pdf.smart_field("ASPECTOS DOS ROTORES", aspectos_rotores)
         
-        valvulas = get_value("valvulas_acopladas")
-        pdf.smart_field("VÁLVULAS ACOPLADAS", valvulas)
+            valvulas = get_value("valvulas_acopladas")
+            pdf.smart_field("VÁLVULAS ACOPLADAS", valvulas)
             
-        data_receb_equip = get_value("data_recebimento_equip")
-        pdf.field_label_value("DATA DE RECEBIMENTO DO EQUIPAMENTO", data_receb_equip)
+            data_receb_equip = get_value("data_recebimento_equip")
+            pdf.field_label_value("DATA DE RECEBIMENTO DO EQUIPAMENTO", data_receb_equip)
         
-        # Anexos da Aba 1 com imagens
-        if 1 in anexos_abas and anexos_abas[1]:
-            pdf.add_attachments_section(anexos_abas[1], "ANEXOS - CONDIÇÃO INICIAL")
+            # Anexos da Aba 1 com imagens
+            if 1 in anexos_abas and anexos_abas[1]:
+                pdf.add_attachments_section(anexos_abas[1], "ANEXOS - CONDIÇÃO INICIAL")
         
-        # === PÁGINA 3: MÓDULO B - PERITAGEM DO SUBCONJUNTO ===
-        pdf.add_page()
-        pdf.section_title("MÓDULO B - PERITAGEM DO SUBCONJUNTO")
-        pdf.ln(2)
-        pdf.set_pdf_font('', 9)
-        pdf.cell(0, 5, "Desacoplando elemento compressor da caixa de acionamento", 0, 1)
-        pdf.ln(2)
+            # === PÁGINA 3: MÓDULO B - PERITAGEM DO SUBCONJUNTO ===
+            pdf.add_page()
+            pdf.section_title("MÓDULO B - PERITAGEM DO SUBCONJUNTO")
+            pdf.ln(2)
+            pdf.set_pdf_font('', 9)
+            pdf.cell(0, 5, "Desacoplando elemento compressor da caixa de acionamento", 0, 1)
+            pdf.ln(2)
         
-        parafusos_pinos = get_value("parafusos_pinos")
-        pdf.smart_field("PARAFUSOS/PINOS", parafusos_pinos)
+            parafusos_pinos = get_value("parafusos_pinos")
+            pdf.smart_field("PARAFUSOS/PINOS", parafusos_pinos)
             
-        superficie_vedacao = get_value("superficie_vedacao")
-        pdf.smart_field("SUPERFÍCIE DE VEDAÇÃO", superficie_vedacao)
+            superficie_vedacao = get_value("superficie_vedacao")
+            pdf.smart_field("SUPERFÍCIE DE VEDAÇÃO", superficie_vedacao)
             
-        engrenagens = get_value("engrenagens")
-        pdf.smart_field("ENGRENAGENS", engrenagens)
+            engrenagens = get_value("engrenagens")
+            pdf.smart_field("ENGRENAGENS", engrenagens)
             
-        bico_injetor = get_value("bico_injetor")
-        pdf.smart_field("BICO INJETOR", bico_injetor)
+            bico_injetor = get_value("bico_injetor")
+            pdf.smart_field("BICO INJETOR", bico_injetor)
             
-        rolamentos = get_value("rolamentos")
-        pdf.smart_field("ROLAMENTOS", rolamentos)
+            rolamentos = get_value("rolamentos")
+            pdf.smart_field("ROLAMENTOS", rolamentos)
             
-        aspecto_oleo = get_value("aspecto_oleo")
-        pdf.smart_field("ASPECTO DO ÓLEO", aspecto_oleo)
+            aspecto_oleo = get_value("aspecto_oleo")
+            pdf.smart_field("ASPECTO DO ÓLEO", aspecto_oleo)
             
-        data_peritagem = get_value("data_peritagem")
-        pdf.field_label_value("DATA DA PERITAGEM", data_peritagem)
+            data_peritagem = get_value("data_peritagem")
+            pdf.field_label_value("DATA DA PERITAGEM", data_peritagem)
         
-        # Anexos da Aba 2 com imagens
-        if 2 in anexos_abas and anexos_abas[2]:
-            pdf.add_attachments_section(anexos_abas[2], "ANEXOS - PERITAGEM DO SUBCONJUNTO")
+            # Anexos da Aba 2 com imagens
+            if 2 in anexos_abas and anexos_abas[2]:
+                pdf.add_attachments_section(anexos_abas[2], "ANEXOS - PERITAGEM DO SUBCONJUNTO")
         
-        # === PÁGINA 4: MÓDULO C - DESMEMBRANDO UNIDADE COMPRESSORA ===
-        pdf.add_page()
-        pdf.section_title("MÓDULO C - DESMEMBRANDO UNIDADE COMPRESSORA")
-        pdf.ln(2)
-        pdf.set_pdf_font('', 9)
-        pdf.cell(0, 5, "Grau de interferência na desmontagem", 0, 1)
-        pdf.ln(2)
+            # === PÁGINA 4: MÓDULO C - DESMEMBRANDO UNIDADE COMPRESSORA ===
+            pdf.add_page()
+            pdf.section_title("MÓDULO C - DESMEMBRANDO UNIDADE COMPRESSORA")
+            pdf.ln(2)
+            pdf.set_pdf_font('', 9)
+            pdf.cell(0, 5, "Grau de interferência na desmontagem", 0, 1)
+            pdf.ln(2)
         
-        interf_desmontagem = get_value("interf_desmontagem")
-        pdf.smart_field("INTERFERÊNCIA PARA DESMONTAGEM", interf_desmontagem)
+            interf_desmontagem = get_value("interf_desmontagem")
+            pdf.smart_field("INTERFERÊNCIA PARA DESMONTAGEM", interf_desmontagem)
             
-        aspecto_rotores_aba3 = get_value("aspecto_rotores_aba3")
-        pdf.smart_field("ASPECTO DOS ROTORES", aspecto_rotores_aba3)
+            aspecto_rotores_aba3 = get_value("aspecto_rotores_aba3")
+            pdf.smart_field("ASPECTO DOS ROTORES", aspecto_rotores_aba3)
             
-        aspecto_carcaca = get_value("aspecto_carcaca")
-        pdf.smart_field("ASPECTO DA CARCAÇA", aspecto_carcaca)
+            aspecto_carcaca = get_value("aspecto_carcaca")
+            pdf.smart_field("ASPECTO DA CARCAÇA", aspecto_carcaca)
             
-        interf_mancais = get_value("interf_mancais")
-        pdf.smart_field("INTERFERÊNCIA DOS MANCAIS", interf_mancais)
+            interf_mancais = get_value("interf_mancais")
+            pdf.smart_field("INTERFERÊNCIA DOS MANCAIS", interf_mancais)
             
-        galeria_hidraulica = get_value("galeria_hidraulica")
-        pdf.smart_field("GALERIA HIDRÁULICA", galeria_hidraulica)
+            galeria_hidraulica = get_value("galeria_hidraulica")
+            pdf.smart_field("GALERIA HIDRÁULICA", galeria_hidraulica)
             
-        data_desmembracao = get_value("data_desmembracao")
-        pdf.field_label_value("DATA DE DESMEMBRAÇÃO", data_desmembracao)
+            data_desmembracao = get_value("data_desmembracao")
+            pdf.field_label_value("DATA DE DESMEMBRAÇÃO", data_desmembracao)
         
-        # Anexos da Aba 3 com imagens
-        if 3 in anexos_abas and anexos_abas[3]:
-            pdf.add_attachments_section(anexos_abas[3], "ANEXOS - DESMEMBRAÇÃO DA UNIDADE")
+            # Anexos da Aba 3 com imagens
+            if 3 in anexos_abas and anexos_abas[3]:
+                pdf.add_attachments_section(anexos_abas[3], "ANEXOS - DESMEMBRAÇÃO DA UNIDADE")
         
-        # === PÁGINA 5: MÓDULO D - RELAÇÃO DE PEÇAS E SERVIÇOS ===
-        pdf.add_page()
-        pdf.section_title("MÓDULO D - RELAÇÃO DE PEÇAS E SERVIÇOS")
+            # === PÁGINA 5: MÓDULO D - RELAÇÃO DE PEÇAS E SERVIÇOS ===
+            pdf.add_page()
+            pdf.section_title("MÓDULO D - RELAÇÃO DE PEÇAS E SERVIÇOS")
         
-        servicos_propostos = get_value("servicos_propostos")
-        pdf.multi_line_field("SERVIÇOS PROPOSTOS PARA REFORMA DO SUBCONJUNTO", servicos_propostos)
+            servicos_propostos = get_value("servicos_propostos")
+            pdf.multi_line_field("SERVIÇOS PROPOSTOS PARA REFORMA DO SUBCONJUNTO", servicos_propostos)
             
-        pecas_recomendadas = get_value("pecas_recomendadas")
-        pdf.multi_line_field("PEÇAS RECOMENDADAS PARA REFORMA", pecas_recomendadas)
+            pecas_recomendadas = get_value("pecas_recomendadas")
+            pdf.multi_line_field("PEÇAS RECOMENDADAS PARA REFORMA", pecas_recomendadas)
             
-        data_pecas = get_value("data_pecas")
-        pdf.field_label_value("DATA", data_pecas)
+            data_pecas = get_value("data_pecas")
+            pdf.field_label_value("DATA", data_pecas)
         
-        pdf.ln(5)
+            pdf.ln(5)
         
-        # === INFORMAÇÕES COMPLEMENTARES ===
-        pdf.section_title("INFORMAÇÕES COMPLEMENTARES")
+            # === INFORMAÇÕES COMPLEMENTARES ===
+            pdf.section_title("INFORMAÇÕES COMPLEMENTARES")
         
-        # Informações de tempo já foram adicionadas na primeira página
-        # Aqui podem ser adicionadas outras informações complementares se necessário
+            # Informações de tempo já foram adicionadas na primeira página
+            # Aqui podem ser adicionadas outras informações complementares se necessário
         
-        # Anexos da Aba 4 com imagens
-        if 4 in anexos_abas and anexos_abas[4]:
-            pdf.add_attachments_section(anexos_abas[4], "ANEXOS - PEÇAS E SERVIÇOS")
+            # Anexos da Aba 4 com imagens
+            if 4 in anexos_abas and anexos_abas[4]:
+                pdf.add_attachments_section(anexos_abas[4], "ANEXOS - PEÇAS E SERVIÇOS")
         
-        # Salvar arquivo
-        output_dir = os.path.join("data", "relatorios")
-        os.makedirs(output_dir, exist_ok=True)
-        filename = f"relatorio_{relatorio_id}.pdf"
-        filepath = os.path.join(output_dir, filename)
-        pdf.output(filepath)
+            # Salvar arquivo
+            output_dir = os.path.join("data", "relatorios")
+            os.makedirs(output_dir, exist_ok=True)
+            filename = f"relatorio_{relatorio_id}.pdf"
+            filepath = os.path.join(output_dir, filename)
+            pdf.output(filepath)
         
-        return True, filepath
+            return True, filepath
         
-    except Exception as e:
-        return False, str(e)
-    finally:
-        conn.close()
\ No newline at end of file
+        except TarefaCancelada:
+            raise
+        except Exception as e:
+            return False, str(e)
\ No newline at end of file
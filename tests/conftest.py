@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+
+@pytest.fixture
+def banco(tmp_path):
+    """Banco novo (schema completo e todas as migrações) em um diretório temporário"""
+    caminho = str(tmp_path / "crm_teste.db")
+    database.criar_banco(caminho)
+    yield caminho
+    database.fechar_conexoes()
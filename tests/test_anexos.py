@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+import database
+from database import obter_conexao
+from utils import anexos
+from utils.anexos import ingerir_arquivo, listar_anexos, remover_blobs_orfaos, salvar_anexos
+from utils.arquivamento import arquivar_historico
+
+
+@pytest.fixture
+def armazenamento(banco, tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", banco)
+    monkeypatch.setattr(anexos, "ANEXOS_DIR", str(tmp_path / "anexos"))
+    return banco
+
+
+def _arquivo(tmp_path, nome, conteudo):
+    caminho = tmp_path / nome
+    caminho.write_bytes(conteudo)
+    return str(caminho)
+
+
+def _blobs():
+    return sorted(nome for _raiz, _dirs, arquivos in os.walk(anexos.ANEXOS_DIR) for nome in arquivos)
+
+
+def test_ingerir_o_mesmo_conteudo_reutiliza_o_blob(armazenamento, tmp_path):
+    conteudo = b"%PDF-1.4 laudo" * 100000
+    primeiro = ingerir_arquivo(_arquivo(tmp_path, "laudo.pdf", conteudo), "Laudo")
+    segundo = ingerir_arquivo(_arquivo(tmp_path, "laudo copia.pdf", conteudo))
+    outro = ingerir_arquivo(_arquivo(tmp_path, "notas.txt", b"outro conteudo"))
+
+    assert primeiro['sha256'] == segundo['sha256'] != outro['sha256']
+    assert primeiro['caminho'] == segundo['caminho'] == anexos.caminho_blob(primeiro['sha256'])
+    assert (segundo['nome'], segundo['size'], segundo['mime']) == ("laudo copia.pdf", len(conteudo), "application/pdf")
+    assert primeiro['descricao'] == "Laudo"
+    # Um arquivo por conteúdo, sem temporários .ingest- sobrando
+    assert _blobs() == sorted([primeiro['sha256'], outro['sha256']])
+    with open(primeiro['caminho'], 'rb') as arquivo:
+        assert arquivo.read() == conteudo
+
+
+def _relatorio(conn, numero, data):
+    return conn.execute("""
+        INSERT INTO relatorios_tecnicos (numero_relatorio, cliente_id, responsavel_id, data_criacao, created_at)
+        VALUES (?, 1, 1, ?, ?)
+    """, (numero, data, data)).lastrowid
+
+
+def test_remover_orfaos_preserva_anexos_de_relatorios_arquivados(armazenamento, tmp_path):
+    ativo = ingerir_arquivo(_arquivo(tmp_path, "ativo.jpg", b"foto do relatorio ativo"))
+    arquivado = ingerir_arquivo(_arquivo(tmp_path, "antigo.jpg", b"foto do relatorio antigo"))
+    orfao = ingerir_arquivo(_arquivo(tmp_path, "removido.jpg", b"foto retirada do relatorio"))
+    with obter_conexao(armazenamento) as conn:
+        recente = _relatorio(conn, "REL-NOVO", "2024-03-01")
+        antigo = _relatorio(conn, "REL-ANTIGO", "2020-02-01")
+        salvar_anexos(conn, recente, {1: [ativo]})
+        salvar_anexos(conn, antigo, {2: [arquivado]})
+        conn.commit()
+    assert arquivar_historico("2021-01-01", armazenamento)['relatorio_anexos'] == 1
+    # Temporário de uma ingestão em andamento
+    temporario = os.path.join(anexos.ANEXOS_DIR, ".ingest-emandamento")
+    open(temporario, 'wb').close()
+
+    assert remover_blobs_orfaos() == 1
+    assert not os.path.exists(orfao['caminho'])
+    assert os.path.exists(ativo['caminho']) and os.path.exists(arquivado['caminho'])
+    assert os.path.exists(temporario)
+    assert [a['sha256'] for a in listar_anexos(antigo)[2]] == [arquivado['sha256']]
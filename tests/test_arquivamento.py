@@ -0,0 +1,118 @@
+import pytest
+
+import database
+from database import obter_conexao, recalcular_cliente_stats, recalcular_dashboard_resumo, transacao
+from utils.arquivamento import (_arquivamento_atomico, _copiar_para_arquivo, arquivar_historico,
+                                concluir_arquivamento_pendente)
+
+CORTE = "2021-01-01"
+
+
+def _inserir_cotacao(conn, numero, cliente_id, data, status, valor):
+    conn.execute("""
+        INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao, status, valor_total, created_at)
+        VALUES (?, ?, 1, ?, ?, ?, ?)
+    """, (numero, cliente_id, data, status, valor, data))
+
+
+@pytest.fixture
+def historico(banco):
+    with obter_conexao(banco) as conn:
+        conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente Arquivado')")
+        _inserir_cotacao(conn, "PROP-A", 1, "2020-01-10", "Aprovada", 1000)
+        _inserir_cotacao(conn, "PROP-B", 1, "2020-03-01", "Rejeitada", 500)
+        _inserir_cotacao(conn, "PROP-C", 1, "2019-06-01", "Em Aberto", 300)
+        _inserir_cotacao(conn, "PROP-D", 1, "2024-02-01", "Aprovada", 200)
+        _inserir_cotacao(conn, "PROP-E", 2, "2020-05-05", "Aprovada", 700)
+        conn.execute("INSERT INTO itens_cotacao (cotacao_id, tipo, item_nome, quantidade, valor_unitario, valor_total_item) "
+                     "VALUES (1, 'Produto', 'Filtro', 1, 1000, 1000)")
+        conn.execute("""
+            INSERT INTO relatorios_tecnicos (numero_relatorio, cliente_id, responsavel_id, data_criacao, created_at)
+            VALUES ('REL-1', 1, 1, '2020-02-01', '2020-02-01')
+        """)
+        conn.commit()
+    return banco
+
+
+def _contadores(banco):
+    with obter_conexao(banco) as conn:
+        return (conn.execute("SELECT * FROM cliente_stats ORDER BY cliente_id").fetchall(),
+                conn.execute("SELECT * FROM dashboard_resumo ORDER BY responsavel_id, filial_id").fetchall())
+
+
+def _contadores_recalculados(banco):
+    with transacao(banco) as conn:
+        recalcular_cliente_stats(conn)
+        recalcular_dashboard_resumo(conn)
+    return _contadores(banco)
+
+
+def _numeros(banco, esquema):
+    with obter_conexao(banco) as conn:
+        return [row[0] for row in conn.execute(f"SELECT numero_proposta FROM {esquema}.cotacoes ORDER BY numero_proposta")]
+
+
+def test_arquivamento_move_linhas_e_preserva_contadores(historico):
+    antes = _contadores(historico)
+    movidas = arquivar_historico(CORTE, historico)
+    assert movidas == {'cotacoes': 3, 'itens_cotacao': 1, 'relatorios_tecnicos': 1,
+                       'eventos_campo': 0, 'relatorio_anexos': 0}
+    assert _numeros(historico, "main") == ["PROP-C", "PROP-D"]
+    assert _numeros(historico, "arquivo") == ["PROP-A", "PROP-B", "PROP-E"]
+    with obter_conexao(historico) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM cotacoes_todas").fetchone()[0] == 5
+        assert conn.execute("SELECT COUNT(*) FROM arquivo.arquivamento_pendente").fetchone()[0] == 0
+    assert _contadores(historico) == antes
+    assert _contadores_recalculados(historico) == antes
+
+
+def test_arquivamento_repetido_nao_duplica(historico):
+    antes = _contadores(historico)
+    arquivar_historico(CORTE, historico)
+    assert set(arquivar_historico(CORTE, historico).values()) == {0}
+    assert _numeros(historico, "arquivo") == ["PROP-A", "PROP-B", "PROP-E"]
+    assert _contadores(historico) == antes
+
+
+def test_arquivamento_sem_wal_em_uma_transacao(historico, monkeypatch):
+    monkeypatch.setattr(database, "JOURNAL_MODE", "DELETE")
+    with obter_conexao(historico) as conn:
+        conn.execute("PRAGMA main.journal_mode = DELETE")
+    antes = _contadores(historico)
+    arquivar_historico(CORTE, historico)
+    with obter_conexao(historico) as conn:
+        assert _arquivamento_atomico(conn)
+    assert _numeros(historico, "main") == ["PROP-C", "PROP-D"]
+    assert _contadores(historico) == antes
+
+
+def test_arquivamento_interrompido_e_concluido_na_inicializacao(historico):
+    antes = _contadores(historico)
+    with obter_conexao(historico) as conn:
+        database.anexar_arquivo(conn, historico, criar=True)
+    # Cópia confirmada, exclusão no banco principal nunca aconteceu
+    with transacao(historico) as conn:
+        _copiar_para_arquivo(conn, CORTE)
+    assert _numeros(historico, "arquivo") == ["PROP-A", "PROP-B", "PROP-E"]
+    assert "PROP-A" in _numeros(historico, "main")
+
+    assert concluir_arquivamento_pendente(historico) == CORTE
+    assert _numeros(historico, "main") == ["PROP-C", "PROP-D"]
+    assert _contadores(historico) == antes
+    assert concluir_arquivamento_pendente(historico) is None
+
+
+def test_contadores_incrementais_apos_arquivamento(historico):
+    arquivar_historico(CORTE, historico)
+    with obter_conexao(historico) as conn:
+        _inserir_cotacao(conn, "PROP-F", 2, "2020-01-01", "Em Aberto", 50)
+        conn.execute("DELETE FROM cotacoes WHERE numero_proposta = 'PROP-D'")
+        conn.commit()
+        total, ultima = conn.execute(
+            "SELECT total_cotacoes, ultima_cotacao FROM cliente_stats WHERE cliente_id = 2").fetchone()
+        # A cotação arquivada continua contando e segue sendo a mais recente
+        assert (total, ultima) == (2, "2020-05-05")
+        total, ultima = conn.execute(
+            "SELECT total_cotacoes, ultima_cotacao FROM cliente_stats WHERE cliente_id = 1").fetchone()
+        # Excluir não recua ultima_cotacao
+        assert (total, ultima) == (3, "2024-02-01")
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import database
+from database import obter_conexao, obter_conexao_leitura
+from utils import backup
+from utils.backup import atualizar_snapshot_leitura
+
+
+def _carregar(banco, linhas):
+    with obter_conexao(banco) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS carga (dados BLOB)")
+        conn.executemany("INSERT INTO carga VALUES (?)", [(b"x" * 3000,)] * linhas)
+        conn.commit()
+
+
+@pytest.fixture
+def leitura(banco, tmp_path, monkeypatch):
+    for modulo in (database, backup):
+        monkeypatch.setattr(modulo, "SNAPSHOT_DIR", str(tmp_path / "leitura"))
+    monkeypatch.setattr(database, "USAR_SNAPSHOT_LEITURA", True)
+    return banco
+
+
+def _contar_na_copia(banco):
+    with obter_conexao_leitura(banco) as conn:
+        return conn.execute("SELECT COUNT(*) FROM carga").fetchone()[0]
+
+
+def test_leitores_da_copia_nao_sao_bloqueados_pela_atualizacao(leitura, monkeypatch):
+    # Espera curta por lock na conexão de leitura: um bloqueio vira erro em vez de atraso
+    monkeypatch.setattr(database, "BUSY_TIMEOUT_MS", 50)
+    # Maior que o cache de páginas: a cópia precisa gravar no arquivo antes do fim
+    _carregar(leitura, 3000)
+    atualizar_snapshot_leitura(leitura)
+    assert _contar_na_copia(leitura) == 3000
+    _carregar(leitura, 1000)
+
+    erros = []
+    atualizacao = threading.Thread(
+        target=lambda: atualizar_snapshot_leitura(leitura, paginas=64, pausa=0.002))
+    atualizacao.start()
+    contagens = set()
+    while atualizacao.is_alive():
+        try:
+            contagens.add(_contar_na_copia(leitura))
+        except sqlite3.OperationalError as e:
+            erros.append(str(e))
+    atualizacao.join()
+
+    assert erros == []
+    assert contagens <= {3000, 4000}
+    # A conexão já aberta na thread passa a ver a cópia nova
+    assert _contar_na_copia(leitura) == 4000
+
+
+def test_criar_backup_gera_copia_verificada_e_listada(banco, tmp_path):
+    destino = str(tmp_path / "backups")
+    _carregar(banco, 50)
+    criados = backup.criar_backup(banco, destino=destino, pausa=0)
+
+    assert criados[0] == backup.listar_backups(banco, destino)[0]
+    assert backup.verificar_backup(criados[0]) == (True, "ok")
+    copia = sqlite3.connect(criados[0])
+    try:
+        assert copia.execute("SELECT COUNT(*) FROM carga").fetchone()[0] == 50
+        assert copia.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+    finally:
+        copia.close()
+    assert not [nome for nome in os.listdir(destino) if nome.endswith(".parcial")]
+
+
+def test_backup_que_falha_na_verificacao_nao_fica_listado(banco, tmp_path, monkeypatch):
+    destino = str(tmp_path / "backups")
+    monkeypatch.setattr(backup, "verificar_backup", lambda caminho: (False, "página corrompida"))
+    with pytest.raises(RuntimeError, match="página corrompida"):
+        backup.criar_backup(banco, destino=destino, pausa=0)
+    assert os.listdir(destino) == []
+
+
+def test_verificar_backup_acusa_arquivo_corrompido(banco, tmp_path):
+    _carregar(banco, 50)
+    caminho = backup.criar_backup(banco, destino=str(tmp_path / "backups"), pausa=0)[0]
+    with open(caminho, "r+b") as arquivo:
+        tamanho_pagina = int.from_bytes(arquivo.read(18)[16:18], "big")
+        arquivo.seek(tamanho_pagina)
+        arquivo.write(b"\xff" * tamanho_pagina * 4)
+
+    ok, mensagem = backup.verificar_backup(caminho)
+    assert not ok and mensagem
+
+
+def test_rotacao_mantem_os_mais_recentes_e_remove_parciais_esquecidos(banco, tmp_path):
+    destino = tmp_path / "backups"
+    destino.mkdir()
+    prefixo = os.path.splitext(os.path.basename(banco))[0]
+    nomes = [f"{prefixo}-2024010{dia}-120000.db" for dia in range(1, 6)]
+    for nome in nomes:
+        (destino / nome).write_bytes(b"")
+    esquecido = destino / f"{prefixo}-20231231-120000.db.parcial"
+    em_andamento = destino / f"{prefixo}-20240106-120000.db.parcial"
+    for parcial in (esquecido, em_andamento):
+        parcial.write_bytes(b"")
+    duas_horas_atras = time.time() - 2 * 3600
+    os.utime(esquecido, (duas_horas_atras, duas_horas_atras))
+    outro_banco = destino / "outro-20230101-120000.db"
+    outro_banco.write_bytes(b"")
+
+    removidos = backup.rotacionar_backups(banco, manter=2, destino=str(destino))
+
+    assert sorted(os.path.basename(p) for p in removidos) == sorted(nomes[:3] + [esquecido.name])
+    assert [os.path.basename(p) for p in backup.listar_backups(banco, str(destino))] == nomes[:2:-1]
+    assert em_andamento.exists() and outro_banco.exists()
@@ -0,0 +1,62 @@
+import pytest
+
+# O pacote interface.modules importa os geradores de PDF
+pytest.importorskip("fpdf")
+from interface.modules.base_module import BaseModule  # noqa: E402
+
+
+class FrameFalso:
+    def __init__(self):
+        self.ligacoes = []
+
+    def bind(self, sequencia, funcao, add=None):
+        self.ligacoes.append((sequencia, funcao))
+
+    def mapear(self):
+        for sequencia, funcao in self.ligacoes:
+            if sequencia == '<Map>':
+                funcao(None)
+
+
+class ModuloFalso:
+    """Métodos e estado das seções adiadas de BaseModule, sem montar a tela"""
+
+    adiar_construcao = BaseModule.adiar_construcao
+    construir_secao = BaseModule.construir_secao
+    secao_pendente = BaseModule.secao_pendente
+    descartar_secao = BaseModule.descartar_secao
+
+    def __init__(self):
+        self._secoes_adiadas = {}
+        self.tempos_secoes = {}
+
+
+def _adiar(modulo, nome, construidas):
+    frame = FrameFalso()
+    modulo.adiar_construcao(frame, nome, lambda f: construidas.append((nome, f)))
+    return frame
+
+
+def test_secao_adiada_e_construida_uma_vez_ao_aparecer():
+    modulo, construidas = ModuloFalso(), []
+    frame = _adiar(modulo, "aba2", construidas)
+    assert construidas == [] and modulo.secao_pendente("aba2")
+
+    frame.mapear()
+    frame.mapear()
+    assert construidas == [("aba2", frame)]
+    assert not modulo.secao_pendente("aba2") and "aba2" in modulo.tempos_secoes
+
+
+def test_construir_secao_antes_de_aparecer_e_registro_novo_do_mesmo_nome():
+    modulo, construidas = ModuloFalso(), []
+    antigo = _adiar(modulo, "tecnico", construidas)
+    modulo.descartar_secao("tecnico")
+    novo = _adiar(modulo, "tecnico", construidas)
+
+    # O <Map> do frame descartado não constrói a seção registrada depois
+    antigo.mapear()
+    assert construidas == []
+    modulo.construir_secao("tecnico")
+    novo.mapear()
+    assert construidas == [("tecnico", novo)]
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from database import fechar_conexoes
+from utils.benchmark import CONSULTAS, FUNCOES, comparar, executar_benchmark
+from utils.dados_sinteticos import gerar_base
+
+ESCALA = 0.01
+
+
+@pytest.fixture
+def base_sintetica(tmp_path):
+    caminho = str(tmp_path / "sintetica.db")
+    totais = gerar_base(caminho, ESCALA)
+    yield caminho, totais
+    fechar_conexoes()
+
+
+def _cotacoes(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return conn.execute("SELECT numero_proposta, cliente_id, status, valor_total FROM cotacoes ORDER BY id"
+                            ).fetchall()
+    finally:
+        conn.close()
+
+
+def test_mesma_semente_gera_a_mesma_base(base_sintetica, tmp_path):
+    caminho, totais = base_sintetica
+    assert totais['cotacoes'] == int(5000 * ESCALA) and totais['itens_cotacao'] > 0
+    assert totais['kit_items'] > 0 and totais['eventos_campo'] > 0
+
+    outra = str(tmp_path / "outra.db")
+    assert gerar_base(outra, ESCALA) == totais
+    assert _cotacoes(outra) == _cotacoes(caminho)
+    with pytest.raises(FileExistsError):
+        gerar_base(caminho, ESCALA)
+
+
+def test_benchmark_mede_todas_as_consultas_da_base(base_sintetica):
+    caminho, totais = base_sintetica
+    resultado = executar_benchmark(caminho, repeticoes=2)
+
+    assert set(resultado['resultados']) == {nome for nome, *_resto in CONSULTAS} | {nome for nome, _f in FUNCOES}
+    assert all(0 <= medida['min_ms'] <= medida['p50_ms'] <= medida['max_ms']
+               for medida in resultado['resultados'].values())
+    assert resultado['volumes']['cotacoes'] == totais['cotacoes']
+    assert resultado['resultados']['clientes.listar']['linhas'] == totais['clientes']
+
+    filtrado = executar_benchmark(caminho, repeticoes=1, filtro="clientes.")
+    assert filtrado['resultados'] and all(nome.startswith("clientes.") for nome in filtrado['resultados'])
+
+
+def test_comparar_aponta_so_regressoes_acima_da_tolerancia_e_do_ruido():
+    anterior = {'resultados': {'a': {'p50_ms': 10.0}, 'b': {'p50_ms': 10.0}, 'c': {'p50_ms': 0.2}}}
+    atual = {'resultados': {'a': {'p50_ms': 11.0}, 'b': {'p50_ms': 15.0}, 'c': {'p50_ms': 0.9},
+                            'nova': {'p50_ms': 50.0}}}
+    assert comparar(anterior, atual) == [('b', 10.0, 15.0)]
@@ -0,0 +1,68 @@
+import pytest
+
+from database import campos_busca_cliente, campos_busca_produto, obter_conexao
+from utils.busca import buscar_clientes_texto, buscar_produtos_texto, montar_consulta_fts
+
+
+def _inserir_cliente(conn, nome, cidade, cnpj, nome_fantasia=None):
+    conn.execute("""
+        INSERT INTO clientes (nome, nome_fantasia, cidade, cnpj, nome_busca, cidade_busca, cnpj_digitos)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (nome, nome_fantasia, cidade, cnpj) + campos_busca_cliente(nome, nome_fantasia, cidade, cnpj))
+
+
+def _inserir_produto(conn, nome, tipo, descricao):
+    conn.execute("""
+        INSERT INTO produtos (nome, tipo, valor_unitario, descricao, nome_busca, detalhes_busca)
+        VALUES (?, ?, 10, ?, ?, ?)
+    """, (nome, tipo, descricao) + campos_busca_produto(nome, tipo, descricao))
+
+
+@pytest.fixture
+def cadastros(banco):
+    with obter_conexao(banco) as conn:
+        _inserir_cliente(conn, "Metalúrgica Zeta", "Ribeirão Preto", "11.222.333/0001-81")
+        _inserir_cliente(conn, "Açougue Alfa", "Ribeirão Preto", "44.555.666/0001-99")
+        _inserir_cliente(conn, "Indústria Beta", "Campinas", "77.888.999/0001-00", "Beta Compressores")
+        _inserir_produto(conn, "Válvula de admissão", "Produto", "Peça do cabeçote")
+        _inserir_produto(conn, "Filtro de ar", "Produto", "Elemento filtrante")
+        _inserir_produto(conn, "Troca de válvula", "Serviço", "Mão de obra")
+        conn.commit()
+    return banco
+
+
+def _nomes(linhas):
+    return [linha[1] for linha in linhas]
+
+
+def test_busca_de_clientes_ignora_acentos_e_ordena_por_nome(cadastros):
+    assert _nomes(buscar_clientes_texto("ribeirao preto", db_name=cadastros)) == ["Açougue Alfa", "Metalúrgica Zeta"]
+
+
+def test_busca_de_clientes_por_nome_fantasia_e_cnpj(cadastros):
+    assert _nomes(buscar_clientes_texto("compressores", db_name=cadastros)) == ["Indústria Beta"]
+    assert _nomes(buscar_clientes_texto("44.555.666", db_name=cadastros)) == ["Açougue Alfa"]
+
+
+def test_busca_de_clientes_respeita_o_limite_na_ordem_por_nome(cadastros):
+    assert _nomes(buscar_clientes_texto("preto", limite=1, db_name=cadastros)) == ["Açougue Alfa"]
+
+
+def test_busca_de_clientes_com_palavra_curta(cadastros):
+    assert _nomes(buscar_clientes_texto("sp zeta", db_name=cadastros)) == []
+    assert _nomes(buscar_clientes_texto("al", db_name=cadastros)) == ["Açougue Alfa", "Metalúrgica Zeta"]
+
+
+def test_busca_de_produtos_por_nome_e_detalhes(cadastros):
+    assert _nomes(buscar_produtos_texto("valvula", db_name=cadastros)) == ["Troca de válvula", "Válvula de admissão"]
+    assert _nomes(buscar_produtos_texto("servico", db_name=cadastros)) == ["Troca de válvula"]
+
+
+def test_termo_vazio_nao_consulta():
+    assert buscar_clientes_texto("  ") == []
+    assert buscar_produtos_texto("") == []
+
+
+def test_montar_consulta_fts():
+    assert montar_consulta_fts("rolamento motor") == '"rolamento"* "motor"*'
+    assert montar_consulta_fts("--") == ''
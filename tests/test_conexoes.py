@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from database import obter_conexao, transacao
+
+
+def _valores(banco):
+    with obter_conexao(banco) as conn:
+        return [row[0] for row in conn.execute("SELECT valor FROM teste ORDER BY valor")]
+
+
+@pytest.fixture
+def tabela(banco):
+    with obter_conexao(banco) as conn:
+        conn.execute("CREATE TABLE teste (valor INTEGER)")
+        conn.commit()
+    return banco
+
+
+def test_emprestimo_aninhado_dentro_de_transacao_nao_desfaz_a_externa(tabela):
+    with transacao(tabela) as conn:
+        conn.execute("INSERT INTO teste VALUES (1)")
+        auxiliar = obter_conexao(tabela)
+        auxiliar.execute("INSERT INTO teste VALUES (2)")
+        auxiliar.close()
+        assert conn.in_transaction
+        conn.execute("INSERT INTO teste VALUES (3)")
+    assert _valores(tabela) == [1, 2, 3]
+    assert conn.emprestimos == 0
+
+
+def test_commit_e_rollback_aninhados_agem_so_no_savepoint(tabela):
+    with transacao(tabela) as conn:
+        conn.execute("INSERT INTO teste VALUES (1)")
+        with obter_conexao(tabela) as auxiliar:
+            auxiliar.execute("INSERT INTO teste VALUES (2)")
+            auxiliar.rollback()
+        with obter_conexao(tabela) as auxiliar:
+            auxiliar.execute("INSERT INTO teste VALUES (3)")
+            auxiliar.commit()
+        assert conn.in_transaction
+    assert _valores(tabela) == [1, 3]
+
+
+def test_commit_aninhado_nao_confirma_pendencias_do_chamador(tabela):
+    conn = obter_conexao(tabela)
+    conn.execute("INSERT INTO teste VALUES (1)")
+    with obter_conexao(tabela) as auxiliar:
+        auxiliar.execute("INSERT INTO teste VALUES (2)")
+        auxiliar.commit()
+    # A última devolução descarta o que o chamador não confirmou
+    conn.close()
+    assert _valores(tabela) == []
+
+
+def test_transacao_aninhada_com_erro_desfaz_so_o_bloco_interno(tabela):
+    with transacao(tabela) as conn:
+        conn.execute("INSERT INTO teste VALUES (1)")
+        with pytest.raises(ValueError):
+            with transacao(tabela):
+                conn.execute("INSERT INTO teste VALUES (2)")
+                raise ValueError
+    assert _valores(tabela) == [1]
+
+
+def test_with_devolve_a_conexao_em_excecao(tabela):
+    with pytest.raises(sqlite3.OperationalError):
+        with obter_conexao(tabela) as conn:
+            conn.execute("INSERT INTO teste VALUES (1)")
+            conn.execute("SELECT * FROM tabela_inexistente")
+    assert conn.emprestimos == 0
+    assert not conn.in_transaction
+    assert _valores(tabela) == []
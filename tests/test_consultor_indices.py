@@ -0,0 +1,57 @@
+import ast
+
+import pytest
+
+from utils.consultor_indices import _acessos, _ColetorSQL
+
+
+@pytest.mark.parametrize("plano", [
+    # SQLite 3.36+
+    ["SCAN c", "SEARCH p USING INDEX idx_cotacoes_cliente (cliente_id=?)",
+     "SCAN produtos USING COVERING INDEX idx_produtos_nome", "SEARCH clientes USING INTEGER PRIMARY KEY (rowid=?)"],
+    # Formato anterior, com TABLE e o nome da tabela antes do alias
+    ["SCAN TABLE clientes AS c", "SEARCH TABLE cotacoes AS p USING INDEX idx_cotacoes_cliente (cliente_id=?)",
+     "SCAN TABLE produtos USING COVERING INDEX idx_produtos_nome",
+     "SEARCH TABLE clientes USING INTEGER PRIMARY KEY (rowid=?)"],
+])
+def test_acessos_nos_dois_formatos_de_plano(plano):
+    assert _acessos(plano) == [("c", "SCAN", 0), ("p", "SEARCH", 1), ("produtos", "SCAN_INDICE", 0)]
+
+
+FONTE = '''
+def listar(conn, cliente_id):
+    sql = "SELECT * FROM cotacoes WHERE cliente_id = ?"
+    conn.execute(sql, (cliente_id,))
+    conn.execute("DELETE FROM contatos WHERE id = ?", (1,))
+    conn.execute(f"SELECT * FROM {tabela}")
+    conn.execute("CREATE TABLE x (id)")
+'''
+
+
+def _coletar(arvore):
+    coletor = _ColetorSQL("modulo.py")
+    coletor.visit(arvore)
+    return [c['sql'] for c in coletor.consultas], coletor.dinamicas
+
+
+def test_coletor_le_literais_e_variaveis():
+    assert _coletar(ast.parse(FONTE)) == (
+        ["SELECT * FROM cotacoes WHERE cliente_id = ?", "DELETE FROM contatos WHERE id = ?"], 1)
+
+
+class StrAntigo(ast.expr):
+    """Literal de string como o ast.parse do Python 3.7 gera (ast.Str, valor em .s)"""
+    _fields = ('s',)
+
+
+def test_coletor_aceita_literais_do_python_37():
+    arvore = ast.parse(FONTE)
+    for no in ast.walk(arvore):
+        for campo, valor in ast.iter_fields(no):
+            if isinstance(valor, ast.Constant) and isinstance(valor.value, str):
+                setattr(no, campo, StrAntigo(s=valor.value))
+            elif isinstance(valor, list):
+                valor[:] = [StrAntigo(s=v.value) if isinstance(v, ast.Constant) and isinstance(v.value, str)
+                            else v for v in valor]
+    assert not any(isinstance(no, ast.Constant) and isinstance(no.value, str) for no in ast.walk(arvore))
+    assert _coletar(arvore) == _coletar(ast.parse(FONTE))
@@ -0,0 +1,70 @@
+import threading
+from datetime import date
+
+import pytest
+
+from database import obter_conexao
+from utils.cotacao_validator import STATUS_EXPIRADA, expirar_cotacoes, iniciar_expiracao_automatica
+
+HOJE = date(2024, 6, 1)
+
+
+@pytest.fixture
+def cotacoes(banco):
+    with obter_conexao(banco) as conn:
+        conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente Validade')")
+        for numero, validade, status in (
+            ("PROP-1", "2024-05-31", "Em Aberto"),
+            ("PROP-2", "2024-06-01", "Em Aberto"),
+            ("PROP-3", "2024-07-01", "Em Aberto"),
+            ("PROP-4", "2024-01-01", "Aprovada"),
+            ("PROP-5", "2023-12-01", "Em Aberto"),
+        ):
+            conn.execute("""
+                INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao,
+                                      data_validade, status, valor_total)
+                VALUES (?, 1, 1, '2024-01-01', ?, ?, 100)
+            """, (numero, validade, status))
+        conn.commit()
+    return banco
+
+
+def _status(banco):
+    with obter_conexao(banco) as conn:
+        return dict(conn.execute("SELECT numero_proposta, status FROM cotacoes"))
+
+
+def test_expira_so_cotacoes_em_aberto_vencidas(cotacoes):
+    expiradas = expirar_cotacoes(cotacoes, hoje=HOJE)
+
+    assert sorted(row[1] for row in expiradas) == ["PROP-1", "PROP-5"]
+    assert _status(cotacoes) == {"PROP-1": STATUS_EXPIRADA, "PROP-2": "Em Aberto", "PROP-3": "Em Aberto",
+                                 "PROP-4": "Aprovada", "PROP-5": STATUS_EXPIRADA}
+    with obter_conexao(cotacoes) as conn:
+        assert conn.execute("SELECT em_aberto FROM cliente_stats WHERE cliente_id = 1").fetchone()[0] == 2
+
+
+def test_segunda_execucao_nao_encontra_nada(cotacoes):
+    expirar_cotacoes(cotacoes, hoje=HOJE)
+    assert expirar_cotacoes(cotacoes, hoje=HOJE) == []
+
+
+def test_rotina_automatica_avisa_os_ids_expirados(cotacoes):
+    recebidos = []
+    avisado = threading.Event()
+
+    def ao_expirar(ids):
+        recebidos.append(sorted(ids))
+        avisado.set()
+
+    parar = iniciar_expiracao_automatica(ao_expirar, db_name=cotacoes)
+    try:
+        assert avisado.wait(5)
+    finally:
+        parar.set()
+    # A rotina usa a data de hoje: todas as cotações em aberto de 2024 já venceram
+    with obter_conexao(cotacoes) as conn:
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM cotacoes WHERE numero_proposta <> 'PROP-4' ORDER BY id")]
+    assert recebidos == [ids]
+    assert set(_status(cotacoes).values()) == {STATUS_EXPIRADA, "Aprovada"}
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+from database import obter_conexao
+
+openpyxl = pytest.importorskip("openpyxl")
+from utils import exportacao  # noqa: E402
+from utils.exportacao import FORMATO_DATA, FORMATO_MOEDA, exportar_cotacoes, exportar_locacoes  # noqa: E402
+
+
+@pytest.fixture
+def cotacoes(banco, monkeypatch):
+    # Lotes de duas linhas: a exportação precisa juntar vários fetchmany
+    monkeypatch.setattr(exportacao, "TAMANHO_LOTE", 2)
+    with obter_conexao(banco) as conn:
+        cliente = conn.execute("INSERT INTO clientes (nome, cnpj) VALUES ('Cliente Exportado', '11222333000181')"
+                               ).lastrowid
+        for numero, tipo, criada, valor in (("PROP-1", "Compra", "2024-01-01", 1500.5),
+                                            ("PROP-2", "Compra", "2024-01-02", None),
+                                            ("PROP-3", "Compra", "2024-01-03", 80),
+                                            ("LOC-1", "Locação", "2024-01-04", 900)):
+            cotacao = conn.execute("""
+                INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao, status,
+                                      valor_total, tipo_cotacao, created_at, locacao_valor_mensal)
+                VALUES (?, ?, 1, ?, 'Em Aberto', ?, ?, ?, ?)
+            """, (numero, cliente, criada, valor, tipo, criada, 300 if tipo == "Locação" else None)).lastrowid
+            conn.execute("INSERT INTO itens_cotacao (cotacao_id, tipo, item_nome, quantidade, valor_unitario, "
+                         "valor_total_item) VALUES (?, 'Produto', 'Filtro', 2, 10, 20)", (cotacao,))
+        conn.commit()
+    return banco
+
+
+def _linhas(caminho, aba):
+    workbook = openpyxl.load_workbook(caminho)
+    return list(workbook[aba].iter_rows()), workbook.sheetnames
+
+
+def test_exportar_cotacoes_em_lotes_com_celulas_tipadas(cotacoes, tmp_path):
+    caminho = str(tmp_path / "cotacoes.xlsx")
+    progresso = []
+    totais = exportar_cotacoes(caminho, db_name=cotacoes, ao_progresso=progresso.append)
+
+    assert totais == {"Cotações": 3, "Itens": 3}
+    assert progresso == ["Cotações: 2 linha(s)", "Cotações: 3 linha(s)", "Itens: 2 linha(s)", "Itens: 3 linha(s)"]
+    linhas, abas = _linhas(caminho, "Cotações")
+    assert abas == ["Cotações", "Itens"]
+    assert [c.value for c in linhas[0][:3]] == ["Número", "Cliente", "CNPJ"]
+    assert linhas[0][0].font.bold
+    # Mais recentes primeiro
+    assert [linha[0].value for linha in linhas[1:]] == ["PROP-3", "PROP-2", "PROP-1"]
+
+    prop1 = {titulo: celula for (titulo, _tipo), celula in zip(exportacao.COLUNAS_COTACOES, linhas[3])}
+    assert prop1["CNPJ"].value == "11.222.333/0001-81"
+    assert prop1["Valor Total"].value == 1500.5 and prop1["Valor Total"].number_format == FORMATO_MOEDA
+    assert prop1["Data"].value == datetime(2024, 1, 1) and prop1["Data"].number_format == FORMATO_DATA
+    assert prop1["Validade"].value is None
+    assert linhas[2][exportacao.COLUNAS_COTACOES.index(("Valor Total", "moeda"))].value is None
+
+
+def test_exportar_locacoes_so_traz_locacoes(cotacoes, tmp_path):
+    caminho = str(tmp_path / "locacoes.xlsx")
+    assert exportar_locacoes(caminho, incluir_itens=False, db_name=cotacoes) == {"Locações": 1}
+    linhas, abas = _linhas(caminho, "Locações")
+    assert abas == ["Locações"]
+    assert [c.value for c in linhas[0]] == [titulo for titulo, _tipo in exportacao.COLUNAS_LOCACOES]
+    assert linhas[1][0].value == "LOC-1"
+    assert linhas[1][exportacao.COLUNAS_LOCACOES.index(("Valor Mensal", "moeda"))].value == 300
@@ -0,0 +1,65 @@
+import csv
+
+from database import obter_conexao
+from utils.importacao import importar_clientes
+
+PLANILHA = [
+    ["Razão Social", "CNPJ", "E-mail"],
+    ["Cliente Zero", "191", ""],
+    ["Cliente A", "11.222.333/0001-81", "contato@clientea.com.br"],
+    ["", "12.345.678/0001-95", ""],
+    ["Cliente Inválido", "11222333000100", ""],
+    ["Cliente A Repetido", "11222333000181", ""],
+    ["Cliente Email", "12345678000195", "sem-arroba"],
+    ["Cliente B", "11444777000161", ""],
+    ["Cliente B Repetido", "11.444.777/0001-61", ""],
+]
+
+
+def _importar(banco, tmp_path):
+    caminho = tmp_path / "clientes.csv"
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        csv.writer(arquivo, delimiter=";").writerows(PLANILHA)
+    # Lotes de duas linhas: a duplicata de "Cliente A" chega no lote seguinte ao dele
+    return importar_clientes(str(caminho), banco, tamanho_lote=2)
+
+
+def test_importacao_de_clientes_rejeita_e_deduplica_entre_lotes(banco, tmp_path):
+    resultado = _importar(banco, tmp_path)
+    assert (resultado['lidas'], resultado['importadas'], resultado['rejeitadas']) == (8, 3, 5)
+
+    with obter_conexao(banco) as conn:
+        importados = conn.execute("SELECT nome, cnpj, cnpj_digitos FROM clientes WHERE nome <> 'Cliente Teste' "
+                                  "ORDER BY id").fetchall()
+    assert [tuple(row) for row in importados] == [
+        # CNPJ digitado como número no Excel perde os zeros à esquerda
+        ("Cliente Zero", "00.000.000/0001-91", "00000000000191"),
+        ("Cliente A", "11.222.333/0001-81", "11222333000181"),
+        ("Cliente B", "11.444.777/0001-61", "11444777000161"),
+    ]
+
+    with open(resultado['relatorio_rejeicoes'], newline="", encoding="utf-8-sig") as arquivo:
+        linhas = list(csv.reader(arquivo, delimiter=";"))
+    assert linhas[0] == ["linha", "motivo"] + PLANILHA[0]
+    # Em cada lote, as linhas inválidas são registradas antes das já cadastradas no banco
+    assert sorted((int(linha[0]), linha[1]) for linha in linhas[1:]) == [
+        (4, "Nome é obrigatório"),
+        (5, "CNPJ inválido: 11222333000100"),
+        (6, "CNPJ já cadastrado: 11.222.333/0001-81"),
+        (7, "Email inválido: sem-arroba"),
+        (9, "CNPJ repetido na planilha: 11.444.777/0001-61"),
+    ]
+    assert [linha[2:] for linha in linhas if linha[0] == "5"] == [PLANILHA[4]]
+
+
+def _total_clientes(banco):
+    with obter_conexao(banco) as conn:
+        return conn.execute("SELECT COUNT(*) FROM clientes").fetchone()[0]
+
+
+def test_reimportar_a_mesma_planilha_nao_duplica_clientes(banco, tmp_path):
+    _importar(banco, tmp_path)
+    total = _total_clientes(banco)
+    resultado = _importar(banco, tmp_path)
+    assert (resultado['importadas'], resultado['rejeitadas']) == (0, 8)
+    assert _total_clientes(banco) == total
@@ -0,0 +1,159 @@
+import queue
+import sqlite3
+import threading
+
+import pytest
+
+from database import fechar_conexoes, obter_conexao
+from utils import kits
+from utils.kits import criaria_ciclo, explodir_kits, invalidar_produto, linhas_composicao
+
+
+def _produto(conn, nome, tipo="Produto", valor=0):
+    return conn.execute("INSERT INTO produtos (nome, tipo, valor_unitario) VALUES (?, ?, ?)",
+                        (nome, tipo, valor)).lastrowid
+
+
+def _item(conn, kit_id, produto_id, quantidade):
+    conn.execute("INSERT INTO kit_items (kit_id, produto_id, quantidade) VALUES (?, ?, ?)",
+                 (kit_id, produto_id, quantidade))
+
+
+@pytest.fixture
+def catalogo(banco):
+    """Kit completo = 2 x Kit filtros + 1 x Óleo + 1 x Instalação; Kit filtros = 3 x Filtro"""
+    with obter_conexao(banco) as conn:
+        ids = {
+            'filtro': _produto(conn, "Filtro", valor=10),
+            'oleo': _produto(conn, "Óleo", valor=50),
+            'instalacao': _produto(conn, "Instalação", "Serviço", 100),
+            'filtros': _produto(conn, "Kit filtros", "Kit"),
+            'completo': _produto(conn, "Kit completo", "Kit"),
+        }
+        _item(conn, ids['filtros'], ids['filtro'], 3)
+        _item(conn, ids['completo'], ids['filtros'], 2)
+        _item(conn, ids['completo'], ids['oleo'], 1)
+        _item(conn, ids['completo'], ids['instalacao'], 1)
+        conn.commit()
+    return banco, ids
+
+
+def _explodir(banco, kit_id):
+    with obter_conexao(banco) as conn:
+        return explodir_kits([kit_id], conn)[kit_id]
+
+
+def test_kits_aninhados_somam_componentes_e_preco(catalogo):
+    banco, ids = catalogo
+    composicao = _explodir(banco, ids['completo'])
+
+    assert composicao['componentes'] == {ids['filtro']: 6, ids['oleo']: 1, ids['instalacao']: 1}
+    assert composicao['preco'] == 6 * 10 + 50 + 100
+    assert not composicao['ciclo'] and not composicao['limite']
+    assert linhas_composicao(composicao) == ["2.0 x Kit filtros", "    3.0 x Filtro", "1.0 x Óleo",
+                                                "1.0 x Instalação"]
+
+
+def test_ciclo_e_marcado_e_nao_expandido(catalogo):
+    banco, ids = catalogo
+    with obter_conexao(banco) as conn:
+        assert criaria_ciclo(ids['filtros'], ids['completo'], conn)
+        assert not criaria_ciclo(ids['completo'], ids['oleo'], conn)
+        _item(conn, ids['filtros'], ids['completo'], 1)
+        conn.commit()
+    invalidar_produto(ids['filtros'])
+    composicao = _explodir(banco, ids['completo'])
+
+    assert composicao['ciclo']
+    assert [item['nome'] for item in composicao['itens'] if item['ciclo']] == ["Kit completo"]
+    assert composicao['componentes'] == {ids['filtro']: 6, ids['oleo']: 1, ids['instalacao']: 1}
+
+
+def test_sub_kit_alem_da_profundidade_maxima_e_marcado(catalogo, monkeypatch):
+    banco, ids = catalogo
+    monkeypatch.setattr(kits, "PROFUNDIDADE_MAXIMA", 1)
+    invalidar_produto(ids['completo'])
+    composicao = _explodir(banco, ids['completo'])
+
+    assert composicao['limite'] and not composicao['ciclo']
+    assert [item['nome'] for item in composicao['itens'] if item['limite']] == ["Kit filtros"]
+    assert composicao['preco'] == 50 + 100
+    assert "não incluída" in linhas_composicao(composicao)[0]
+
+
+def test_invalidar_produto_descarta_os_kits_que_o_contem(catalogo):
+    banco, ids = catalogo
+    assert _explodir(banco, ids['completo'])['preco'] == 210
+    with obter_conexao(banco) as conn:
+        conn.execute("UPDATE produtos SET valor_unitario = 20 WHERE id = ?", (ids['filtro'],))
+        conn.commit()
+    invalidar_produto(ids['filtro'])
+    assert _explodir(banco, ids['completo'])['preco'] == 270
+
+
+class Trabalhador:
+    """Thread de segundo plano com sua própria conexão, como a geração de PDF"""
+
+    def __init__(self):
+        self.pedidos = queue.Queue()
+        self.thread = threading.Thread(target=self._executar)
+        self.thread.start()
+
+    def _executar(self):
+        try:
+            for funcao, resposta in iter(self.pedidos.get, None):
+                resposta.put(funcao())
+        finally:
+            fechar_conexoes()
+
+    def chamar(self, funcao):
+        resposta = queue.Queue()
+        self.pedidos.put((funcao, resposta))
+        return resposta.get(timeout=5)
+
+    def encerrar(self):
+        self.pedidos.put(None)
+        self.thread.join()
+
+
+def test_cache_por_conexao_entre_threads_e_gravacao_externa(catalogo, monkeypatch):
+    banco, ids = catalogo
+    consultas = []
+    explodir_original = kits._explodir
+    monkeypatch.setattr(kits, "_explodir", lambda conn, kit_ids: consultas.append(kit_ids) or
+                        explodir_original(conn, kit_ids))
+
+    def preco():
+        return _explodir(banco, ids['completo'])['preco']
+
+    def gravar_sem_relacao_com_kits():
+        with obter_conexao(banco) as conn:
+            conn.execute("UPDATE clientes SET nome = nome")
+            conn.commit()
+
+    trabalhador = Trabalhador()
+    try:
+        assert preco() == 210
+        # Gravação da outra thread: só o data_version da conexão da interface avança
+        trabalhador.chamar(gravar_sem_relacao_com_kits)
+        assert trabalhador.chamar(preco) == 210
+        # A interface percebe a gravação uma vez e relê
+        assert preco() == 210
+
+        # Daí em diante, chamadas alternadas entre as threads usam o cache
+        consultas.clear()
+        for _ in range(3):
+            assert preco() == 210
+            assert trabalhador.chamar(preco) == 210
+        assert consultas == []
+
+        # Outra estação grava sem passar por invalidar_produto
+        externa = sqlite3.connect(banco)
+        externa.execute("UPDATE kit_items SET quantidade = 5 WHERE kit_id = ?", (ids['filtros'],))
+        externa.commit()
+        externa.close()
+
+        assert trabalhador.chamar(preco) == 250
+        assert preco() == 250
+    finally:
+        trabalhador.encerrar()
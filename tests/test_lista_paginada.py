@@ -0,0 +1,126 @@
+import pytest
+
+import database
+from database import obter_conexao
+from interface.lista_paginada import ListaPaginada
+
+CIDADES = ["Campinas", None, "Barueri", "Campinas", "Americana", None, "Santos", "Barueri", "Jundiaí", "Campinas"]
+
+
+class TreeFalsa:
+    """Só o que a ListaPaginada usa da ttk.Treeview, sem Tk"""
+
+    def __init__(self):
+        self.itens = {}
+        self.ordem = []
+        self.agendados = []
+
+    def configure(self, **opcoes):
+        pass
+
+    def insert(self, pai, posicao, values, tags):
+        iid = f"I{len(self.itens) + 1}"
+        self.itens[iid] = {'values': values, 'tags': tags}
+        self.ordem.insert(len(self.ordem) if posicao == "end" else posicao, iid)
+        return iid
+
+    def item(self, iid, values):
+        self.itens[iid]['values'] = values
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.ordem.remove(iid)
+            del self.itens[iid]
+
+    def get_children(self):
+        return tuple(self.ordem)
+
+    def after_idle(self, funcao):
+        self.agendados.append(funcao)
+
+    def ids(self):
+        return [self.itens[iid]['tags'][0] for iid in self.ordem]
+
+
+class ScrollbarFalsa:
+    def set(self, primeiro, ultimo):
+        pass
+
+
+@pytest.fixture
+def clientes(banco, monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", banco)
+    with obter_conexao(banco) as conn:
+        conn.execute("DELETE FROM clientes")
+        conn.executemany("INSERT INTO clientes (id, nome, cidade) VALUES (?, ?, ?)",
+                         [(i, f"Cliente {i:02d}", cidade) for i, cidade in enumerate(CIDADES, start=1)])
+        conn.commit()
+    return banco
+
+
+def _lista(descendente=False, condicao=None, tamanho_pagina=3):
+    tree = TreeFalsa()
+    lista = ListaPaginada(tree, ScrollbarFalsa(), "id, nome, cidade", "clientes", ("cidade", "id"),
+                          formatar=lambda dados: dados, condicao=condicao, descendente=descendente,
+                          tamanho_pagina=tamanho_pagina)
+    return tree, lista
+
+
+def _esperados(banco, descendente=False, where="1"):
+    direcao = "DESC" if descendente else "ASC"
+    with obter_conexao(banco) as conn:
+        return [row[0] for row in conn.execute(
+            f"SELECT id FROM clientes WHERE {where} ORDER BY cidade {direcao}, id {direcao}")]
+
+
+def _ler_tudo(lista):
+    paginas = 1
+    while lista._ha_mais:
+        lista.carregar_mais()
+        paginas += 1
+    return paginas
+
+
+@pytest.mark.parametrize("descendente", [False, True])
+def test_paginas_percorrem_a_ordem_completa_sem_repetir(clientes, descendente):
+    tree, lista = _lista(descendente)
+    lista.carregar()
+    assert len(tree.ids()) == 3
+
+    paginas = _ler_tudo(lista)
+    assert tree.ids() == _esperados(clientes, descendente)
+    assert paginas == 4
+
+
+def test_filtro_e_condicao_fixa_valem_para_todas_as_paginas(clientes):
+    tree, lista = _lista(condicao="cidade IS NOT NULL", tamanho_pagina=2)
+    lista.carregar("nome LIKE ?", ("Cliente 0%",))
+    _ler_tudo(lista)
+    assert tree.ids() == _esperados(clientes, where="cidade IS NOT NULL AND nome LIKE 'Cliente 0%'")
+
+
+def test_rolagem_perto_do_fim_agenda_a_proxima_pagina(clientes):
+    tree, lista = _lista()
+    lista.carregar()
+    lista._ao_rolar("0.0", "0.5")
+    assert tree.agendados == []
+    lista._ao_rolar("0.5", "1.0")
+    lista._ao_rolar("0.5", "1.0")
+    assert len(tree.agendados) == 1
+    tree.agendados.pop()()
+    assert len(tree.ids()) == 6
+
+
+def test_atualizar_troca_remove_e_insere_na_ordem(clientes):
+    tree, lista = _lista(tamanho_pagina=20)
+    lista.carregar()
+    with obter_conexao(clientes) as conn:
+        conn.execute("UPDATE clientes SET nome = 'Renomeado' WHERE id = 3")
+        conn.execute("DELETE FROM clientes WHERE id = 7")
+        conn.execute("INSERT INTO clientes (id, nome, cidade) VALUES (11, 'Cliente 11', 'Bauru')")
+        conn.commit()
+
+    lista.atualizar(["3", 7, 11])
+    assert tree.ids() == _esperados(clientes)
+    assert lista.registro(3).dados[1] == "Renomeado"
+    assert lista.registro(7) is None
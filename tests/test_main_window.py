@@ -0,0 +1,79 @@
+import sys
+import types
+
+import pytest
+
+from interface import main_window
+from interface.main_window import MainWindow, mesclar_evento
+
+
+class ModuloFalso:
+    construidos = []
+
+    def __init__(self, frame, user_id, role, janela):
+        self.frame = frame
+        ModuloFalso.construidos.append(frame)
+
+
+class ModuloQuebrado:
+    tentativas = 0
+
+    def __init__(self, *args):
+        ModuloQuebrado.tentativas += 1
+        raise RuntimeError("falha ao montar")
+
+
+class JanelaFalsa:
+    """Só o que MainWindow.construir_aba usa, sem Tk"""
+
+    user_id = 1
+    role = 'admin'
+
+    def __init__(self):
+        self.abas = {}
+
+    def registrar(self, frame, classe, atributo):
+        self.abas[frame] = {'titulo': frame, 'modulo': "modulo_falso_abas", 'classe': classe,
+                            'atributo': atributo, 'frame': frame, 'construida': False}
+        setattr(self, atributo, None)
+
+
+@pytest.fixture
+def janela(monkeypatch):
+    modulo = types.ModuleType("modulo_falso_abas")
+    modulo.ModuloFalso, modulo.ModuloQuebrado = ModuloFalso, ModuloQuebrado
+    monkeypatch.setitem(sys.modules, "modulo_falso_abas", modulo)
+    ModuloFalso.construidos, ModuloQuebrado.tentativas = [], 0
+    erros = []
+    monkeypatch.setattr(main_window.messagebox, "showerror", lambda titulo, mensagem: erros.append(mensagem))
+    janela = JanelaFalsa()
+    janela.erros = erros
+    janela.registrar(".!frame", "ModuloFalso", 'clientes_module')
+    janela.registrar(".!frame2", "ModuloFalso", 'produtos_module')
+    janela.registrar(".!frame3", "ModuloQuebrado", 'relatorios_module')
+    return janela
+
+
+def test_aba_e_construida_so_na_primeira_abertura(janela):
+    assert janela.clientes_module is None and janela.produtos_module is None
+
+    modulo = MainWindow.construir_aba(janela, ".!frame")
+    assert MainWindow.construir_aba(janela, ".!frame") is modulo is janela.clientes_module
+    assert ModuloFalso.construidos == [".!frame"]
+    assert janela.produtos_module is None
+    assert MainWindow.construir_aba(janela, ".!desconhecida") is None
+
+
+def test_falha_ao_construir_aba_avisa_uma_vez(janela):
+    assert MainWindow.construir_aba(janela, ".!frame3") is None
+    assert MainWindow.construir_aba(janela, ".!frame3") is None
+    assert ModuloQuebrado.tentativas == 1
+    assert len(janela.erros) == 1 and "falha ao montar" in janela.erros[0]
+
+
+def test_mesclar_evento_acumula_ids_e_recarga_completa_prevalece():
+    pendente = mesclar_evento(None, 'cliente_updated', {'id': 3})
+    pendente = mesclar_evento(pendente, 'cliente_updated', {'ids': [4, 3], 'origem': 'lote'})
+    assert pendente == {'ids': {3, 4}, 'acao': 'alterado', 'origem': 'lote'}
+    assert mesclar_evento(pendente, 'cliente_updated')['ids'] is None
+    assert mesclar_evento(None, 'cotacao_deleted', {'ids': [1]})['acao'] == 'excluido'
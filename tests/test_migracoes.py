@@ -0,0 +1,93 @@
+import pytest
+
+import database
+from database import MIGRACOES, aplicar_migracoes, obter_conexao, versao_schema
+
+
+def _objetos(banco, tipo):
+    with obter_conexao(banco) as conn:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (tipo,))}
+
+
+def test_banco_novo_fica_na_ultima_versao(banco):
+    with obter_conexao(banco) as conn:
+        assert versao_schema(conn) == MIGRACOES[-1][0]
+    assert [m[0] for m in MIGRACOES] == list(range(1, len(MIGRACOES) + 1))
+
+
+def test_migracoes_criam_tabelas_e_indices(banco):
+    assert {"sequences", "relatorio_anexos", "cliente_stats", "dashboard_resumo"} <= _objetos(banco, "table")
+    assert {"idx_itens_cotacao_cotacao", "idx_cotacoes_cliente", "idx_relatorios_created",
+            "idx_clientes_nome", "idx_produtos_ativos"} <= _objetos(banco, "index")
+    with obter_conexao(banco) as conn:
+        assert "contato_nome" in database._colunas(conn, "cotacoes")
+
+
+def test_reaplicar_todas_as_migracoes_e_seguro(banco):
+    with obter_conexao(banco) as conn:
+        conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente Migrado')")
+        conn.execute("PRAGMA user_version = 0")
+        conn.commit()
+    antes = _objetos(banco, "index")
+
+    assert aplicar_migracoes(banco) == MIGRACOES[-1][0]
+    assert _objetos(banco, "index") == antes
+    with obter_conexao(banco) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM clientes WHERE nome = 'Cliente Migrado'").fetchone()[0] == 1
+
+
+def test_migracao_com_falha_nao_deixa_o_schema_pela_metade(banco, monkeypatch):
+    def quebrar(conn):
+        conn.execute("CREATE TABLE pela_metade (id INTEGER)")
+        raise RuntimeError("falha simulada")
+
+    proxima = MIGRACOES[-1][0] + 1
+    monkeypatch.setattr(database, "MIGRACOES", MIGRACOES + [(proxima, "migração com falha", quebrar)])
+    with pytest.raises(RuntimeError):
+        aplicar_migracoes(banco)
+
+    assert "pela_metade" not in _objetos(banco, "table")
+    with obter_conexao(banco) as conn:
+        assert versao_schema(conn) == proxima - 1
+
+
+def test_sonda_de_tokenizador_nao_deixa_rastro(banco):
+    with obter_conexao(banco) as conn:
+        assert database.tokenizador_fts5_disponivel(conn, "unicode61 remove_diacritics 1")
+        assert not database.tokenizador_fts5_disponivel(conn, "inexistente")
+        assert not conn.in_transaction
+        assert conn.execute("SELECT 1 FROM temp.sqlite_master WHERE name LIKE '_sonda%'").fetchone() is None
+
+
+def _banco_com_tokenizadores(tmp_path, monkeypatch, recusados):
+    """Banco novo criado como em um SQLite antigo, que não conhece os tokenizadores recusados"""
+    sonda = database.tokenizador_fts5_disponivel
+    monkeypatch.setattr(database, "tokenizador_fts5_disponivel",
+                        lambda conn, tokenize: tokenize not in recusados and sonda(conn, tokenize))
+    caminho = str(tmp_path / "crm_antigo.db")
+    database.criar_banco(caminho)
+    return caminho
+
+
+def test_sqlite_sem_remove_diacritics_2_usa_a_versao_1(tmp_path, monkeypatch):
+    caminho = _banco_com_tokenizadores(tmp_path, monkeypatch, {"unicode61 remove_diacritics 2"})
+    try:
+        with obter_conexao(caminho) as conn:
+            assert versao_schema(conn) == MIGRACOES[-1][0]
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'relatorios_fts'").fetchone()[0]
+        assert "remove_diacritics 1" in sql
+    finally:
+        database.fechar_conexoes()
+
+
+def test_sqlite_sem_trigram_completa_as_migracoes_e_busca_por_like(tmp_path, monkeypatch):
+    from utils.busca import buscar_clientes_texto
+
+    caminho = _banco_com_tokenizadores(tmp_path, monkeypatch, {"trigram"})
+    try:
+        assert {"cliente_stats", "dashboard_resumo", "relatorio_anexos"} <= _objetos(caminho, "table")
+        assert not {"clientes_busca", "produtos_busca"} & _objetos(caminho, "table")
+        assert "idx_cotacoes_validade_em_aberto" in _objetos(caminho, "index")
+        assert [linha[1] for linha in buscar_clientes_texto("cliente teste", db_name=caminho)] == ["Cliente Teste"]
+    finally:
+        database.fechar_conexoes()
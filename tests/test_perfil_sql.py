@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+import database
+from database import ConexaoPerfilada, fechar_conexoes, obter_conexao
+from utils import perfil_sql
+from utils.perfil_sql import formatar_relatorio, normalizar_sql, resultados_perfil, salvar_perfil
+
+
+def test_normalizar_sql_agrupa_literais_e_listas():
+    assert normalizar_sql("SELECT *  FROM clientes\n WHERE nome = 'D''Ávila' AND id IN (1, 2, 3) LIMIT 10") == \
+        "SELECT * FROM clientes WHERE nome = ? AND id IN (?, ...) LIMIT ?"
+
+
+@pytest.fixture
+def perfilado(banco, monkeypatch):
+    # A conexão aberta por criar_banco é de classe comum
+    fechar_conexoes()
+    monkeypatch.setattr(database, "_CLASSE_CONEXAO", ConexaoPerfilada)
+    # Todo comando conta como lento: o plano é capturado na primeira execução
+    monkeypatch.setattr(perfil_sql, "LIMITE_LENTO_MS", 0)
+    perfil_sql.limpar_perfil()
+    yield banco
+    fechar_conexoes()
+    perfil_sql.limpar_perfil()
+
+
+def _do_teste(itens, trecho):
+    return [item for item in itens if trecho in item['sql'] and item['local'].startswith("tests")]
+
+
+def test_comandos_sao_agregados_por_texto_e_local_com_plano(perfilado, tmp_path):
+    with obter_conexao(perfilado) as conn:
+        for cidade in ("Campinas", "Santos"):
+            conn.execute("INSERT INTO clientes (nome, cidade) VALUES (?, ?)", (f"Cliente {cidade}", cidade))
+        for cidade in ("Campinas", "Bauru"):
+            conn.execute(f"SELECT id FROM clientes WHERE cidade = '{cidade}'").fetchall()
+        conn.execute("UPDATE clientes SET observacoes = 'x' WHERE cidade IS NOT NULL")
+        conn.commit()
+
+    itens = resultados_perfil()
+    [consulta] = _do_teste(itens, "WHERE cidade = ?")
+    assert consulta['sql'] == "SELECT id FROM clientes WHERE cidade = ?"
+    assert (consulta['execucoes'], consulta['linhas'], consulta['lentas']) == (2, 1, 2)
+    assert consulta['local'].startswith("tests/test_perfil_sql.py:")
+    assert consulta['varreduras'] == ["SCAN clientes"]
+    [atualizacao] = _do_teste(itens, "UPDATE clientes")
+    assert atualizacao['linhas'] == 3
+    [insercao] = _do_teste(itens, "INSERT INTO clientes")
+    assert insercao['execucoes'] == 2
+
+    assert "⚠️ Varredura completa: SCAN clientes" in formatar_relatorio(itens)
+    with open(salvar_perfil(str(tmp_path / "perfil.json")), encoding='utf-8') as arquivo:
+        salvo = json.load(arquivo)
+    assert salvo['limite_lento_ms'] == 0
+    assert len(salvo['consultas']) == len(itens)
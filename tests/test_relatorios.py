@@ -0,0 +1,89 @@
+import tkinter as tk
+
+import pytest
+
+import database
+from database import obter_conexao
+
+# O pacote interface.modules importa os geradores de PDF
+pytest.importorskip("fpdf")
+from interface.modules.relatorios import RelatoriosModule  # noqa: E402
+
+
+class TextoFalso:
+    def __init__(self, texto=""):
+        self.texto = texto
+
+    def get(self, inicio, fim):
+        return self.texto
+
+
+class FormularioFalso:
+    """Estado do formulário lido por RelatoriosModule.salvar_relatorio, sem montar a tela"""
+
+    def __init__(self, root, cliente_id):
+        def var(valor=""):
+            return tk.StringVar(root, value=valor)
+
+        self.user_id = 1
+        self.current_relatorio_id = None
+        self.cliente_var = var("Cliente Relatório")
+        self.clientes_dict = {"Cliente Relatório": cliente_id}
+        self.numero_relatorio_var = var("REL-TESTE-1")
+        self.cotacao_var = var()
+        self.cotacoes_dict = {}
+        self.filial_var = var("2 - Filial")
+        self.formulario_servico_var = var()
+        self.tipo_servico_var = var("Manutenção")
+        self.descricao_text = TextoFalso("Troca de rolamentos")
+        self.data_recebimento_var = var()
+        self.data_pecas_var = var()
+        self.aba1_vars = {}
+        self.aba2_vars = {}
+        self.aba3_vars = {}
+        self.anexos_aba = {1: [], 2: [], 3: [], 4: []}
+        self.tecnicos_eventos = {1: {'nome': 'Técnico', 'tree': None, 'eventos': [
+            ("2024-01-10 08:00", "Trabalho", "Início da desmontagem"),
+            ("2024-01-10 12:00", "Deslocamento", "Retorno à oficina"),
+        ]}}
+        self.emitidos = []
+        self.mensagens = []
+
+    def _textos_aba4_atuais(self):
+        return "", ""
+
+    def emit_event(self, event_type, data=None):
+        self.emitidos.append((event_type, data))
+
+    def show_success(self, message):
+        self.mensagens.append(message)
+
+    show_error = show_warning = show_success
+
+
+@pytest.fixture
+def root(monkeypatch):
+    # Interpretador Tcl sem janela: basta para as variáveis do formulário, inclusive
+    # as criadas sem master em salvar_relatorio
+    interpretador = tk.Tcl()
+    monkeypatch.setattr(tk, "_default_root", interpretador)
+    return interpretador
+
+
+def test_salvar_relatorio_com_eventos_emite_o_tipo_do_relatorio(banco, monkeypatch, root):
+    monkeypatch.setattr(database, "DB_NAME", banco)
+    with obter_conexao(banco) as conn:
+        cliente_id = conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente Relatório')").lastrowid
+        conn.commit()
+    formulario = FormularioFalso(root, cliente_id)
+
+    RelatoriosModule.salvar_relatorio(formulario)
+    relatorio_id = formulario.current_relatorio_id
+    assert formulario.emitidos == [('relatorio_created', {'ids': [relatorio_id]})]
+
+    RelatoriosModule.salvar_relatorio(formulario)
+    assert formulario.emitidos[-1] == ('relatorio_updated', {'ids': [relatorio_id]})
+    with obter_conexao(banco) as conn:
+        eventos = [row[0] for row in conn.execute(
+            "SELECT evento FROM eventos_campo WHERE relatorio_id = ? ORDER BY data_hora", (relatorio_id,))]
+    assert eventos == ["Início da desmontagem", "Retorno à oficina"]
@@ -0,0 +1,101 @@
+from database import obter_conexao, recalcular_cliente_stats, recalcular_dashboard_resumo, transacao
+
+
+def _tabela(banco, sql):
+    with obter_conexao(banco) as conn:
+        return conn.execute(sql).fetchall()
+
+
+def _recalculada(banco, recalcular, sql):
+    with transacao(banco) as conn:
+        recalcular(conn)
+    return _tabela(banco, sql)
+
+
+# ultima_cotacao fica de fora: nos triggers ela só avança (não recua ao mover ou excluir)
+CLIENTE_STATS = """SELECT cliente_id, total_cotacoes, aprovadas, rejeitadas, em_aberto, valor_aprovado,
+                          valor_em_aberto, valor_rejeitado, soma_valores, qtd_valores, total_contatos
+                   FROM cliente_stats ORDER BY cliente_id"""
+
+
+def test_triggers_de_cliente_stats_batem_com_o_recalculo(banco):
+    with obter_conexao(banco) as conn:
+        a = conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente A')").lastrowid
+        b = conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente B')").lastrowid
+        for numero, cliente, data, status, valor in (
+            ("PROP-1", a, "2024-01-10", "Em Aberto", 100),
+            ("PROP-2", a, "2024-02-10", "Aprovada", 250),
+            ("PROP-3", b, "2024-03-10", "Em Aberto", None),
+            ("PROP-4", a, "2023-12-01", "Rejeitada", 80),
+        ):
+            conn.execute("""
+                INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao, status, valor_total)
+                VALUES (?, ?, 1, ?, ?, ?)
+            """, (numero, cliente, data, status, valor))
+        conn.execute("UPDATE cotacoes SET status = 'Aprovada' WHERE numero_proposta = 'PROP-1'")
+        conn.execute("UPDATE cotacoes SET valor_total = 400 WHERE numero_proposta = 'PROP-3'")
+        conn.execute("UPDATE cotacoes SET cliente_id = ? WHERE numero_proposta = 'PROP-2'", (b,))
+        conn.execute("DELETE FROM cotacoes WHERE numero_proposta = 'PROP-4'")
+        conn.execute("INSERT INTO contatos (cliente_id, nome) VALUES (?, 'Contato 1')", (a,))
+        contato = conn.execute("INSERT INTO contatos (cliente_id, nome) VALUES (?, 'Contato 2')", (a,)).lastrowid
+        conn.execute("UPDATE contatos SET cliente_id = ? WHERE id = ?", (b, contato))
+        conn.commit()
+
+    ultima = f"SELECT cliente_id, ultima_cotacao FROM cliente_stats WHERE cliente_id IN ({a}, {b}) ORDER BY cliente_id"
+    assert _tabela(banco, ultima) == [(a, "2024-02-10"), (b, "2024-03-10")]
+    with obter_conexao(banco) as conn:
+        linha = conn.execute("SELECT total_cotacoes, aprovadas, valor_aprovado, total_contatos "
+                             "FROM cliente_stats WHERE cliente_id = ?", (b,)).fetchone()
+    assert tuple(linha) == (2, 1, 250, 1)
+
+    incremental = _tabela(banco, CLIENTE_STATS)
+    assert incremental == _recalculada(banco, recalcular_cliente_stats, CLIENTE_STATS)
+    # O recálculo lê as datas das cotações atuais
+    assert _tabela(banco, ultima) == [(a, "2024-01-10"), (b, "2024-03-10")]
+
+
+def test_excluir_cliente_remove_suas_estatisticas(banco):
+    with obter_conexao(banco) as conn:
+        cliente = conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente Excluído')").lastrowid
+        conn.execute("INSERT INTO contatos (cliente_id, nome) VALUES (?, 'Contato')", (cliente,))
+        conn.execute("DELETE FROM contatos WHERE cliente_id = ?", (cliente,))
+        conn.execute("DELETE FROM clientes WHERE id = ?", (cliente,))
+        conn.commit()
+        assert conn.execute("SELECT 1 FROM cliente_stats WHERE cliente_id = ?", (cliente,)).fetchone() is None
+
+
+# Linhas zeradas pelos triggers (o recálculo não as cria) são equivalentes a ausentes
+DASHBOARD = """SELECT 'resumo', responsavel_id, filial_id, total_cotacoes, cotacoes_aprovadas,
+                      faturamento_aprovado, total_relatorios FROM dashboard_resumo
+               WHERE total_cotacoes <> 0 OR total_relatorios <> 0
+               UNION ALL SELECT 'total', chave, valor, NULL, NULL, NULL, NULL FROM dashboard_totais
+               ORDER BY 1, 2, 3"""
+
+
+def test_triggers_do_dashboard_batem_com_o_recalculo(banco):
+    with obter_conexao(banco) as conn:
+        cliente = conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente Dashboard')").lastrowid
+        for numero, responsavel, filial, status, valor in (
+            ("PROP-1", 1, 1, "Aprovada", 300),
+            ("PROP-2", 1, 2, "Em Aberto", 150),
+            ("PROP-3", 2, None, "Aprovada", 90),
+        ):
+            conn.execute("""
+                INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, filial_id, data_criacao,
+                                      status, valor_total)
+                VALUES (?, ?, ?, ?, '2024-01-01', ?, ?)
+            """, (numero, cliente, responsavel, filial, status, valor))
+        conn.execute("UPDATE cotacoes SET status = 'Aprovada', valor_total = 200 WHERE numero_proposta = 'PROP-2'")
+        conn.execute("UPDATE cotacoes SET responsavel_id = 2 WHERE numero_proposta = 'PROP-1'")
+        conn.execute("DELETE FROM cotacoes WHERE numero_proposta = 'PROP-3'")
+        conn.execute("INSERT INTO relatorios_tecnicos (numero_relatorio, cliente_id, responsavel_id, data_criacao) "
+                     "VALUES ('REL-1', ?, 1, '2024-01-01')", (cliente,))
+        conn.execute("INSERT INTO produtos (nome, tipo, ativo) VALUES ('Filtro', 'Produto', 1)")
+        conn.execute("UPDATE produtos SET ativo = 0 WHERE nome = 'Filtro'")
+        conn.commit()
+
+    incremental = _tabela(banco, DASHBOARD)
+    assert incremental == _recalculada(banco, recalcular_dashboard_resumo, DASHBOARD)
+    resumo = {(row[1], row[2]): tuple(row[3:]) for row in incremental if row[0] == 'resumo'}
+    assert resumo[(2, 1)] == (1, 1, 300, 0)
+    assert resumo[(1, 2)] == (1, 1, 200, 1)
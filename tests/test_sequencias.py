@@ -0,0 +1,35 @@
+from database import _migracao_sequencias, alocar_numero, espiar_numero, formatar_numero, obter_conexao
+
+
+def test_formatar_numero():
+    assert formatar_numero("PROP", 123) == "PROP-000123"
+    assert formatar_numero("LOC", 7, filial_id=2) == "LOC-2-000007"
+
+
+def test_alocar_numero_e_sequencial_e_espiar_nao_reserva(banco):
+    assert espiar_numero("REL", db_name=banco) == "REL-000001"
+    assert espiar_numero("REL", db_name=banco) == "REL-000001"
+    assert [alocar_numero("REL", db_name=banco) for _ in range(3)] == ["REL-000001", "REL-000002", "REL-000003"]
+    assert espiar_numero("REL", db_name=banco) == "REL-000004"
+
+
+def test_cada_prefixo_e_filial_tem_seu_contador(banco):
+    assert alocar_numero("PROP", db_name=banco) == "PROP-000001"
+    assert alocar_numero("PROP", filial_id=2, db_name=banco) == "PROP-2-000001"
+    assert alocar_numero("LOC", db_name=banco) == "LOC-000001"
+    assert alocar_numero("PROP", db_name=banco) == "PROP-000002"
+
+
+def test_migracao_semeia_a_partir_do_maior_numero_emitido(banco):
+    with obter_conexao(banco) as conn:
+        conn.execute("DELETE FROM sequences")
+        conn.execute("INSERT INTO clientes (nome) VALUES ('Cliente Legado')")
+        for numero in ("PROP-000041", "PROP-000009", "LOC-000005"):
+            conn.execute("INSERT INTO cotacoes (numero_proposta, cliente_id, responsavel_id, data_criacao) "
+                         "VALUES (?, 1, 1, '2020-01-01')", (numero,))
+        _migracao_sequencias(conn)
+        conn.commit()
+
+    assert alocar_numero("PROP", db_name=banco) == "PROP-000042"
+    assert alocar_numero("LOC", db_name=banco) == "LOC-000006"
+    assert alocar_numero("REL", db_name=banco) == "REL-000001"
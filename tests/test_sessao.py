@@ -0,0 +1,61 @@
+import pytest
+
+import database
+from database import obter_conexao
+from interface.sessao import (BITS_NIVEL_ACESSO, PERMISSAO_CONSULTA, PERMISSAO_CONTROLE_TOTAL, Sessao)
+
+
+@pytest.fixture
+def usuario(banco, monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", banco)
+    with obter_conexao() as conn:
+        cursor = conn.execute("""
+            INSERT INTO usuarios (username, password, role, nome_completo)
+            VALUES ('operador', 'x', 'operador, Tecnico', 'Operador Teste')
+        """)
+        usuario_id = cursor.lastrowid
+        conn.executemany("INSERT INTO permissoes_usuarios (usuario_id, modulo, nivel_acesso) VALUES (?, ?, ?)",
+                         [(usuario_id, 'clientes', 'consulta'), (usuario_id, 'cotacoes', 'controle_total'),
+                          (usuario_id, 'usuarios', 'sem_acesso')])
+        conn.commit()
+    return usuario_id
+
+
+def test_niveis_de_acesso_em_bits():
+    assert BITS_NIVEL_ACESSO['sem_acesso'] == 0
+    assert BITS_NIVEL_ACESSO['consulta'] == PERMISSAO_CONSULTA
+    assert BITS_NIVEL_ACESSO['controle_total'] == PERMISSAO_CONSULTA | PERMISSAO_CONTROLE_TOTAL
+
+
+def test_sessao_carrega_cadastro_perfis_e_permissoes(usuario):
+    sessao = Sessao(usuario)
+    assert sessao.nome_completo == 'Operador Teste'
+    assert sessao.has_role('tecnico') and sessao.has_role('OPERADOR')
+    assert not sessao.has_role('admin')
+    assert sessao.permissoes == {'clientes': 1, 'cotacoes': 3, 'usuarios': 0}
+
+
+@pytest.mark.parametrize("modulo, nivel, esperado", [
+    ('clientes', 'consulta', True),
+    ('clientes', 'controle_total', False),
+    ('cotacoes', 'consulta', True),
+    ('cotacoes', 'controle_total', True),
+    ('usuarios', 'consulta', False),
+    ('produtos', 'consulta', False),
+    ('cotacoes', 'sem_acesso', False),
+    ('cotacoes', 'nivel_inexistente', False),
+])
+def test_tem_permissao(usuario, modulo, nivel, esperado):
+    assert Sessao(usuario).tem_permissao(modulo, nivel) is esperado
+
+
+def test_invalidar_usuario_rele_so_a_propria_sessao(usuario):
+    sessao = Sessao(usuario)
+    with obter_conexao() as conn:
+        conn.execute("UPDATE permissoes_usuarios SET nivel_acesso = 'controle_total' "
+                     "WHERE usuario_id = ? AND modulo = 'clientes'", (usuario,))
+        conn.commit()
+    sessao.invalidar_usuario(usuario + 1)
+    assert not sessao.tem_permissao('clientes', 'controle_total')
+    sessao.invalidar_usuario(usuario)
+    assert sessao.tem_permissao('clientes', 'controle_total')
@@ -0,0 +1,74 @@
+import pytest
+
+import database
+from database import obter_conexao
+from utils import sugestoes
+from utils.sugestoes import IndiceSugestoes
+
+PRODUTOS = [(1, "Filtro de Ar", None), (2, "Óleo Compressor", None), (3, "Compressor Parafuso", None),
+            (4, "Válvula de Admissão", None), (5, "Kit Filtros", None)]
+
+
+def _indice(linhas=PRODUTOS):
+    indice = IndiceSugestoes()
+    indice.carregar(linhas)
+    return indice
+
+
+def test_busca_por_inicio_de_palavra_sem_acento_e_depois_por_trecho():
+    indice = _indice()
+    assert indice.buscar("comp") == ["Óleo Compressor", "Compressor Parafuso"]
+    assert indice.buscar("VALV") == ["Válvula de Admissão"]
+    assert indice.buscar("oleo c") == ["Óleo Compressor"]
+    # Início de palavra antes do trecho no meio de uma palavra
+    assert indice.buscar("filtro") == ["Filtro de Ar", "Kit Filtros"]
+    assert indice.buscar("ssor") == ["Óleo Compressor", "Compressor Parafuso"]
+    assert indice.buscar("") == ["Compressor Parafuso", "Filtro de Ar", "Kit Filtros", "Óleo Compressor",
+                                 "Válvula de Admissão"]
+    assert indice.buscar("", limite=2) == ["Compressor Parafuso", "Filtro de Ar"]
+    assert indice.buscar("xyz") == []
+
+
+def test_adicionar_e_remover_equivalem_a_recarregar():
+    indice = _indice()
+    indice.adicionar(6, "Filtro de Óleo")
+    indice.adicionar(2, "Óleo Sintético")
+    indice.remover(4)
+    indice.remover(99)
+
+    recarregado = _indice([(1, "Filtro de Ar", None), (2, "Óleo Sintético", None), (3, "Compressor Parafuso", None),
+                           (5, "Kit Filtros", None), (6, "Filtro de Óleo", None)])
+    for termo in ("", "filtro", "oleo", "comp", "valv", "ar"):
+        assert indice.buscar(termo) == recarregado.buscar(termo)
+    assert indice.ids_por_rotulo == recarregado.ids_por_rotulo
+    assert len(indice) == 5 and indice.rotulo(2) == "Óleo Sintético" and indice.rotulo(4) is None
+
+
+@pytest.fixture
+def indices(banco, monkeypatch):
+    monkeypatch.setattr(database, "DB_NAME", banco)
+    monkeypatch.setattr(sugestoes, "_indice_clientes", None)
+    monkeypatch.setattr(sugestoes, "_indices_produtos", {})
+    return banco
+
+
+def test_eventos_atualizam_apenas_os_itens_informados(indices):
+    assert sugestoes.indice_clientes().buscar("cliente") == ["Cliente Teste (ID: 1)"]
+    assert sugestoes.indice_produtos("Produto").buscar("compressor") == ["Compressor Teste"]
+    with obter_conexao(indices) as conn:
+        novo = conn.execute("INSERT INTO clientes (nome, nome_busca) VALUES ('Ávila Ar', 'avila ar')").lastrowid
+        conn.execute("UPDATE produtos SET ativo = 0 WHERE nome = 'Compressor Teste'")
+        produto = conn.execute("INSERT INTO produtos (nome, tipo, ativo, nome_busca) "
+                               "VALUES ('Secador', 'Produto', 1, 'secador')").lastrowid
+        conn.commit()
+
+    sugestoes.tratar_evento('cliente_created', {'ids': [novo]})
+    sugestoes.tratar_evento('produto_updated', {'ids': [1, produto]})
+    assert sugestoes.indice_clientes().buscar("avila") == [f"Ávila Ar (ID: {novo})"]
+    assert sugestoes.indice_produtos("Produto").buscar("") == ["Secador"]
+
+    with obter_conexao(indices) as conn:
+        conn.execute("DELETE FROM clientes WHERE id = ?", (novo,))
+        conn.commit()
+    sugestoes.tratar_evento('cliente_deleted', {'ids': [novo]})
+    assert sugestoes.indice_clientes().buscar("") == ["Cliente Teste (ID: 1)"]
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+from interface.tarefas import ExecutorTarefas
+
+
+class WidgetFalso:
+    """Só o after()/after_cancel() do Tk: o teste faz o papel do laço de eventos"""
+
+    def __init__(self):
+        self.agendados = {}
+        self._proximo = 0
+
+    def after(self, ms, funcao):
+        self._proximo += 1
+        self.agendados[self._proximo] = funcao
+        return self._proximo
+
+    def after_cancel(self, identificador):
+        self.agendados.pop(identificador, None)
+
+    def processar(self, condicao, limite=5):
+        """Rodar os after() pendentes até a condição valer"""
+        fim = time.monotonic() + limite
+        while not condicao():
+            assert time.monotonic() < fim, "tarefa não terminou a tempo"
+            for identificador in list(self.agendados):
+                self.agendados.pop(identificador)()
+            time.sleep(0.01)
+
+
+@pytest.fixture
+def executor():
+    widget = WidgetFalso()
+    ocupacao = []
+    executor = ExecutorTarefas(widget, max_threads=1, ao_ocupacao=ocupacao.append)
+    executor.ocupacao = ocupacao
+    yield executor
+    executor.encerrar()
+
+
+def test_progresso_e_resultado_chegam_na_thread_da_interface(executor):
+    eventos = []
+
+    def somar(tarefa, n):
+        for i in range(n):
+            tarefa.progresso(i, n)
+        return threading.current_thread().name, sum(range(n))
+
+    def registrar(tipo):
+        return lambda *valores: eventos.append((tipo, valores, threading.current_thread() is threading.main_thread()))
+
+    executor.executar(somar, 3, descricao="Somar", ao_concluir=registrar('concluida'),
+                      ao_progresso=registrar('progresso'), ao_fim=registrar('fim'))
+    executor.widget.processar(lambda: not executor.em_andamento())
+
+    assert [tipo for tipo, _valores, _principal in eventos] == ['progresso'] * 3 + ['concluida', 'fim']
+    assert all(principal for _tipo, _valores, principal in eventos)
+    nome_thread, total = eventos[3][1][0]
+    assert nome_thread.startswith('crm-tarefa') and total == 3
+    assert executor.ocupacao[0] == ["Somar"] and executor.ocupacao[-1] == []
+    assert executor.widget.agendados == {}
+
+
+def test_erro_vai_para_ao_erro(executor):
+    erros, fins = [], []
+
+    def falhar(tarefa):
+        raise ValueError("planilha inválida")
+
+    executor.executar(falhar, ao_erro=erros.append, ao_fim=lambda: fins.append(1))
+    executor.widget.processar(lambda: fins)
+    assert [str(e) for e in erros] == ["planilha inválida"]
+
+
+def test_cancelar_descarta_resultado_e_evita_tarefas_na_fila(executor):
+    iniciou, liberar = threading.Event(), threading.Event()
+    concluidas, fins, rodou = [], [], []
+
+    def demorada(tarefa):
+        iniciou.set()
+        while not liberar.wait(0.01):
+            tarefa.progresso()
+        return "resultado"
+
+    def na_fila(tarefa):
+        rodou.append(1)
+
+    primeira = executor.executar(demorada, descricao="Gerar PDF", ao_concluir=concluidas.append,
+                                 ao_fim=lambda: fins.append("Gerar PDF"))
+    # max_threads=1: a segunda espera a primeira
+    segunda = executor.executar(na_fila, descricao="Exportar", ao_concluir=concluidas.append,
+                                ao_fim=lambda: fins.append("Exportar"))
+    assert iniciou.wait(5)
+    segunda.cancelar()
+    primeira.cancelar()
+    executor.widget.processar(lambda: len(fins) == 2)
+    liberar.set()
+
+    assert concluidas == [] and rodou == []
+    assert sorted(fins) == ["Exportar", "Gerar PDF"]
+    assert executor.em_andamento() == []
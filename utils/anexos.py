@@ -0,0 +1,136 @@
+import os
+import hashlib
+import mimetypes
+import sqlite3
+import tempfile
+from contextlib import nullcontext
+from database import DATA_DIR, obter_conexao, fonte_historico
+
+# Diretório gerenciado com o conteúdo dos anexos, endereçado pelo SHA-256
+ANEXOS_DIR = os.path.join(DATA_DIR, "anexos")
+TAMANHO_BLOCO = 1024 * 1024
+MIMES_IMAGEM_PDF = ("image/jpeg", "image/png")
+
+def caminho_blob(sha256):
+    """Caminho do arquivo armazenado para o hash informado (data/anexos/ab/abcdef...)"""
+    return os.path.join(ANEXOS_DIR, sha256[:2], sha256)
+
+def _dimensoes_imagem(caminho):
+    """Largura e altura da imagem lendo apenas o cabeçalho (None se não for imagem)"""
+    try:
+        from PIL import Image
+        with Image.open(caminho) as img:
+            return img.size
+    except Exception:
+        return None, None
+
+def ingerir_arquivo(caminho_origem, descricao=''):
+    """
+    Copia um arquivo para o armazenamento de anexos e retorna seus metadados.
+    O arquivo é lido em blocos, calculando o SHA-256 enquanto é copiado, então
+    fotos grandes não ficam inteiras em memória. Se o conteúdo já existir no
+    armazenamento, a cópia é descartada e o blob existente é reutilizado.
+    """
+    os.makedirs(ANEXOS_DIR, exist_ok=True)
+    sha = hashlib.sha256()
+    tamanho = 0
+    fd, temporario = tempfile.mkstemp(dir=ANEXOS_DIR, prefix='.ingest-')
+    try:
+        with os.fdopen(fd, 'wb') as destino, open(caminho_origem, 'rb') as origem:
+            while True:
+                bloco = origem.read(TAMANHO_BLOCO)
+                if not bloco:
+                    break
+                sha.update(bloco)
+                destino.write(bloco)
+                tamanho += len(bloco)
+        sha256 = sha.hexdigest()
+        final = caminho_blob(sha256)
+        if os.path.exists(final):
+            os.remove(temporario)
+        else:
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            os.replace(temporario, final)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+    mime = mimetypes.guess_type(caminho_origem)[0] or 'application/octet-stream'
+    largura, altura = _dimensoes_imagem(final) if mime.startswith('image/') else (None, None)
+    return {
+        'nome': os.path.basename(caminho_origem),
+        'caminho': final,
+        'descricao': descricao,
+        'sha256': sha256,
+        'mime': mime,
+        'size': tamanho,
+        'width': largura,
+        'height': altura,
+    }
+
+def listar_anexos(relatorio_id, conn=None):
+    """
+    Anexos do relatório agrupados por aba ({1: [...], ..., 4: [...]}), em uma
+    única consulta indexada. Cada anexo é um dict com nome, caminho, descricao,
+    sha256, mime, size, width e height.
+    """
+    anexos = {1: [], 2: [], 3: [], 4: []}
+    with (obter_conexao() if conn is None else nullcontext(conn)) as conn:
+        try:
+            rows = conn.execute(f"""
+                SELECT aba, nome, descricao, sha256, mime, size, width, height
+                FROM {fonte_historico(conn, 'relatorio_anexos')}
+                WHERE relatorio_id = ?
+                ORDER BY aba, ordem
+            """, (relatorio_id,)).fetchall()
+        except sqlite3.Error as e:
+            print(f"❌ Erro ao carregar anexos do relatório {relatorio_id}: {e}")
+            rows = []
+    for aba, nome, descricao, sha256, mime, size, width, height in rows:
+        anexos.setdefault(aba, []).append({
+            'nome': nome,
+            'caminho': caminho_blob(sha256),
+            'descricao': descricao or '',
+            'sha256': sha256,
+            'mime': mime,
+            'size': size,
+            'width': width,
+            'height': height,
+        })
+    return anexos
+
+def salvar_anexos(conn, relatorio_id, anexos_por_aba):
+    """Regrava os anexos do relatório na conexão informada (sem commit)"""
+    conn.execute("DELETE FROM relatorio_anexos WHERE relatorio_id = ?", (relatorio_id,))
+    conn.executemany("""
+        INSERT INTO relatorio_anexos (relatorio_id, aba, ordem, sha256, nome, descricao, mime, size, width, height)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, [
+        (relatorio_id, aba, ordem, a['sha256'], a.get('nome'), a.get('descricao'),
+         a.get('mime'), a.get('size'), a.get('width'), a.get('height'))
+        for aba, lista in anexos_por_aba.items()
+        for ordem, a in enumerate(lista)
+        if isinstance(a, dict) and a.get('sha256')
+    ])
+
+def remover_blobs_orfaos():
+    """
+    Apagar do armazenamento os arquivos que nenhum relatório referencia mais.
+    Anexos adicionados a um formulário ainda não salvo também parecem órfãos,
+    então rode fora do horário de uso.
+    """
+    with obter_conexao() as conn:
+        # Anexos de relatórios arquivados também contam como usados
+        usados = {row[0] for row in conn.execute(
+            f"SELECT DISTINCT sha256 FROM {fonte_historico(conn, 'relatorio_anexos')}")}
+    removidos = 0
+    if not os.path.isdir(ANEXOS_DIR):
+        return removidos
+    for raiz, _dirs, arquivos in os.walk(ANEXOS_DIR):
+        for nome in arquivos:
+            if nome.startswith('.ingest-') or nome in usados:
+                continue
+            os.remove(os.path.join(raiz, nome))
+            removidos += 1
+    return removidos
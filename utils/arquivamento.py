@@ -0,0 +1,149 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from database import (obter_conexao, transacao, anexar_arquivo, caminho_arquivo, fts5_disponivel,
+                      devolver_contadores_arquivados, valores_fts_relatorio)
+
+# Idade padrão (em dias) a partir da qual cotações fechadas e relatórios vão para o arquivo
+DIAS_PADRAO = 730
+
+# Movimentação em ordem: (tabela, seleção dos ids a mover). As tabelas filhas vêm
+# depois das principais para que a seleção possa usar as listas já montadas.
+_SELECOES = (
+    ("cotacoes", """
+        SELECT id FROM main.cotacoes
+        WHERE created_at < :corte AND COALESCE(status, 'Em Aberto') <> 'Em Aberto'
+          AND id NOT IN (SELECT cotacao_id FROM main.relatorios_tecnicos
+                         WHERE cotacao_id IS NOT NULL AND created_at >= :corte)"""),
+    ("itens_cotacao", "SELECT id FROM main.itens_cotacao WHERE cotacao_id IN (SELECT id FROM temp._arquivar_cotacoes)"),
+    ("relatorios_tecnicos", "SELECT id FROM main.relatorios_tecnicos WHERE created_at < :corte"),
+    ("eventos_campo", """
+        SELECT id FROM main.eventos_campo
+        WHERE relatorio_id IN (SELECT id FROM temp._arquivar_relatorios_tecnicos)"""),
+    ("relatorio_anexos", """
+        SELECT id FROM main.relatorio_anexos
+        WHERE relatorio_id IN (SELECT id FROM temp._arquivar_relatorios_tecnicos)"""),
+)
+
+def _colunas(conn, tabela):
+    return [row[1] for row in conn.execute(f"PRAGMA main.table_info({tabela})")]
+
+def _arquivamento_atomico(conn):
+    """Se uma transação sobre os dois bancos é atômica como um todo (nenhum dos dois em WAL)"""
+    return all(conn.execute(f"PRAGMA {esquema}.journal_mode").fetchone()[0].lower() != 'wal'
+               for esquema in ("main", "arquivo"))
+
+def _copiar_para_arquivo(conn, data_corte):
+    """Selecionar as linhas a mover (tabelas temp._arquivar_*) e copiá-las para o arquivo"""
+    movidas = {}
+    for tabela, selecao in _SELECOES:
+        temporaria = f"temp._arquivar_{tabela}"
+        conn.execute(f"DROP TABLE IF EXISTS {temporaria}")
+        conn.execute(f"CREATE TABLE {temporaria} (id INTEGER PRIMARY KEY)")
+        conn.execute(f"INSERT INTO {temporaria} (id) {selecao}", {'corte': data_corte})
+        movidas[tabela] = conn.execute(f"SELECT COUNT(*) FROM {temporaria}").fetchone()[0]
+        lista = ", ".join(_colunas(conn, tabela))
+        conn.execute(f"""INSERT OR REPLACE INTO arquivo.{tabela} ({lista})
+            SELECT {lista} FROM main.{tabela} WHERE id IN (SELECT id FROM {temporaria})""")
+    # Marca do arquivamento em andamento, removida junto com a exclusão no banco principal
+    conn.execute("CREATE TABLE IF NOT EXISTS arquivo.arquivamento_pendente (data_corte TEXT NOT NULL)")
+    conn.execute("DELETE FROM arquivo.arquivamento_pendente")
+    conn.execute("INSERT INTO arquivo.arquivamento_pendente (data_corte) VALUES (?)", (data_corte,))
+    return movidas
+
+def _remover_do_principal(conn):
+    """Excluir do banco principal as linhas já copiadas, mantendo busca e contadores"""
+    # Excluir das filhas para as principais; os triggers retiram as linhas da busca e dos contadores
+    for tabela, _selecao in reversed(_SELECOES):
+        conn.execute(f"DELETE FROM main.{tabela} WHERE id IN (SELECT id FROM temp._arquivar_{tabela})")
+
+    # Relatórios arquivados continuam na busca textual
+    if fts5_disponivel(conn) and conn.execute(
+            "SELECT 1 FROM main.sqlite_master WHERE name = 'relatorios_fts'").fetchone():
+        colunas_fts = ("rowid, numero_relatorio, cliente, descricao_servico, condicao_encontrada, "
+                       "servicos_propostos, pecas_recomendadas, detalhes, eventos")
+        conn.execute(f"""INSERT INTO relatorios_fts ({colunas_fts})
+            SELECT {valores_fts_relatorio('r', 'arquivo.eventos_campo')}
+            FROM arquivo.relatorios_tecnicos r
+            WHERE r.id IN (SELECT id FROM temp._arquivar_relatorios_tecnicos)""")
+
+    # Estatísticas de clientes e dashboard continuam contando o histórico arquivado
+    devolver_contadores_arquivados(conn, "temp._arquivar_cotacoes", "temp._arquivar_relatorios_tecnicos")
+    conn.execute("DELETE FROM arquivo.arquivamento_pendente")
+
+def arquivar_historico(data_corte, db_name=None):
+    """
+    Move para crm_arquivo.db as cotações fechadas (status diferente de
+    'Em Aberto') e os relatórios técnicos criados antes de data_corte
+    ('AAAA-MM-DD'), junto com itens, eventos de campo e anexos.
+
+    Sem WAL, a cópia e a exclusão acontecem em uma única transação
+    (BEGIN IMMEDIATE) sobre os dois bancos, confirmada uma vez. Em WAL o SQLite
+    confirma cada banco separadamente, então a cópia é confirmada antes da
+    exclusão: uma interrupção entre as duas deixa linhas nos dois bancos (as
+    views *_todas mostram cada uma só uma vez) e a marca em
+    arquivo.arquivamento_pendente, e concluir_arquivamento_pendente() termina
+    o trabalho na próxima inicialização. Repetir é seguro: a cópia usa os
+    mesmos ids (INSERT OR REPLACE).
+
+    Retorna {tabela: linhas_movidas}.
+    """
+    with obter_conexao(db_name) as conn:
+        # ATTACH não pode acontecer dentro de transação
+        anexar_arquivo(conn, db_name, criar=True)
+        atomico = _arquivamento_atomico(conn)
+
+    with transacao(db_name) as conn:
+        movidas = _copiar_para_arquivo(conn, data_corte)
+        if atomico:
+            _remover_do_principal(conn)
+    if not atomico:
+        with transacao(db_name) as conn:
+            # Selecionar e copiar de novo: outra estação pode ter alterado as linhas entre as transações
+            movidas = _copiar_para_arquivo(conn, data_corte)
+            _remover_do_principal(conn)
+
+    with obter_conexao(db_name) as conn:
+        for tabela, _selecao in _SELECOES:
+            conn.execute(f"DROP TABLE IF EXISTS temp._arquivar_{tabela}")
+    return movidas
+
+def concluir_arquivamento_pendente(db_name=None):
+    """Concluir um arquivamento interrompido entre a cópia e a exclusão. Retorna a data de corte ou None"""
+    if not os.path.exists(caminho_arquivo(db_name)):
+        return None
+    with obter_conexao(db_name) as conn:
+        anexar_arquivo(conn, db_name)
+        if not conn.execute("SELECT 1 FROM arquivo.sqlite_master WHERE name = 'arquivamento_pendente'").fetchone():
+            return None
+        row = conn.execute("SELECT data_corte FROM arquivo.arquivamento_pendente").fetchone()
+    if row is None:
+        return None
+    print(f"📦 Concluindo arquivamento interrompido (corte {row[0]})")
+    arquivar_historico(row[0], db_name)
+    return row[0]
+
+def compactar_banco(db_name=None):
+    """VACUUM do banco principal para devolver ao disco o espaço liberado pelo arquivamento"""
+    with obter_conexao(db_name) as conn:
+        conn.execute("VACUUM main")
+
+if __name__ == "__main__":
+    # Uso: python -m utils.arquivamento [AAAA-MM-DD] [--compactar]
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if argumentos:
+        corte = argumentos[0]
+        try:
+            datetime.strptime(corte, '%Y-%m-%d')
+        except ValueError:
+            print("Uso: python -m utils.arquivamento [AAAA-MM-DD] [--compactar]")
+            sys.exit(1)
+    else:
+        corte = (datetime.now() - timedelta(days=DIAS_PADRAO)).strftime('%Y-%m-%d')
+    print(f"📦 Arquivando registros anteriores a {corte} em {caminho_arquivo()}")
+    for tabela, total in arquivar_historico(corte).items():
+        print(f"   {tabela}: {total}")
+    if '--compactar' in sys.argv:
+        compactar_banco()
+        print("🧹 Banco principal compactado")
+    print("✅ Arquivamento concluído!")
@@ -0,0 +1,220 @@
+import os
+import sys
+import glob
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from database import (DB_NAME, DATA_DIR, BUSY_TIMEOUT_MS, SNAPSHOT_DIR, SNAPSHOT_INTERVALO_MIN,
+                      caminho_arquivo, caminho_snapshot)
+
+# Snapshots ficam em data/backups/<nome do banco>-AAAAMMDD-HHMMSS.db
+BACKUP_DIR = os.path.join(DATA_DIR, "backups")
+FORMATO_DATA = "%Y%m%d-%H%M%S"
+# Páginas copiadas por passo e pausa entre passos: o lock de leitura do banco
+# de origem só é mantido durante cada passo, então as outras estações
+# continuam gravando enquanto o backup anda
+PAGINAS_POR_PASSO = 256
+PAUSA_ENTRE_PASSOS = 0.05
+# Quantos snapshots de cada banco manter
+MANTER_BACKUPS = 14
+# Intervalo do backup automático feito ao abrir o sistema
+INTERVALO_AUTOMATICO_HORAS = 24
+
+def _prefixo(db_name):
+    return os.path.splitext(os.path.basename(db_name))[0] + "-"
+
+def listar_backups(db_name=None, destino=BACKUP_DIR):
+    """Snapshots do banco, do mais recente para o mais antigo"""
+    padrao = os.path.join(destino, _prefixo(db_name or DB_NAME) + "*.db")
+    return sorted(glob.glob(padrao), reverse=True)
+
+def verificar_backup(caminho):
+    """PRAGMA quick_check no snapshot. Retorna (ok, mensagem)"""
+    try:
+        conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+        try:
+            resultado = [row[0] for row in conn.execute("PRAGMA quick_check")]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return False, str(e)
+    return resultado == ['ok'], "; ".join(resultado)
+
+def _copiar(origem, destino, paginas, pausa, journal_mode="DELETE"):
+    """
+    Cópia online com Connection.backup, em passos de `paginas` com pausa entre eles.
+
+    journal_mode é o modo do destino: DELETE deixa um arquivo único e autônomo,
+    sem -wal ao lado (snapshots); WAL é aplicado já antes da cópia, para que quem
+    lê o destino não fique bloqueado pelo lock de escrita durante as pausas.
+    """
+    fonte = sqlite3.connect(origem, timeout=BUSY_TIMEOUT_MS / 1000)
+    alvo = sqlite3.connect(destino, timeout=BUSY_TIMEOUT_MS / 1000)
+    try:
+        if journal_mode == "WAL":
+            alvo.execute("PRAGMA journal_mode = WAL")
+        fonte.backup(alvo, pages=paginas, sleep=pausa)
+        alvo.execute(f"PRAGMA journal_mode = {journal_mode}")
+    finally:
+        alvo.close()
+        fonte.close()
+
+def _copiar_verificado(origem, final, paginas, pausa):
+    """
+    Copiar para `final` passando por um arquivo .parcial, verificado com
+    PRAGMA quick_check e só então renomeado: `final` nunca fica pela metade.
+    Lança RuntimeError se a verificação falhar.
+    """
+    parcial = final + ".parcial"
+    try:
+        _copiar(origem, parcial, paginas, pausa)
+        ok, mensagem = verificar_backup(parcial)
+        if not ok:
+            raise RuntimeError(f"Backup de {origem} falhou na verificação: {mensagem}")
+        os.replace(parcial, final)
+    finally:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+
+def rotacionar_backups(db_name=None, manter=MANTER_BACKUPS, destino=BACKUP_DIR):
+    """Apagar os snapshots mais antigos, mantendo os `manter` mais recentes"""
+    removidos = []
+    # Cópias .parcial esquecidas por um backup interrompido (sistema fechado no meio)
+    padrao = os.path.join(destino, _prefixo(db_name or DB_NAME) + "*.db.parcial")
+    antigos = [p for p in glob.glob(padrao) if time.time() - os.path.getmtime(p) > 3600]
+    for caminho in listar_backups(db_name, destino)[manter:] + antigos:
+        try:
+            os.remove(caminho)
+            removidos.append(caminho)
+        except OSError as e:
+            print(f"⚠️ Não foi possível remover o backup {caminho}: {e}")
+    return removidos
+
+def criar_backup(db_name=None, destino=BACKUP_DIR, paginas=PAGINAS_POR_PASSO,
+                 pausa=PAUSA_ENTRE_PASSOS, manter=MANTER_BACKUPS):
+    """
+    Gerar um snapshot do banco (e do arquivo histórico, se existir) sem
+    interromper quem está usando o sistema.
+
+    A cópia é gravada em um arquivo .parcial, verificada com PRAGMA quick_check
+    e só então renomeada para o nome final com data e hora, de modo que um
+    snapshot listado em data/backups está sempre completo e íntegro. Depois
+    os snapshots mais antigos que `manter` são apagados.
+
+    Retorna a lista de snapshots criados. Lança RuntimeError se a verificação falhar.
+    """
+    db_name = db_name or DB_NAME
+    os.makedirs(destino, exist_ok=True)
+    carimbo = datetime.now().strftime(FORMATO_DATA)
+    bancos = [db_name]
+    if os.path.exists(caminho_arquivo(db_name)):
+        bancos.append(caminho_arquivo(db_name))
+
+    criados = []
+    for banco in bancos:
+        final = os.path.join(destino, f"{_prefixo(banco)}{carimbo}.db")
+        _copiar_verificado(banco, final, paginas, pausa)
+        criados.append(final)
+        rotacionar_backups(banco, manter, destino)
+    return criados
+
+def backup_necessario(db_name=None, intervalo_horas=INTERVALO_AUTOMATICO_HORAS, destino=BACKUP_DIR):
+    """True se não houver snapshot do banco mais novo que intervalo_horas"""
+    backups = listar_backups(db_name, destino)
+    if not backups:
+        return True
+    return time.time() - os.path.getmtime(backups[0]) >= intervalo_horas * 3600
+
+def iniciar_backup_automatico(db_name=None, intervalo_horas=INTERVALO_AUTOMATICO_HORAS):
+    """
+    Se o último snapshot for mais velho que intervalo_horas, gerar um novo em
+    segundo plano. A thread usa conexões próprias e não bloqueia a interface.
+    """
+    if not backup_necessario(db_name, intervalo_horas):
+        return None
+
+    def executar():
+        try:
+            for caminho in criar_backup(db_name):
+                print(f"💾 Backup criado: {caminho}")
+        except (sqlite3.Error, OSError, RuntimeError) as e:
+            print(f"❌ Erro no backup automático: {e}")
+
+    thread = threading.Thread(target=executar, name="backup-automatico", daemon=True)
+    thread.start()
+    return thread
+
+def atualizar_snapshot_leitura(db_name=None, paginas=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS):
+    """
+    Atualizar a cópia somente leitura usada por obter_conexao_leitura()
+    (data/leitura), inclusive a do arquivo histórico, se existir.
+
+    A primeira cópia é feita como os snapshots (arquivo .parcial verificado e
+    renomeado). As seguintes regravam o próprio arquivo pela API de backup, em
+    uma transação; a cópia fica em WAL, então quem está lendo continua vendo
+    os dados antigos, sem "database is locked", até o fim da atualização, e as
+    conexões já abertas passam a ver os novos. Retorna os caminhos atualizados.
+    """
+    db_name = db_name or DB_NAME
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    bancos = [db_name]
+    if os.path.exists(caminho_arquivo(db_name)):
+        bancos.append(caminho_arquivo(db_name))
+    atualizados = []
+    # O arquivo histórico primeiro: quando a cópia principal fica "recente",
+    # a do arquivo já está atualizada
+    for banco in reversed(bancos):
+        destino = caminho_snapshot(banco)
+        if os.path.exists(destino):
+            _copiar(banco, destino, paginas, pausa, journal_mode="WAL")
+        else:
+            _copiar_verificado(banco, destino, paginas, pausa)
+            conn = sqlite3.connect(destino)
+            try:
+                conn.execute("PRAGMA journal_mode = WAL")
+            finally:
+                conn.close()
+        # snapshot_disponivel() usa a data do arquivo, que em WAL só muda no checkpoint
+        os.utime(destino)
+        atualizados.append(destino)
+    return atualizados
+
+def iniciar_snapshot_leitura(db_name=None, intervalo_min=SNAPSHOT_INTERVALO_MIN):
+    """Atualizar a cópia de leitura agora e a cada intervalo_min minutos, em segundo plano"""
+    def executar():
+        while True:
+            try:
+                atualizar_snapshot_leitura(db_name)
+            except (sqlite3.Error, OSError, RuntimeError) as e:
+                print(f"❌ Erro ao atualizar a cópia de leitura: {e}")
+            time.sleep(intervalo_min * 60)
+
+    thread = threading.Thread(target=executar, name="snapshot-leitura", daemon=True)
+    thread.start()
+    return thread
+
+if __name__ == "__main__":
+    # Uso: python -m utils.backup [--listar | --verificar | --snapshot-leitura]
+    if '--snapshot-leitura' in sys.argv:
+        for caminho in atualizar_snapshot_leitura():
+            print(f"📖 Cópia de leitura atualizada: {caminho}")
+        sys.exit(0)
+    if '--listar' in sys.argv or '--verificar' in sys.argv:
+        for banco in (DB_NAME, caminho_arquivo()):
+            for caminho in listar_backups(banco):
+                linha = caminho
+                if '--verificar' in sys.argv:
+                    ok, mensagem = verificar_backup(caminho)
+                    linha += "  ✅" if ok else f"  ❌ {mensagem}"
+                print(linha)
+        sys.exit(0)
+    inicio = datetime.now()
+    try:
+        criados = criar_backup()
+    except (sqlite3.Error, OSError, RuntimeError) as e:
+        print(f"❌ Erro no backup: {e}")
+        sys.exit(1)
+    for caminho in criados:
+        print(f"💾 Backup criado e verificado: {caminho}")
+    print(f"⏱️ Tempo: {(datetime.now() - inicio).total_seconds():.1f}s")
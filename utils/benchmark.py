@@ -0,0 +1,338 @@
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import subprocess
+from datetime import datetime
+from database import obter_conexao, fechar_conexoes, esquemas_historico
+from utils.anexos import listar_anexos
+from utils.busca import buscar_clientes_texto, buscar_produtos_texto, buscar_relatorios_texto
+
+# Execuções medidas por consulta (mais uma de aquecimento, descartada)
+REPETICOES = 20
+# Razão de p50 acima da qual a comparação aponta regressão
+TOLERANCIA_REGRESSAO = 1.2
+TERMOS_BUSCA = ("paulista", "sao paulo", "metalurgica horizonte", "filtro", "rolamento", "ga 37",
+                "vazamento", "manutencao preventiva", "0001", "campinas")
+
+def _termos_like(rng):
+    """Parâmetros da busca por número ou cliente das listagens de cotações"""
+    termo = rng.choice(("Paulista", "PROP-0001", "Ltda"))
+    return (f"%{termo}%", f"%{termo}%")
+
+# Consultas de produção, copiadas dos módulos: (nome, sql, parâmetros(contexto, rng)).
+# Ao alterar uma consulta no módulo, atualize-a aqui para o benchmark continuar fiel.
+CONSULTAS = (
+    ("clientes.listar", """
+        SELECT id, nome, cnpj, cidade, telefone, email
+        FROM clientes
+        ORDER BY nome
+    """, None),
+    ("clientes.carregar", "SELECT * FROM clientes WHERE id = ?", lambda ctx, rng: (rng.choice(ctx['clientes']),)),
+    ("clientes.contatos", "SELECT * FROM contatos WHERE cliente_id = ? ORDER BY nome",
+     lambda ctx, rng: (rng.choice(ctx['clientes']),)),
+    ("clientes.estatisticas", """
+        SELECT total_cotacoes, aprovadas, rejeitadas, em_aberto,
+               valor_aprovado, valor_em_aberto, valor_rejeitado,
+               soma_valores, qtd_valores, total_contatos, ultima_cotacao
+        FROM cliente_stats
+        WHERE cliente_id = ?
+    """, lambda ctx, rng: (rng.choice(ctx['clientes_ativos']),)),
+    ("clientes.historico", """
+        SELECT ct.numero_proposta, ct.data_criacao, ct.status, ct.valor_total,
+               u.nome_completo, ct.data_validade
+        FROM cotacoes_todas ct
+        LEFT JOIN usuarios u ON u.id = ct.responsavel_id
+        WHERE ct.cliente_id = ?
+        ORDER BY ct.data_criacao DESC
+        LIMIT ?
+    """, lambda ctx, rng: (rng.choice(ctx['clientes_ativos']), 10)),
+    ("produtos.listar", """
+        SELECT id, nome, tipo, valor_unitario, ativo
+        FROM produtos
+        ORDER BY nome
+    """, None),
+    ("produtos.itens_kit", """
+        SELECT p.id, p.nome, p.tipo, p.valor_unitario, ki.quantidade
+        FROM kit_items ki
+        JOIN produtos p ON ki.produto_id = p.id
+        WHERE ki.kit_id = ?
+    """, lambda ctx, rng: (rng.choice(ctx['kits']),)),
+    ("produtos.por_tipo", "SELECT id, nome, valor_unitario FROM produtos WHERE tipo = ? AND ativo = 1 ORDER BY nome",
+     lambda ctx, rng: (rng.choice(("Produto", "Serviço", "Kit")),)),
+    ("cotacoes.clientes_combo", "SELECT id, nome FROM clientes ORDER BY nome", None),
+    ("cotacoes.listar", """
+        SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
+        FROM cotacoes c
+        JOIN clientes cl ON c.cliente_id = cl.id
+        WHERE c.tipo_cotacao = 'Compra'
+        ORDER BY c.created_at DESC
+    """, None),
+    ("cotacoes.buscar", """
+        SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
+        FROM cotacoes c
+        JOIN clientes cl ON c.cliente_id = cl.id
+        WHERE c.tipo_cotacao = 'Compra' AND (c.numero_proposta LIKE ? OR cl.nome LIKE ?)
+        ORDER BY c.created_at DESC
+    """, lambda ctx, rng: _termos_like(rng)),
+    ("cotacoes.carregar", """
+        SELECT
+            c.id, c.numero_proposta, c.cliente_id, c.responsavel_id, c.filial_id,
+            c.data_validade, c.modelo_compressor, c.numero_serie_compressor,
+            c.descricao_atividade, c.observacoes, c.valor_total, c.tipo_frete,
+            c.condicao_pagamento, c.prazo_entrega, c.moeda, c.status,
+            c.caminho_arquivo_pdf, c.relacao_pecas, cl.nome AS cliente_nome,
+            c.esboco_servico, c.relacao_pecas_substituir,
+            c.tipo_cotacao, c.locacao_valor_mensal, c.locacao_data_inicio,
+            c.locacao_data_fim, c.locacao_qtd_meses, c.locacao_nome_equipamento
+        FROM cotacoes c
+        JOIN clientes cl ON c.cliente_id = cl.id
+        WHERE c.id = ?
+    """, lambda ctx, rng: (rng.choice(ctx['cotacoes']),)),
+    ("cotacoes.itens", """
+        SELECT
+            COALESCE(tipo, 'Produto') as tipo,
+            COALESCE(item_nome, '') as item_nome,
+            COALESCE(quantidade, 1) as quantidade,
+            COALESCE(valor_unitario, 0) as valor_unitario,
+            COALESCE(valor_total_item, 0) as valor_total_item,
+            COALESCE(descricao, '') as descricao,
+            COALESCE(mao_obra, 0) as mao_obra,
+            COALESCE(deslocamento, 0) as deslocamento,
+            COALESCE(estadia, 0) as estadia,
+            COALESCE(locacao_qtd_meses, 0) as locacao_qtd_meses,
+            locacao_data_inicio,
+            locacao_data_fim,
+            COALESCE(tipo_operacao, 'Compra') as tipo_operacao
+        FROM itens_cotacao
+        WHERE cotacao_id = ?
+        ORDER BY id
+    """, lambda ctx, rng: (rng.choice(ctx['cotacoes']),)),
+    ("locacoes.listar", """
+        SELECT id, numero_proposta, (SELECT nome FROM clientes WHERE id=cliente_id) AS cliente,
+               data_criacao, valor_total, status
+        FROM cotacoes
+        WHERE tipo_cotacao = 'Locação'
+        ORDER BY created_at DESC
+    """, None),
+    ("relatorios.listar", """
+        SELECT r.id, r.numero_relatorio, cl.nome, r.data_criacao,
+               u.nome_completo, r.tipo_servico
+        FROM relatorios_tecnicos r
+        JOIN clientes cl ON r.cliente_id = cl.id
+        JOIN usuarios u ON r.responsavel_id = u.id
+        ORDER BY r.created_at DESC
+    """, None),
+    ("relatorios.cotacoes_combo", "SELECT id, numero_proposta FROM cotacoes ORDER BY numero_proposta", None),
+    ("relatorios.eventos", """
+        SELECT ec.tecnico_id, u.nome_completo, ec.data_hora, ec.evento, ec.tipo
+        FROM eventos_campo ec
+        JOIN usuarios u ON ec.tecnico_id = u.id
+        WHERE ec.relatorio_id = ?
+        ORDER BY ec.tecnico_id, ec.data_hora
+    """, lambda ctx, rng: (rng.choice(ctx['relatorios']),)),
+    ("dashboard.totais", "SELECT chave, valor FROM dashboard_totais", None),
+    ("dashboard.resumo_admin", """
+        SELECT COALESCE(SUM(total_cotacoes), 0), COALESCE(SUM(total_relatorios), 0)
+        FROM dashboard_resumo
+    """, None),
+    ("dashboard.resumo_usuario", """
+        SELECT COALESCE(SUM(total_cotacoes), 0), COALESCE(SUM(total_relatorios), 0),
+               COALESCE(SUM(faturamento_aprovado), 0)
+        FROM dashboard_resumo
+        WHERE responsavel_id = ?
+    """, lambda ctx, rng: (rng.choice(ctx['usuarios']),)),
+    ("dashboard.cotacoes_recentes", """
+        SELECT c.numero_proposta, cl.nome, c.data_criacao, c.valor_total, c.status
+        FROM cotacoes c
+        JOIN clientes cl ON c.cliente_id = cl.id
+        WHERE c.responsavel_id = ?
+        ORDER BY c.created_at DESC
+        LIMIT 10
+    """, lambda ctx, rng: (rng.choice(ctx['usuarios']),)),
+    ("dashboard.relatorios_recentes", """
+        SELECT r.numero_relatorio, cl.nome, r.data_criacao, u.nome_completo, r.tipo_servico
+        FROM relatorios_tecnicos r
+        JOIN clientes cl ON r.cliente_id = cl.id
+        JOIN usuarios u ON r.responsavel_id = u.id
+        ORDER BY r.created_at DESC
+        LIMIT 10
+    """, None),
+    ("pdf_cotacao.dados", """
+        SELECT
+            cot.id, cot.numero_proposta, cot.modelo_compressor, cot.numero_serie_compressor,
+            cot.descricao_atividade, cot.observacoes, cot.data_criacao,
+            cot.valor_total, cot.tipo_frete, cot.condicao_pagamento, cot.prazo_entrega,
+            cli.id AS cliente_id, cli.nome AS cliente_nome, COALESCE(cli.nome_fantasia, cli.nome) AS cliente_nome_fantasia, cli.endereco, cli.email,
+            cli.telefone, cli.site, cli.cnpj, cli.cidade, cli.estado, cli.cep,
+            usr.id AS responsavel_id, usr.nome_completo, usr.email AS usr_email, usr.telefone AS usr_telefone, usr.username,
+            cot.moeda, cot.relacao_pecas, cot.filial_id, cot.esboco_servico, cot.relacao_pecas_substituir, cot.tipo_cotacao,
+            cot.locacao_nome_equipamento, cot.locacao_imagem_path
+        FROM cotacoes AS cot
+        JOIN clientes AS cli ON cot.cliente_id = cli.id
+        JOIN usuarios AS usr ON cot.responsavel_id = usr.id
+        WHERE cot.id = ?
+    """, lambda ctx, rng: (rng.choice(ctx['cotacoes']),)),
+    ("pdf_cotacao.contato", """
+        SELECT nome FROM contatos
+        WHERE cliente_id = ?
+        LIMIT 1
+    """, lambda ctx, rng: (rng.choice(ctx['clientes']),)),
+    ("pdf_cotacao.itens", """
+        SELECT
+            id, tipo, item_nome, quantidade, descricao,
+            valor_unitario, valor_total_item,
+            mao_obra, deslocamento, estadia, produto_id, tipo_operacao
+        FROM itens_cotacao
+        WHERE cotacao_id=?
+    """, lambda ctx, rng: (rng.choice(ctx['cotacoes']),)),
+    ("pdf_cotacao.composicao_kit", """
+        SELECT p.nome, kc.quantidade
+        FROM kit_items kc
+        JOIN produtos p ON kc.produto_id = p.id
+        WHERE kc.kit_id = ?
+    """, lambda ctx, rng: (rng.choice(ctx['kits']),)),
+)
+
+def _produtos_mais_vendidos(conn, ctx, rng):
+    """Ranking de produtos do painel do cliente (clientes.update_cliente_dashboard_expandido)"""
+    esquemas = esquemas_historico(conn)
+    vendidos = " UNION ALL ".join(f"""
+        SELECT ic.item_nome, ic.valor_total_item
+        FROM {esquema}.cotacoes c
+        JOIN {esquema}.itens_cotacao ic ON ic.cotacao_id = c.id
+        WHERE c.cliente_id = ? AND c.status = 'Aprovada'""" for esquema in esquemas)
+    return conn.execute(f"""
+        SELECT item_nome, COUNT(*) as quantidade, SUM(valor_total_item) as valor_total
+        FROM ({vendidos})
+        GROUP BY item_nome
+        ORDER BY quantidade DESC, valor_total DESC
+        LIMIT 5
+    """, (rng.choice(ctx['clientes_ativos']),) * len(esquemas)).fetchall()
+
+# Funções de produção medidas inteiras: (nome, função(conn, contexto, rng, db_name) -> linhas)
+FUNCOES = (
+    ("clientes.produtos_mais_vendidos", lambda conn, ctx, rng, db: _produtos_mais_vendidos(conn, ctx, rng)),
+    ("busca.clientes", lambda conn, ctx, rng, db: buscar_clientes_texto(rng.choice(TERMOS_BUSCA), db_name=db)),
+    ("busca.produtos", lambda conn, ctx, rng, db: buscar_produtos_texto(rng.choice(TERMOS_BUSCA), db_name=db)),
+    ("busca.relatorios", lambda conn, ctx, rng, db: buscar_relatorios_texto(rng.choice(TERMOS_BUSCA), db_name=db)),
+    ("anexos.listar", lambda conn, ctx, rng, db: listar_anexos(rng.choice(ctx['relatorios']), conn)),
+)
+
+def _percentil(valores, p):
+    """Percentil pelo método nearest-rank (valores já ordenados)"""
+    indice = max(0, min(len(valores) - 1, int(round(p / 100 * len(valores) + 0.5)) - 1))
+    return valores[indice]
+
+def _contexto(conn):
+    """Ids reais usados para sortear os parâmetros das consultas"""
+    def ids(sql):
+        return [row[0] for row in conn.execute(sql)] or [0]
+    return {
+        'clientes': ids("SELECT id FROM clientes"),
+        # Clientes com cotações, do mais ao menos movimentado: o painel é aberto mais para esses
+        'clientes_ativos': ids("SELECT cliente_id FROM cliente_stats WHERE total_cotacoes > 0 "
+                               "ORDER BY total_cotacoes DESC LIMIT 1000"),
+        'cotacoes': ids("SELECT id FROM cotacoes"),
+        'relatorios': ids("SELECT id FROM relatorios_tecnicos"),
+        'kits': ids("SELECT id FROM produtos WHERE tipo = 'Kit'"),
+        'usuarios': ids("SELECT id FROM usuarios"),
+    }
+
+def _medir(executar, repeticoes):
+    """Executa uma vez para aquecer e depois mede. Retorna as estatísticas em ms"""
+    linhas = executar()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        linhas = executar()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'p50_ms': round(_percentil(tempos, 50), 3),
+        'p95_ms': round(_percentil(tempos, 95), 3),
+        'min_ms': round(tempos[0], 3),
+        'max_ms': round(tempos[-1], 3),
+        'linhas': len(linhas) if linhas is not None else 0,
+    }
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar_benchmark(db_name, repeticoes=REPETICOES, filtro=None, semente=42):
+    """
+    Mede as consultas de CONSULTAS e as funções de FUNCOES contra db_name
+    (gerado com utils.dados_sinteticos). Cada item roda uma vez para aquecer
+    o cache e depois `repeticoes` vezes com parâmetros sorteados; o resultado
+    traz p50/p95/min/max em milissegundos e o nº de linhas da última execução.
+    filtro limita aos itens cujo nome começa com o texto informado.
+    """
+    rng = random.Random(semente)
+    with obter_conexao(db_name) as conn:
+        ctx = _contexto(conn)
+        resultados = {}
+        for nome, sql, parametros in CONSULTAS:
+            if filtro and not nome.startswith(filtro):
+                continue
+            resultados[nome] = _medir(
+                lambda: conn.execute(sql, parametros(ctx, rng) if parametros else ()).fetchall(), repeticoes)
+        for nome, funcao in FUNCOES:
+            if filtro and not nome.startswith(filtro):
+                continue
+            resultados[nome] = _medir(lambda: funcao(conn, ctx, rng, db_name), repeticoes)
+        volumes = {tabela: conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+                   for tabela in ("clientes", "cotacoes", "itens_cotacao", "relatorios_tecnicos")}
+    return {
+        'base': os.path.abspath(db_name),
+        'volumes': volumes,
+        'commit': _commit_atual(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'sqlite': sqlite3.sqlite_version,
+        'python': sys.version.split()[0],
+        'repeticoes': repeticoes,
+        'resultados': resultados,
+    }
+
+def comparar(anterior, atual, tolerancia=TOLERANCIA_REGRESSAO):
+    """Itens cujo p50 cresceu mais que `tolerancia` vezes: [(nome, p50_antes, p50_agora)]"""
+    regressoes = []
+    for nome, medida in atual['resultados'].items():
+        antes = anterior.get('resultados', {}).get(nome)
+        # Abaixo de 1 ms a variação é ruído de medição
+        if antes and medida['p50_ms'] > max(1.0, antes['p50_ms'] * tolerancia):
+            regressoes.append((nome, antes['p50_ms'], medida['p50_ms']))
+    return regressoes
+
+if __name__ == "__main__":
+    # Uso: python -m utils.benchmark base.db [--repeticoes N] [--filtro prefixo]
+    #                                [--saida resultado.json] [--comparar anterior.json]
+    argumentos = sys.argv[1:]
+    if not argumentos or argumentos[0].startswith('--'):
+        print("Uso: python -m utils.benchmark base.db [--repeticoes N] [--filtro prefixo] "
+              "[--saida resultado.json] [--comparar anterior.json]")
+        sys.exit(1)
+    opcoes = dict(zip(argumentos[1::2], argumentos[2::2]))
+    if not os.path.exists(argumentos[0]):
+        print(f"❌ Base {argumentos[0]} não encontrada (gere com python -m utils.dados_sinteticos)")
+        sys.exit(1)
+    resultado = executar_benchmark(argumentos[0], int(opcoes.get('--repeticoes', REPETICOES)),
+                                   opcoes.get('--filtro'))
+    fechar_conexoes()
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if '--saida' in opcoes:
+        with open(opcoes['--saida'], 'w', encoding='utf-8') as arquivo:
+            arquivo.write(texto)
+    else:
+        print(texto)
+    if '--comparar' in opcoes:
+        with open(opcoes['--comparar'], encoding='utf-8') as arquivo:
+            regressoes = comparar(json.load(arquivo), resultado)
+        for nome, antes, agora in regressoes:
+            print(f"⚠️ {nome}: p50 {antes:.2f} ms -> {agora:.2f} ms", file=sys.stderr)
+        sys.exit(1 if regressoes else 0)
@@ -0,0 +1,176 @@
+import re
+import sqlite3
+from database import obter_conexao, fonte_historico
+from utils.formatters import normalize_text, only_digits
+
+# Pesos do bm25 na ordem das colunas de relatorios_fts: número e cliente pesam mais
+PESOS_RELATORIOS_FTS = (10.0, 5.0, 2.0, 1.5, 1.5, 1.5, 1.0, 1.0)
+
+def montar_consulta_fts(termo):
+    """
+    Converte o texto digitado em uma expressão MATCH do FTS5.
+    Cada palavra vira um termo entre aspas com busca por prefixo ("rolam"*),
+    e todas as palavras precisam aparecer (AND implícito).
+    """
+    palavras = re.findall(r'\w+', termo or '', flags=re.UNICODE)
+    return ' '.join(f'"{p}"*' for p in palavras)
+
+def _tabela_existe(cursor, nome):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (nome,))
+    return cursor.fetchone() is not None
+
+def buscar_relatorios_texto(termo, limite=500, db_name=None):
+    """
+    Busca relatórios técnicos pelo conteúdo (número, cliente, campos técnicos
+    e eventos de campo), ordenados por relevância.
+    Retorna tuplas (id, numero, cliente, data_criacao, responsavel, tipo_servico, trecho),
+    onde trecho destaca entre [colchetes] o texto encontrado.
+    """
+    consulta = montar_consulta_fts(termo)
+    if not consulta:
+        return []
+    with obter_conexao(db_name) as conn:
+        try:
+            c = conn.cursor()
+            # Inclui os relatórios movidos para o arquivo histórico
+            relatorios = fonte_historico(conn, 'relatorios_tecnicos')
+            if not _tabela_existe(c, 'relatorios_fts'):
+                # SQLite sem FTS5: manter a busca antiga por número/cliente
+                c.execute(f"""
+                    SELECT r.id, r.numero_relatorio, cl.nome, r.data_criacao,
+                           u.nome_completo, r.tipo_servico, ''
+                    FROM {relatorios} r
+                    JOIN clientes cl ON r.cliente_id = cl.id
+                    JOIN usuarios u ON r.responsavel_id = u.id
+                    WHERE r.numero_relatorio LIKE ? OR cl.nome LIKE ?
+                    ORDER BY r.created_at DESC
+                    LIMIT ?
+                """, (f"%{termo}%", f"%{termo}%", limite))
+                return c.fetchall()
+
+            pesos = ', '.join(str(p) for p in PESOS_RELATORIOS_FTS)
+            c.execute(f"""
+                SELECT r.id, r.numero_relatorio, cl.nome, r.data_criacao,
+                       u.nome_completo, r.tipo_servico,
+                       snippet(relatorios_fts, -1, '[', ']', '…', 10)
+                FROM relatorios_fts f
+                JOIN {relatorios} r ON r.id = f.rowid
+                JOIN clientes cl ON r.cliente_id = cl.id
+                JOIN usuarios u ON r.responsavel_id = u.id
+                WHERE relatorios_fts MATCH ?
+                ORDER BY bm25(relatorios_fts, {pesos})
+                LIMIT ?
+            """, (consulta, limite))
+            return c.fetchall()
+
+        except sqlite3.Error as e:
+            print(f"❌ Erro na busca textual de relatórios: {e}")
+            return []
+
+def _consulta_palavras(termo):
+    """Palavras normalizadas do termo (ou só os dígitos, se parecer CNPJ)"""
+    termo = (termo or '').strip()
+    if re.fullmatch(r'[\d./\-\s]+', termo):
+        return [only_digits(termo)]
+    return normalize_text(termo).split()
+
+def _consulta_trigram(termo):
+    """
+    Monta a busca nas colunas normalizadas.
+    Retorna (expressao_match, curtas): cada palavra com 3+ letras vira uma frase
+    do índice trigram (busca por substring) e as palavras curtas, que o trigram
+    não indexa, voltam à parte para filtro por LIKE. Termos que parecem CNPJ
+    são reduzidos aos dígitos. Sem palavras longas, expressao_match é None.
+    """
+    palavras = _consulta_palavras(termo)
+    longas = [p for p in palavras if len(p) >= 3]
+    curtas = [p for p in palavras if 0 < len(p) < 3]
+    match = ' AND '.join('"' + p.replace('"', '""') + '"' for p in longas) or None
+    return match, curtas
+
+def _filtro_like(colunas, palavras):
+    """WHERE equivalente por LIKE nas colunas normalizadas (termos curtos ou sem FTS5)"""
+    condicoes = []
+    parametros = []
+    for palavra in palavras:
+        condicoes.append('(' + ' OR '.join(f"{col} LIKE ?" for col in colunas) + ')')
+        parametros.extend([f"%{palavra}%"] * len(colunas))
+    return ' AND '.join(condicoes) or '1', parametros
+
+def buscar_clientes_texto(termo, limite=1000, db_name=None):
+    """
+    Busca clientes por nome/nome fantasia, cidade ou CNPJ, sem diferenciar
+    acentos e maiúsculas ("sao paulo" encontra "São Paulo").
+    Retorna tuplas (id, nome, cnpj, cidade, telefone, email) ordenadas por nome.
+    """
+    match, curtas = _consulta_trigram(termo)
+    if not match and not curtas:
+        return []
+    colunas = ("nome_busca", "cidade_busca", "cnpj_digitos")
+    with obter_conexao(db_name) as conn:
+        try:
+            c = conn.cursor()
+            if match and _tabela_existe(c, 'clientes_busca'):
+                where, parametros = _filtro_like(['t.' + col for col in colunas], curtas)
+                c.execute(f"""
+                    SELECT t.id, t.nome, t.cnpj, t.cidade, t.telefone, t.email
+                    FROM clientes_busca f
+                    JOIN clientes t ON t.id = f.rowid
+                    WHERE clientes_busca MATCH ? AND {where}
+                    ORDER BY t.nome
+                    LIMIT ?
+                """, [match] + parametros + [limite])
+                return c.fetchall()
+            palavras = _consulta_palavras(termo)
+            where, parametros = _filtro_like(colunas, palavras)
+            c.execute(f"""
+                SELECT id, nome, cnpj, cidade, telefone, email
+                FROM clientes
+                WHERE {where}
+                ORDER BY nome
+                LIMIT ?
+            """, parametros + [limite])
+            return c.fetchall()
+
+        except sqlite3.Error as e:
+            print(f"❌ Erro na busca de clientes: {e}")
+            return []
+
+def buscar_produtos_texto(termo, limite=1000, db_name=None):
+    """
+    Busca produtos, serviços e kits por nome, tipo ou descrição, sem diferenciar
+    acentos e maiúsculas.
+    Retorna tuplas (id, nome, tipo, valor_unitario, ativo) ordenadas por nome.
+    """
+    match, curtas = _consulta_trigram(termo)
+    if not match and not curtas:
+        return []
+    colunas = ("nome_busca", "detalhes_busca")
+    with obter_conexao(db_name) as conn:
+        try:
+            c = conn.cursor()
+            if match and _tabela_existe(c, 'produtos_busca'):
+                where, parametros = _filtro_like(['t.' + col for col in colunas], curtas)
+                c.execute(f"""
+                    SELECT t.id, t.nome, t.tipo, t.valor_unitario, t.ativo
+                    FROM produtos_busca f
+                    JOIN produtos t ON t.id = f.rowid
+                    WHERE produtos_busca MATCH ? AND {where}
+                    ORDER BY t.nome
+                    LIMIT ?
+                """, [match] + parametros + [limite])
+                return c.fetchall()
+            palavras = _consulta_palavras(termo)
+            where, parametros = _filtro_like(colunas, palavras)
+            c.execute(f"""
+                SELECT id, nome, tipo, valor_unitario, ativo
+                FROM produtos
+                WHERE {where}
+                ORDER BY nome
+                LIMIT ?
+            """, parametros + [limite])
+            return c.fetchall()
+
+        except sqlite3.Error as e:
+            print(f"❌ Erro na busca de produtos: {e}")
+            return []
@@ -0,0 +1,320 @@
+import os
+import re
+import ast
+import sys
+import json
+import sqlite3
+import unicodedata
+from database import obter_conexao, fechar_conexoes
+
+# Pastas cujo SQL é analisado e arquivos de ferramentas que não são consultas de produção
+PASTAS_CONSULTAS = ("interface", "pdf_generators", "utils")
+_IGNORADOS = {"benchmark.py", "consultor_indices.py", "dados_sinteticos.py", "perfil_sql.py"}
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Colunas com até este nº de valores distintos viram condição de índice parcial
+# (WHERE status = 'Em Aberto', WHERE ativo = 1) em vez de coluna da chave
+MAX_DISTINTOS_PARCIAL = 5
+_COMANDOS = ("SELECT", "WITH", "UPDATE", "DELETE")
+_PALAVRAS_RESERVADAS = {"WHERE", "JOIN", "LEFT", "INNER", "ON", "ORDER", "GROUP", "LIMIT", "SET",
+                        "AND", "OR", "AS", "USING", "CROSS", "OUTER", "UNION", "HAVING", "NOT"}
+
+def _texto(node):
+    """Valor de um literal de string: ast.Constant, ou ast.Str no Python 3.7"""
+    valor = node.value if isinstance(node, ast.Constant) else getattr(node, 's', None)
+    return valor if isinstance(valor, str) else None
+
+class _ColetorSQL(ast.NodeVisitor):
+    """Strings SQL passadas a .execute()/.executemany(), diretamente ou por variável local"""
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.consultas = []
+        self.dinamicas = 0
+        self._variaveis = [{}]
+
+    def visit_FunctionDef(self, node):
+        self._variaveis.append({})
+        self.generic_visit(node)
+        self._variaveis.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Assign(self, node):
+        texto = _texto(node.value)
+        if texto is not None:
+            for alvo in node.targets:
+                if isinstance(alvo, ast.Name):
+                    self._variaveis[-1][alvo.id] = texto
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Attribute) and node.func.attr in ("execute", "executemany") and node.args:
+            argumento = node.args[0]
+            sql = _texto(argumento)
+            if isinstance(argumento, ast.Name):
+                sql = self._variaveis[-1].get(argumento.id)
+            elif isinstance(argumento, ast.JoinedStr):
+                self.dinamicas += 1
+            if sql and sql.lstrip().upper().startswith(_COMANDOS):
+                self.consultas.append({'local': f"{self.arquivo}:{node.lineno}", 'sql': sql})
+        self.generic_visit(node)
+
+def coletar_consultas(pastas=PASTAS_CONSULTAS):
+    """SELECT/UPDATE/DELETE literais das pastas informadas. Retorna (consultas, nº de f-strings ignoradas)"""
+    consultas, dinamicas = [], 0
+    for pasta in pastas:
+        for raiz, _dirs, arquivos in os.walk(os.path.join(_RAIZ, pasta)):
+            for nome in sorted(arquivos):
+                if not nome.endswith(".py") or nome in _IGNORADOS:
+                    continue
+                caminho = os.path.join(raiz, nome)
+                with open(caminho, encoding='utf-8') as arquivo:
+                    try:
+                        arvore = ast.parse(arquivo.read(), caminho)
+                    except SyntaxError:
+                        continue
+                coletor = _ColetorSQL(os.path.relpath(caminho, _RAIZ))
+                coletor.visit(arvore)
+                consultas.extend(coletor.consultas)
+                dinamicas += coletor.dinamicas
+    return consultas, dinamicas
+
+def _sem_literais(sql):
+    return re.sub(r"'(?:[^']|'')*'", "''", sql)
+
+def _parametros(sql):
+    """Parâmetros nulos na quantidade/nomes que o comando espera"""
+    texto = _sem_literais(sql)
+    nomes = re.findall(r"(?<![:\w]):(\w+)", texto)
+    if nomes:
+        return dict.fromkeys(nomes)
+    return (None,) * texto.count("?")
+
+def _plano(conn, sql):
+    try:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", _parametros(sql))]
+    except sqlite3.Error as e:
+        return [f"ERRO: {e}"]
+
+def _acessos(plano):
+    """
+    Como cada tabela é lida no plano: [(alias, tipo, nº de colunas do índice usadas)],
+    tipo SCAN (tabela inteira), SCAN_INDICE (tabela inteira na ordem de um índice)
+    ou SEARCH. Buscas pela chave primária ficam de fora: não há o que melhorar.
+    Antes do SQLite 3.36 o plano trazia "SCAN TABLE tabela [AS alias]".
+    """
+    acessos = []
+    for passo in plano:
+        m = re.match(r"(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?"
+                     r"(?: USING (?:COVERING )?INDEX \w+(?: \((.*)\))?)?$", passo)
+        if not m:
+            continue
+        operacao, tabela, alias, termos = m.groups()
+        alias = alias or tabela
+        if operacao == "SCAN":
+            acessos.append((alias, "SCAN" if "USING" not in passo else "SCAN_INDICE", 0))
+        else:
+            acessos.append((alias, "SEARCH", len(termos.split(" AND ")) if termos else 0))
+    return acessos
+
+def _aliases(sql):
+    """{alias: tabela} a partir das cláusulas FROM/JOIN/UPDATE"""
+    mapa = {}
+    for tabela, alias in re.findall(r"\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", sql, re.I):
+        if alias and alias.upper() not in _PALAVRAS_RESERVADAS:
+            mapa[alias] = tabela
+        mapa.setdefault(tabela, tabela)
+    return mapa
+
+def _colunas_tabela(conn, tabela):
+    """Colunas de uma tabela comum (vazio para views, tabelas do sistema e inexistentes)"""
+    if tabela.lower().startswith("sqlite_") or not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,)).fetchone():
+        return set()
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+
+def _da_tabela(qualificador, coluna, alias, colunas, aliases):
+    """Se a referência [qualificador.]coluna pertence à tabela lida pelo alias"""
+    if qualificador:
+        return qualificador == alias and coluna in colunas
+    # Coluna sem qualificador: só é da tabela se ela for a única do comando com essa coluna
+    return coluna in colunas and len(set(aliases.values())) == 1
+
+def _literal_sql(valor):
+    return valor if not valor.startswith("'") else "'" + valor.strip("'").replace("'", "''") + "'"
+
+def _candidato(conn, sql, alias, aliases, externa):
+    """
+    Índice sugerido para a tabela lida pelo alias: (tabela, colunas, where_parcial) ou None.
+    Condições de junção só entram na chave se a tabela não for a externa do laço (externa=False).
+    """
+    tabela = aliases.get(alias, alias)
+    colunas = _colunas_tabela(conn, tabela)
+    if not colunas:
+        return None
+    texto = re.sub(r"\s+", " ", sql)
+    # As atribuições do UPDATE não são condições
+    texto = re.sub(r"\bSET\b.*?\bWHERE\b", "WHERE", texto, flags=re.I)
+    igualdades, faixas, parciais = [], [], []
+    for qualificador, coluna, operador, valor in re.findall(
+            r"(?:\b(\w+)\.)?\b(\w+)\s*(=|>=|<=|<>|>|<|\bIN\b|\bLIKE\b|\bBETWEEN\b)\s*(\?|:\w+|'(?:[^']|'')*'|-?\d+(?:\.\d+)?|\(|\w+\.\w+)",
+            texto, re.I):
+        if not _da_tabela(qualificador, coluna, alias, colunas, aliases) or operador == "<>":
+            continue
+        operador = operador.upper()
+        if re.match(r"\w+\.\w+$", valor):
+            # Condição de junção: a coluna desta tabela é buscada pelo valor da outra
+            if operador == "=" and valor.split(".")[0] != alias and not externa:
+                igualdades.append(coluna)
+        elif operador == "=" and (valor.startswith("'") or re.match(r"-?\d", valor)):
+            distintos = conn.execute(f"SELECT COUNT(DISTINCT {coluna}) FROM {tabela}").fetchone()[0]
+            if distintos <= MAX_DISTINTOS_PARCIAL:
+                parciais.append(f"{coluna} = {_literal_sql(valor)}")
+            else:
+                igualdades.append(coluna)
+        elif operador in ("=", "IN"):
+            igualdades.append(coluna)
+        elif operador == "LIKE" and not valor.startswith("'%"):
+            faixas.append(coluna)
+        elif operador in (">", "<", ">=", "<=", "BETWEEN"):
+            faixas.append(coluna)
+    ordem = []
+    ordem_texto = re.search(r"\bORDER BY (.+?)(?:\bLIMIT\b|$)", texto, re.I)
+    if ordem_texto:
+        for termo in ordem_texto.group(1).split(","):
+            m = re.match(r"\s*(?:(\w+)\.)?(\w+)\s*(?:ASC|DESC)?\s*$", termo, re.I)
+            if not m or not _da_tabela(m.group(1), m.group(2), alias, colunas, aliases):
+                ordem = []
+                break
+            ordem.append(m.group(2))
+    chave = list(dict.fromkeys(igualdades))
+    if faixas:
+        chave.append(faixas[0])
+    else:
+        chave.extend(c for c in ordem if c not in chave)
+    if not chave:
+        return None
+    return tabela, tuple(chave), " AND ".join(dict.fromkeys(parciais)) or None
+
+def _indices_existentes(conn, tabela):
+    """[(colunas, where_parcial)] dos índices da tabela"""
+    existentes = []
+    for _seq, nome, _unico, _origem, parcial in conn.execute(f"PRAGMA index_list({tabela})"):
+        colunas = tuple(row[2] for row in conn.execute(f"PRAGMA index_info({nome})"))
+        where = None
+        if parcial:
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (nome,)).fetchone()[0]
+            where = re.sub(r"\s+", " ", sql.split(" WHERE ", 1)[1]).strip() if " WHERE " in sql else None
+        existentes.append((colunas, where))
+    return existentes
+
+def _ja_coberto(conn, tabela, colunas, parcial):
+    return any(existentes[:len(colunas)] == colunas and where == parcial
+               for existentes, where in _indices_existentes(conn, tabela))
+
+def _nome_indice(tabela, colunas, parcial):
+    nome = f"idx_{tabela}_{'_'.join(colunas)}"
+    if parcial:
+        nome += "_" + "_".join(re.findall(r"\w+", parcial.split("=")[-1]))[:20].lower()
+    nome = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    return re.sub(r"\W", "_", nome)
+
+def estimar_tamanho(conn, tabela, colunas, parcial):
+    """Estimativa em bytes: linhas cobertas x (chave média + rowid + cabeçalho), com páginas ~80% cheias"""
+    soma = " + ".join(f"COALESCE(LENGTH(CAST({c} AS BLOB)), 1)" for c in colunas)
+    linhas, chave_media = conn.execute(
+        f"SELECT COUNT(*), AVG({soma}) FROM {tabela}" + (f" WHERE {parcial}" if parcial else "")).fetchone()
+    return int(linhas * ((chave_media or 0) + 9 + len(colunas)) / 0.8)
+
+def _verificar(conn, ddl, consultas):
+    """Criar o índice em uma transação desfeita ao final e ver quais consultas passam a usá-lo"""
+    nome = re.search(r"INDEX (?:IF NOT EXISTS )?(\w+)", ddl).group(1)
+    conn.execute("SAVEPOINT consultor_indices")
+    try:
+        conn.execute(ddl)
+        return [c['local'] for c in consultas if any(nome in passo for passo in _plano(conn, c['sql']))]
+    finally:
+        conn.execute("ROLLBACK TO consultor_indices")
+        conn.execute("RELEASE consultor_indices")
+
+def analisar(db_name, pastas=PASTAS_CONSULTAS, verificar=False):
+    """
+    Rodar EXPLAIN QUERY PLAN em todas as consultas literais do código contra
+    db_name (base real ou gerada por utils.dados_sinteticos) e propor índices
+    para as tabelas lidas por completo ou por um índice que resolve só parte
+    das condições: colunas de igualdade/junção, depois a primeira de faixa ou
+    as do ORDER BY; colunas de poucos valores comparadas com literal (status,
+    ativo) viram condição de índice parcial. Com verificar=True cada
+    proposta é criada e desfeita para confirmar quais consultas passam a usá-la.
+    """
+    consultas, dinamicas = coletar_consultas(pastas)
+    with obter_conexao(db_name) as conn:
+        propostas = {}
+        for consulta in consultas:
+            consulta['plano'] = _plano(conn, consulta['sql'])
+            acessos = _acessos(consulta['plano'])
+            consulta['varreduras'] = [alias for alias, tipo, _usadas in acessos if tipo == "SCAN"]
+            consulta['ordenacao_temporaria'] = any("TEMP B-TREE" in passo for passo in consulta['plano'])
+            aliases = _aliases(consulta['sql'])
+            for posicao, (alias, _tipo, usadas) in enumerate(acessos):
+                candidato = _candidato(conn, consulta['sql'], alias, aliases, externa=posicao == 0)
+                if not candidato or _ja_coberto(conn, *candidato):
+                    continue
+                # Só vale propor se o índice novo resolver mais condições do que o usado hoje
+                # (a condição do índice parcial conta como uma delas)
+                if len(candidato[1]) + bool(candidato[2]) <= usadas:
+                    continue
+                tabela, colunas, parcial = candidato
+                ddl = (f"CREATE INDEX IF NOT EXISTS {_nome_indice(tabela, colunas, parcial)} "
+                       f"ON {tabela}({', '.join(colunas)})" + (f" WHERE {parcial}" if parcial else ""))
+                proposta = propostas.setdefault(ddl, {
+                    'ddl': ddl, 'tabela': tabela, 'consultas': [],
+                    'tamanho_estimado_bytes': estimar_tamanho(conn, tabela, colunas, parcial)})
+                proposta['consultas'].append(consulta['local'])
+        if verificar:
+            for proposta in propostas.values():
+                proposta['usada_por'] = _verificar(conn, proposta['ddl'], consultas)
+    return {
+        'consultas': consultas,
+        'fstrings_ignoradas': dinamicas,
+        'com_varredura': sum(1 for c in consultas if c['varreduras']),
+        'com_ordenacao_temporaria': sum(1 for c in consultas if c['ordenacao_temporaria']),
+        'propostas': sorted(propostas.values(), key=lambda p: -len(p['consultas'])),
+    }
+
+def formatar_relatorio(resultado):
+    consultas = resultado['consultas']
+    linhas = [f"Consultas analisadas: {len(consultas)} (f-strings ignoradas: {resultado['fstrings_ignoradas']})",
+              f"Só SEARCH/índices: {len(consultas) - resultado['com_varredura']}  "
+              f"Com SCAN completo: {resultado['com_varredura']}  "
+              f"Com ordenação temporária: {resultado['com_ordenacao_temporaria']}", ""]
+    for consulta in consultas:
+        if consulta['varreduras']:
+            linhas.append(f"SCAN {', '.join(consulta['varreduras'])}  {consulta['local']}")
+            sql = re.sub(r"\s+", " ", consulta['sql']).strip()
+            linhas.append(f"    {sql[:200]}")
+    linhas.append("")
+    linhas.append("Índices propostos:" if resultado['propostas'] else "Nenhum índice a propor.")
+    for proposta in resultado['propostas']:
+        linhas.append(f"{proposta['ddl']};")
+        linhas.append(f"    ~{proposta['tamanho_estimado_bytes'] / 1024:.0f} KB, "
+                      f"{len(proposta['consultas'])} consulta(s): {', '.join(proposta['consultas'][:5])}")
+        if 'usada_por' in proposta:
+            if proposta['usada_por']:
+                linhas.append(f"    ✅ verificado: usado por {len(proposta['usada_por'])} consulta(s)")
+            else:
+                linhas.append("    ⚠️ o planejador não usou o índice nesta base")
+    return "\n".join(linhas)
+
+if __name__ == "__main__":
+    # Uso: python -m utils.consultor_indices base.db [--verificar] [--json]
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not argumentos or not os.path.exists(argumentos[0]):
+        print("Uso: python -m utils.consultor_indices base.db [--verificar] [--json]")
+        sys.exit(1)
+    resultado = analisar(argumentos[0], verificar='--verificar' in sys.argv)
+    fechar_conexoes()
+    if '--json' in sys.argv:
+        print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    else:
+        print(formatar_relatorio(resultado))
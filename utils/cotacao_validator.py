@@ -1,162 +1,181 @@
+import os
 import sqlite3
+import threading
 from datetime import datetime, date
-from database import DB_NAME
+from database import DB_NAME, obter_conexao, transacao, fechar_conexoes
+
+# Status dado às cotações vencidas e intervalo da rotina de expiração em segundo plano
+STATUS_EXPIRADA = 'Rejeitada'
+EXPIRACAO_INTERVALO_MIN = float(os.environ.get("CRM_EXPIRACAO_INTERVALO_MIN", "60"))
+
+def expirar_cotacoes(db_name=None, hoje=None):
+    """
+    Marcar como 'Rejeitada' as cotações em aberto com validade vencida.
+
+    A busca usa o índice parcial idx_cotacoes_validade_em_aberto, e a
+    transação de escrita só é aberta quando há cotações a expirar. Retorna
+    [(id, numero_proposta, data_validade)] das cotações atualizadas.
+    """
+    hoje = (hoje or date.today()).isoformat()
+    consulta = """
+        SELECT id, numero_proposta, data_validade
+        FROM cotacoes
+        WHERE status = 'Em Aberto' AND data_validade < ?
+    """
+    with obter_conexao(db_name) as conn:
+        if not conn.execute(consulta, (hoje,)).fetchall():
+            return []
+        with transacao(db_name):
+            # Reler com o lock de escrita: outra estação pode ter expirado as mesmas cotações
+            expiradas = conn.execute(consulta, (hoje,)).fetchall()
+            conn.executemany("UPDATE cotacoes SET status = ? WHERE id = ? AND status = 'Em Aberto'",
+                             [(STATUS_EXPIRADA, row[0]) for row in expiradas])
+        return expiradas
 
 def verificar_e_atualizar_status_cotacoes():
     """
     Verifica e atualiza automaticamente o status das cotações que expiraram
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        # Buscar cotações com prazo de validade expirado e status "Em Aberto"
-        hoje = date.today()
-        c.execute("""
-            SELECT id, numero_proposta, data_validade 
-            FROM cotacoes 
-            WHERE status = 'Em Aberto' 
-            AND data_validade IS NOT NULL 
-            AND data_validade < ?
-        """, (hoje,))
-        
-        cotações_expiradas = c.fetchall()
-        
-        if cotações_expiradas:
-            # Atualizar status para "Rejeitada"
-            c.execute("""
-                UPDATE cotacoes 
-                SET status = 'Rejeitada' 
-                WHERE status = 'Em Aberto' 
-                AND data_validade IS NOT NULL 
-                AND data_validade < ?
-            """, (hoje,))
-            
-            conn.commit()
-            print(f"✅ {len(cotações_expiradas)} cotações expiradas foram atualizadas para 'Rejeitada'")
-            
-            # Retornar detalhes das cotações atualizadas
-            return cotações_expiradas
-        else:
-            print("✅ Nenhuma cotação expirada encontrada")
-            return []
-            
+        cotações_expiradas = expirar_cotacoes()
     except sqlite3.Error as e:
         print(f"❌ Erro ao verificar cotações expiradas: {e}")
         return []
-    finally:
-        conn.close()
+    if cotações_expiradas:
+        print(f"✅ {len(cotações_expiradas)} cotações expiradas foram atualizadas para '{STATUS_EXPIRADA}'")
+    else:
+        print("✅ Nenhuma cotação expirada encontrada")
+    return cotações_expiradas
+
+def iniciar_expiracao_automatica(ao_expirar=None, db_name=None, intervalo_min=EXPIRACAO_INTERVALO_MIN):
+    """
+    Rodar expirar_cotacoes agora e a cada intervalo_min minutos, em segundo plano.
+
+    ao_expirar(ids) é chamada na thread da rotina, uma vez por execução que
+    expirou alguma cotação, com todos os ids juntos. Retorna um threading.Event:
+    set() encerra a rotina.
+    """
+    parar = threading.Event()
+
+    def executar():
+        while not parar.is_set():
+            try:
+                expiradas = expirar_cotacoes(db_name)
+            except sqlite3.Error as e:
+                print(f"❌ Erro ao verificar cotações expiradas: {e}")
+                expiradas = []
+            if expiradas:
+                print(f"⏰ {len(expiradas)} cotações expiradas foram atualizadas para '{STATUS_EXPIRADA}'")
+                if ao_expirar:
+                    ao_expirar([row[0] for row in expiradas])
+            parar.wait(intervalo_min * 60)
+        fechar_conexoes()
+
+    threading.Thread(target=executar, name="expiracao-cotacoes", daemon=True).start()
+    return parar
 
 def obter_cotacoes_por_status(status=None):
     """
     Obtém cotações filtradas por status
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
-        
-        if status:
-            c.execute("""
-                SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.data_validade, 
-                       c.valor_total, c.status, u.nome_completo
-                FROM cotacoes c
-                JOIN clientes cl ON c.cliente_id = cl.id
-                JOIN usuarios u ON c.responsavel_id = u.id
-                WHERE c.status = ?
-                ORDER BY c.created_at DESC
-            """, (status,))
-        else:
-            c.execute("""
-                SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.data_validade, 
-                       c.valor_total, c.status, u.nome_completo
-                FROM cotacoes c
-                JOIN clientes cl ON c.cliente_id = cl.id
-                JOIN usuarios u ON c.responsavel_id = u.id
-                ORDER BY c.created_at DESC
-            """)
-        
-        return c.fetchall()
+        with obter_conexao() as conn:
+            c = conn.cursor()
+        
+            if status:
+                c.execute("""
+                    SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.data_validade, 
+                           c.valor_total, c.status, u.nome_completo
+                    FROM cotacoes c
+                    JOIN clientes cl ON c.cliente_id = cl.id
+                    JOIN usuarios u ON c.responsavel_id = u.id
+                    WHERE c.status = ?
+                    ORDER BY c.created_at DESC
+                """, (status,))
+            else:
+                c.execute("""
+                    SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.data_validade, 
+                           c.valor_total, c.status, u.nome_completo
+                    FROM cotacoes c
+                    JOIN clientes cl ON c.cliente_id = cl.id
+                    JOIN usuarios u ON c.responsavel_id = u.id
+                    ORDER BY c.created_at DESC
+                """)
+        
+            return c.fetchall()
         
     except sqlite3.Error as e:
         print(f"❌ Erro ao buscar cotações: {e}")
         return []
-    finally:
-        conn.close()
 
 def obter_estatisticas_cotacoes():
     """
     Obtém estatísticas das cotações por status
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        c.execute("""
-            SELECT status, COUNT(*) as quantidade, SUM(valor_total) as valor_total
-            FROM cotacoes
-            GROUP BY status
-        """)
+            c.execute("""
+                SELECT status, COUNT(*) as quantidade, SUM(valor_total) as valor_total
+                FROM cotacoes
+                GROUP BY status
+            """)
         
-        return c.fetchall()
+            return c.fetchall()
         
     except sqlite3.Error as e:
         print(f"❌ Erro ao buscar estatísticas: {e}")
         return []
-    finally:
-        conn.close()
 
 def obter_cotacoes_por_usuario(usuario_id):
     """
     Obtém cotações de um usuário específico
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        c.execute("""
-            SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.data_validade, 
-                   c.valor_total, c.status
-            FROM cotacoes c
-            JOIN clientes cl ON c.cliente_id = cl.id
-            WHERE c.responsavel_id = ?
-            ORDER BY c.created_at DESC
-        """, (usuario_id,))
+            c.execute("""
+                SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.data_validade, 
+                       c.valor_total, c.status
+                FROM cotacoes c
+                JOIN clientes cl ON c.cliente_id = cl.id
+                WHERE c.responsavel_id = ?
+                ORDER BY c.created_at DESC
+            """, (usuario_id,))
         
-        return c.fetchall()
+            return c.fetchall()
         
     except sqlite3.Error as e:
         print(f"❌ Erro ao buscar cotações do usuário: {e}")
         return []
-    finally:
-        conn.close()
 
 def obter_cotacoes_vencendo_em_dias(dias=7):
     """
     Obtém cotações que vencem em X dias
     """
     try:
-        conn = sqlite3.connect(DB_NAME)
-        c = conn.cursor()
+        with obter_conexao() as conn:
+            c = conn.cursor()
         
-        from datetime import timedelta
-        data_limite = date.today() + timedelta(days=dias)
+            from datetime import timedelta
+            data_limite = date.today() + timedelta(days=dias)
         
-        c.execute("""
-            SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.data_validade, 
-                   c.valor_total, c.status, u.nome_completo
-            FROM cotacoes c
-            JOIN clientes cl ON c.cliente_id = cl.id
-            JOIN usuarios u ON c.responsavel_id = u.id
-            WHERE c.status = 'Em Aberto' 
-            AND c.data_validade IS NOT NULL 
-            AND c.data_validade <= ?
-            ORDER BY c.data_validade ASC
-        """, (data_limite,))
+            c.execute("""
+                SELECT c.id, c.numero_proposta, cl.nome, c.data_criacao, c.data_validade, 
+                       c.valor_total, c.status, u.nome_completo
+                FROM cotacoes c
+                JOIN clientes cl ON c.cliente_id = cl.id
+                JOIN usuarios u ON c.responsavel_id = u.id
+                WHERE c.status = 'Em Aberto' 
+                AND c.data_validade IS NOT NULL 
+                AND c.data_validade <= ?
+                ORDER BY c.data_validade ASC
+            """, (data_limite,))
         
-        return c.fetchall()
+            return c.fetchall()
         
     except sqlite3.Error as e:
         print(f"❌ Erro ao buscar cotações vencendo: {e}")
-        return []
-    finally:
-        conn.close()
\ No newline at end of file
+        return []
\ No newline at end of file
@@ -0,0 +1,334 @@
+import os
+import sys
+import random
+from datetime import datetime, timedelta
+from database import (criar_banco, transacao, fechar_conexoes, formatar_numero, campos_busca_cliente,
+                      campos_busca_produto, recalcular_cliente_stats, recalcular_dashboard_resumo)
+from utils.formatters import format_cnpj
+
+# Escala 1: 1.000 clientes, 5.000 cotações (~50.000 itens) e 1.000 relatórios.
+# Escala 100 chega a 100 mil clientes, 500 mil cotações e ~5 milhões de itens.
+CLIENTES_POR_ESCALA = 1000
+COTACOES_POR_ESCALA = 5000
+ITENS_POR_COTACAO = 10
+RELATORIOS_POR_ESCALA = 1000
+# Linhas por executemany/transação
+TAMANHO_LOTE = 10000
+# Período coberto pelas datas geradas
+ANOS_HISTORICO = 3
+
+_PREFIXOS_EMPRESA = ("Metalúrgica", "Indústria", "Comércio", "Transportes", "Alimentos", "Têxtil",
+                     "Plásticos", "Química", "Construtora", "Mineração", "Papel e Celulose", "Auto Peças")
+_NOMES_EMPRESA = ("São Jorge", "Paulista", "Nova Era", "Horizonte", "Ipiranga", "Atlântico", "Bandeirantes",
+                  "Santa Rita", "Aliança", "Progresso", "Vale Verde", "Estrela", "Cruzeiro", "Imperial",
+                  "Guarani", "Tietê", "Boa Vista", "Itaú", "Real", "Fênix")
+_SUFIXOS_EMPRESA = ("Ltda", "S.A.", "EIRELI", "ME", "Ltda - EPP")
+# Cidades com peso: poucas concentram a maior parte dos clientes
+_CIDADES = (("São Paulo", "SP", 30), ("Campinas", "SP", 12), ("Guarulhos", "SP", 8), ("Jundiaí", "SP", 6),
+            ("Sorocaba", "SP", 5), ("Santo André", "SP", 5), ("São José dos Campos", "SP", 4),
+            ("Rio de Janeiro", "RJ", 8), ("Belo Horizonte", "MG", 6), ("Curitiba", "PR", 5),
+            ("Joinville", "SC", 3), ("Porto Alegre", "RS", 3), ("Goiânia", "GO", 2), ("Recife", "PE", 2),
+            ("Manaus", "AM", 1))
+_CARGOS = ("Comprador", "Gerente de Manutenção", "Supervisor", "Engenheiro", "Diretor", "Técnico")
+_PRIMEIROS_NOMES = ("Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela",
+                    "João", "Karina", "Lucas", "Mariana", "Nelson", "Otávio", "Paula", "Rafael", "Sílvia")
+_SOBRENOMES = ("Silva", "Souza", "Oliveira", "Santos", "Pereira", "Lima", "Costa", "Ribeiro", "Almeida",
+               "Carvalho", "Gomes", "Martins", "Araújo", "Barbosa")
+_PECAS = ("Filtro de Ar", "Filtro de Óleo", "Separador Ar/Óleo", "Rolamento", "Válvula de Admissão",
+          "Válvula Termostática", "Kit de Vedação", "Correia", "Acoplamento", "Sensor de Temperatura",
+          "Pressostato", "Óleo Sintético 20L", "Mangueira", "Elemento Separador", "Motor Elétrico",
+          "Bico Injetor", "Unidade Compressora", "Radiador", "Purgador Eletrônico", "Secador de Ar")
+_SERVICOS = ("Manutenção Preventiva", "Manutenção Corretiva", "Revisão Geral", "Troca de Óleo",
+             "Análise de Vibração", "Instalação", "Visita Técnica", "Retífica de Unidade", "Inspeção")
+_MODELOS = ("GA 37", "GA 75", "SSR 100", "ZT 55", "GX 11", "R110i", "SM 15", "BSD 72", "ASD 40")
+_TIPOS_SERVICO = ("Manutenção", "Reparo", "Instalação", "Inspeção", "Consultoria")
+# Mix de status das cotações de compra: (status, peso)
+_STATUS = (("Aprovada", 35), ("Rejeitada", 30), ("Em Aberto", 35))
+# Fração das cotações que são locações
+FRACAO_LOCACOES = 0.15
+# Concentração de cotações e relatórios nos clientes (1 = uniforme)
+ENVIESAMENTO = 3
+
+def _escolher_pesado(rng, opcoes):
+    """Escolha ponderada entre tuplas cujo último elemento é o peso"""
+    return rng.choices(opcoes, weights=[o[-1] for o in opcoes])[0]
+
+def _indice_enviesado(rng, total):
+    """Índice em [0, total) concentrado no início: com expoente 3, 10% dos clientes ficam com ~46% das cotações"""
+    return int(total * rng.random() ** ENVIESAMENTO)
+
+def _data(rng, inicio, dias):
+    return inicio + timedelta(days=rng.randrange(dias), seconds=rng.randrange(86400))
+
+def _cnpj(sequencial):
+    """CNPJ válido e único a partir do sequencial (8 dígitos de raiz + 0001 + DV)"""
+    base = f"{sequencial:08d}0001"
+    digitos = [int(d) for d in base]
+    for pesos in ((5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2), (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)):
+        resto = sum(d * p for d, p in zip(digitos, pesos)) % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return format_cnpj(''.join(str(d) for d in digitos))
+
+def _lotes(linhas, tamanho=TAMANHO_LOTE):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def _gravar(db_name, sql, linhas):
+    """executemany em transações de TAMANHO_LOTE linhas. Retorna o total gravado"""
+    total = 0
+    for lote in _lotes(linhas):
+        with transacao(db_name) as conn:
+            conn.executemany(sql, lote)
+        total += len(lote)
+    return total
+
+def _gerar_usuarios(db_name, rng, quantidade):
+    nomes = set()
+    while len(nomes) < quantidade:
+        nomes.add(f"{rng.choice(_PRIMEIROS_NOMES)} {rng.choice(_SOBRENOMES)}")
+    with transacao(db_name) as conn:
+        conn.execute("""INSERT OR IGNORE INTO filiais (id, nome, cnpj, cidade, estado)
+            VALUES (2, 'World Comp Filial', '12.345.678/0002-71', 'Campinas', 'SP')""")
+        for i, nome in enumerate(sorted(nomes)):
+            conn.execute("""INSERT OR IGNORE INTO usuarios (username, password, role, nome_completo, email)
+                VALUES (?, '', ?, ?, ?)""", (f"usuario{i}", 'tecnico' if i % 3 == 0 else 'operador', nome,
+                                             f"usuario{i}@worldcomp.com.br"))
+        return [row[0] for row in conn.execute("SELECT id FROM usuarios")]
+
+def _gerar_clientes(db_name, rng, quantidade, inicio, dias):
+    def linhas():
+        for i in range(quantidade):
+            nome = (f"{rng.choice(_PREFIXOS_EMPRESA)} {rng.choice(_NOMES_EMPRESA)} "
+                    f"{i + 1} {rng.choice(_SUFIXOS_EMPRESA)}")
+            fantasia = nome.rsplit(' ', 1)[0] if rng.random() < 0.6 else None
+            cidade, estado, _peso = _escolher_pesado(rng, _CIDADES)
+            cnpj = _cnpj(i + 1)
+            yield (nome, fantasia, cnpj, f"Rua {rng.choice(_SOBRENOMES)}, {rng.randrange(1, 3000)}", cidade,
+                   estado, f"{rng.randrange(1000, 99999):05d}-{rng.randrange(1000):03d}",
+                   f"11{rng.randrange(10**8, 10**9)}", f"contato{i}@cliente{i}.com.br",
+                   rng.choice(("28 dias", "30 dias", "30/60 dias", "À vista")),
+                   _data(rng, inicio, dias).strftime('%Y-%m-%d %H:%M:%S')) + campos_busca_cliente(
+                       nome, fantasia, cidade, cnpj)
+    return _gravar(db_name, """
+        INSERT INTO clientes (nome, nome_fantasia, cnpj, endereco, cidade, estado, cep, telefone, email,
+                              prazo_pagamento, created_at, nome_busca, cidade_busca, cnpj_digitos)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", linhas())
+
+def _gerar_contatos(db_name, rng, clientes):
+    def linhas():
+        for cliente_id in clientes:
+            for _ in range(rng.choice((0, 1, 1, 2, 2, 3, 4))):
+                nome = f"{rng.choice(_PRIMEIROS_NOMES)} {rng.choice(_SOBRENOMES)}"
+                yield (cliente_id, nome, rng.choice(_CARGOS), f"{nome.split()[0].lower()}@cliente{cliente_id}.com.br",
+                       f"11{rng.randrange(10**8, 10**9)}")
+    return _gravar(db_name, """INSERT INTO contatos (cliente_id, nome, cargo, email, telefone)
+        VALUES (?, ?, ?, ?, ?)""", linhas())
+
+def _gerar_produtos(db_name, rng, escala):
+    """Produtos, serviços e kits (com composição). Retorna {tipo: [(id, nome, valor)]}"""
+    fator = max(1, int(escala ** 0.5))
+    registros = []
+    for i in range(40 * fator):
+        nome = f"{rng.choice(_PECAS)} {rng.choice(_MODELOS)} #{i + 1}"
+        registros.append((nome, 'Produto', round(rng.uniform(50, 15000), 2), f"Peça para compressor {nome}"))
+    for i in range(10 * fator):
+        nome = f"{rng.choice(_SERVICOS)} {rng.choice(_MODELOS)} #{i + 1}"
+        registros.append((nome, 'Serviço', round(rng.uniform(200, 8000), 2), f"Serviço: {nome}"))
+    for i in range(5 * fator):
+        nome = f"Kit {rng.choice(_SERVICOS)} {rng.choice(_MODELOS)} #{i + 1}"
+        registros.append((nome, 'Kit', 0, f"Kit completo para {nome}"))
+    with transacao(db_name) as conn:
+        conn.executemany("""INSERT INTO produtos (nome, tipo, valor_unitario, descricao, ativo, nome_busca, detalhes_busca)
+            VALUES (?, ?, ?, ?, ?, ?, ?)""", [
+            r + (0 if rng.random() < 0.05 else 1,) + campos_busca_produto(r[0], r[1], r[3]) for r in registros])
+        catalogo = {}
+        for produto_id, nome, tipo, valor in conn.execute("SELECT id, nome, tipo, valor_unitario FROM produtos"):
+            catalogo.setdefault(tipo, []).append((produto_id, nome, valor))
+        componentes = catalogo['Produto'] + catalogo['Serviço']
+        for kit_id, _nome, _valor in catalogo['Kit']:
+            itens = rng.sample(componentes, min(len(componentes), rng.randrange(2, 7)))
+            conn.executemany("INSERT INTO kit_items (kit_id, produto_id, quantidade) VALUES (?, ?, ?)",
+                             [(kit_id, produto_id, rng.randrange(1, 4)) for produto_id, _n, _v in itens])
+            total = conn.execute("""SELECT SUM(p.valor_unitario * ki.quantidade) FROM kit_items ki
+                JOIN produtos p ON p.id = ki.produto_id WHERE ki.kit_id = ?""", (kit_id,)).fetchone()[0]
+            conn.execute("UPDATE produtos SET valor_unitario = ? WHERE id = ?", (round(total, 2), kit_id))
+        catalogo['Kit'] = [(kit_id, nome, valor) for kit_id, nome, valor in
+                           conn.execute("SELECT id, nome, valor_unitario FROM produtos WHERE tipo = 'Kit'")]
+    return catalogo
+
+def _itens_cotacao(rng, catalogo, locacao, inicio_locacao, meses):
+    """Itens de uma cotação na ordem das colunas de _gerar_cotacoes (sem cotacao_id)"""
+    itens = []
+    quantidade = max(1, int(rng.expovariate(1 / ITENS_POR_COTACAO)))
+    for _ in range(quantidade):
+        if locacao:
+            produto_id, nome, valor = rng.choice(catalogo['Produto'])
+            mensal = round(valor * rng.uniform(0.05, 0.12), 2)
+            fim = inicio_locacao + timedelta(days=30 * meses)
+            itens.append((produto_id, "Produto", nome, 1, f"Locação de {nome}", mensal, mensal * meses,
+                          0, 0, 0, "Locação", inicio_locacao.strftime('%Y-%m-%d'), fim.strftime('%Y-%m-%d'), meses))
+            continue
+        tipo = rng.choices(("Produto", "Serviço", "Kit"), weights=(70, 20, 10))[0]
+        produto_id, nome, valor = rng.choice(catalogo[tipo])
+        qtd = rng.choice((1, 1, 1, 2, 2, 3, 4, 5, 10))
+        mao_obra = deslocamento = estadia = 0
+        if tipo == "Serviço":
+            mao_obra = round(rng.uniform(100, 2000), 2)
+            deslocamento = round(rng.uniform(0, 600), 2)
+            estadia = round(rng.choice((0, 0, 0, rng.uniform(150, 900))), 2)
+        total = round(valor * qtd + mao_obra + deslocamento + estadia, 2)
+        itens.append((produto_id, tipo, nome, qtd, f"{tipo}: {nome}", valor, total,
+                      mao_obra, deslocamento, estadia, "Compra", None, None, None))
+    return itens
+
+def _gerar_cotacoes(db_name, rng, quantidade, clientes, usuarios, catalogo, inicio, dias):
+    """Cotações (compras e locações) e seus itens. Retorna os ids das cotações"""
+    colunas_cotacao = """numero_proposta, cliente_id, responsavel_id, filial_id, data_criacao, data_validade,
+        modelo_compressor, numero_serie_compressor, descricao_atividade, observacoes, valor_total,
+        condicao_pagamento, prazo_entrega, status, tipo_cotacao, locacao_valor_mensal, locacao_data_inicio,
+        locacao_data_fim, locacao_qtd_meses, locacao_nome_equipamento, created_at"""
+    colunas_item = """cotacao_id, produto_id, tipo, item_nome, quantidade, descricao, valor_unitario,
+        valor_total_item, mao_obra, deslocamento, estadia, tipo_operacao, locacao_data_inicio,
+        locacao_data_fim, locacao_qtd_meses"""
+    sql_cotacao = f"INSERT INTO cotacoes (id, {colunas_cotacao}) VALUES ({', '.join('?' * 22)})"
+    sql_item = f"INSERT INTO itens_cotacao ({colunas_item}) VALUES ({', '.join('?' * 15)})"
+    numeros = {'PROP': 0, 'LOC': 0}
+    # Datas em ordem crescente: ids e created_at crescem juntos, como no uso real
+    datas = sorted(_data(rng, inicio, dias) for _ in range(quantidade))
+    cotacoes, itens = [], []
+    for cotacao_id, criada in enumerate(datas, start=1):
+        locacao = rng.random() < FRACAO_LOCACOES
+        prefixo = 'LOC' if locacao else 'PROP'
+        numeros[prefixo] += 1
+        meses = rng.choice((6, 12, 12, 24, 36)) if locacao else None
+        inicio_locacao = criada + timedelta(days=rng.randrange(5, 45))
+        linhas = _itens_cotacao(rng, catalogo, locacao, inicio_locacao, meses or 0)
+        total = round(sum(item[6] for item in linhas), 2)
+        status = _escolher_pesado(rng, _STATUS)[0]
+        # Cotações antigas quase nunca ficam em aberto
+        if status == "Em Aberto" and (datas[-1] - criada).days > 120 and rng.random() < 0.9:
+            status = rng.choice(("Aprovada", "Rejeitada"))
+        cotacoes.append((
+            cotacao_id, formatar_numero(prefixo, numeros[prefixo]),
+            clientes[_indice_enviesado(rng, len(clientes))], rng.choice(usuarios), rng.choice((1, 1, 2)),
+            criada.strftime('%Y-%m-%d'), (criada + timedelta(days=rng.choice((7, 15, 30)))).strftime('%Y-%m-%d'),
+            rng.choice(_MODELOS), f"SN{rng.randrange(10**6, 10**7)}", rng.choice(_SERVICOS),
+            "Observação gerada" if rng.random() < 0.3 else None, total,
+            rng.choice(("28 DDL", "30/60 DDL", "À vista")), rng.choice(("5 dias", "15 dias", "30 dias")),
+            status, 'Locação' if locacao else 'Compra',
+            round(total / meses, 2) if locacao else None,
+            inicio_locacao.strftime('%Y-%m-%d') if locacao else None,
+            (inicio_locacao + timedelta(days=30 * meses)).strftime('%Y-%m-%d') if locacao else None,
+            meses, linhas[0][2] if locacao else None, criada.strftime('%Y-%m-%d %H:%M:%S'),
+        ))
+        itens.extend((cotacao_id,) + item for item in linhas)
+        if len(cotacoes) >= TAMANHO_LOTE:
+            with transacao(db_name) as conn:
+                conn.executemany(sql_cotacao, cotacoes)
+                conn.executemany(sql_item, itens)
+            cotacoes, itens = [], []
+    with transacao(db_name) as conn:
+        conn.executemany(sql_cotacao, cotacoes)
+        conn.executemany(sql_item, itens)
+        for prefixo, valor in numeros.items():
+            conn.execute("INSERT OR REPLACE INTO sequences (prefixo, filial_id, ultimo_valor) VALUES (?, 0, ?)",
+                         (prefixo, valor))
+    return list(range(1, quantidade + 1))
+
+def _gerar_relatorios(db_name, rng, quantidade, clientes, usuarios, cotacoes, inicio, dias):
+    datas = sorted(_data(rng, inicio, dias) for _ in range(quantidade))
+
+    def linhas():
+        for numero, criada in enumerate(datas, start=1):
+            yield (formatar_numero('REL', numero), clientes[_indice_enviesado(rng, len(clientes))],
+                   rng.choice(usuarios), criada.strftime('%Y-%m-%d'), rng.choice(("Campo", "Oficina")),
+                   rng.choice(_TIPOS_SERVICO), f"{rng.choice(_SERVICOS)} em compressor {rng.choice(_MODELOS)}",
+                   rng.choice(("Vazamento de óleo", "Ruído anormal nos rolamentos", "Alta temperatura",
+                               "Filtros saturados", "Funcionando normalmente")),
+                   f"{rng.choice(_SERVICOS)}; substituição de {rng.choice(_PECAS).lower()}",
+                   ", ".join(rng.sample(_PECAS, 3)),
+                   rng.choice(cotacoes) if cotacoes and rng.random() < 0.3 else None,
+                   f"{rng.randrange(1, 12)}:00", f"{rng.randrange(0, 4)}:30", rng.choice((1, 2, 2)),
+                   criada.strftime('%Y-%m-%d %H:%M:%S'))
+    total = _gravar(db_name, """
+        INSERT INTO relatorios_tecnicos (numero_relatorio, cliente_id, responsavel_id, data_criacao,
+            formulario_servico, tipo_servico, descricao_servico, condicao_encontrada, servicos_propostos,
+            pecas_recomendadas, cotacao_id, tempo_trabalho_total, tempo_deslocamento_total, filial_id, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", linhas())
+    with transacao(db_name) as conn:
+        conn.execute("INSERT OR REPLACE INTO sequences (prefixo, filial_id, ultimo_valor) VALUES ('REL', 0, ?)",
+                     (quantidade,))
+
+    def eventos():
+        for relatorio_id, criada in enumerate(datas, start=1):
+            tecnico = rng.choice(usuarios)
+            hora = criada
+            for tipo in ("Início", "Pausa", "Início", "Fim")[:rng.choice((0, 2, 4, 4))]:
+                hora += timedelta(minutes=rng.randrange(30, 240))
+                yield (relatorio_id, tecnico, hora.strftime('%d/%m/%Y %H:%M'),
+                       f"{tipo} - {rng.choice(_SERVICOS).lower()}", tipo)
+    _gravar(db_name, """INSERT INTO eventos_campo (relatorio_id, tecnico_id, data_hora, evento, tipo)
+        VALUES (?, ?, ?, ?, ?)""", eventos())
+    return total
+
+def gerar_base(db_name, escala=1.0, semente=42):
+    """
+    Criar em db_name uma base sintética com o schema atual (criar_banco +
+    migrações) e volume proporcional à escala: clientes com cidades e
+    volume de cotações enviesados (poucos clientes concentram muitas
+    propostas), mix de status, produtos, serviços, kits com composição,
+    locações com itens mensais, relatórios com eventos de campo.
+    A mesma semente gera sempre a mesma base. Retorna {tabela: linhas}.
+    """
+    if os.path.exists(db_name):
+        raise FileExistsError(f"{db_name} já existe")
+    rng = random.Random(semente)
+    criar_banco(db_name)
+    fim = datetime(2025, 12, 31)
+    dias = 365 * ANOS_HISTORICO
+    inicio = fim - timedelta(days=dias)
+
+    usuarios = _gerar_usuarios(db_name, rng, 8 + int(4 * escala ** 0.5))
+    total_clientes = _gerar_clientes(db_name, rng, int(CLIENTES_POR_ESCALA * escala), inicio, dias)
+    with transacao(db_name) as conn:
+        clientes = [row[0] for row in conn.execute("SELECT id FROM clientes")]
+    rng.shuffle(clientes)
+    total_contatos = _gerar_contatos(db_name, rng, clientes)
+    catalogo = _gerar_produtos(db_name, rng, escala)
+    cotacoes = _gerar_cotacoes(db_name, rng, int(COTACOES_POR_ESCALA * escala), clientes, usuarios,
+                               catalogo, inicio, dias)
+    total_relatorios = _gerar_relatorios(db_name, rng, int(RELATORIOS_POR_ESCALA * escala), clientes,
+                                         usuarios, cotacoes, inicio, dias)
+    with transacao(db_name) as conn:
+        recalcular_cliente_stats(conn)
+        recalcular_dashboard_resumo(conn)
+        totais = {tabela: conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0] for tabela in
+                  ("clientes", "contatos", "produtos", "kit_items", "cotacoes", "itens_cotacao",
+                   "relatorios_tecnicos", "eventos_campo")}
+    with transacao(db_name, imediata=False) as conn:
+        conn.execute("ANALYZE")
+    fechar_conexoes()
+    return totais
+
+if __name__ == "__main__":
+    # Uso: python -m utils.dados_sinteticos destino.db [escala] [semente]
+    if len(sys.argv) < 2:
+        print("Uso: python -m utils.dados_sinteticos destino.db [escala] [semente]")
+        sys.exit(1)
+    escala = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    semente = int(sys.argv[3]) if len(sys.argv) > 3 else 42
+    inicio = datetime.now()
+    try:
+        totais = gerar_base(sys.argv[1], escala, semente)
+    except FileExistsError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for tabela, total in totais.items():
+        print(f"   {tabela}: {total}")
+    print(f"✅ Base sintética gerada em {(datetime.now() - inicio).total_seconds():.1f}s")
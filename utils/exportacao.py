@@ -0,0 +1,174 @@
+import sys
+from datetime import datetime
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from database import obter_conexao_leitura
+from utils.formatters import format_cnpj, format_currency, format_date, parse_date
+
+# Linhas lidas do banco por vez: a memória usada não cresce com o tamanho da exportação
+TAMANHO_LOTE = 1000
+
+# Formatos de célula equivalentes a format_currency/format_date, mantendo números e datas
+# como valores do Excel (somáveis e ordenáveis)
+FORMATO_MOEDA = '"R$" #,##0.00'
+FORMATO_DATA = 'DD/MM/YYYY'
+
+# Colunas de cada aba: (título, tipo da célula) na mesma ordem do SELECT
+COLUNAS_COTACOES = (
+    ("Número", "texto"), ("Cliente", "texto"), ("CNPJ", "cnpj"), ("Responsável", "texto"),
+    ("Filial", "numero"), ("Data", "data"), ("Validade", "data"), ("Status", "texto"),
+    ("Valor Total", "moeda"), ("Condição de Pagamento", "texto"), ("Prazo de Entrega", "texto"),
+    ("Modelo do Compressor", "texto"), ("Nº de Série", "texto"), ("Observações", "texto"),
+)
+COLUNAS_LOCACOES = COLUNAS_COTACOES + (
+    ("Equipamento", "texto"), ("Valor Mensal", "moeda"), ("Início", "data"), ("Fim", "data"),
+    ("Meses", "texto"),
+)
+COLUNAS_ITENS = (
+    ("Número", "texto"), ("Tipo", "texto"), ("Item", "texto"), ("Descrição", "texto"),
+    ("Quantidade", "numero"), ("Valor Unitário", "moeda"), ("Mão de Obra", "moeda"),
+    ("Deslocamento", "moeda"), ("Estadia", "moeda"), ("Valor Total", "moeda"),
+)
+COLUNAS_RELATORIOS = (
+    ("Número", "texto"), ("Cliente", "texto"), ("CNPJ", "cnpj"), ("Responsável", "texto"),
+    ("Filial", "numero"), ("Data", "data"), ("Tipo de Serviço", "texto"), ("Formulário", "texto"),
+    ("Descrição do Serviço", "texto"), ("Condição Encontrada", "texto"), ("Serviços Propostos", "texto"),
+    ("Peças Recomendadas", "texto"), ("Tempo de Trabalho", "texto"), ("Tempo de Deslocamento", "texto"),
+    ("Proposta Vinculada", "texto"),
+)
+
+_SQL_COTACOES = """
+    SELECT c.numero_proposta, cl.nome, cl.cnpj, u.nome_completo, c.filial_id,
+           c.data_criacao, c.data_validade, c.status, c.valor_total, c.condicao_pagamento,
+           c.prazo_entrega, c.modelo_compressor, c.numero_serie_compressor, c.observacoes{extras}
+    FROM cotacoes c
+    LEFT JOIN clientes cl ON cl.id = c.cliente_id
+    LEFT JOIN usuarios u ON u.id = c.responsavel_id
+    WHERE c.tipo_cotacao = ?
+    ORDER BY c.created_at DESC
+"""
+_EXTRAS_LOCACAO = """,
+           c.locacao_nome_equipamento, c.locacao_valor_mensal, c.locacao_data_inicio,
+           c.locacao_data_fim, c.locacao_qtd_meses"""
+_SQL_ITENS = """
+    SELECT c.numero_proposta, i.tipo, i.item_nome, i.descricao, i.quantidade, i.valor_unitario,
+           i.mao_obra, i.deslocamento, i.estadia, i.valor_total_item
+    FROM cotacoes c
+    JOIN itens_cotacao i ON i.cotacao_id = c.id
+    WHERE c.tipo_cotacao = ?
+    ORDER BY c.created_at DESC, c.id DESC, i.id
+"""
+_SQL_RELATORIOS = """
+    SELECT r.numero_relatorio, cl.nome, cl.cnpj, u.nome_completo, r.filial_id, r.data_criacao,
+           r.tipo_servico, r.formulario_servico, r.descricao_servico, r.condicao_encontrada,
+           r.servicos_propostos, r.pecas_recomendadas, r.tempo_trabalho_total,
+           r.tempo_deslocamento_total, (SELECT numero_proposta FROM cotacoes WHERE id = r.cotacao_id)
+    FROM relatorios_tecnicos r
+    LEFT JOIN clientes cl ON cl.id = r.cliente_id
+    LEFT JOIN usuarios u ON u.id = r.responsavel_id
+    ORDER BY r.created_at DESC
+"""
+
+def _celula(ws, tipo, valor):
+    """Célula do write_only com o formato do tipo (moeda/data viram números/datas do Excel)"""
+    if valor is None or valor == '':
+        return None
+    if tipo == 'moeda':
+        if isinstance(valor, (int, float)):
+            celula = WriteOnlyCell(ws, value=valor)
+            celula.number_format = FORMATO_MOEDA
+            return celula
+        return format_currency(valor)
+    if tipo == 'data':
+        data = parse_date(valor)
+        if data is None:
+            return format_date(valor)
+        celula = WriteOnlyCell(ws, value=data)
+        celula.number_format = FORMATO_DATA
+        return celula
+    if tipo == 'cnpj':
+        return format_cnpj(valor)
+    if tipo == 'numero':
+        return valor
+    return str(valor)
+
+def _escrever_aba(workbook, titulo, colunas, cursor, sql, parametros=(), ao_progresso=None):
+    """
+    Cria uma aba e a preenche lendo o cursor em lotes de TAMANHO_LOTE. Retorna o nº de linhas.
+    ao_progresso(texto) é chamado a cada lote.
+    """
+    ws = workbook.create_sheet(titulo)
+    cabecalho = []
+    for nome, _tipo in colunas:
+        celula = WriteOnlyCell(ws, value=nome)
+        celula.font = Font(bold=True)
+        cabecalho.append(celula)
+    ws.append(cabecalho)
+    tipos = [tipo for _nome, tipo in colunas]
+    total = 0
+    cursor.execute(sql, parametros)
+    while True:
+        linhas = cursor.fetchmany(TAMANHO_LOTE)
+        if not linhas:
+            break
+        for linha in linhas:
+            ws.append([_celula(ws, tipo, valor) for tipo, valor in zip(tipos, linha)])
+        total += len(linhas)
+        if ao_progresso:
+            ao_progresso(f"{titulo}: {total} linha(s)")
+    return total
+
+def _exportar(caminho, abas, db_name=None, ao_progresso=None):
+    """
+    Grava as abas [(titulo, colunas, sql, parametros)] em um .xlsx no modo
+    write_only do openpyxl: as linhas vão direto para o arquivo, sem ficar em memória.
+    Retorna {titulo_da_aba: linhas_exportadas}.
+    """
+    workbook = Workbook(write_only=True)
+    totais = {}
+    # Exportações longas leem da cópia de leitura, quando ativada
+    with obter_conexao_leitura(db_name) as conn:
+        c = conn.cursor()
+        for titulo, colunas, sql, parametros in abas:
+            totais[titulo] = _escrever_aba(workbook, titulo, colunas, c, sql, parametros, ao_progresso)
+    workbook.save(caminho)
+    return totais
+
+def exportar_cotacoes(caminho, incluir_itens=True, db_name=None, ao_progresso=None):
+    """Exportar as cotações de compra (e seus itens, em outra aba) para .xlsx"""
+    abas = [("Cotações", COLUNAS_COTACOES, _SQL_COTACOES.format(extras=''), ('Compra',))]
+    if incluir_itens:
+        abas.append(("Itens", COLUNAS_ITENS, _SQL_ITENS, ('Compra',)))
+    return _exportar(caminho, abas, db_name, ao_progresso)
+
+def exportar_locacoes(caminho, incluir_itens=True, db_name=None, ao_progresso=None):
+    """Exportar as locações (e seus itens, em outra aba) para .xlsx"""
+    abas = [("Locações", COLUNAS_LOCACOES, _SQL_COTACOES.format(extras=_EXTRAS_LOCACAO), ('Locação',))]
+    if incluir_itens:
+        abas.append(("Itens", COLUNAS_ITENS, _SQL_ITENS, ('Locação',)))
+    return _exportar(caminho, abas, db_name, ao_progresso)
+
+def exportar_relatorios(caminho, db_name=None, ao_progresso=None):
+    """Exportar os relatórios técnicos para .xlsx"""
+    return _exportar(caminho, [("Relatórios", COLUNAS_RELATORIOS, _SQL_RELATORIOS, ())], db_name, ao_progresso)
+
+EXPORTADORES = {
+    'cotacoes': exportar_cotacoes,
+    'locacoes': exportar_locacoes,
+    'relatorios': exportar_relatorios,
+}
+
+def resumo_exportacao(totais, caminho):
+    """Texto para exibir ao usuário ao final da exportação"""
+    linhas = "\n".join(f"{aba}: {total} linha(s)" for aba, total in totais.items())
+    return f"{linhas}\n\nArquivo salvo em:\n{caminho}"
+
+if __name__ == "__main__":
+    # Uso: python -m utils.exportacao cotacoes|locacoes|relatorios arquivo.xlsx
+    if len(sys.argv) != 3 or sys.argv[1] not in EXPORTADORES:
+        print(f"Uso: python -m utils.exportacao {'|'.join(EXPORTADORES)} arquivo.xlsx")
+        sys.exit(1)
+    inicio = datetime.now()
+    print(resumo_exportacao(EXPORTADORES[sys.argv[1]](sys.argv[2]), sys.argv[2]))
+    print(f"⏱️ Tempo: {(datetime.now() - inicio).total_seconds():.1f}s")
@@ -1,4 +1,5 @@
 import re
+import unicodedata
 from datetime import datetime
 
 def format_cnpj(cnpj):
@@ -138,4 +139,36 @@ def format_cep(cep):
     if len(cep_clean) == 8:
         return f"{cep_clean[:5]}-{cep_clean[5:]}"
     
-    return cep
\ No newline at end of file
+    return cep
+
+def only_digits(value):
+    """Manter apenas os dígitos (ex.: CNPJ, CEP, telefone)"""
+    if not value:
+        return ""
+    return re.sub(r'\D', '', str(value))
+
+def normalize_text(value):
+    """Normalizar texto para busca: minúsculas, sem acentos e com espaços simples"""
+    if not value:
+        return ""
+    text = str(value).lower()
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.split())
+
+def parse_date(value):
+    """Converter data (AAAA-MM-DD ou DD/MM/AAAA, com ou sem hora) em date; None se não reconhecer"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if hasattr(value, 'year'):
+        return value
+    texto = str(value).strip()[:10]
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
@@ -0,0 +1,374 @@
+import csv
+import os
+import sys
+from datetime import datetime
+from database import transacao, campos_busca_cliente, campos_busca_produto
+from utils.formatters import (validate_cnpj, validate_email, format_cnpj, clean_number,
+                              normalize_text, only_digits)
+
+# Linhas gravadas por transação e parâmetros por consulta IN (...) de deduplicação
+TAMANHO_LOTE = 5000
+TAMANHO_CONSULTA = 900
+
+# Cabeçalhos aceitos na planilha para cada campo, já normalizados (sem acento, minúsculas)
+COLUNAS_CLIENTES = {
+    'nome': ('nome', 'razao social', 'cliente'),
+    'nome_fantasia': ('nome fantasia', 'fantasia'),
+    'cnpj': ('cnpj',),
+    'endereco': ('endereco', 'logradouro'),
+    'cidade': ('cidade', 'municipio'),
+    'estado': ('estado', 'uf'),
+    'cep': ('cep',),
+    'telefone': ('telefone', 'fone'),
+    'email': ('email', 'e-mail'),
+    'observacoes': ('observacoes', 'obs'),
+    'prazo_pagamento': ('prazo pagamento', 'prazo de pagamento'),
+}
+COLUNAS_CONTATOS = {
+    'cliente_cnpj': ('cnpj', 'cliente cnpj', 'cnpj cliente'),
+    'cliente_nome': ('cliente', 'razao social', 'nome cliente', 'cliente nome'),
+    'nome': ('nome', 'contato', 'nome contato'),
+    'cargo': ('cargo', 'funcao'),
+    'telefone': ('telefone', 'fone', 'celular'),
+    'email': ('email', 'e-mail'),
+    'observacoes': ('observacoes', 'obs'),
+}
+COLUNAS_PRODUTOS = {
+    'nome': ('nome', 'produto', 'descricao curta'),
+    'tipo': ('tipo',),
+    'ncm': ('ncm',),
+    'valor_unitario': ('valor unitario', 'valor', 'preco'),
+    'descricao': ('descricao', 'detalhes'),
+    'ativo': ('ativo',),
+}
+TIPOS_PRODUTO = {'produto': 'Produto', 'servico': 'Serviço'}
+
+class LinhaRejeitada(Exception):
+    """Linha da planilha que não pode ser importada (a mensagem é o motivo)"""
+
+def _texto(valor):
+    """Valor da célula como texto (números inteiros do Excel sem o ".0")"""
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+def _cabecalho(nome):
+    return normalize_text(_texto(nome).replace('_', ' '))
+
+class _DialetoPadrao(csv.excel):
+    delimiter = ';'
+
+def _ler_csv(caminho):
+    with open(caminho, 'rb') as arquivo:
+        amostra = arquivo.read(64 * 1024)
+    try:
+        amostra.decode('utf-8')
+        codificacao = 'utf-8-sig'
+    except UnicodeDecodeError:
+        # Planilhas salvas pelo Excel em português costumam vir em Windows-1252
+        codificacao = 'cp1252'
+    texto = amostra.decode(codificacao, errors='ignore')
+    try:
+        dialeto = csv.Sniffer().sniff(texto, delimiters=';,\t')
+    except csv.Error:
+        dialeto = _DialetoPadrao
+    with open(caminho, newline='', encoding=codificacao) as arquivo:
+        yield from csv.reader(arquivo, dialeto)
+
+def _ler_xlsx(caminho):
+    from openpyxl import load_workbook
+    # read_only percorre a planilha sem carregar todas as células em memória
+    workbook = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def ler_planilha(caminho):
+    """
+    Percorre um .csv ou .xlsx linha a linha, sem carregar o arquivo inteiro.
+    A primeira linha é o cabeçalho. Gera (numero_linha, {cabecalho_original: texto}).
+    """
+    extensao = os.path.splitext(caminho)[1].lower()
+    linhas = _ler_xlsx(caminho) if extensao in ('.xlsx', '.xlsm') else _ler_csv(caminho)
+    cabecalho = None
+    for numero, valores in enumerate(linhas, 1):
+        if cabecalho is None:
+            cabecalho = [_texto(v) for v in valores]
+            continue
+        textos = [_texto(v) for v in valores]
+        if not any(textos):
+            continue
+        yield numero, dict(zip(cabecalho, textos))
+
+def _mapear_colunas(cabecalho, colunas):
+    """{campo: cabecalho_original} para os campos encontrados no cabeçalho da planilha"""
+    normalizados = {_cabecalho(nome): nome for nome in cabecalho}
+    mapa = {}
+    for campo, apelidos in colunas.items():
+        for apelido in apelidos:
+            if apelido in normalizados and normalizados[apelido] not in mapa.values():
+                mapa[campo] = normalizados[apelido]
+                break
+    return mapa
+
+def _em_blocos(valores, tamanho=TAMANHO_CONSULTA):
+    valores = list(valores)
+    for inicio in range(0, len(valores), tamanho):
+        yield valores[inicio:inicio + tamanho]
+
+def _existentes(conn, sql, valores):
+    """Executa sql (com {marcadores}) em blocos de IN (...) e junta os resultados"""
+    encontrados = []
+    for bloco in _em_blocos(valores):
+        marcadores = ', '.join('?' * len(bloco))
+        encontrados.extend(conn.execute(sql.format(marcadores=marcadores), bloco).fetchall())
+    return encontrados
+
+class _RelatorioRejeicoes:
+    """CSV com as linhas rejeitadas, criado só quando a primeira rejeição aparece"""
+
+    def __init__(self, caminho_origem):
+        base = os.path.splitext(caminho_origem)[0]
+        self.caminho = f"{base}_rejeitados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        self.total = 0
+        self._arquivo = None
+        self._writer = None
+        self._cabecalho = None
+
+    def registrar(self, numero, linha, motivo):
+        if self._writer is None:
+            self._cabecalho = list(linha.keys())
+            self._arquivo = open(self.caminho, 'w', newline='', encoding='utf-8-sig')
+            self._writer = csv.writer(self._arquivo, delimiter=';')
+            self._writer.writerow(['linha', 'motivo'] + self._cabecalho)
+        self._writer.writerow([numero, motivo] + [linha.get(col, '') for col in self._cabecalho])
+        self.total += 1
+
+    def fechar(self):
+        if self._arquivo:
+            self._arquivo.close()
+        return self.caminho if self.total else None
+
+def _importar(caminho, colunas, obrigatorias, processar_lote, db_name=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Motor comum da importação: lê a planilha em streaming, agrupa as linhas em
+    lotes e chama processar_lote(conn, [(numero, linha, campos)], rejeitar) dentro
+    de uma transação por lote. Retorna um dict com lidas, importadas, rejeitadas
+    e relatorio_rejeicoes (caminho do CSV de rejeitadas ou None).
+    """
+    rejeicoes = _RelatorioRejeicoes(caminho)
+    resultado = {'lidas': 0, 'importadas': 0, 'rejeitadas': 0, 'relatorio_rejeicoes': None}
+    mapa = None
+    lote = []
+
+    def gravar():
+        with transacao(db_name) as conn:
+            resultado['importadas'] += processar_lote(conn, lote, rejeicoes.registrar)
+        lote.clear()
+
+    try:
+        for numero, linha in ler_planilha(caminho):
+            if mapa is None:
+                mapa = _mapear_colunas(linha.keys(), colunas)
+                faltando = [campo for campo in obrigatorias if campo not in mapa]
+                if faltando:
+                    raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+            resultado['lidas'] += 1
+            lote.append((numero, linha, {campo: linha.get(col, '') for campo, col in mapa.items()}))
+            if len(lote) >= tamanho_lote:
+                gravar()
+        if lote:
+            gravar()
+    finally:
+        resultado['rejeitadas'] = rejeicoes.total
+        resultado['relatorio_rejeicoes'] = rejeicoes.fechar()
+    return resultado
+
+def _lote_clientes(conn, lote, rejeitar):
+    validos = []
+    vistos = set()
+    for numero, linha, campos in lote:
+        try:
+            nome = campos.get('nome', '')
+            if not nome:
+                raise LinhaRejeitada("Nome é obrigatório")
+            cnpj = campos.get('cnpj', '')
+            digitos = only_digits(cnpj)
+            if cnpj.isdigit() and len(cnpj) < 14:
+                # O Excel remove os zeros à esquerda de CNPJs digitados como número
+                digitos = digitos.zfill(14)
+            if cnpj and not (digitos and validate_cnpj(digitos)):
+                raise LinhaRejeitada(f"CNPJ inválido: {cnpj}")
+            if not validate_email(campos.get('email', '')):
+                raise LinhaRejeitada(f"Email inválido: {campos['email']}")
+            if digitos and digitos in vistos:
+                raise LinhaRejeitada(f"CNPJ repetido na planilha: {format_cnpj(digitos)}")
+        except LinhaRejeitada as e:
+            rejeitar(numero, linha, str(e))
+            continue
+        if digitos:
+            vistos.add(digitos)
+        validos.append((numero, linha, campos, digitos))
+
+    # Deduplicação contra o banco pelo índice idx_clientes_cnpj_digitos
+    cadastrados = {row[0] for row in _existentes(
+        conn, "SELECT cnpj_digitos FROM clientes WHERE cnpj_digitos IN ({marcadores})",
+        [d for *_resto, d in validos if d])}
+
+    registros = []
+    for numero, linha, campos, digitos in validos:
+        if digitos in cadastrados:
+            rejeitar(numero, linha, f"CNPJ já cadastrado: {format_cnpj(digitos)}")
+            continue
+        nome = campos['nome']
+        nome_fantasia = campos.get('nome_fantasia') or nome
+        cidade = campos.get('cidade') or None
+        cnpj = format_cnpj(digitos) if digitos else None
+        registros.append((
+            nome, nome_fantasia, cnpj, campos.get('endereco') or None, cidade,
+            (campos.get('estado') or '').upper() or None, campos.get('cep') or None,
+            campos.get('telefone') or None, campos.get('email') or None,
+            campos.get('observacoes') or None, campos.get('prazo_pagamento') or None,
+        ) + campos_busca_cliente(nome, nome_fantasia, cidade, cnpj))
+    conn.executemany("""
+        INSERT INTO clientes (
+            nome, nome_fantasia, cnpj, endereco, cidade, estado, cep,
+            telefone, email, observacoes, prazo_pagamento,
+            nome_busca, cidade_busca, cnpj_digitos, ativo, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, datetime('now'))
+    """, registros)
+    return len(registros)
+
+def _lote_contatos(conn, lote, rejeitar):
+    # Clientes referenciados no lote, por CNPJ (índice de cnpj_digitos) ou pelo nome
+    cnpjs = {only_digits(c.get('cliente_cnpj', '')).zfill(14) for _n, _l, c in lote if c.get('cliente_cnpj')}
+    nomes = {c['cliente_nome'] for _n, _l, c in lote if c.get('cliente_nome') and not c.get('cliente_cnpj')}
+    por_cnpj = dict(_existentes(
+        conn, "SELECT cnpj_digitos, id FROM clientes WHERE cnpj_digitos IN ({marcadores})", cnpjs))
+    por_nome = {}
+    for nome, cliente_id in _existentes(conn, "SELECT nome, id FROM clientes WHERE nome IN ({marcadores})", nomes):
+        por_nome.setdefault(nome, []).append(cliente_id)
+
+    validos = []
+    for numero, linha, campos in lote:
+        try:
+            if not campos.get('nome'):
+                raise LinhaRejeitada("Nome do contato é obrigatório")
+            if not validate_email(campos.get('email', '')):
+                raise LinhaRejeitada(f"Email inválido: {campos['email']}")
+            if campos.get('cliente_cnpj'):
+                cliente_id = por_cnpj.get(only_digits(campos['cliente_cnpj']).zfill(14))
+                if cliente_id is None:
+                    raise LinhaRejeitada(f"Cliente não encontrado para o CNPJ {campos['cliente_cnpj']}")
+            else:
+                ids = por_nome.get(campos.get('cliente_nome', ''), [])
+                if len(ids) != 1:
+                    motivo = "ambíguo (informe o CNPJ)" if ids else "não encontrado"
+                    raise LinhaRejeitada(f"Cliente {motivo}: {campos.get('cliente_nome', '')}")
+                cliente_id = ids[0]
+        except LinhaRejeitada as e:
+            rejeitar(numero, linha, str(e))
+            continue
+        validos.append((numero, linha, campos, cliente_id))
+
+    # Contatos já cadastrados para os mesmos clientes (índice idx_contatos_cliente)
+    existentes = {(cliente_id, normalize_text(nome)) for cliente_id, nome in _existentes(
+        conn, "SELECT cliente_id, nome FROM contatos WHERE cliente_id IN ({marcadores})",
+        {v[3] for v in validos})}
+    registros = []
+    for numero, linha, campos, cliente_id in validos:
+        chave = (cliente_id, normalize_text(campos['nome']))
+        if chave in existentes:
+            rejeitar(numero, linha, f"Contato já cadastrado para o cliente: {campos['nome']}")
+            continue
+        existentes.add(chave)
+        registros.append((cliente_id, campos['nome'], campos.get('cargo') or None,
+                          campos.get('telefone') or None, campos.get('email') or None,
+                          campos.get('observacoes') or None))
+    conn.executemany("""
+        INSERT INTO contatos (cliente_id, nome, cargo, telefone, email, observacoes)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, registros)
+    return len(registros)
+
+def _lote_produtos(conn, lote, rejeitar):
+    validos = []
+    vistos = set()
+    for numero, linha, campos in lote:
+        try:
+            nome = campos.get('nome', '')
+            if not nome:
+                raise LinhaRejeitada("Nome é obrigatório")
+            tipo_informado = normalize_text(campos.get('tipo', '')) or 'produto'
+            if tipo_informado == 'kit':
+                raise LinhaRejeitada("Kits devem ser cadastrados pela tela de produtos (precisam de itens)")
+            tipo = TIPOS_PRODUTO.get(tipo_informado)
+            if tipo is None:
+                raise LinhaRejeitada(f"Tipo inválido: {campos['tipo']}")
+            chave = (normalize_text(nome), tipo)
+            if chave in vistos:
+                raise LinhaRejeitada(f"Produto repetido na planilha: {nome}")
+        except LinhaRejeitada as e:
+            rejeitar(numero, linha, str(e))
+            continue
+        vistos.add(chave)
+        validos.append((numero, linha, campos, tipo, chave))
+
+    # Deduplicação contra o banco pelo nome normalizado (índice idx_produtos_nome_busca)
+    cadastrados = set(_existentes(
+        conn, "SELECT nome_busca, tipo FROM produtos WHERE nome_busca IN ({marcadores})",
+        {v[4][0] for v in validos}))
+    registros = []
+    for numero, linha, campos, tipo, chave in validos:
+        if chave in cadastrados:
+            rejeitar(numero, linha, f"Produto já cadastrado: {campos['nome']}")
+            continue
+        ativo = normalize_text(campos.get('ativo', '')) not in ('0', 'nao', 'n', 'false', 'inativo')
+        descricao = campos.get('descricao', '')
+        registros.append((campos['nome'], tipo, campos.get('ncm', ''), clean_number(campos.get('valor_unitario')),
+                          descricao, 1 if ativo else 0) + campos_busca_produto(campos['nome'], tipo, descricao))
+    conn.executemany("""
+        INSERT INTO produtos (nome, tipo, ncm, valor_unitario, descricao, ativo,
+                              nome_busca, detalhes_busca)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, registros)
+    return len(registros)
+
+def importar_clientes(caminho, db_name=None, tamanho_lote=TAMANHO_LOTE):
+    """Importar clientes de um .csv/.xlsx, ignorando CNPJs inválidos ou já cadastrados"""
+    return _importar(caminho, COLUNAS_CLIENTES, ('nome',), _lote_clientes, db_name, tamanho_lote)
+
+def importar_contatos(caminho, db_name=None, tamanho_lote=TAMANHO_LOTE):
+    """Importar contatos de um .csv/.xlsx, vinculando ao cliente pelo CNPJ (ou pelo nome exato)"""
+    return _importar(caminho, COLUNAS_CONTATOS, ('nome',), _lote_contatos, db_name, tamanho_lote)
+
+def importar_produtos(caminho, db_name=None, tamanho_lote=TAMANHO_LOTE):
+    """Importar produtos e serviços de um .csv/.xlsx, ignorando nomes já cadastrados para o mesmo tipo"""
+    return _importar(caminho, COLUNAS_PRODUTOS, ('nome',), _lote_produtos, db_name, tamanho_lote)
+
+IMPORTADORES = {
+    'clientes': importar_clientes,
+    'contatos': importar_contatos,
+    'produtos': importar_produtos,
+}
+
+def resumo_importacao(resultado):
+    """Texto para exibir ao usuário ao final da importação"""
+    texto = (f"Linhas lidas: {resultado['lidas']}\n"
+             f"Importadas: {resultado['importadas']}\n"
+             f"Rejeitadas: {resultado['rejeitadas']}")
+    if resultado['relatorio_rejeicoes']:
+        texto += f"\n\nMotivos das rejeições em:\n{resultado['relatorio_rejeicoes']}"
+    return texto
+
+if __name__ == "__main__":
+    # Uso: python -m utils.importacao clientes|contatos|produtos arquivo.csv|arquivo.xlsx
+    if len(sys.argv) != 3 or sys.argv[1] not in IMPORTADORES:
+        print(f"Uso: python -m utils.importacao {'|'.join(IMPORTADORES)} arquivo.csv|arquivo.xlsx")
+        sys.exit(1)
+    inicio = datetime.now()
+    print(resumo_importacao(IMPORTADORES[sys.argv[1]](sys.argv[2])))
+    print(f"⏱️ Tempo: {(datetime.now() - inicio).total_seconds():.1f}s")
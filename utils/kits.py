@@ -0,0 +1,139 @@
+import threading
+import weakref
+from contextlib import nullcontext
+from database import obter_conexao
+
+# Níveis de kits dentro de kits percorridos pela explosão
+PROFUNDIDADE_MAXIMA = 10
+
+# Explosão de vários kits em uma consulta. `caminho` guarda os produtos já
+# visitados no ramo (/kit/componente/.../): um componente que já está no
+# caminho fecha um ciclo e não é expandido. `ordem` mantém a sequência de
+# cadastro dos itens, com cada sub-kit seguido dos seus componentes.
+_SQL_EXPLOSAO = """
+    WITH RECURSIVE explosao(raiz, produto_id, quantidade, quantidade_total, nivel, caminho, ordem, ciclo) AS (
+        SELECT ki.kit_id, ki.produto_id, ki.quantidade, ki.quantidade, 1,
+               '/' || ki.kit_id || '/' || ki.produto_id || '/', printf('%010d/', ki.id),
+               ki.produto_id = ki.kit_id
+        FROM kit_items ki
+        WHERE ki.kit_id IN ({marcadores})
+        UNION ALL
+        SELECT e.raiz, ki.produto_id, ki.quantidade, e.quantidade_total * ki.quantidade, e.nivel + 1,
+               e.caminho || ki.produto_id || '/', e.ordem || printf('%010d/', ki.id),
+               instr(e.caminho, '/' || ki.produto_id || '/') > 0
+        FROM explosao e
+        JOIN kit_items ki ON ki.kit_id = e.produto_id
+        WHERE NOT e.ciclo AND e.nivel < ?
+    )
+    SELECT e.raiz, e.produto_id, p.nome, p.tipo, COALESCE(p.valor_unitario, 0), e.quantidade,
+           e.quantidade_total, e.nivel, e.ciclo,
+           NOT EXISTS (SELECT 1 FROM kit_items filho WHERE filho.kit_id = e.produto_id)
+    FROM explosao e
+    JOIN produtos p ON p.id = e.produto_id
+    ORDER BY e.raiz, e.ordem
+"""
+
+# Composições já explodidas e índice de dependências: produto -> kits que o contêm
+_lock = threading.Lock()
+_cache = {}
+_dependentes = {}
+# PRAGMA data_version visto por último em cada conexão (o contador é de cada conexão)
+_versoes_dados = weakref.WeakKeyDictionary()
+
+def _explodir(conn, kit_ids):
+    """Composição de cada kit em kit_ids, consultando o banco uma única vez"""
+    composicoes = {kit_id: {'itens': [], 'componentes': {}, 'preco': 0.0, 'ciclo': False, 'limite': False,
+                            'dependencias': {kit_id}} for kit_id in kit_ids}
+    marcadores = ", ".join("?" * len(kit_ids))
+    linhas = conn.execute(_SQL_EXPLOSAO.format(marcadores=marcadores),
+                          tuple(kit_ids) + (PROFUNDIDADE_MAXIMA,)).fetchall()
+    for (raiz, produto_id, nome, tipo, valor, quantidade, quantidade_total,
+         nivel, ciclo, folha) in linhas:
+        composicao = composicoes[raiz]
+        # Sub-kit no último nível percorrido: seus componentes não foram lidos
+        limite = not ciclo and not folha and nivel >= PROFUNDIDADE_MAXIMA
+        composicao['itens'].append({
+            'produto_id': produto_id, 'nome': nome, 'tipo': tipo, 'nivel': nivel,
+            'quantidade': quantidade, 'quantidade_total': quantidade_total, 'ciclo': bool(ciclo),
+            'limite': limite,
+        })
+        composicao['dependencias'].add(produto_id)
+        if ciclo:
+            composicao['ciclo'] = True
+        elif limite:
+            composicao['limite'] = True
+        elif folha:
+            # Só as folhas (produtos, serviços e kits vazios) entram no preço somado
+            componentes = composicao['componentes']
+            componentes[produto_id] = componentes.get(produto_id, 0) + quantidade_total
+            composicao['preco'] += quantidade_total * valor
+    return composicoes
+
+def explodir_kits(kit_ids, conn=None):
+    """
+    Composição achatada de cada kit: {kit_id: {'itens', 'componentes', 'preco', 'ciclo', 'limite'}}.
+
+    'itens' lista todos os níveis (sub-kits seguidos dos seus componentes),
+    'componentes' soma as quantidades finais por produto e 'preco' é o valor
+    das folhas multiplicado por essas quantidades. Kits que se contêm são
+    marcados com 'ciclo' e o ramo repetido não é expandido; sub-kits além de
+    PROFUNDIDADE_MAXIMA níveis são marcados com 'limite' e ficam fora do preço.
+
+    Os resultados ficam em cache até invalidar_produto() de algum componente
+    ou até outra conexão gravar no banco. Os kits fora do cache são
+    explodidos juntos, em uma só consulta.
+    """
+    kit_ids = [kit_id for kit_id in dict.fromkeys(kit_ids) if kit_id]
+    if not kit_ids:
+        return {}
+    with (obter_conexao() if conn is None else nullcontext(conn)) as conn:
+        # data_version muda quando outra conexão (outra thread ou estação) confirma uma
+        # gravação. Conexão ainda não vista: não se sabe o que mudou antes, descartar também
+        versao = conn.execute("PRAGMA data_version").fetchone()[0]
+        with _lock:
+            if _versoes_dados.get(conn) != versao:
+                _cache.clear()
+                _dependentes.clear()
+                _versoes_dados[conn] = versao
+            faltantes = [kit_id for kit_id in kit_ids if kit_id not in _cache]
+        if faltantes:
+            composicoes = _explodir(conn, faltantes)
+            with _lock:
+                for kit_id, composicao in composicoes.items():
+                    _cache[kit_id] = composicao
+                    for produto_id in composicao['dependencias']:
+                        _dependentes.setdefault(produto_id, set()).add(kit_id)
+        with _lock:
+            return {kit_id: _cache[kit_id] for kit_id in kit_ids if kit_id in _cache}
+
+def invalidar_produto(produto_id):
+    """Descartar do cache os kits que contêm o produto (em qualquer nível) ou que são ele"""
+    with _lock:
+        for kit_id in _dependentes.pop(produto_id, set()) | {produto_id}:
+            composicao = _cache.pop(kit_id, None)
+            if composicao:
+                for dependencia in composicao['dependencias']:
+                    _dependentes.get(dependencia, set()).discard(kit_id)
+
+def criaria_ciclo(kit_id, componente_id, conn=None):
+    """Se colocar componente_id dentro de kit_id faria o kit conter a si mesmo"""
+    if not kit_id:
+        return False
+    if componente_id == kit_id:
+        return True
+    composicao = explodir_kits([componente_id], conn).get(componente_id)
+    return bool(composicao) and kit_id in composicao['dependencias']
+
+def linhas_composicao(composicao):
+    """Texto da composição para PDFs: "qtd x nome", recuado a cada nível de sub-kit"""
+    linhas = []
+    for item in composicao['itens']:
+        recuo = "    " * (item['nivel'] - 1)
+        if item['ciclo']:
+            sufixo = " (contém o próprio kit)"
+        elif item['limite']:
+            sufixo = f" (composição além de {PROFUNDIDADE_MAXIMA} níveis não incluída)"
+        else:
+            sufixo = ""
+        linhas.append(f"{recuo}{item['quantidade']} x {item['nome']}{sufixo}")
+    return linhas
@@ -0,0 +1,208 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+# Instrumentação opcional das consultas: ative com CRM_PERFIL_SQL=1.
+# Comandos mais lentos que CRM_PERFIL_LIMITE_MS têm o EXPLAIN QUERY PLAN capturado.
+PERFIL_ATIVO = os.environ.get("CRM_PERFIL_SQL", "0") == "1"
+LIMITE_LENTO_MS = float(os.environ.get("CRM_PERFIL_LIMITE_MS", "50"))
+ARQUIVO_PERFIL = os.path.join("data", "perfil_sql.json")
+
+# Arquivos ignorados ao procurar quem chamou a consulta
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_ARQUIVOS_INTERNOS = {os.path.abspath(__file__), os.path.join(_RAIZ, "database.py")}
+_COMANDOS_EXPLICAVEIS = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT", "REPLACE")
+
+_lock = threading.Lock()
+_estatisticas = {}
+
+def normalizar_sql(sql):
+    """Texto do comando sem literais e espaços extras, para agrupar execuções iguais"""
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)+\s*\)", "(?, ...)", sql)
+    return re.sub(r"\s+", " ", sql).strip()
+
+def _local_chamada():
+    """arquivo:linha (função) do primeiro quadro fora de database.py e deste módulo"""
+    quadro = sys._getframe(2)
+    while quadro and os.path.abspath(quadro.f_code.co_filename) in _ARQUIVOS_INTERNOS:
+        quadro = quadro.f_back
+    if quadro is None:
+        return "?"
+    arquivo = os.path.relpath(quadro.f_code.co_filename, _RAIZ)
+    return f"{arquivo}:{quadro.f_lineno} ({quadro.f_code.co_name})"
+
+def _plano(conn, sql, parametros):
+    """Linhas do EXPLAIN QUERY PLAN, com um cursor comum (fora da instrumentação)"""
+    try:
+        cursor = sqlite3.Cursor(conn)
+        return [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parametros)]
+    except (sqlite3.Error, ValueError):
+        return []
+
+def varreduras_completas(plano):
+    """Passos do plano que leem a tabela inteira (SCAN sem índice)"""
+    return [passo for passo in plano
+            if re.match(r"SCAN \w+", passo) and "USING" not in passo and "VIRTUAL TABLE" not in passo]
+
+def _registrar(conn, sql, parametros, local, duracao_ms, linhas):
+    chave = (normalizar_sql(sql), local)
+    with _lock:
+        item = _estatisticas.get(chave)
+        if item is None:
+            item = _estatisticas[chave] = {
+                'sql': chave[0], 'local': local, 'execucoes': 0, 'total_ms': 0.0,
+                'max_ms': 0.0, 'linhas': 0, 'lentas': 0, 'plano': None, 'varreduras': [],
+            }
+        item['execucoes'] += 1
+        item['total_ms'] += duracao_ms
+        item['max_ms'] = max(item['max_ms'], duracao_ms)
+        item['linhas'] += max(linhas, 0)
+        lenta = duracao_ms >= LIMITE_LENTO_MS
+        if lenta:
+            item['lentas'] += 1
+        capturar = lenta and item['plano'] is None
+    if capturar and sql.lstrip()[:7].upper().startswith(_COMANDOS_EXPLICAVEIS):
+        plano = _plano(conn, sql, parametros)
+        with _lock:
+            item['plano'] = plano
+            item['varreduras'] = varreduras_completas(plano)
+
+class CursorPerfilado(sqlite3.Cursor):
+    """Cursor que mede cada comando: tempo do execute e das leituras, e linhas lidas.
+
+    A medição de um comando termina quando o resultado acaba, no próximo
+    execute, no close() ou quando o cursor é descartado.
+    """
+
+    _medicao = None
+
+    def _iniciar(self, sql, parametros, local):
+        self._finalizar()
+        self._medicao = [sql, parametros, local, 0.0, 0]
+
+    def _finalizar(self):
+        medicao, self._medicao = self._medicao, None
+        if medicao:
+            sql, parametros, local, duracao, linhas = medicao
+            if linhas == 0 and self.rowcount > 0:
+                # INSERT/UPDATE/DELETE: linhas afetadas
+                linhas = self.rowcount
+            _registrar(self.connection, sql, parametros, local, duracao * 1000, linhas)
+
+    def _medir(self, funcao, *args):
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            if self._medicao:
+                self._medicao[3] += time.perf_counter() - inicio
+
+    def execute(self, sql, parametros=()):
+        self._iniciar(sql, parametros, _local_chamada())
+        self._medir(super().execute, sql, parametros)
+        return self
+
+    def executemany(self, sql, sequencia):
+        self._iniciar(sql, (), _local_chamada())
+        self._medir(super().executemany, sql, sequencia)
+        self._finalizar()
+        return self
+
+    def fetchone(self):
+        row = self._medir(super().fetchone)
+        if self._medicao:
+            if row is None:
+                self._finalizar()
+            else:
+                self._medicao[4] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._medir(super().fetchmany, self.arraysize if size is None else size)
+        if self._medicao:
+            self._medicao[4] += len(rows)
+            if not rows:
+                self._finalizar()
+        return rows
+
+    def fetchall(self):
+        rows = self._medir(super().fetchall)
+        if self._medicao:
+            self._medicao[4] += len(rows)
+            self._finalizar()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._medir(super().__next__)
+        except StopIteration:
+            self._finalizar()
+            raise
+        if self._medicao:
+            self._medicao[4] += 1
+        return row
+
+    def close(self):
+        self._finalizar()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finalizar()
+        except Exception:
+            pass
+
+def limpar_perfil():
+    with _lock:
+        _estatisticas.clear()
+
+def resultados_perfil(ordenar='total_ms'):
+    """Agregado por (comando normalizado, local da chamada), do mais custoso para o menos"""
+    with _lock:
+        itens = [dict(item, media_ms=item['total_ms'] / item['execucoes']) for item in _estatisticas.values()]
+    return sorted(itens, key=lambda item: item[ordenar], reverse=True)
+
+def salvar_perfil(caminho=ARQUIVO_PERFIL):
+    """Gravar o agregado em JSON (lido por python -m utils.perfil_sql)"""
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump({'limite_lento_ms': LIMITE_LENTO_MS, 'consultas': resultados_perfil()},
+                  arquivo, ensure_ascii=False, indent=2)
+    return caminho
+
+def formatar_relatorio(itens, limite=30):
+    """Texto com as consultas mais custosas, seus planos e varreduras completas"""
+    if not itens:
+        return "Nenhuma consulta registrada."
+    linhas = []
+    for item in itens[:limite]:
+        media = item.get('media_ms', item['total_ms'] / item['execucoes'])
+        linhas.append(f"{item['total_ms']:10.1f} ms  {item['execucoes']:6d}x  média {media:.2f} ms  "
+                      f"máx {item['max_ms']:.1f} ms  {item['linhas']} linha(s)")
+        linhas.append(f"    {item['local']}")
+        linhas.append(f"    {item['sql'][:300]}")
+        if item['varreduras']:
+            linhas.append(f"    ⚠️ Varredura completa: {'; '.join(item['varreduras'])}")
+        for passo in item['plano'] or []:
+            linhas.append(f"      plano: {passo}")
+        linhas.append("")
+    return "\n".join(linhas)
+
+if __name__ == "__main__":
+    # Uso: python -m utils.perfil_sql [perfil.json] [--lentas]
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    caminho = argumentos[0] if argumentos else ARQUIVO_PERFIL
+    if not os.path.exists(caminho):
+        print(f"❌ {caminho} não encontrado. Rode o sistema com CRM_PERFIL_SQL=1 para gerar o perfil.")
+        sys.exit(1)
+    with open(caminho, encoding='utf-8') as arquivo:
+        itens = json.load(arquivo)['consultas']
+    if '--lentas' in sys.argv:
+        itens = [item for item in itens if item['lentas']]
+    print(formatar_relatorio(itens, limite=len(itens)))
@@ -0,0 +1,186 @@
+import bisect
+from operator import itemgetter
+import sqlite3
+from database import obter_conexao
+from utils.formatters import normalize_text
+
+# Quantas sugestões o combobox mostra de cada vez
+LIMITE_SUGESTOES = 50
+
+class IndiceSugestoes:
+    """Rótulos pesquisáveis enquanto se digita (clientes, produtos).
+
+    Cada rótulo entra em uma lista ordenada uma vez para cada início de
+    palavra, já normalizado (minúsculas, sem acento): "Compressores Atlas"
+    gera "compressores atlas" e "atlas". Uma busca por prefixo de qualquer
+    palavra é então uma busca binária. Se sobrar espaço no limite, a busca
+    por trecho no meio das palavras completa a lista.
+    """
+
+    def __init__(self):
+        self.ids_por_rotulo = {}
+        self._rotulos = {}
+        self._normalizados = {}
+        # Chaves ordenadas e, nas mesmas posições, (rótulo, id) correspondentes
+        self._chaves_ordenadas = []
+        self._entradas = []
+        self._ordem = []
+
+    def _chaves(self, normalizado):
+        """O texto a partir do início de cada palavra"""
+        chaves = [normalizado]
+        posicao = normalizado.find(' ')
+        while posicao >= 0:
+            chaves.append(normalizado[posicao + 1:])
+            posicao = normalizado.find(' ', posicao + 1)
+        return chaves
+
+    def carregar(self, linhas):
+        """
+        Substituir o conteúdo por [(id, rótulo, texto de busca)]. O texto de
+        busca já normalizado (colunas nome_busca) evita normalizar cada rótulo;
+        se vier vazio, o rótulo é normalizado aqui.
+        """
+        self.ids_por_rotulo.clear()
+        self._rotulos.clear()
+        self._normalizados.clear()
+        entradas, ordem = [], []
+        for item_id, rotulo, normalizado in linhas:
+            normalizado = normalizado or normalize_text(rotulo)
+            self.ids_por_rotulo[rotulo] = item_id
+            self._rotulos[item_id] = rotulo
+            self._normalizados[item_id] = normalizado
+            entradas.extend((chave, (rotulo, item_id)) for chave in self._chaves(normalizado))
+            ordem.append((normalizado, rotulo, item_id))
+        # Ordenar só pela chave (comparar as tuplas inteiras é bem mais lento)
+        entradas.sort(key=itemgetter(0))
+        ordem.sort(key=itemgetter(0))
+        self._chaves_ordenadas = [chave for chave, _item in entradas]
+        self._entradas = [item for _chave, item in entradas]
+        self._ordem = ordem
+
+    def adicionar(self, item_id, rotulo, normalizado=None):
+        """Incluir ou renomear um item"""
+        self.remover(item_id)
+        normalizado = normalizado or normalize_text(rotulo)
+        self.ids_por_rotulo[rotulo] = item_id
+        self._rotulos[item_id] = rotulo
+        self._normalizados[item_id] = normalizado
+        for chave in self._chaves(normalizado):
+            posicao = bisect.bisect_right(self._chaves_ordenadas, chave)
+            self._chaves_ordenadas.insert(posicao, chave)
+            self._entradas.insert(posicao, (rotulo, item_id))
+        posicao = bisect.bisect_right([item[0] for item in self._ordem], normalizado)
+        self._ordem.insert(posicao, (normalizado, rotulo, item_id))
+
+    def remover(self, item_id):
+        rotulo = self._rotulos.pop(item_id, None)
+        if rotulo is None:
+            return
+        self.ids_por_rotulo.pop(rotulo, None)
+        normalizado = self._normalizados.pop(item_id)
+        for chave in self._chaves(normalizado):
+            posicao = bisect.bisect_left(self._chaves_ordenadas, chave)
+            while posicao < len(self._chaves_ordenadas) and self._chaves_ordenadas[posicao] == chave:
+                if self._entradas[posicao][1] == item_id:
+                    del self._chaves_ordenadas[posicao]
+                    del self._entradas[posicao]
+                    break
+                posicao += 1
+        self._ordem.remove((normalizado, rotulo, item_id))
+
+    def rotulo(self, item_id):
+        return self._rotulos.get(item_id)
+
+    def __len__(self):
+        return len(self._rotulos)
+
+    def buscar(self, texto, limite=LIMITE_SUGESTOES):
+        """Rótulos que combinam com o texto: primeiro por início de palavra, depois por trecho"""
+        termo = normalize_text(texto)
+        if not termo:
+            # Sem texto: os primeiros em ordem alfabética
+            return [rotulo for _normalizado, rotulo, _item_id in self._ordem[:limite]]
+        resultado = {}
+        posicao = bisect.bisect_left(self._chaves_ordenadas, termo)
+        while posicao < len(self._chaves_ordenadas) and len(resultado) < limite:
+            if not self._chaves_ordenadas[posicao].startswith(termo):
+                break
+            resultado.setdefault(self._entradas[posicao][0], None)
+            posicao += 1
+        if len(resultado) < limite:
+            for item_id, normalizado in self._normalizados.items():
+                if termo in normalizado and self._rotulos[item_id] not in resultado:
+                    resultado[self._rotulos[item_id]] = None
+                    if len(resultado) >= limite:
+                        break
+        return list(resultado)
+
+# Índices compartilhados por todos os módulos, carregados no primeiro uso
+_indice_clientes = None
+_indices_produtos = {}
+
+def _rotulo_cliente(cliente_id, nome):
+    return f"{nome} (ID: {cliente_id})"
+
+def indice_clientes(recarregar=False):
+    """Índice de clientes com rótulos "Nome (ID: n)", como nos combobox de cotações e relatórios"""
+    global _indice_clientes
+    if _indice_clientes is None or recarregar:
+        with obter_conexao() as conn:
+            linhas = conn.execute("SELECT id, nome, nome_busca FROM clientes").fetchall()
+        if _indice_clientes is None:
+            _indice_clientes = IndiceSugestoes()
+        _indice_clientes.carregar((cliente_id, _rotulo_cliente(cliente_id, nome), busca)
+                                  for cliente_id, nome, busca in linhas)
+    return _indice_clientes
+
+def indice_produtos(tipo, recarregar=False):
+    """Índice dos nomes dos produtos ativos de um tipo (Produto, Serviço, Kit)"""
+    if tipo not in _indices_produtos or recarregar:
+        with obter_conexao() as conn:
+            linhas = conn.execute("SELECT id, nome, nome_busca FROM produtos WHERE tipo = ? AND ativo = 1",
+                                  (tipo,)).fetchall()
+        _indices_produtos.setdefault(tipo, IndiceSugestoes()).carregar(linhas)
+    return _indices_produtos[tipo]
+
+def _atualizar_cliente(cliente_id):
+    with obter_conexao() as conn:
+        row = conn.execute("SELECT nome, nome_busca FROM clientes WHERE id = ?", (cliente_id,)).fetchone()
+    if row:
+        _indice_clientes.adicionar(cliente_id, _rotulo_cliente(cliente_id, row[0]), row[1])
+    else:
+        _indice_clientes.remover(cliente_id)
+
+def _atualizar_produto(produto_id):
+    with obter_conexao() as conn:
+        row = conn.execute("SELECT nome, tipo, ativo, nome_busca FROM produtos WHERE id = ?", (produto_id,)).fetchone()
+    for indice in _indices_produtos.values():
+        indice.remover(produto_id)
+    if row and row[2] and row[1] in _indices_produtos:
+        _indices_produtos[row[1]].adicionar(produto_id, row[0], row[3])
+
+def tratar_evento(event_type, data=None):
+    """
+    Manter os índices em dia a partir dos eventos da MainWindow.
+
+    Com data['ids'] só aqueles clientes/produtos são relidos; sem ids
+    (importação de planilha) o índice inteiro é recarregado.
+    """
+    ids = (data or {}).get('ids')
+    try:
+        if event_type in ('cliente_created', 'cliente_updated', 'cliente_deleted') and _indice_clientes is not None:
+            if ids is not None:
+                for cliente_id in ids:
+                    _atualizar_cliente(cliente_id)
+            else:
+                indice_clientes(recarregar=True)
+        elif event_type in ('produto_created', 'produto_updated') and _indices_produtos:
+            if ids is not None:
+                for produto_id in ids:
+                    _atualizar_produto(produto_id)
+            else:
+                for tipo in list(_indices_produtos):
+                    indice_produtos(tipo, recarregar=True)
+    except sqlite3.Error as e:
+        print(f"❌ Erro ao atualizar sugestões ({event_type}): {e}")